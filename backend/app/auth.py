@@ -96,6 +96,35 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+# flag map: role name → attribute on User model
+_FLAG_MAP = {
+    "ADMIN":        "is_admin",
+    "DIRETOR":      "is_diretor",
+    "GERENTE":      "is_gerente",
+    "CHEFE_EQUIPE": "is_chefe_equipe",
+    "FORMADOR":     "is_formador",
+    "TUTOR":        "is_tutor",
+    "LIBERADOR":    "is_liberador",
+    "REFERENTE":    "is_referente",
+    # Legacy aliases kept so chamadas antigas não quebram imediatamente
+    "TRAINER":   "is_formador",
+    "MANAGER":   "is_gerente",
+    "GESTOR":    "is_gerente",
+    # TRAINEE/STUDENT/USUARIO — qualquer utilizador activo (is_active já verificado por get_current_active_user)
+    "TRAINEE":   "is_active",
+    "STUDENT":   "is_active",
+    "USUARIO":   "is_active",
+}
+
+def has_any_role(user: User, allowed_roles: list[str]) -> bool:
+    """True se o utilizador tem pelo menos uma das flags de `allowed_roles` (ver require_role)."""
+    return any(
+        getattr(user, _FLAG_MAP[r], False)
+        for r in allowed_roles
+        if r in _FLAG_MAP
+    )
+
+
 def require_role(allowed_roles: list[str]):
     """Dependency que verifica se o utilizador tem pelo menos uma das flags requeridas.
 
@@ -109,38 +138,13 @@ def require_role(allowed_roles: list[str]):
         LIBERADOR    → is_liberador
         REFERENTE    → is_referente
     """
-    # flag map: role name → attribute on User model
-    _FLAG_MAP = {
-        "ADMIN":        "is_admin",
-        "DIRETOR":      "is_diretor",
-        "GERENTE":      "is_gerente",
-        "CHEFE_EQUIPE": "is_chefe_equipe",
-        "FORMADOR":     "is_formador",
-        "TUTOR":        "is_tutor",
-        "LIBERADOR":    "is_liberador",
-        "REFERENTE":    "is_referente",
-        # Legacy aliases kept so chamadas antigas não quebram imediatamente
-        "TRAINER":   "is_formador",
-        "MANAGER":   "is_gerente",
-        "GESTOR":    "is_gerente",
-        # TRAINEE/STUDENT/USUARIO — qualquer utilizador activo (is_active já verificado por get_current_active_user)
-        "TRAINEE":   "is_active",
-        "STUDENT":   "is_active",
-        "USUARIO":   "is_active",
-    }
-
     async def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
         if current_user.is_pending:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Conta pendente de validação pelo administrador"
             )
-        has_access = any(
-            getattr(current_user, _FLAG_MAP[r], False)
-            for r in allowed_roles
-            if r in _FLAG_MAP
-        )
-        if not has_access:
+        if not has_any_role(current_user, allowed_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
@@ -173,36 +177,60 @@ def is_trainer_user(user) -> bool:
     return is_formador_user(user)
 
 
-def get_visible_user_ids(db: Session, user: User):
-    """Retorna a lista de IDs de utilizadores cujos dados o user pode ver.
+def visible_user_scope(db: Session, user: User):
+    """Âmbito de utilizadores visíveis para `user`, como subquery SQL.
 
-    None  → vê todos (is_admin ou is_diretor).
-    [ids] → lista restrita por role/flag:
-              is_gerente / is_chefe_equipe → equipa(s) gerida(s)
-              is_formador                  → formandos atribuídos (tutor_id)
-              USUARIO sem flags             → só o próprio
+    None     → vê todos (is_admin ou is_diretor).
+    Select   → SELECT users.id do âmbito, para usar em `coluna.in_(scope)`;
+               a BD resolve o âmbito na própria query, sem listas IN gigantes.
+               (correlate(None): pode ser usado em queries sobre `users`.)
+
+    is_gerente / is_chefe_equipe → equipas geridas (Team.manager_id), a
+        própria equipa (chefe) e todas as equipas ligadas a nós da
+        hierarquia organizacional abaixo dos nós de que é membro
+        (org_node_closure) — um gerente vê as equipas descendentes.
+    is_formador → formandos atribuídos (tutor_id)
+    USUARIO sem flags → só o próprio
     """
-    from app.models import Team
+    from sqlalchemy import or_, select
+    from app.models import Team, OrgNodeMember, OrgNodeClosure
 
     if user.is_admin or user.is_diretor:
         return None  # sem filtro
 
     if user.is_gerente or user.is_chefe_equipe:
-        managed = db.query(Team).filter(Team.manager_id == user.id).all()
-        team_ids = {t.id for t in managed}
+        subtree_nodes = (
+            select(OrgNodeClosure.descendant_id)
+            .join(OrgNodeMember, OrgNodeMember.node_id == OrgNodeClosure.ancestor_id)
+            .where(OrgNodeMember.user_id == user.id)
+            .correlate(None)
+        )
+        team_conditions = [Team.manager_id == user.id, Team.node_id.in_(subtree_nodes)]
         if user.is_chefe_equipe and user.team_id:
-            team_ids.add(user.team_id)
-        if team_ids:
-            rows = db.query(User.id).filter(
-                User.team_id.in_(team_ids), User.is_active == True
-            ).all()
-            return list({r.id for r in rows} | {user.id})
-        return [user.id]
+            team_conditions.append(Team.id == user.team_id)
+        team_ids = select(Team.id).where(or_(*team_conditions)).correlate(None)
+        return select(User.id).where(or_(
+            User.id == user.id,
+            (User.team_id.in_(team_ids)) & (User.is_active == True),
+        )).correlate(None)
 
     if user.is_formador:
-        students = db.query(User.id).filter(
-            User.tutor_id == user.id, User.is_active == True
-        ).all()
-        return list({r.id for r in students} | {user.id})
+        return select(User.id).where(or_(
+            User.id == user.id,
+            (User.tutor_id == user.id) & (User.is_active == True),
+        )).correlate(None)
+
+    return select(User.id).where(User.id == user.id).correlate(None)
+
 
-    return [user.id]
+def get_visible_user_ids(db: Session, user: User):
+    """Retorna a lista de IDs de utilizadores cujos dados o user pode ver.
+
+    None  → vê todos (is_admin ou is_diretor).
+    [ids] → âmbito de visible_user_scope() materializado numa lista (para
+            verificações em Python; nas queries usar a subquery directamente).
+    """
+    scope = visible_user_scope(db, user)
+    if scope is None:
+        return None
+    return list(db.scalars(scope).all())
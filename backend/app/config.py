@@ -38,6 +38,18 @@ class Settings(BaseSettings):
     MICROSOFT_TENANT_ID:     str = "common"
     MICROSOFT_CLIENT_SECRET: str = ""
     MICROSOFT_REDIRECT_URI:  str = ""
+
+    # Ficheiros gerados pela aplicação (cache de PDFs de certificados, ...)
+    STORAGE_DIR: str = str(Path(__file__).resolve().parents[1] / "storage")
+    BLOB_STORE_BACKEND: str = "local"   # anexos binários (app/utils/blob_store.py)
+
+    # Eventos em tempo real (SSE): com vários workers, activar a ponte pela BD
+    REALTIME_DB_BRIDGE: bool = False
+
+    # Relatórios: servir o resultado em cache (stale) e recalcular em background
+    REPORT_CACHE_SWR: bool = True
+    # Relatórios calculados sobre os factos do DW (MySQL, com carga ETL recente)
+    REPORTS_FROM_DW: bool = True
     
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).resolve().parents[1] / ".env"),
@@ -13,18 +13,42 @@ DW_DEFAULT_LIMIT = 10
 DW_MAX_LIMIT = 50
 DW_DEFAULT_DAYS = 30
 DW_MAX_DAYS = 365
+DW_REPORTS_MAX_AGE_SECONDS = 900   # carga ETL mais antiga que isto → relatórios voltam às tabelas OLTP
+DW_CACHE_TTL_SECONDS = 900         # respostas /api/dw em memória (a geração do ETL invalida antes)
+DW_CACHE_MAX_ENTRIES = 256         # entradas (endpoint, parâmetros, geração) — LRU
+DW_GENERATION_CHECK_SECONDS = 10   # intervalo de releitura de dw_etl_runs (cargas de outros workers)
+DW_ETL_RUNS_RETENTION_DAYS = 7     # linhas de dw_etl_runs mais antigas são apagadas no fim de cada carga
+
+# ─── Dashboards (POST /api/dashboard/batch) ───────────────────────────────────
+DASHBOARD_BATCH_MAX_WIDGETS = 20   # widgets por pedido
+DASHBOARD_BATCH_CONCURRENCY = 4    # widgets em paralelo por pedido (cada um usa uma ligação do pool)
 
 # ─── Chatbot ──────────────────────────────────────────────────────────────────
 MAX_CHAT_ERRORS_DISPLAY = 10
 MAX_CHAT_STUDENTS_DISPLAY = 15
 MAX_CHAT_PLANS_DISPLAY = 10
+CHAT_FAQ_INDEX_TTL_SECONDS = 300   # índice compilado das FAQs; invalidado pelo CRUD de FAQs
 
 # ─── Org Hierarchy ────────────────────────────────────────────────────────────
 ORG_HIERARCHY_DEFAULT_LIMIT = 100
+ORG_TREE_CACHE_TTL_SECONDS = 300   # snapshot da árvore; invalidado por cada alteração ao organograma
 
 # ─── Tutoria ──────────────────────────────────────────────────────────────────
 MAX_TUTORIA_RECORDS = 50
 
+# ─── Relatórios ───────────────────────────────────────────────────────────────
+INCIDENTS_PAGE_SIZE = 50           # página da tabela do relatório de incidências
+INCIDENTS_EXPORT_BATCH = 500       # linhas por lote do cursor na exportação CSV/XLSX
+REPORT_CACHE_TTL_SECONDS = 300         # resultado fresco; depois disso (ou após um write) fica stale
+REPORT_CACHE_STALE_MAX_SECONDS = 3600  # idade máxima de um resultado servido stale (modo SWR)
+REPORT_CACHE_MAX_ENTRIES = 500         # entradas (endpoint, âmbito, filtros) em memória
+REPORT_CACHE_REFRESH_WORKERS = 2       # threads que recalculam em background
+
+# ─── Chamados (anexos) ────────────────────────────────────────────────────────
+MAX_CHAMADO_ATTACHMENTS = 5                         # por chamado (igual ao limite do frontend)
+CHAMADO_ATTACHMENT_MAX_BYTES = 5 * 1024 * 1024      # 5 MB por ficheiro
+CHAMADO_THUMBNAIL_SIZE = 320                        # lado maior da miniatura (px)
+
 # ─── Rate Limiting ────────────────────────────────────────────────────────────
 RATE_LIMIT_DEFAULT = "60/minute"
 PASSWORD_RESET_RATE_LIMIT = "3/minute"
@@ -32,10 +56,25 @@ PASSWORD_RESET_RATE_LIMIT = "3/minute"
 # ─── Schedulers (segundos) ────────────────────────────────────────────────────
 ETL_INTERVAL_SECONDS = 300         # 5 minutos — DW actualiza automaticamente
 DEADLINE_INTERVAL_SECONDS = 86400  # 24 horas
+PLAN_RENEWAL_INTERVAL_SECONDS = 86400  # 24 horas — renovação de planos permanentes
+LANDING_REFRESH_SECONDS = 300      # 5 minutos — estatísticas públicas da landing page
+
+# ─── Certificados (renderização de PDFs em lote) ──────────────────────────────
+CERTIFICATE_RENDER_WORKERS = 2             # processos do pool de renderização
+CERTIFICATE_BATCH_MAX_SIZE = 200           # certificados por lote
+CERTIFICATE_BATCH_JOB_TTL_SECONDS = 3600   # jobs terminados ficam 1 hora em memória
+CERTIFICATE_TEMPLATE_VERSION = 1           # subir em alterações reais ao layout do PDF (regenera a cache)
+
+# ─── Eventos em tempo real (SSE) ──────────────────────────────────────────────
+REALTIME_KEEPALIVE_SECONDS = 25            # comentário ": keepalive" para proxies não fecharem a ligação
+REALTIME_SUBSCRIBER_QUEUE_SIZE = 100       # eventos pendentes por ligação (os mais antigos são descartados)
+REALTIME_BRIDGE_POLL_SECONDS = 2           # ponte pela BD entre workers (REALTIME_DB_BRIDGE)
+REALTIME_BRIDGE_RETENTION_SECONDS = 3600   # eventos da ponte guardados durante 1 hora
 
 # ─── Cache HTTP (segundos) ────────────────────────────────────────────────────
 CACHE_ASSETS_MAX_AGE = 31536000    # 1 ano (ficheiros com hash Vite)
 CACHE_LOCALES_MAX_AGE = 3600       # 1 hora
+LANDING_CACHE_MAX_AGE = 60         # /api/public/landing (browsers/proxies)
 
 # ─── HSTS ─────────────────────────────────────────────────────────────────────
 HSTS_MAX_AGE = 31536000            # 1 ano
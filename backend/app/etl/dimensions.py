@@ -56,16 +56,47 @@ def load_dim_error_category(db: Session):
     return count
 
 
+def load_dim_bank(db: Session):
+    """Reload dw_dim_bank from banks."""
+    db.execute(text("DELETE FROM dw_dim_bank"))
+    db.execute(text("""
+        INSERT INTO dw_dim_bank (bank_id, `name`, is_active)
+        SELECT b.id, b.`name`, b.is_active
+        FROM banks b
+    """))
+    count = db.execute(text("SELECT COUNT(*) FROM dw_dim_bank")).scalar()
+    db.commit()
+    logger.info("Loaded dw_dim_bank: %d rows", count)
+    return count
+
+
+def load_dim_product(db: Session):
+    """Reload dw_dim_product from products."""
+    db.execute(text("DELETE FROM dw_dim_product"))
+    db.execute(text("""
+        INSERT INTO dw_dim_product (product_id, `name`, is_active)
+        SELECT p.id, p.`name`, p.is_active
+        FROM products p
+    """))
+    count = db.execute(text("SELECT COUNT(*) FROM dw_dim_product")).scalar()
+    db.commit()
+    logger.info("Loaded dw_dim_product: %d rows", count)
+    return count
+
+
 def load_dim_team(db: Session):
-    """Reload dw_dim_team from teams."""
+    """Reload dw_dim_team from teams (after dw_dim_product)."""
     db.execute(text("DELETE FROM dw_dim_team"))
     db.execute(text("""
-        INSERT INTO dw_dim_team (team_id, `name`, manager_name, total_members, is_active)
+        INSERT INTO dw_dim_team (team_id, `name`, manager_name, manager_id, product_key, total_members, is_active)
         SELECT t.id, t.`name`,
                (SELECT u.full_name FROM users u WHERE u.id = t.manager_id),
+               t.manager_id,
+               dp.product_key,
                (SELECT COUNT(*) FROM users u2 WHERE u2.team_id = t.id),
                t.is_active
         FROM teams t
+        LEFT JOIN dw_dim_product dp ON dp.product_id = t.product_id
     """))
     count = db.execute(text("SELECT COUNT(*) FROM dw_dim_team")).scalar()
     db.commit()
@@ -107,6 +138,8 @@ def load_all_dimensions(db: Session) -> dict:
         "dim_user": load_dim_user(db),
         "dim_course": load_dim_course(db),
         "dim_error_category": load_dim_error_category(db),
+        "dim_bank": load_dim_bank(db),
+        "dim_product": load_dim_product(db),
         "dim_team": load_dim_team(db),
         "dim_status": load_dim_status(db),
     }
@@ -2,6 +2,7 @@
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import date
+import json
 import logging
 import time
 
@@ -9,10 +10,16 @@ from .date_dimension import populate_date_dimension
 from .dimensions import load_all_dimensions
 from .facts import load_all_facts
 from .daily_snapshot import load_daily_snapshot
+from .rollups import load_all_rollups
+from app.constants import DW_ETL_RUNS_RETENTION_DAYS
+from app.utils.dw_cache import dw_cache
 
 logger = logging.getLogger("etl.runner")
 
 FACT_TABLES = [
+    "dw_fact_user_activity",
+    "dw_fact_training_plans",
+    "dw_fact_tutoria_plans",
     "dw_fact_daily_snapshot",
     "dw_fact_internal_errors",
     "dw_fact_chamados",
@@ -29,15 +36,50 @@ def _clear_facts(db: Session):
     logger.info("Cleared %d fact tables", len(FACT_TABLES))
 
 
+def _start_run(db: Session):
+    """Regista o início da carga em dw_etl_runs (lido por app/utils/dw_reports.py)."""
+    try:
+        run_id = db.execute(text("INSERT INTO dw_etl_runs (started_at) VALUES (NOW())")).lastrowid
+        db.commit()
+        dw_cache.begin_load()
+        return run_id
+    except Exception as e:
+        db.rollback()
+        logger.warning("Could not record ETL run start: %s", e)
+        return None
+
+
+def _finish_run(db: Session, run_id, result: dict):
+    if run_id is None:
+        return
+    try:
+        db.execute(text("""
+            UPDATE dw_etl_runs SET finished_at = NOW(), ok = :ok, summary = :summary
+            WHERE id = :run_id
+        """), {"ok": not result["errors"], "summary": json.dumps(result, default=str), "run_id": run_id})
+        # Retenção: o scheduler regista uma carga a cada 5 minutos
+        db.execute(text("""
+            DELETE FROM dw_etl_runs
+            WHERE started_at < NOW() - INTERVAL :days DAY AND id <> :run_id
+        """), {"days": DW_ETL_RUNS_RETENTION_DAYS, "run_id": run_id})
+        db.commit()
+        dw_cache.bump(run_id)  # nova geração: /api/dw deixa de servir a cache anterior
+    except Exception as e:
+        db.rollback()
+        logger.warning("Could not record ETL run %s finish: %s", run_id, e)
+
+
 def run_full_etl(db: Session) -> dict:
     """Execute all ETL steps in order and return a summary."""
     start = time.time()
     result: dict = {"errors": []}
 
     logger.info("=== ETL START ===")
+    run_id = _start_run(db)
+    result["run_id"] = run_id
 
     # 1) Date dimension (idempotent — only inserts missing dates)
-    logger.info("Step 1/5: Date dimension")
+    logger.info("Step 1/6: Date dimension")
     try:
         result["date_dimension"] = populate_date_dimension(db)
     except Exception as e:
@@ -46,7 +88,7 @@ def run_full_etl(db: Session) -> dict:
         result["errors"].append(f"date_dimension: {e}")
 
     # 2) Clear all fact tables (release FK references)
-    logger.info("Step 2/5: Clear fact tables")
+    logger.info("Step 2/6: Clear fact tables")
     try:
         _clear_facts(db)
     except Exception as e:
@@ -54,7 +96,7 @@ def run_full_etl(db: Session) -> dict:
         result["errors"].append(f"clear_facts: {e}")
 
     # 3) Dimensions (DELETE + INSERT) — safe now that facts are cleared
-    logger.info("Step 3/5: Dimensions")
+    logger.info("Step 3/6: Dimensions")
     try:
         result["dimensions"] = load_all_dimensions(db)
     except Exception as e:
@@ -63,7 +105,7 @@ def run_full_etl(db: Session) -> dict:
         result["errors"].append(f"dimensions: {e}")
 
     # 4) Facts (INSERT using fresh dimension keys)
-    logger.info("Step 4/5: Facts")
+    logger.info("Step 4/6: Facts")
     try:
         result["facts"] = load_all_facts(db)
     except Exception as e:
@@ -71,17 +113,32 @@ def run_full_etl(db: Session) -> dict:
         result["facts"] = None
         result["errors"].append(f"facts: {e}")
 
-    # 5) Daily snapshot (UPSERT today)
-    logger.info("Step 5/5: Daily snapshot")
+    # 5) Monthly rollups (merge — only if the facts loaded completely)
+    logger.info("Step 5/6: Rollups")
+    if result["facts"] is None:
+        logger.warning("Step 5 (rollups) skipped: facts did not load")
+        result["rollups"] = None
+    else:
+        try:
+            result["rollups"] = load_all_rollups(db)
+        except Exception as e:
+            db.rollback()
+            logger.error("Step 5 (rollups) failed: %s", e, exc_info=True)
+            result["rollups"] = None
+            result["errors"].append(f"rollups: {e}")
+
+    # 6) Daily snapshot (UPSERT today)
+    logger.info("Step 6/6: Daily snapshot")
     try:
         result["snapshot_key"] = load_daily_snapshot(db, date.today())
     except Exception as e:
-        logger.error("Step 5 (daily_snapshot) failed: %s", e, exc_info=True)
+        logger.error("Step 6 (daily_snapshot) failed: %s", e, exc_info=True)
         result["snapshot_key"] = None
         result["errors"].append(f"daily_snapshot: {e}")
 
     elapsed = round(time.time() - start, 2)
     result["elapsed_seconds"] = elapsed
+    _finish_run(db, run_id, result)
     if result["errors"]:
         logger.warning("=== ETL DONE with %d error(s) in %.2fs ===", len(result["errors"]), elapsed)
     else:
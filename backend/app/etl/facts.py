@@ -39,17 +39,23 @@ def load_fact_training(db: Session):
 
 
 def load_fact_tutoria(db: Session):
-    """Populate dw_fact_tutoria from tutoria_errors."""
+    """Populate dw_fact_tutoria from tutoria_errors (team = student's team)."""
     db.execute(text("DELETE FROM dw_fact_tutoria"))
     db.execute(text("""
         INSERT INTO dw_fact_tutoria
-            (date_key, student_key, trainer_key, category_key, status_key, error_id,
+            (date_key, student_key, trainer_key, team_key, bank_key, product_key,
+             category_key, status_key, error_id,
              is_resolved, days_to_resolve, comments_count, action_items_count,
-             action_items_completed, impact_level)
+             action_items_completed, action_items_overdue, impact_level,
+             severity, status_code, is_recurrent, recurrence_type, amount,
+             pending_solution, is_escalated, origin_name, impact_name)
         SELECT
             CAST(DATE_FORMAT(te.date_occurrence, '%Y%m%d') AS UNSIGNED),
             du_student.user_key,
             du_trainer.user_key,
+            dt.team_key,
+            db2.bank_key,
+            dp.product_key,
             dec2.category_key,
             ds.status_key,
             te.id,
@@ -59,18 +65,40 @@ def load_fact_tutoria(db: Session):
                  ELSE NULL END,
             (SELECT COUNT(*) FROM tutoria_comments tc
              WHERE tc.ref_type = 'ERROR' AND tc.ref_id = te.id),
-            (SELECT COUNT(*) FROM tutoria_action_plans tap
-             JOIN tutoria_action_items tai ON tai.plan_id = tap.id
-             WHERE tap.error_id = te.id),
-            (SELECT COUNT(*) FROM tutoria_action_plans tap
-             JOIN tutoria_action_items tai ON tai.plan_id = tap.id
-             WHERE tap.error_id = te.id AND tai.status = 'CONCLUIDO'),
-            te.impact_level
+            COALESCE(ai.total, 0),
+            COALESCE(ai.completed, 0),
+            COALESCE(ai.overdue, 0),
+            te.impact_level,
+            te.severity,
+            te.status,
+            te.is_recurrent,
+            te.recurrence_type,
+            te.amount,
+            te.pending_solution,
+            CASE WHEN te.escalado IS NOT NULL AND te.escalado != '' THEN 1 ELSE 0 END,
+            eo.`name`,
+            ei.`name`
         FROM tutoria_errors te
         JOIN dw_dim_user du_student ON du_student.user_id = te.tutorado_id
         LEFT JOIN dw_dim_user du_trainer ON du_trainer.user_id = te.created_by_id
+        LEFT JOIN dw_dim_team dt ON dt.team_id = du_student.team_id
+        LEFT JOIN dw_dim_bank db2 ON db2.bank_id = te.bank_id
+        LEFT JOIN dw_dim_product dp ON dp.product_id = te.product_id
         LEFT JOIN dw_dim_error_category dec2 ON dec2.category_id = te.category_id
         LEFT JOIN dw_dim_status ds ON ds.`domain` = 'TUTORIA' AND ds.status_code = te.status
+        LEFT JOIN error_origins eo ON eo.id = te.origin_id
+        LEFT JOIN error_impacts ei ON ei.id = te.impact_id
+        LEFT JOIN (
+            SELECT tap.error_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN tai.status = 'CONCLUIDO' THEN 1 ELSE 0 END) AS completed,
+                   SUM(CASE WHEN tai.due_date < CURDATE() AND tai.status != 'CONCLUIDO'
+                            THEN 1 ELSE 0 END) AS overdue
+            FROM tutoria_action_plans tap
+            JOIN tutoria_action_items tai ON tai.plan_id = tap.id
+            WHERE tap.error_id IS NOT NULL
+            GROUP BY tap.error_id
+        ) ai ON ai.error_id = te.id
         WHERE te.is_active = 1
           AND EXISTS (SELECT 1 FROM dw_dim_date dd WHERE dd.date_key = CAST(DATE_FORMAT(te.date_occurrence, '%Y%m%d') AS UNSIGNED))
     """))
@@ -80,6 +108,127 @@ def load_fact_tutoria(db: Session):
     return count
 
 
+def load_fact_tutoria_plans(db: Session):
+    """Populate dw_fact_tutoria_plans — one row per tutoria action plan."""
+    db.execute(text("DELETE FROM dw_fact_tutoria_plans"))
+    db.execute(text("""
+        INSERT INTO dw_fact_tutoria_plans (plan_id, student_key, team_key, status_code)
+        SELECT tap.id, du.user_key, dt.team_key, tap.status
+        FROM tutoria_action_plans tap
+        JOIN dw_dim_user du ON du.user_id = tap.tutorado_id
+        LEFT JOIN dw_dim_team dt ON dt.team_id = du.team_id
+    """))
+    count = db.execute(text("SELECT COUNT(*) FROM dw_fact_tutoria_plans")).scalar()
+    db.commit()
+    logger.info("Loaded dw_fact_tutoria_plans: %d rows", count)
+    return count
+
+
+def load_fact_training_plans(db: Session):
+    """Populate dw_fact_training_plans — one row per training plan (student may be NULL)."""
+    db.execute(text("DELETE FROM dw_fact_training_plans"))
+    db.execute(text("""
+        INSERT INTO dw_fact_training_plans (plan_id, student_key, team_key, product_key, status_code)
+        SELECT tp.id, du.user_key, dt.team_key, dp.product_key, tp.status
+        FROM training_plans tp
+        LEFT JOIN dw_dim_user du ON du.user_id = tp.student_id
+        LEFT JOIN dw_dim_team dt ON dt.team_id = du.team_id
+        LEFT JOIN dw_dim_product dp ON dp.product_id = tp.product_id
+    """))
+    count = db.execute(text("SELECT COUNT(*) FROM dw_fact_training_plans")).scalar()
+    db.commit()
+    logger.info("Loaded dw_fact_training_plans: %d rows", count)
+    return count
+
+
+def load_fact_user_activity(db: Session):
+    """
+    Populate dw_fact_user_activity — training aggregates per user
+    (enrollments, challenge submissions, lesson progress, certificates).
+    """
+    db.execute(text("DELETE FROM dw_fact_user_activity"))
+    db.execute(text("""
+        INSERT INTO dw_fact_user_activity
+            (user_key, team_key, enrollments_total, enrollments_completed,
+             submissions_total, submissions_approved,
+             mpu_approved_sum, mpu_approved_count, mpu_positive_sum, mpu_positive_count,
+             error_methodology, error_knowledge, error_detail, error_procedure,
+             lessons_total, lessons_completed, lesson_minutes, study_seconds, certificates)
+        SELECT
+            du.user_key,
+            dt.team_key,
+            COALESCE(en.total, 0),
+            COALESCE(en.completed, 0),
+            COALESCE(cs.total, 0),
+            COALESCE(cs.approved, 0),
+            COALESCE(cs.mpu_approved_sum, 0),
+            COALESCE(cs.mpu_approved_count, 0),
+            COALESCE(cs.mpu_positive_sum, 0),
+            COALESCE(cs.mpu_positive_count, 0),
+            COALESCE(cs.error_methodology, 0),
+            COALESCE(cs.error_knowledge, 0),
+            COALESCE(cs.error_detail, 0),
+            COALESCE(cs.error_procedure, 0),
+            COALESCE(lp.total, 0),
+            COALESCE(lp.completed, 0),
+            COALESCE(lp.minutes, 0),
+            COALESCE(lp.seconds, 0) + COALESCE(cs.seconds, 0),
+            COALESCE(ce.total, 0)
+        FROM dw_dim_user du
+        LEFT JOIN dw_dim_team dt ON dt.team_id = du.team_id
+        LEFT JOIN (
+            SELECT user_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN completed_at IS NOT NULL THEN 1 ELSE 0 END) AS completed
+            FROM enrollments
+            GROUP BY user_id
+        ) en ON en.user_id = du.user_id
+        LEFT JOIN (
+            SELECT user_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN is_approved = 1 THEN 1 ELSE 0 END) AS approved,
+                   SUM(CASE WHEN is_approved = 1 AND calculated_mpu IS NOT NULL
+                            THEN calculated_mpu ELSE 0 END) AS mpu_approved_sum,
+                   SUM(CASE WHEN is_approved = 1 AND calculated_mpu IS NOT NULL
+                            THEN 1 ELSE 0 END) AS mpu_approved_count,
+                   SUM(CASE WHEN calculated_mpu > 0 THEN calculated_mpu ELSE 0 END) AS mpu_positive_sum,
+                   SUM(CASE WHEN calculated_mpu > 0 THEN 1 ELSE 0 END) AS mpu_positive_count,
+                   SUM(COALESCE(error_methodology, 0)) AS error_methodology,
+                   SUM(COALESCE(error_knowledge, 0)) AS error_knowledge,
+                   SUM(COALESCE(error_detail, 0)) AS error_detail,
+                   SUM(COALESCE(error_procedure, 0)) AS error_procedure,
+                   SUM(CASE WHEN total_time_minutes > 0 THEN total_time_minutes * 60
+                            WHEN started_at IS NOT NULL AND completed_at IS NOT NULL
+                            THEN GREATEST(TIMESTAMPDIFF(SECOND, started_at, completed_at), 0)
+                            ELSE 0 END) AS seconds
+            FROM challenge_submissions
+            GROUP BY user_id
+        ) cs ON cs.user_id = du.user_id
+        LEFT JOIN (
+            SELECT user_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN status = 'COMPLETED' THEN 1 ELSE 0 END) AS completed,
+                   SUM(COALESCE(actual_time_minutes, 0)) AS minutes,
+                   SUM(CASE WHEN accumulated_seconds > 0 THEN accumulated_seconds
+                            WHEN started_at IS NOT NULL AND completed_at IS NOT NULL
+                            THEN GREATEST(TIMESTAMPDIFF(SECOND, started_at, completed_at), 0)
+                            ELSE 0 END) AS seconds
+            FROM lesson_progress
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id
+        ) lp ON lp.user_id = du.user_id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total
+            FROM certificates
+            GROUP BY user_id
+        ) ce ON ce.user_id = du.user_id
+    """))
+    count = db.execute(text("SELECT COUNT(*) FROM dw_fact_user_activity")).scalar()
+    db.commit()
+    logger.info("Loaded dw_fact_user_activity: %d rows", count)
+    return count
+
+
 def load_fact_chamados(db: Session):
     """Populate dw_fact_chamados from chamados."""
     db.execute(text("DELETE FROM dw_fact_chamados"))
@@ -150,6 +299,9 @@ def load_all_facts(db: Session) -> dict:
     return {
         "fact_training": load_fact_training(db),
         "fact_tutoria": load_fact_tutoria(db),
+        "fact_tutoria_plans": load_fact_tutoria_plans(db),
+        "fact_training_plans": load_fact_training_plans(db),
+        "fact_user_activity": load_fact_user_activity(db),
         "fact_chamados": load_fact_chamados(db),
         "fact_internal_errors": load_fact_internal_errors(db),
     }
@@ -0,0 +1,180 @@
+"""ETL — Monthly rollups (dw_agg_*), merged from the freshly loaded facts.
+
+Each rollup is aggregated into a temporary table and merged into the
+summary table: INSERT ... ON DUPLICATE KEY UPDATE only touches groups whose
+values changed, and groups that no longer exist are deleted. Unlike the
+fact tables (DELETE + INSERT), the rollups are never empty mid-run.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger("etl.rollups")
+
+
+def _merge(db: Session, table: str, keys: list, columns: list, select_sql: str) -> int:
+    """Merge `select_sql` (keys + columns) into `table`; returns the rollup row count."""
+    tmp = f"tmp_{table}"
+    cols = ", ".join(f"`{c}`" for c in keys + columns)
+    updates = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in columns)
+    same_key = " AND ".join(f"t.`{k}` = a.`{k}`" for k in keys)
+
+    # Temporary table: one connection, so everything runs in one transaction
+    db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {tmp}"))
+    db.execute(text(f"CREATE TEMPORARY TABLE {tmp} AS {select_sql}"))
+    db.execute(text(f"""
+        INSERT INTO {table} ({cols})
+        SELECT {cols} FROM {tmp}
+        ON DUPLICATE KEY UPDATE {updates}
+    """))
+    removed = db.execute(text(f"""
+        DELETE a FROM {table} a
+        WHERE NOT EXISTS (SELECT 1 FROM {tmp} t WHERE {same_key})
+    """)).rowcount
+    db.execute(text(f"DROP TEMPORARY TABLE {tmp}"))
+    count = db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    db.commit()
+    logger.info("Merged %s: %d rows (%d removed)", table, count, removed)
+    return count
+
+
+def load_agg_training_monthly(db: Session):
+    """Certificates per month × course (dw_fact_training)."""
+    return _merge(
+        db, "dw_agg_training_monthly",
+        ["year", "month", "course_id"],
+        ["month_name_short", "course_title", "certificates", "hours_sum", "hours_count",
+         "mpu_sum", "mpu_count", "approval_sum", "approval_count"],
+        """
+        SELECT dd.`year`, dd.`month`, dd.month_name_short,
+               dc.course_id, dc.title AS course_title,
+               COUNT(*) AS certificates,
+               COALESCE(SUM(ft.total_hours), 0) AS hours_sum,
+               COUNT(ft.total_hours) AS hours_count,
+               COALESCE(SUM(ft.average_mpu), 0) AS mpu_sum,
+               COUNT(ft.average_mpu) AS mpu_count,
+               COALESCE(SUM(ft.average_approval_rate), 0) AS approval_sum,
+               COUNT(ft.average_approval_rate) AS approval_count
+        FROM dw_fact_training ft
+        JOIN dw_dim_date dd ON dd.date_key = ft.date_key
+        JOIN dw_dim_course dc ON dc.course_key = ft.course_key
+        GROUP BY dd.`year`, dd.`month`, dd.month_name_short, dc.course_id, dc.title
+        """,
+    )
+
+
+def load_agg_tutoria_monthly(db: Session):
+    """Tutoria errors per month × category × trainer × student team (dw_fact_tutoria)."""
+    return _merge(
+        db, "dw_agg_tutoria_monthly",
+        ["year", "month", "category_id", "trainer_id", "team_id"],
+        ["month_name_short", "category_name", "trainer_name", "trainer_team_name",
+         "total", "resolved", "days_sum", "days_count"],
+        """
+        SELECT dd.`year`, dd.`month`, dd.month_name_short,
+               COALESCE(dec2.category_id, 0) AS category_id,
+               COALESCE(du_trainer.user_id, 0) AS trainer_id,
+               COALESCE(du_student.team_id, 0) AS team_id,
+               MAX(dec2.`name`) AS category_name,
+               MAX(du_trainer.full_name) AS trainer_name,
+               MAX(du_trainer.team_name) AS trainer_team_name,
+               COUNT(*) AS total,
+               COALESCE(SUM(ft.is_resolved), 0) AS resolved,
+               COALESCE(SUM(ft.days_to_resolve), 0) AS days_sum,
+               COUNT(ft.days_to_resolve) AS days_count
+        FROM dw_fact_tutoria ft
+        JOIN dw_dim_date dd ON dd.date_key = ft.date_key
+        JOIN dw_dim_user du_student ON du_student.user_key = ft.student_key
+        LEFT JOIN dw_dim_user du_trainer ON du_trainer.user_key = ft.trainer_key
+        LEFT JOIN dw_dim_error_category dec2 ON dec2.category_key = ft.category_key
+        GROUP BY dd.`year`, dd.`month`, dd.month_name_short,
+                 COALESCE(dec2.category_id, 0), COALESCE(du_trainer.user_id, 0),
+                 COALESCE(du_student.team_id, 0)
+        """,
+    )
+
+
+def load_agg_chamados_monthly(db: Session):
+    """Chamados per month × status × type × priority (dw_fact_chamados)."""
+    return _merge(
+        db, "dw_agg_chamados_monthly",
+        ["year", "month", "status_code", "type", "priority"],
+        ["month_name_short", "status_label", "total", "resolved", "days_sum", "days_count"],
+        """
+        SELECT dd.`year`, dd.`month`, dd.month_name_short,
+               COALESCE(ds.status_code, '') AS status_code,
+               COALESCE(fc.`type`, '') AS `type`,
+               COALESCE(fc.`priority`, '') AS `priority`,
+               MAX(ds.status_label) AS status_label,
+               COUNT(*) AS total,
+               COALESCE(SUM(fc.is_resolved), 0) AS resolved,
+               COALESCE(SUM(fc.days_to_resolve), 0) AS days_sum,
+               COUNT(fc.days_to_resolve) AS days_count
+        FROM dw_fact_chamados fc
+        JOIN dw_dim_date dd ON dd.date_key = fc.date_key
+        LEFT JOIN dw_dim_status ds ON ds.status_key = fc.status_key
+        GROUP BY dd.`year`, dd.`month`, dd.month_name_short,
+                 COALESCE(ds.status_code, ''), COALESCE(fc.`type`, ''), COALESCE(fc.`priority`, '')
+        """,
+    )
+
+
+def load_agg_internal_errors_monthly(db: Session):
+    """Internal errors per month × reporter team (dw_fact_internal_errors)."""
+    return _merge(
+        db, "dw_agg_internal_errors_monthly",
+        ["year", "month", "team_id"],
+        ["month_name_short", "team_name", "total", "with_learning_sheet", "with_action_plan"],
+        """
+        SELECT dd.`year`, dd.`month`, dd.month_name_short,
+               COALESCE(dt.team_id, 0) AS team_id,
+               MAX(dt.`name`) AS team_name,
+               COUNT(*) AS total,
+               COALESCE(SUM(fie.has_learning_sheet), 0) AS with_learning_sheet,
+               COALESCE(SUM(fie.has_action_plan), 0) AS with_action_plan
+        FROM dw_fact_internal_errors fie
+        JOIN dw_dim_date dd ON dd.date_key = fie.date_key
+        JOIN dw_dim_user du ON du.user_key = fie.reporter_key
+        LEFT JOIN dw_dim_team dt ON dt.team_id = du.team_id
+        GROUP BY dd.`year`, dd.`month`, dd.month_name_short, COALESCE(dt.team_id, 0)
+        """,
+    )
+
+
+def load_agg_teams(db: Session):
+    """Per-team totals (members, tutoria errors of members, internal errors reported)."""
+    return _merge(
+        db, "dw_agg_teams",
+        ["team_id"],
+        ["team_name", "manager_name", "member_count", "tutoria_errors", "internal_errors"],
+        """
+        SELECT dt.team_id, dt.`name` AS team_name, dt.manager_name,
+               dt.total_members AS member_count,
+               COALESCE(te.total, 0) AS tutoria_errors,
+               COALESCE(ie.total, 0) AS internal_errors
+        FROM dw_dim_team dt
+        LEFT JOIN (
+            SELECT du.team_id, COUNT(*) AS total
+            FROM dw_fact_tutoria ft
+            JOIN dw_dim_user du ON du.user_key = ft.student_key
+            GROUP BY du.team_id
+        ) te ON te.team_id = dt.team_id
+        LEFT JOIN (
+            SELECT du.team_id, COUNT(*) AS total
+            FROM dw_fact_internal_errors fie
+            JOIN dw_dim_user du ON du.user_key = fie.reporter_key
+            GROUP BY du.team_id
+        ) ie ON ie.team_id = dt.team_id
+        """,
+    )
+
+
+def load_all_rollups(db: Session) -> dict:
+    """Merge all rollups, return row counts."""
+    return {
+        "agg_training_monthly": load_agg_training_monthly(db),
+        "agg_tutoria_monthly": load_agg_tutoria_monthly(db),
+        "agg_chamados_monthly": load_agg_chamados_monthly(db),
+        "agg_internal_errors_monthly": load_agg_internal_errors_monthly(db),
+        "agg_teams": load_agg_teams(db),
+    }
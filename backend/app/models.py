@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, JSON, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -518,6 +518,14 @@ class ChallengeSubmission(Base):
     # Referência da operação realizada pelo formando (para SUMMARY)
     operation_reference = Column(String(255), nullable=True)
 
+    # Agregados incrementais das operações concluídas (COMPLETE) —
+    # mantidos por app.utils.challenge_scoring em finish/classify
+    ops_completed = Column(Integer, default=0, nullable=False)  # Operações concluídas
+    ops_reviewed = Column(Integer, default=0, nullable=False)  # Concluídas e já classificadas
+    ops_with_error = Column(Integer, default=0, nullable=False)  # Concluídas com erro
+    ops_correct = Column(Integer, default=0, nullable=False)  # Concluídas aprovadas sem erro
+    ops_duration_seconds = Column(Integer, default=0, nullable=False)  # Soma de duration_seconds
+
     # Campos comuns
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
@@ -1197,7 +1205,9 @@ class Chamado(Base):
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     assigned_to_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     admin_notes = Column(Text, nullable=True)
-    attachments = Column(JSON, nullable=True)  # List of base64-encoded screenshot strings
+    # Legado: screenshots base64 em JSON — migrados para chamado_attachments no arranque.
+    # Deferred para que nenhuma query de chamados carregue os binários.
+    attachments = deferred(Column(JSON, nullable=True))
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1205,6 +1215,24 @@ class Chamado(Base):
     creator = relationship("User", foreign_keys=[created_by_id])
     assignee = relationship("User", foreign_keys=[assigned_to_id])
     comments = relationship("ChamadoComment", back_populates="chamado", cascade="all, delete-orphan", order_by="ChamadoComment.created_at")
+    attachment_files = relationship("ChamadoAttachment", back_populates="chamado", cascade="all, delete-orphan", order_by="ChamadoAttachment.id")
+
+
+class ChamadoAttachment(Base):
+    """Anexo de um chamado — só metadados; o binário fica no blob store"""
+    __tablename__ = "chamado_attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chamado_id = Column(Integer, ForeignKey("chamados.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    blob_key = Column(String(64), nullable=False)                # sha256 do conteúdo
+    thumbnail_key = Column(String(64), nullable=True)            # sha256 da miniatura (se gerada)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    chamado = relationship("Chamado", back_populates="attachment_files")
 
 
 class ChamadoComment(Base):
@@ -1288,6 +1316,38 @@ class TutoriaNotification(Base):
     plan = relationship("TutoriaActionPlan", foreign_keys=[plan_id])
 
 
+class TutoriaNotificationCounter(Base):
+    """Contador de notificações por ler, por utilizador (mantido por app/utils/notifications.py)"""
+    __tablename__ = "tutoria_notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread = Column(Integer, default=0, nullable=False)
+
+
+class RealtimeEvent(Base):
+    """Eventos SSE partilhados entre workers (ponte pela BD; ver app/utils/events.py)"""
+    __tablename__ = "realtime_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String(100), nullable=False)
+    event = Column(String(50), nullable=False)
+    data = Column(JSON, nullable=True)
+    origin = Column(String(32), nullable=False)   # worker que publicou (não reenvia os seus)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class SearchDocument(Base):
+    """Índice de pesquisa: uma linha por registo pesquisável (ver app/utils/search_index.py)"""
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doc_key = Column(String(40), unique=True, nullable=False)   # "<source>:<source_id>"
+    source = Column(String(20), nullable=False, index=True)      # error | chamado | learning_sheet | faq
+    source_id = Column(Integer, nullable=False)
+    title = Column(String(300), nullable=False, default="")
+    body = Column(Text, nullable=True)
+
+
 # ── Feedback dos Liberadores (B) ──────────────────────────────────────────────
 
 class ReleaserSurvey(Base):
@@ -1367,6 +1427,19 @@ class OrgNode(Base):
     creator  = relationship("User", foreign_keys=[created_by])
 
 
+class OrgNodeClosure(Base):
+    """
+    Closure table da hierarquia: uma linha por par (antecessor, descendente),
+    incluindo o próprio nó com depth 0. Mantida por app/utils/org_closure.py
+    em cada create / move / delete de OrgNode.
+    """
+    __tablename__ = "org_node_closure"
+
+    ancestor_id   = Column(Integer, ForeignKey("org_nodes.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("org_nodes.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth         = Column(Integer, nullable=False, default=0)
+
+
 class OrgNodeMember(Base):
     """Associação M2M utilizador ↔ nó hierárquico."""
     __tablename__ = "org_node_members"
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func as sa_func, or_, and_, update
 from typing import List, Optional
 from datetime import datetime, timezone
 from pydantic import BaseModel
@@ -7,6 +8,11 @@ from .. import models, schemas
 from fastapi import Body
 from ..database import get_db
 from ..auth import get_current_user, require_role
+from ..constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..utils.challenge_scoring import (
+    AGGREGATE_COLUMNS, aggregate_operations, operation_contribution, apply_operation_delta,
+    live_score, recompute_submission_aggregates,
+)
 
 router = APIRouter(prefix="/api/challenges", tags=["challenges"])
 
@@ -135,6 +141,191 @@ def calculate_kpi_approval(
     
     return is_approved, kpi_details
 
+# ===== Grafo de uma Submission (detalhe, revisão, finalização) =====
+
+def load_submission_graph(db: Session, submission_id: int) -> Optional[models.ChallengeSubmission]:
+    """
+    Carrega uma submission com todo o grafo usado pelas páginas de detalhe,
+    revisão e finalização: challenge, user, submitter, reviewer (JOIN) e
+    parts, operations + errors, submission_errors (selectinload).
+
+    Número fixo de queries (5), independente do nº de operações.
+    """
+    return db.query(models.ChallengeSubmission).options(
+        joinedload(models.ChallengeSubmission.challenge),
+        joinedload(models.ChallengeSubmission.user),
+        joinedload(models.ChallengeSubmission.submitter),
+        joinedload(models.ChallengeSubmission.reviewer),
+        selectinload(models.ChallengeSubmission.parts),
+        selectinload(models.ChallengeSubmission.operations).selectinload(models.ChallengeOperation.errors),
+        selectinload(models.ChallengeSubmission.submission_errors),
+    ).filter(
+        models.ChallengeSubmission.id == submission_id
+    ).first()
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _user_basic_out(user: Optional[models.User]) -> Optional[dict]:
+    if not user:
+        return None
+    return {"id": user.id, "email": user.email, "full_name": user.full_name, "role": user.role}
+
+
+def _part_out(p: models.ChallengePart) -> dict:
+    return {
+        "id": p.id,
+        "challenge_id": p.challenge_id,
+        "submission_id": p.submission_id,
+        "part_number": p.part_number,
+        "operations_count": p.operations_count,
+        "started_at": _iso(p.started_at),
+        "completed_at": _iso(p.completed_at),
+        "duration_minutes": p.duration_minutes,
+        "mpu": p.mpu,
+        "created_at": _iso(p.created_at),
+    }
+
+
+def _operation_out(op: models.ChallengeOperation) -> dict:
+    return {
+        "id": op.id,
+        "submission_id": op.submission_id,
+        "operation_number": op.operation_number,
+        "operation_reference": op.operation_reference,
+        "started_at": _iso(op.started_at),
+        "completed_at": _iso(op.completed_at),
+        "duration_seconds": op.duration_seconds,
+        "has_error": op.has_error,
+        "is_approved": op.is_approved,
+        "created_at": _iso(op.created_at),
+        "errors": [
+            {
+                "id": err.id,
+                "operation_id": err.operation_id,
+                "error_type": err.error_type,
+                "description": err.description,
+                "created_at": _iso(err.created_at)
+            } for err in op.errors
+        ]
+    }
+
+
+def _challenge_out(challenge: Optional[models.Challenge]) -> Optional[dict]:
+    if not challenge:
+        return None
+    return {
+        "id": challenge.id,
+        "course_id": challenge.course_id,
+        "title": challenge.title,
+        "description": challenge.description,
+        "challenge_type": challenge.challenge_type,
+        "operations_required": challenge.operations_required,
+        "time_limit_minutes": challenge.time_limit_minutes,
+        "target_mpu": challenge.target_mpu,
+        "max_errors": getattr(challenge, 'max_errors', 0),
+        "use_volume_kpi": getattr(challenge, 'use_volume_kpi', True),
+        "use_mpu_kpi": getattr(challenge, 'use_mpu_kpi', True),
+        "use_errors_kpi": getattr(challenge, 'use_errors_kpi', True),
+        "kpi_mode": getattr(challenge, 'kpi_mode', 'AUTO'),
+        "allow_retry": getattr(challenge, 'allow_retry', False),
+        "created_by": getattr(challenge, 'created_by', None),
+        "is_active": challenge.is_active,
+        "created_at": _iso(challenge.created_at),
+        "updated_at": _iso(challenge.updated_at),
+    }
+
+
+def submission_detail_out(submission: models.ChallengeSubmission) -> dict:
+    """
+    Serializa uma submission carregada com load_submission_graph para o
+    schema ChallengeSubmissionDetail. Não faz queries.
+
+    Para COMPLETE, totais, tempo e MPU são derivados das operações reais.
+    """
+    challenge = submission.challenge
+    is_complete = submission.submission_type == "COMPLETE"
+    parts = submission.parts if is_complete else []
+    operations = sorted(submission.operations, key=lambda op: op.operation_number or 0)
+    completed_ops = [op for op in operations if op.completed_at]
+
+    # Calcular valores para COMPLETE baseado nas operações reais
+    actual_total_operations = len(completed_ops) if is_complete else (submission.total_operations or 0)
+
+    # Calcular tempo total e MPU para COMPLETE
+    total_time_calculated = submission.total_time_minutes or 0
+    calculated_mpu_value = submission.calculated_mpu or 0
+
+    if is_complete and operations:
+        total_seconds = sum(op.duration_seconds or 0 for op in completed_ops)
+        total_time_calculated = round(total_seconds / 60, 2) if total_seconds > 0 else 0
+        if actual_total_operations > 0 and total_time_calculated > 0:
+            # MPU = tempo / operações (minutos por unidade)
+            calculated_mpu_value = round(total_time_calculated / actual_total_operations, 2)
+
+    # Calcular erros para COMPLETE
+    errors_in_operations = len([op for op in operations if op.has_error])
+    actual_errors_count = errors_in_operations if is_complete else (submission.errors_count or 0)
+
+    # Calcular mpu_vs_target (quanto menor o MPU calculado, melhor)
+    mpu_vs_target_value = (challenge.target_mpu / calculated_mpu_value * 100) if challenge and challenge.target_mpu and calculated_mpu_value else (submission.mpu_vs_target or 0)
+
+    return {
+        "id": submission.id,
+        "challenge_id": submission.challenge_id,
+        "user_id": submission.user_id,
+        "training_plan_id": submission.training_plan_id,
+        "submission_type": submission.submission_type,
+        "status": submission.status,
+        "total_operations": actual_total_operations,
+        "total_time_minutes": total_time_calculated,
+        "started_at": _iso(submission.started_at),
+        "completed_at": _iso(submission.completed_at),
+        "calculated_mpu": calculated_mpu_value,
+        "mpu_vs_target": mpu_vs_target_value,
+        "is_approved": submission.is_approved,
+        "score": submission.score,
+        "feedback": submission.feedback,
+        "submitted_by": submission.submitted_by,
+        "errors_count": actual_errors_count,
+        "retry_count": getattr(submission, 'retry_count', 0),
+        "is_retry_allowed": getattr(submission, 'is_retry_allowed', False),
+        "trainer_notes": getattr(submission, 'trainer_notes', None),
+        "created_at": _iso(submission.created_at),
+        "updated_at": _iso(submission.updated_at),
+        "parts": [_part_out(p) for p in parts],
+        "operations": [_operation_out(op) for op in operations],  # Operações com erros detalhados (COMPLETE)
+        "submission_errors": [  # Erros detalhados (SUMMARY)
+            {
+                "id": se.id,
+                "error_type": se.error_type,
+                "description": se.description,
+                "operation_reference": se.operation_reference,
+                "created_at": _iso(se.created_at)
+            }
+            for se in submission.submission_errors
+        ],
+        "challenge": _challenge_out(challenge),
+        "user": _user_basic_out(submission.user),
+        "submitter": _user_basic_out(submission.submitter) if submission.submitted_by else None,
+        # Resumo de erros (para formando ver claramente)
+        "errors_summary": {
+            "operations_with_errors": actual_errors_count,
+            "max_errors_allowed": getattr(challenge, 'max_errors', 0) if challenge else 0,
+            "error_methodology": submission.error_methodology or 0,
+            "error_knowledge": submission.error_knowledge or 0,
+            "error_detail": submission.error_detail or 0,
+            "error_procedure": submission.error_procedure or 0,
+            "total_individual_errors": (submission.error_methodology or 0) + 
+                                       (submission.error_knowledge or 0) + 
+                                       (submission.error_detail or 0) + 
+                                       (submission.error_procedure or 0)
+        }
+    }
+
+
 # ===== ADMIN/TRAINER/TUTOR: Criar Desafio =====
 @router.post("/", response_model=schemas.Challenge, status_code=status.HTTP_201_CREATED)
 async def create_challenge(
@@ -936,10 +1127,8 @@ async def finish_challenge_complete(
     Finalizar desafio COMPLETE
     Calcula totais de todas as partes, MPU médio e aprova/reprova
     """
-    # Buscar submission com partes
-    submission = db.query(models.ChallengeSubmission).filter(
-        models.ChallengeSubmission.id == submission_id
-    ).first()
+    # Buscar submission com partes, operações/erros e challenge (queries fixas)
+    submission = load_submission_graph(db, submission_id)
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission não encontrada")
@@ -947,10 +1136,7 @@ async def finish_challenge_complete(
     if submission.completed_at:
         raise HTTPException(status_code=400, detail="Submission já foi finalizada")
     
-    # Buscar partes
-    parts = db.query(models.ChallengePart).filter(
-        models.ChallengePart.submission_id == submission_id
-    ).all()
+    parts = submission.parts
     
     if not parts:
         raise HTTPException(
@@ -965,10 +1151,8 @@ async def finish_challenge_complete(
     # Calcular MPU geral
     calculated_mpu = calculate_mpu(total_operations, total_time)
     
-    # Buscar challenge para comparar com target
-    challenge = db.query(models.Challenge).filter(
-        models.Challenge.id == submission.challenge_id
-    ).first()
+    # Challenge para comparar com target
+    challenge = submission.challenge
     
     # Aprovação por MPU
     is_approved_mpu, mpu_vs_target = calculate_approval(calculated_mpu, challenge.target_mpu)
@@ -976,35 +1160,21 @@ async def finish_challenge_complete(
 
     # Contar OPERAÇÕES com erro (não total de erros)
     # Para COMPLETE: conta operations onde has_error=True
-    operations_with_errors = db.query(models.ChallengeOperation).filter(
-        models.ChallengeOperation.submission_id == submission.id,
-        models.ChallengeOperation.has_error == True
-    ).count()
+    all_operations = submission.operations
+    operations_with_errors = len([op for op in all_operations if op.has_error == True])
     
     # errors_count guarda o número de OPERAÇÕES com erro
     errors_count = operations_with_errors
 
-    # Também guardar totais de erros por tipo (para relatórios)
-    error_methodology = 0
-    error_knowledge = 0
-    error_detail = 0
-    error_procedure = 0
-    
-    # Buscar todos os erros de todas as operações desta submission
-    all_operations = db.query(models.ChallengeOperation).filter(
-        models.ChallengeOperation.submission_id == submission.id
-    ).all()
-    
-    for op in all_operations:
-        for err in op.errors:
-            if err.error_type == 'METHODOLOGY':
-                error_methodology += 1
-            elif err.error_type == 'KNOWLEDGE':
-                error_knowledge += 1
-            elif err.error_type == 'DETAIL':
-                error_detail += 1
-            elif err.error_type == 'PROCEDURE':
-                error_procedure += 1
+    # Também guardar totais de erros por tipo (para relatórios), sincronizando
+    # os agregados incrementais com as operações já carregadas
+    totals = aggregate_operations(all_operations)
+    for column in AGGREGATE_COLUMNS:
+        setattr(submission, column, totals[column])
+    error_methodology = totals["error_methodology"]
+    error_knowledge = totals["error_knowledge"]
+    error_detail = totals["error_detail"]
+    error_procedure = totals["error_procedure"]
 
     # Aprovação por erros: max_errors refere-se a OPERAÇÕES com erro, não total de erros
     max_errors = getattr(challenge, 'max_errors', 0) or 0
@@ -1028,10 +1198,8 @@ async def finish_challenge_complete(
     submission.reviewed_by = current_user.id
     submission.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(submission)
-    
-    # Retornar com detalhes (construir dict explícito para evitar __dict__ issues)
+    # Retornar com detalhes (construir dict explícito para evitar __dict__ issues).
+    # Serializado antes do commit para não recarregar partes/challenge expirados.
     resp = {
         "id": submission.id,
         "challenge_id": submission.challenge_id,
@@ -1039,48 +1207,22 @@ async def finish_challenge_complete(
         "submission_type": submission.submission_type,
         "total_operations": submission.total_operations,
         "total_time_minutes": submission.total_time_minutes,
-        "started_at": submission.started_at.isoformat() if submission.started_at else None,
-        "completed_at": submission.completed_at.isoformat() if submission.completed_at else None,
+        "started_at": _iso(submission.started_at),
+        "completed_at": _iso(submission.completed_at),
         "calculated_mpu": submission.calculated_mpu,
         "mpu_vs_target": submission.mpu_vs_target,
         "is_approved": submission.is_approved,
         "score": submission.score,
         "feedback": submission.feedback,
         "submitted_by": submission.submitted_by,
-        "created_at": submission.created_at.isoformat() if submission.created_at else None,
-        "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
-        "parts": [
-            {
-                "id": p.id,
-                "challenge_id": p.challenge_id,
-                "submission_id": p.submission_id,
-                "part_number": p.part_number,
-                "operations_count": p.operations_count,
-                "started_at": p.started_at.isoformat() if p.started_at else None,
-                "completed_at": p.completed_at.isoformat() if p.completed_at else None,
-                "duration_minutes": p.duration_minutes,
-                "mpu": p.mpu,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-            }
-            for p in parts
-        ],
-        "challenge": {
-            "id": challenge.id,
-            "course_id": challenge.course_id,
-            "title": challenge.title,
-            "description": challenge.description,
-            "challenge_type": challenge.challenge_type,
-            "operations_required": challenge.operations_required,
-            "time_limit_minutes": challenge.time_limit_minutes,
-            "target_mpu": challenge.target_mpu,
-            "max_errors": getattr(challenge, 'max_errors', 0),
-            "created_by": getattr(challenge, 'created_by', None),
-            "is_active": challenge.is_active,
-            "created_at": challenge.created_at.isoformat() if challenge.created_at else None,
-            "updated_at": challenge.updated_at.isoformat() if challenge.updated_at else None,
-        }
+        "created_at": _iso(submission.created_at),
+        "updated_at": _iso(submission.updated_at),
+        "parts": [_part_out(p) for p in parts],
+        "challenge": _challenge_out(challenge),
     }
 
+    db.commit()
+
     return resp
 
 # ===== LISTAR Submissions de um Desafio =====
@@ -1140,6 +1282,9 @@ async def list_challenge_submissions(
 # ===== LISTAR Submissions Pendentes de Revisão (para Formador) =====
 @router.get("/pending-review/list", response_model=List[schemas.ChallengeSubmissionDetail])
 async def list_pending_review_submissions(
+    response: Response,
+    page: Optional[int] = Query(None, ge=1, description="Page number (omit for the full queue)"),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Items per page"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role(["ADMIN", "FORMADOR", "GERENTE", "TUTOR"]))
 ):
@@ -1147,48 +1292,52 @@ async def list_pending_review_submissions(
     Listar todas as submissions pendentes de revisão
     Ordenadas por data de submissão (mais antigas primeiro)
     Inclui submissions IN_PROGRESS que têm operações concluídas prontas para correção
+
+    Uma única query: challenge e user por JOIN e contagem de operações por
+    subquery agrupada (restrita às submissions em fila). Com `page` devolve
+    apenas essa página; o total da fila vai no header X-Total-Count.
     """
-    submissions = db.query(models.ChallengeSubmission).filter(
-        models.ChallengeSubmission.status.in_(["PENDING_REVIEW", "IN_PROGRESS"])
-    ).order_by(models.ChallengeSubmission.updated_at.asc()).all()
-    
-    # Filtrar: só incluir IN_PROGRESS se tiver pelo menos 1 operação concluída
-    filtered_submissions = []
-    for sub in submissions:
-        if sub.status == "PENDING_REVIEW":
-            filtered_submissions.append(sub)
-        elif sub.status == "IN_PROGRESS":
-            completed_ops = db.query(models.ChallengeOperation).filter(
-                models.ChallengeOperation.submission_id == sub.id,
-                models.ChallengeOperation.completed_at.isnot(None)
-            ).count()
-            if completed_ops > 0:
-                filtered_submissions.append(sub)
-    
-    submissions = filtered_submissions
-    
-    # Enriquecer com dados de challenge e user
+    Sub = models.ChallengeSubmission
+    Op = models.ChallengeOperation
+    queue_statuses = ["PENDING_REVIEW", "IN_PROGRESS"]
+
+    ops_counts = db.query(
+        Op.submission_id.label("submission_id"),
+        sa_func.count(Op.id).label("ops_total"),
+        sa_func.count(Op.completed_at).label("ops_completed"),
+    ).join(Sub, Sub.id == Op.submission_id).filter(
+        Sub.status.in_(queue_statuses)
+    ).group_by(Op.submission_id).subquery()
+
+    query = db.query(
+        Sub, models.Challenge, models.User, ops_counts.c.ops_total
+    ).outerjoin(
+        models.Challenge, models.Challenge.id == Sub.challenge_id
+    ).outerjoin(
+        models.User, models.User.id == Sub.user_id
+    ).outerjoin(
+        ops_counts, ops_counts.c.submission_id == Sub.id
+    ).filter(
+        # IN_PROGRESS só entra se tiver pelo menos 1 operação concluída
+        or_(
+            Sub.status == "PENDING_REVIEW",
+            and_(Sub.status == "IN_PROGRESS", ops_counts.c.ops_completed > 0),
+        )
+    ).order_by(Sub.updated_at.asc(), Sub.id.asc())
+
+    if page is not None:
+        response.headers["X-Total-Count"] = str(query.count())
+        query = query.offset((page - 1) * page_size).limit(page_size)
+
     result = []
-    for sub in submissions:
-        challenge = db.query(models.Challenge).filter(
-            models.Challenge.id == sub.challenge_id
-        ).first()
-        user = db.query(models.User).filter(
-            models.User.id == sub.user_id
-        ).first()
-        
-        # Contar operações
-        ops_count = db.query(models.ChallengeOperation).filter(
-            models.ChallengeOperation.submission_id == sub.id
-        ).count()
-        
+    for sub, challenge, user, ops_count in query.all():
         result.append({
             "id": sub.id,
             "challenge_id": sub.challenge_id,
             "user_id": sub.user_id,
             "submission_type": sub.submission_type,
             "status": getattr(sub, 'status', 'IN_PROGRESS'),
-            "total_operations": sub.total_operations or ops_count,
+            "total_operations": sub.total_operations or (ops_count or 0),
             "total_time_minutes": sub.total_time_minutes,
             "started_at": sub.started_at,
             "completed_at": sub.completed_at,
@@ -1238,9 +1387,7 @@ async def get_submission_detail(
     current_user: models.User = Depends(get_current_user)
 ):
     """Ver detalhes completos de uma submission incluindo partes e erros"""
-    submission = db.query(models.ChallengeSubmission).filter(
-        models.ChallengeSubmission.id == submission_id
-    ).first()
+    submission = load_submission_graph(db, submission_id)
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission não encontrada")
@@ -1250,180 +1397,7 @@ async def get_submission_detail(
         if submission.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Sem permissão para ver esta submission")
     
-    # Buscar partes se for tipo COMPLETE
-    parts = []
-    if submission.submission_type == "COMPLETE":
-        parts = db.query(models.ChallengePart).filter(
-            models.ChallengePart.submission_id == submission_id
-        ).all()
-    
-    # Buscar operações com seus erros
-    operations = db.query(models.ChallengeOperation).filter(
-        models.ChallengeOperation.submission_id == submission_id
-    ).order_by(models.ChallengeOperation.operation_number).all()
-    
-    # Contar operações completadas (para COMPLETE)
-    completed_operations_count = len([op for op in operations if op.completed_at])
-    
-    operations_data = []
-    for op in operations:
-        errors = db.query(models.OperationError).filter(
-            models.OperationError.operation_id == op.id
-        ).all()
-        operations_data.append({
-            "id": op.id,
-            "submission_id": op.submission_id,
-            "operation_number": op.operation_number,
-            "operation_reference": op.operation_reference,
-            "started_at": op.started_at.isoformat() if op.started_at else None,
-            "completed_at": op.completed_at.isoformat() if op.completed_at else None,
-            "duration_seconds": op.duration_seconds,
-            "has_error": op.has_error,
-            "is_approved": op.is_approved,
-            "created_at": op.created_at.isoformat() if op.created_at else None,
-            "errors": [
-                {
-                    "id": err.id,
-                    "operation_id": err.operation_id,
-                    "error_type": err.error_type,
-                    "description": err.description,
-                    "created_at": err.created_at.isoformat() if err.created_at else None
-                } for err in errors
-            ]
-        })
-    
-    # Buscar challenge
-    challenge = db.query(models.Challenge).filter(
-        models.Challenge.id == submission.challenge_id
-    ).first()
-    
-    # Buscar user e submitter
-    user = db.query(models.User).filter(models.User.id == submission.user_id).first()
-    submitter = db.query(models.User).filter(models.User.id == submission.submitted_by).first() if submission.submitted_by else None
-    
-    # Buscar erros da submission (para SUMMARY)
-    submission_errors = db.query(models.SubmissionError).filter(
-        models.SubmissionError.submission_id == submission_id
-    ).all()
-    
-    # Calcular valores para COMPLETE baseado nas operações reais
-    actual_total_operations = completed_operations_count if submission.submission_type == "COMPLETE" else (submission.total_operations or 0)
-    
-    # Calcular tempo total e MPU para COMPLETE
-    total_time_calculated = submission.total_time_minutes or 0
-    calculated_mpu_value = submission.calculated_mpu or 0
-    
-    if submission.submission_type == "COMPLETE" and operations:
-        total_seconds = sum(op.duration_seconds or 0 for op in operations if op.completed_at)
-        total_time_calculated = round(total_seconds / 60, 2) if total_seconds > 0 else 0
-        if actual_total_operations > 0 and total_time_calculated > 0:
-            # MPU = tempo / operações (minutos por unidade)
-            calculated_mpu_value = round(total_time_calculated / actual_total_operations, 2)
-    
-    # Calcular erros para COMPLETE
-    errors_in_operations = len([op for op in operations if op.has_error])
-    actual_errors_count = errors_in_operations if submission.submission_type == "COMPLETE" else (submission.errors_count or 0)
-    
-    # Calcular mpu_vs_target (quanto menor o MPU calculado, melhor)
-    mpu_vs_target_value = (challenge.target_mpu / calculated_mpu_value * 100) if challenge and challenge.target_mpu and calculated_mpu_value else (submission.mpu_vs_target or 0)
-    
-    resp = {
-        "id": submission.id,
-        "challenge_id": submission.challenge_id,
-        "user_id": submission.user_id,
-        "training_plan_id": submission.training_plan_id,
-        "submission_type": submission.submission_type,
-        "status": submission.status,
-        "total_operations": actual_total_operations,
-        "total_time_minutes": total_time_calculated,
-        "started_at": submission.started_at.isoformat() if submission.started_at else None,
-        "completed_at": submission.completed_at.isoformat() if submission.completed_at else None,
-        "calculated_mpu": calculated_mpu_value,
-        "mpu_vs_target": mpu_vs_target_value,
-        "is_approved": submission.is_approved,
-        "score": submission.score,
-        "feedback": submission.feedback,
-        "submitted_by": submission.submitted_by,
-        "errors_count": actual_errors_count,
-        "retry_count": getattr(submission, 'retry_count', 0),
-        "is_retry_allowed": getattr(submission, 'is_retry_allowed', False),
-        "trainer_notes": getattr(submission, 'trainer_notes', None),
-        "created_at": submission.created_at.isoformat() if submission.created_at else None,
-        "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
-        "parts": [
-            {
-                "id": p.id,
-                "challenge_id": p.challenge_id,
-                "submission_id": p.submission_id,
-                "part_number": p.part_number,
-                "operations_count": p.operations_count,
-                "started_at": p.started_at.isoformat() if p.started_at else None,
-                "completed_at": p.completed_at.isoformat() if p.completed_at else None,
-                "duration_minutes": p.duration_minutes,
-                "mpu": p.mpu,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-            }
-            for p in parts
-        ],
-        "operations": operations_data,  # Operações com erros detalhados (COMPLETE)
-        "submission_errors": [  # Erros detalhados (SUMMARY)
-            {
-                "id": se.id,
-                "error_type": se.error_type,
-                "description": se.description,
-                "operation_reference": se.operation_reference,
-                "created_at": se.created_at.isoformat() if se.created_at else None
-            }
-            for se in submission_errors
-        ],
-        "challenge": {
-            "id": challenge.id,
-            "course_id": challenge.course_id,
-            "title": challenge.title,
-            "description": challenge.description,
-            "challenge_type": challenge.challenge_type,
-            "operations_required": challenge.operations_required,
-            "time_limit_minutes": challenge.time_limit_minutes,
-            "target_mpu": challenge.target_mpu,
-            "max_errors": getattr(challenge, 'max_errors', 0) if challenge else 0,
-            "use_volume_kpi": getattr(challenge, 'use_volume_kpi', True) if challenge else True,
-            "use_mpu_kpi": getattr(challenge, 'use_mpu_kpi', True) if challenge else True,
-            "use_errors_kpi": getattr(challenge, 'use_errors_kpi', True) if challenge else True,
-            "kpi_mode": getattr(challenge, 'kpi_mode', 'AUTO') if challenge else 'AUTO',
-            "allow_retry": getattr(challenge, 'allow_retry', False) if challenge else False,
-            "created_by": getattr(challenge, 'created_by', None) if challenge else None,
-            "is_active": challenge.is_active if challenge else None,
-            "created_at": challenge.created_at.isoformat() if challenge and challenge.created_at else None,
-            "updated_at": challenge.updated_at.isoformat() if challenge and challenge.updated_at else None,
-        } if challenge else None,
-        "user": {
-            "id": user.id,
-            "email": user.email,
-            "full_name": user.full_name,
-            "role": user.role
-        } if user else None,
-        "submitter": {
-            "id": submitter.id,
-            "email": submitter.email,
-            "full_name": submitter.full_name,
-            "role": submitter.role
-        } if submitter else None,
-        # Resumo de erros (para formando ver claramente)
-        "errors_summary": {
-            "operations_with_errors": actual_errors_count,
-            "max_errors_allowed": getattr(challenge, 'max_errors', 0) if challenge else 0,
-            "error_methodology": submission.error_methodology or 0,
-            "error_knowledge": submission.error_knowledge or 0,
-            "error_detail": submission.error_detail or 0,
-            "error_procedure": submission.error_procedure or 0,
-            "total_individual_errors": (submission.error_methodology or 0) + 
-                                       (submission.error_knowledge or 0) + 
-                                       (submission.error_detail or 0) + 
-                                       (submission.error_procedure or 0)
-        }
-    }
-
-    return resp
+    return submission_detail_out(submission)
 
 
 # ===== FORMANDO: Iniciar Operação (COMPLETE) =====
@@ -1530,7 +1504,24 @@ async def finish_operation(
         if submission.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Sem permissão")
     
+    # Contribuição antes do evento (operação ainda não concluída → zero)
+    before = operation_contribution(operation, error_types=[])
+    
+    # Reclamar a conclusão com um UPDATE condicional: de dois pedidos
+    # concorrentes só um o vê afectar a linha e soma a operação aos agregados
     now = datetime.now()
+    claimed = db.execute(
+        update(models.ChallengeOperation)
+        .where(
+            models.ChallengeOperation.id == operation.id,
+            models.ChallengeOperation.completed_at.is_(None),
+        )
+        .values(completed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Operação já foi finalizada")
     operation.completed_at = now
     
     # Calcular duração - usar duração do frontend (exclui pausas) se disponível
@@ -1561,13 +1552,20 @@ async def finish_operation(
             )
             db.add(op_error)
     
+    # Contribuição a partir das linhas de erro gravadas (inclui erros que a
+    # operação já tivesse), igual ao que recompute_submission_aggregates conta
+    db.flush()
+    error_types = [
+        error_type for (error_type,) in db.query(models.OperationError.error_type).filter(
+            models.OperationError.operation_id == operation.id
+        )
+    ]
+    apply_operation_delta(db, submission, before, operation_contribution(operation, error_types=error_types))
+    
     # Auto-submit for review when ALL required operations are completed
     # This allows the trainer to review each operation as it's completed
     # but the submission only goes to PENDING_REVIEW when all ops are done
-    completed_count = db.query(models.ChallengeOperation).filter(
-        models.ChallengeOperation.submission_id == submission.id,
-        models.ChallengeOperation.completed_at.isnot(None)
-    ).count()
+    completed_count = submission.ops_completed or 0
     
     challenge_obj = db.query(models.Challenge).filter(
         models.Challenge.id == submission.challenge_id
@@ -1668,107 +1666,71 @@ async def classify_operation(
     """
     Formador classifica uma operação indicando se tem erro e os detalhes dos erros
     Uma operação pode ter múltiplos erros, mas conta como 1 operação errada
+
+    Os agregados da submission são actualizados com o delta desta operação
+    (O(1)); a auto-finalização lê apenas esses agregados.
     """
-    operation = db.query(models.ChallengeOperation).filter(
+    operation = db.query(models.ChallengeOperation).options(
+        selectinload(models.ChallengeOperation.errors)
+    ).filter(
         models.ChallengeOperation.id == operation_id
     ).first()
     
     if not operation:
         raise HTTPException(status_code=404, detail="Operação não encontrada")
     
+    submission = db.query(models.ChallengeSubmission).filter(
+        models.ChallengeSubmission.id == operation.submission_id
+    ).first()
+    
+    # Contribuição antes da reclassificação
+    before = operation_contribution(operation)
+    
     operation.has_error = classification.has_error
     operation.is_approved = not classification.has_error
     
     # Remover erros anteriores se existirem
-    db.query(models.OperationError).filter(
-        models.OperationError.operation_id == operation_id
-    ).delete()
+    operation.errors.clear()
     
     # Adicionar novos erros
     if classification.has_error and classification.errors:
         for err in classification.errors:
-            db_error = models.OperationError(
-                operation_id=operation_id,
+            operation.errors.append(models.OperationError(
                 error_type=err.error_type,
                 description=err.description[:160] if err.description else None
-            )
-            db.add(db_error)
+            ))
     
-    db.commit()
-    db.refresh(operation)
-    
-    # Buscar erros para retorno
-    operation.errors = db.query(models.OperationError).filter(
-        models.OperationError.operation_id == operation_id
-    ).all()
+    if submission:
+        apply_operation_delta(db, submission, before, operation_contribution(operation))
     
     # ===== AUTO-FINALIZE: Verificar se todas as operações foram corrigidas =====
     # Se sim, finalizar automaticamente o desafio (calcular KPIs, MPU, APPROVED/REJECTED)
-    submission = db.query(models.ChallengeSubmission).filter(
-        models.ChallengeSubmission.id == operation.submission_id
-    ).first()
-    
     if submission and submission.status in ("PENDING_REVIEW", "IN_PROGRESS"):
         challenge = db.query(models.Challenge).filter(
             models.Challenge.id == submission.challenge_id
         ).first()
         
         if challenge:
-            all_ops = db.query(models.ChallengeOperation).filter(
-                models.ChallengeOperation.submission_id == submission.id
-            ).all()
-            
-            completed_ops = [op for op in all_ops if op.completed_at]
+            completed_ops = submission.ops_completed or 0
             required_ops = challenge.operations_required or 0
             
             # Verificar se todas as operações requeridas foram completadas
-            all_completed = len(completed_ops) >= required_ops
+            all_completed = completed_ops >= required_ops
             
             # Verificar se todas as operações completadas foram classificadas (is_approved != None)
-            all_reviewed = all(op.is_approved is not None for op in completed_ops) if completed_ops else False
+            all_reviewed = completed_ops > 0 and (submission.ops_reviewed or 0) >= completed_ops
             
             if all_completed and all_reviewed:
                 import logging
                 logger = logging.getLogger(__name__)
-                logger.info(f"[AUTO-FINALIZE] All {len(completed_ops)} operations reviewed for submission {submission.id}. Auto-finalizing...")
-                
-                # Calcular estatísticas
-                total_ops = len(completed_ops)
-                correct_ops = len([op for op in completed_ops if op.is_approved == True and not op.has_error])
-                error_ops = len([op for op in completed_ops if op.has_error])
+                logger.info(f"[AUTO-FINALIZE] All {completed_ops} operations reviewed for submission {submission.id}. Auto-finalizing...")
                 
-                # Calcular erros por tipo
-                error_methodology = 0
-                error_knowledge = 0
-                error_detail = 0
-                error_procedure = 0
-                
-                for op_item in completed_ops:
-                    if op_item.has_error:
-                        op_errors = db.query(models.OperationError).filter(
-                            models.OperationError.operation_id == op_item.id
-                        ).all()
-                        for err in op_errors:
-                            etype = (err.error_type or '').upper()
-                            if etype in ('METHODOLOGY', 'METODOLOGIA'):
-                                error_methodology += 1
-                            elif etype in ('KNOWLEDGE', 'CONHECIMENTO'):
-                                error_knowledge += 1
-                            elif etype in ('DETAIL', 'DETALHE'):
-                                error_detail += 1
-                            elif etype in ('PROCEDURE', 'PROCEDIMENTO'):
-                                error_procedure += 1
-                
-                # Calcular tempo total e MPU
-                total_duration_seconds = sum(op.duration_seconds or 0 for op in completed_ops)
-                total_time_minutes = total_duration_seconds / 60.0 if total_duration_seconds > 0 else 0
-                
-                calculated_mpu = 0.0
-                if total_ops > 0 and total_time_minutes > 0:
-                    calculated_mpu = round(total_time_minutes / total_ops, 2)
-                
-                target_mpu = challenge.target_mpu or 0
-                mpu_vs_target = round((target_mpu / calculated_mpu * 100) if calculated_mpu > 0 else 0, 1)
+                # Estatísticas a partir dos agregados
+                score = live_score(submission, challenge)
+                total_ops = score["total_operations"]
+                error_ops = score["operations_with_error"]
+                total_time_minutes = score["total_time_minutes"]
+                calculated_mpu = score["calculated_mpu"]
                 
                 # Determinar aprovação
                 kpi_mode = getattr(challenge, 'kpi_mode', 'AUTO') or 'AUTO'
@@ -1780,16 +1742,12 @@ async def classify_operation(
                     # MANUAL mode - keep as PENDING_REVIEW for trainer to decide
                     is_approved = None
                 
-                # Atualizar submission
+                # Atualizar submission (error_* já estão actualizados pelos deltas)
                 submission.total_operations = total_ops
                 submission.total_time_minutes = int(total_time_minutes)
                 submission.errors_count = error_ops
-                submission.error_methodology = error_methodology
-                submission.error_knowledge = error_knowledge
-                submission.error_detail = error_detail
-                submission.error_procedure = error_procedure
                 submission.calculated_mpu = calculated_mpu
-                submission.mpu_vs_target = mpu_vs_target
+                submission.mpu_vs_target = score["mpu_vs_target"]
                 submission.reviewed_by = current_user.id
                 submission.completed_at = datetime.now()
                 submission.updated_at = datetime.now()
@@ -1802,12 +1760,54 @@ async def classify_operation(
                     # Manual mode: all ops reviewed but trainer needs to manually approve/reject
                     submission.status = "PENDING_REVIEW"
                     logger.info(f"[AUTO-FINALIZE] Submission {submission.id}: All ops reviewed, awaiting manual approval (KPI_MODE=MANUAL)")
-                
-                db.commit()
+    
+    # Classificação, agregados e eventual finalização na mesma transacção
+    db.commit()
+    db.refresh(operation)
     
     return operation
 
 
+# ===== ADMIN: Verificar / Recalcular agregados de submissions =====
+@router.get("/admin/aggregates/verify")
+async def verify_submission_aggregates(
+    submission_id: Optional[int] = None,
+    fix: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(["ADMIN"]))
+):
+    """
+    Compara os agregados incrementais (ops_*, error_*) das submissions COMPLETE
+    com o recálculo a partir das operações. Com fix=true corrige as divergências.
+    Sem submission_id verifica apenas as submissions ainda não finalizadas.
+    """
+    query = db.query(models.ChallengeSubmission).filter(
+        models.ChallengeSubmission.submission_type == "COMPLETE"
+    )
+    if submission_id:
+        query = query.filter(models.ChallengeSubmission.id == submission_id)
+    else:
+        query = query.filter(models.ChallengeSubmission.completed_at.is_(None))
+
+    checked = 0
+    mismatched = []
+    for submission in query.all():
+        checked += 1
+        diff = recompute_submission_aggregates(db, submission, fix=fix)
+        if diff:
+            mismatched.append({"submission_id": submission.id, "mismatches": diff})
+
+    if fix and mismatched:
+        db.commit()
+
+    return {
+        "checked": checked,
+        "mismatched": len(mismatched),
+        "fixed": fix,
+        "details": mismatched,
+    }
+
+
 # ===== LISTAR Operações de uma Submission =====
 @router.get("/submissions/{submission_id}/operations", response_model=List[schemas.ChallengeOperation])
 async def list_submission_operations(
@@ -1906,17 +1906,13 @@ async def finalize_submission_review(
     - Calcula estatísticas finais (MPU, erros por tipo)
     - O formador decide manualmente se aprova ou reprova
     """
-    submission = db.query(models.ChallengeSubmission).filter(
-        models.ChallengeSubmission.id == submission_id
-    ).first()
+    submission = load_submission_graph(db, submission_id)
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission não encontrada")
     
-    # Buscar challenge para os KPIs
-    challenge = db.query(models.Challenge).filter(
-        models.Challenge.id == submission.challenge_id
-    ).first()
+    # Challenge para os KPIs
+    challenge = submission.challenge
     
     if not challenge:
         raise HTTPException(status_code=404, detail="Desafio não encontrado")
@@ -1957,10 +1953,7 @@ async def finalize_submission_review(
         }
     
     # ===== COMPLETE type: calculate from operations =====
-    # Buscar operações
-    operations = db.query(models.ChallengeOperation).filter(
-        models.ChallengeOperation.submission_id == submission_id
-    ).all()
+    operations = submission.operations
     
     completed_ops = [op for op in operations if op.completed_at]
     
@@ -1988,26 +1981,15 @@ async def finalize_submission_review(
     correct_ops = len([op for op in completed_ops if op.is_approved == True and not op.has_error])
     error_ops = len([op for op in completed_ops if op.has_error])
     
-    # Calcular erros por tipo (para relatórios)
-    error_methodology = 0
-    error_knowledge = 0
-    error_detail = 0
-    error_procedure = 0
-    
-    for op in completed_ops:
-        if op.has_error:
-            errors = db.query(models.OperationError).filter(
-                models.OperationError.operation_id == op.id
-            ).all()
-            for err in errors:
-                if err.error_type == "METODOLOGIA":
-                    error_methodology += 1
-                elif err.error_type == "CONHECIMENTO":
-                    error_knowledge += 1
-                elif err.error_type == "DETALHE":
-                    error_detail += 1
-                elif err.error_type == "PROCEDIMENTO":
-                    error_procedure += 1
+    # Calcular erros por tipo (para relatórios) — mesma normalização EN/PT
+    # dos agregados incrementais, que ficam também sincronizados
+    totals = aggregate_operations(operations)
+    for column in AGGREGATE_COLUMNS:
+        setattr(submission, column, totals[column])
+    error_methodology = totals["error_methodology"]
+    error_knowledge = totals["error_knowledge"]
+    error_detail = totals["error_detail"]
+    error_procedure = totals["error_procedure"]
     
     # O errors_count é o número de OPERAÇÕES com erro (não total de erros)
     operations_with_error = error_ops
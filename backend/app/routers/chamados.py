@@ -6,17 +6,38 @@ Regras:
   • Só ADMIN pode alterar status, atribuir responsável e editar notas de andamento.
 """
 
+import base64
+import binascii
+import io
+import logging
+import mimetypes
+import re
+import unicodedata
+import urllib.parse
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import desc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, func, null
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload, undefer
 
 from app.database import get_db
-from app.auth import get_current_user, get_visible_user_ids
-from app.models import User, Chamado, ChamadoComment
+from app.auth import get_current_user, visible_user_scope
+from app.constants import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    MAX_CHAMADO_ATTACHMENTS, CHAMADO_ATTACHMENT_MAX_BYTES, CHAMADO_THUMBNAIL_SIZE,
+)
+from app.models import User, Chamado, ChamadoComment, ChamadoAttachment
+from app.utils.blob_store import get_blob_store
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow está em requirements.txt; sem ele os anexos são recusados
+    Image = None
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -29,7 +50,7 @@ class ChamadoCreate(BaseModel):
     type: str = Field("BUG", pattern=r"^(BUG|MELHORIA)$")
     priority: str = Field("MEDIA", pattern=r"^(BAIXA|MEDIA|ALTA|CRITICA)$")
     portal: str = Field("GERAL", pattern=r"^(FORMACOES|TUTORIA|RELATORIOS|DADOS_MESTRES|CHAMADOS|GERAL)$")
-    attachments: Optional[List[str]] = None
+    attachments: Optional[List[str]] = None  # imagens em data URL (base64) — guardadas no blob store
 
 class ChamadoUpdate(BaseModel):
     """Campos editáveis pelo ADMIN"""
@@ -51,6 +72,16 @@ class CommentOut(BaseModel):
     content: str
     created_at: datetime
 
+class AttachmentOut(BaseModel):
+    """Referência leve a um anexo — o conteúdo é servido por id"""
+    id: int
+    filename: str
+    content_type: str
+    size_bytes: int
+    has_thumbnail: bool
+    url: str
+    thumbnail_url: str
+
 class ChamadoOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -66,18 +97,61 @@ class ChamadoOut(BaseModel):
     assigned_to_id: Optional[int] = None
     assignee_name: Optional[str] = None
     admin_notes: Optional[str] = None
-    attachments: Optional[List[str]] = None
+    attachments: List[AttachmentOut] = []
     completed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     comments: List[CommentOut] = []
 
+class ChamadoSummaryOut(BaseModel):
+    """Cartão do Kanban — sem comentários nem anexos, só contagens"""
+    id: int
+    title: str
+    description: str
+    type: str
+    priority: str
+    status: str
+    portal: str
+    created_by_id: int
+    creator_name: str
+    assigned_to_id: Optional[int] = None
+    assignee_name: Optional[str] = None
+    comments_count: int = 0
+    attachments_count: int = 0
+    completed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class ChamadoColumnOut(BaseModel):
+    items: List[ChamadoSummaryOut]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+class ChamadoBoardOut(BaseModel):
+    """view=summary — uma coluna paginada por status"""
+    columns: Dict[str, ChamadoColumnOut]
+
 # ─── Helpers ──────────────────────────────────────────────────
 
+CHAMADO_STATUSES = ("ABERTO", "EM_ANDAMENTO", "EM_REVISAO", "CONCLUIDO")
+
 def _require_admin(user: User):
     if user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Apenas administradores podem realizar esta ação")
 
+def _attachment_to_out(a: ChamadoAttachment) -> dict:
+    return {
+        "id": a.id,
+        "filename": a.filename,
+        "content_type": a.content_type,
+        "size_bytes": a.size_bytes,
+        "has_thumbnail": a.thumbnail_key is not None,
+        "url": f"/api/chamados/attachments/{a.id}",
+        "thumbnail_url": f"/api/chamados/attachments/{a.id}/thumbnail",
+    }
+
 def _chamado_to_out(c: Chamado) -> dict:
     return {
         "id": c.id,
@@ -92,7 +166,7 @@ def _chamado_to_out(c: Chamado) -> dict:
         "assigned_to_id": c.assigned_to_id,
         "assignee_name": c.assignee.full_name if c.assignee else None,
         "admin_notes": c.admin_notes,
-        "attachments": c.attachments or [],
+        "attachments": [_attachment_to_out(a) for a in (c.attachment_files or [])],
         "completed_at": c.completed_at,
         "created_at": c.created_at,
         "updated_at": c.updated_at,
@@ -109,39 +183,386 @@ def _chamado_to_out(c: Chamado) -> dict:
         ],
     }
 
+# ─── Anexos (blob store) ───────────────────────────────────────
+
+_DATA_URL_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(?P<params>(?:;[^,;]*)*?);base64,(?P<data>.*)$", re.S)
+
+
+def _decode_data_url(value: str) -> tuple:
+    """data:image/png;base64,... (ou base64 simples) → (content_type, bytes)."""
+    match = _DATA_URL_RE.match(value.strip())
+    content_type = None
+    payload = value
+    if match:
+        content_type = match.group("type")
+        payload = match.group("data")
+    try:
+        data = base64.b64decode(payload, validate=False)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Anexo inválido (base64)")
+    return content_type or "application/octet-stream", data
+
+
+def _sniff_image(data: bytes) -> str:
+    """Tipo MIME real da imagem via Pillow ("" se não for imagem).
+    Sem Pillow recusa o anexo em vez de confiar no Content-Type do cliente."""
+    if Image is None:
+        raise HTTPException(status_code=503, detail="Validação de imagens indisponível no servidor")
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return Image.MIME.get(img.format) or ""
+    except Exception:
+        return ""
+
+
+def _make_thumbnail(data: bytes) -> Optional[bytes]:
+    """Miniatura JPEG (lado maior CHAMADO_THUMBNAIL_SIZE); None se não for possível gerar."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail((CHAMADO_THUMBNAIL_SIZE, CHAMADO_THUMBNAIL_SIZE))
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, format="JPEG", quality=80, optimize=True)
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def _store_attachment(
+    chamado: Chamado,
+    data: bytes,
+    content_type: str,
+    filename: Optional[str],
+    user_id: Optional[int],
+) -> ChamadoAttachment:
+    """Valida a imagem, grava binário + miniatura no blob store e cria a linha de metadados."""
+    if not data:
+        raise HTTPException(status_code=400, detail="Anexo vazio")
+    if len(data) > CHAMADO_ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Anexo excede {CHAMADO_ATTACHMENT_MAX_BYTES // (1024 * 1024)} MB",
+        )
+    content_type = _sniff_image(data)
+    if not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Apenas imagens são aceites como anexo")
+
+    store = get_blob_store()
+    blob_key = store.put(data)
+    thumbnail = _make_thumbnail(data)
+    thumbnail_key = store.put(thumbnail) if thumbnail else None
+
+    if not filename:
+        extension = mimetypes.guess_extension(content_type) or ""
+        filename = f"screenshot-{len(chamado.attachment_files) + 1}{extension}"
+
+    attachment = ChamadoAttachment(
+        filename=filename[:255],
+        content_type=content_type,
+        size_bytes=len(data),
+        blob_key=blob_key,
+        thumbnail_key=thumbnail_key,
+        created_by_id=user_id,
+    )
+    chamado.attachment_files.append(attachment)
+    return attachment
+
+
+def _release_blobs(db: Session, keys: set) -> None:
+    """Apaga do blob store as chaves que já não são referenciadas por nenhum anexo."""
+    keys = {k for k in keys if k}
+    if not keys:
+        return
+    still_used = {
+        key
+        for row in db.query(ChamadoAttachment.blob_key, ChamadoAttachment.thumbnail_key).filter(
+            ChamadoAttachment.blob_key.in_(keys) | ChamadoAttachment.thumbnail_key.in_(keys)
+        ).all()
+        for key in row
+    }
+    store = get_blob_store()
+    for key in keys - still_used:
+        store.delete(key)
+
+
+def migrate_legacy_chamado_attachments(db: Session) -> int:
+    """
+    Move os screenshots base64 da coluna JSON chamados.attachments para o
+    blob store (um chamado por transacção) e deixa a coluna a NULL.
+    Idempotente — corre no arranque da aplicação. Devolve nº de anexos migrados.
+    Sem Pillow não migra nada (os anexos seriam recusados e a coluna limpa).
+    """
+    if Image is None:
+        return 0
+    legacy_ids = [
+        row.id for row in db.query(Chamado.id).filter(Chamado.attachments.isnot(None)).all()
+    ]
+    migrated = 0
+    for chamado_id in legacy_ids:
+        chamado = db.query(Chamado).options(
+            undefer(Chamado.attachments), selectinload(Chamado.attachment_files)
+        ).filter(Chamado.id == chamado_id).first()
+        for value in chamado.attachments or []:
+            try:
+                content_type, data = _decode_data_url(value)
+                _store_attachment(chamado, data, content_type, None, chamado.created_by_id)
+                migrated += 1
+            except HTTPException as e:
+                logger.warning("Chamado %s: anexo legado ignorado (%s)", chamado_id, e.detail)
+        chamado.attachments = null()
+        db.commit()
+    return migrated
+
+
+def _get_visible_attachment(db: Session, attachment_id: int, current_user: User) -> ChamadoAttachment:
+    """Anexo por id, com o mesmo scoping da listagem de chamados."""
+    attachment = (
+        db.query(ChamadoAttachment)
+        .options(joinedload(ChamadoAttachment.chamado))
+        .filter(ChamadoAttachment.id == attachment_id)
+        .first()
+    )
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Anexo não encontrado")
+    visible_scope = visible_user_scope(db, current_user)
+    if visible_scope is not None:
+        chamado = attachment.chamado
+        owner_ids = [uid for uid in (chamado.created_by_id, chamado.assigned_to_id) if uid is not None]
+        visible = db.query(User.id).filter(User.id.in_(owner_ids), User.id.in_(visible_scope)).first()
+        if not visible:
+            raise HTTPException(status_code=403, detail="Sem permissão para ver este anexo")
+    return attachment
+
+
+def _parse_range(range_header: str, size: int):
+    """
+    Range de um único intervalo ("bytes=a-b", "bytes=a-", "bytes=-n").
+    Devolve (start, end), None se insatisfazível, ou (0, size-1) se o header
+    for inválido ou pedir vários intervalos (responde-se com o ficheiro todo).
+    """
+    full = (0, size - 1)
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return full
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep:
+        return full
+    try:
+        if start_s == "":
+            length = int(end_s)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return full
+    if start >= size or start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_blob(key: str, start: int, end: int, chunk_size: int = 64 * 1024):
+    with get_blob_store().open(key) as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _content_disposition(filename: str) -> str:
+    """inline com filename* (RFC 5987, UTF-8) e um filename ASCII de recurso, com aspas escapadas."""
+    ascii_name = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    ascii_name = "".join(ch for ch in ascii_name if ch.isprintable())
+    ascii_name = ascii_name.replace("\\", "\\\\").replace('"', '\\"') or "anexo"
+    return f'inline; filename="{ascii_name}"; filename*=UTF-8\'\'{urllib.parse.quote(filename, safe="")}'
+
+
+def _blob_response(request: Request, key: str, content_type: str, filename: str) -> Response:
+    """Serve um blob com ETag (a própria chave sha256), If-None-Match e Range."""
+    store = get_blob_store()
+    if not store.exists(key):
+        raise HTTPException(status_code=404, detail="Conteúdo do anexo não encontrado")
+
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Blob imutável: a chave muda se o conteúdo mudar
+        "Cache-Control": "private, max-age=31536000, immutable",
+        # Imagens já vêm comprimidas; evita o GZip (que quebraria os Range)
+        "Content-Encoding": "identity",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    size = store.size(key)
+    status_code = 200
+    start, end = 0, size - 1
+    range_header = request.headers.get("range")
+    if range_header and size > 0:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range != (0, size - 1):
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = _content_disposition(filename)
+    return StreamingResponse(
+        _iter_blob(key, start, end),
+        status_code=status_code,
+        media_type=content_type,
+        headers=headers,
+    )
+
 # ─── Endpoints ──────────────────────────────────────────────────
 
-@router.get("/chamados", response_model=List[ChamadoOut])
+def _scoped_chamado_filters(db: Session, current_user: User, status, type, portal) -> list:
+    """Filtros comuns da listagem (scoping por role + filtros do pedido)."""
+    filters = []
+    # ── Data scoping ──────────────────────────────────────────────
+    visible_scope = visible_user_scope(db, current_user)
+    if visible_scope is not None:
+        # Vê os chamados que criou OU que lhe foram atribuídos
+        filters.append(
+            (Chamado.created_by_id.in_(visible_scope)) |
+            (Chamado.assigned_to_id.in_(visible_scope))
+        )
+    # ─────────────────────────────────────────────────────────────
+    if status:
+        filters.append(Chamado.status == status)
+    if type:
+        filters.append(Chamado.type == type)
+    if portal:
+        filters.append(Chamado.portal == portal)
+    return filters
+
+
+def _chamado_board(db: Session, filters: list, page: int, page_size: int) -> dict:
+    """
+    Projecção leve para o Kanban: só colunas escalares + contagens por
+    subqueries agrupadas (sem carregar comentários/anexos), paginada por
+    status com ROW_NUMBER() — duas queries no total.
+    """
+    comments_sq = (
+        db.query(ChamadoComment.chamado_id.label("chamado_id"), func.count(ChamadoComment.id).label("n"))
+        .group_by(ChamadoComment.chamado_id)
+        .subquery()
+    )
+    attachments_sq = (
+        db.query(ChamadoAttachment.chamado_id.label("chamado_id"), func.count(ChamadoAttachment.id).label("n"))
+        .group_by(ChamadoAttachment.chamado_id)
+        .subquery()
+    )
+    creator = aliased(User)
+    assignee = aliased(User)
+
+    rows_sq = (
+        db.query(
+            Chamado.id, Chamado.title, Chamado.description, Chamado.type,
+            Chamado.priority, Chamado.status, Chamado.portal,
+            Chamado.created_by_id, Chamado.assigned_to_id,
+            Chamado.completed_at, Chamado.created_at, Chamado.updated_at,
+            creator.full_name.label("creator_name"),
+            assignee.full_name.label("assignee_name"),
+            func.coalesce(comments_sq.c.n, 0).label("comments_count"),
+            func.coalesce(attachments_sq.c.n, 0).label("attachments_count"),
+            func.row_number().over(
+                partition_by=Chamado.status,
+                order_by=(desc(Chamado.created_at), desc(Chamado.id)),
+            ).label("rn"),
+        )
+        .outerjoin(creator, creator.id == Chamado.created_by_id)
+        .outerjoin(assignee, assignee.id == Chamado.assigned_to_id)
+        .outerjoin(comments_sq, comments_sq.c.chamado_id == Chamado.id)
+        .outerjoin(attachments_sq, attachments_sq.c.chamado_id == Chamado.id)
+        .filter(*filters)
+        .subquery()
+    )
+    offset = (page - 1) * page_size
+    rows = (
+        db.query(rows_sq)
+        .filter(rows_sq.c.rn > offset, rows_sq.c.rn <= offset + page_size)
+        .order_by(rows_sq.c.status, rows_sq.c.rn)
+        .all()
+    )
+    totals = dict(
+        db.query(Chamado.status, func.count(Chamado.id))
+        .filter(*filters)
+        .group_by(Chamado.status)
+        .all()
+    )
+
+    columns = {}
+    for status in list(CHAMADO_STATUSES) + [st for st in totals if st not in CHAMADO_STATUSES]:
+        total = totals.get(status, 0)
+        columns[status] = {
+            "items": [],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size,
+        }
+    for r in rows:
+        columns[r.status]["items"].append({
+            "id": r.id,
+            "title": r.title,
+            "description": r.description,
+            "type": r.type,
+            "priority": r.priority,
+            "status": r.status,
+            "portal": r.portal,
+            "created_by_id": r.created_by_id,
+            "creator_name": r.creator_name or "",
+            "assigned_to_id": r.assigned_to_id,
+            "assignee_name": r.assignee_name,
+            "comments_count": r.comments_count,
+            "attachments_count": r.attachments_count,
+            "completed_at": r.completed_at,
+            "created_at": r.created_at,
+            "updated_at": r.updated_at,
+        })
+    return {"columns": columns}
+
+
+@router.get("/chamados", response_model=Union[ChamadoBoardOut, List[ChamadoOut]])
 def list_chamados(
     status: Optional[str] = Query(None),
     type: Optional[str] = Query(None),
     portal: Optional[str] = Query(None),
+    view: str = Query("full", pattern=r"^(full|summary)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Lista chamados com scoping por role:
     ADMIN/GESTOR → todos | MANAGER → equipa | utilizador simples → os seus.
+
+    view=summary → cartões do Kanban agrupados por status, cada coluna
+    paginada com page/page_size (para "carregar mais" numa coluna, filtrar
+    por status). view=full (defeito, compatibilidade) → lista completa com
+    comentários e anexos; o detalhe completo está em /chamados/{id}.
     """
+    filters = _scoped_chamado_filters(db, current_user, status, type, portal)
+    if view == "summary":
+        return _chamado_board(db, filters, page, page_size)
+
     q = db.query(Chamado).options(
         joinedload(Chamado.creator),
         joinedload(Chamado.assignee),
         joinedload(Chamado.comments).joinedload(ChamadoComment.author),
-    )
-    # ── Data scoping ──────────────────────────────────────────────
-    visible_ids = get_visible_user_ids(db, current_user)
-    if visible_ids is not None:
-        # Vê os chamados que criou OU que lhe foram atribuídos
-        q = q.filter(
-            (Chamado.created_by_id.in_(visible_ids)) |
-            (Chamado.assigned_to_id.in_(visible_ids))
-        )
-    # ─────────────────────────────────────────────────────────────
-    if status:
-        q = q.filter(Chamado.status == status)
-    if type:
-        q = q.filter(Chamado.type == type)
-    if portal:
-        q = q.filter(Chamado.portal == portal)
+        selectinload(Chamado.attachment_files),
+    ).filter(*filters)
     chamados = q.order_by(desc(Chamado.created_at)).all()
     return [_chamado_to_out(c) for c in chamados]
 
@@ -159,6 +580,7 @@ def get_chamado(
             joinedload(Chamado.creator),
             joinedload(Chamado.assignee),
             joinedload(Chamado.comments).joinedload(ChamadoComment.author),
+            selectinload(Chamado.attachment_files),
         )
         .filter(Chamado.id == chamado_id)
         .first()
@@ -175,6 +597,8 @@ def create_chamado(
     current_user: User = Depends(get_current_user),
 ):
     """Qualquer utilizador autenticado pode criar um chamado."""
+    if payload.attachments and len(payload.attachments) > MAX_CHAMADO_ATTACHMENTS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_CHAMADO_ATTACHMENTS} anexos por chamado")
     chamado = Chamado(
         title=payload.title,
         description=payload.description,
@@ -182,15 +606,21 @@ def create_chamado(
         priority=payload.priority,
         portal=payload.portal,
         created_by_id=current_user.id,
-        attachments=payload.attachments,
     )
     db.add(chamado)
+    for value in payload.attachments or []:
+        content_type, data = _decode_data_url(value)
+        _store_attachment(chamado, data, content_type, None, current_user.id)
     db.commit()
     db.refresh(chamado)
     # Reload with relationships
     c = (
         db.query(Chamado)
-        .options(joinedload(Chamado.creator), joinedload(Chamado.assignee))
+        .options(
+            joinedload(Chamado.creator),
+            joinedload(Chamado.assignee),
+            selectinload(Chamado.attachment_files),
+        )
         .filter(Chamado.id == chamado.id)
         .first()
     )
@@ -235,6 +665,7 @@ def update_chamado(
             joinedload(Chamado.creator),
             joinedload(Chamado.assignee),
             joinedload(Chamado.comments).joinedload(ChamadoComment.author),
+            selectinload(Chamado.attachment_files),
         )
         .filter(Chamado.id == chamado_id)
         .first()
@@ -253,8 +684,68 @@ def delete_chamado(
     c = db.query(Chamado).filter(Chamado.id == chamado_id).first()
     if not c:
         raise HTTPException(status_code=404, detail="Chamado não encontrado")
+    blob_keys = {key for a in c.attachment_files for key in (a.blob_key, a.thumbnail_key)}
     db.delete(c)
     db.commit()
+    _release_blobs(db, blob_keys)
+
+
+# ─── Anexos ─────────────────────────────────────────────────────
+
+@router.post("/chamados/{chamado_id}/attachments", response_model=AttachmentOut, status_code=201)
+def upload_attachment(
+    chamado_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Adiciona uma imagem a um chamado (multipart). Só o criador ou ADMIN."""
+    c = (
+        db.query(Chamado)
+        .options(selectinload(Chamado.attachment_files))
+        .filter(Chamado.id == chamado_id)
+        .first()
+    )
+    if not c:
+        raise HTTPException(status_code=404, detail="Chamado não encontrado")
+    if current_user.role != "ADMIN" and c.created_by_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Apenas o criador ou administradores podem anexar ficheiros")
+    if len(c.attachment_files) >= MAX_CHAMADO_ATTACHMENTS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_CHAMADO_ATTACHMENTS} anexos por chamado")
+
+    data = file.file.read(CHAMADO_ATTACHMENT_MAX_BYTES + 1)
+    attachment = _store_attachment(
+        c, data, file.content_type or "application/octet-stream", file.filename, current_user.id
+    )
+    db.commit()
+    db.refresh(attachment)
+    return _attachment_to_out(attachment)
+
+
+@router.get("/chamados/attachments/{attachment_id}")
+def get_attachment(
+    attachment_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Conteúdo do anexo (suporta ETag/If-None-Match e Range)."""
+    a = _get_visible_attachment(db, attachment_id, current_user)
+    return _blob_response(request, a.blob_key, a.content_type, a.filename)
+
+
+@router.get("/chamados/attachments/{attachment_id}/thumbnail")
+def get_attachment_thumbnail(
+    attachment_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Miniatura JPEG do anexo (ou o original, se não houver miniatura)."""
+    a = _get_visible_attachment(db, attachment_id, current_user)
+    if a.thumbnail_key:
+        return _blob_response(request, a.thumbnail_key, "image/jpeg", f"thumb-{a.id}.jpg")
+    return _blob_response(request, a.blob_key, a.content_type, a.filename)
 
 
 # ─── Comentários ────────────────────────────────────────────────
@@ -7,16 +7,22 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case, select, true
 from app.database import get_db
 from app.auth import get_current_user
 from app.models import (
     User, TutoriaError, TutoriaActionPlan, TutoriaActionItem,
     ErrorCategory, ChatFAQ,
 )
+from app.constants import CHAT_FAQ_INDEX_TTL_SECONDS
 import re
 import math
 import random
+import itertools
+import threading
+import time
+import unicodedata
+from collections import deque
 from datetime import datetime, timezone
 
 # ── optional portal-of-formations models (may not exist) ──────────────────
@@ -98,103 +104,230 @@ class FAQOut(BaseModel):
 
 def _norm(text: str) -> str:
     """Lowercase + strip accents for loose matching."""
-    import unicodedata
     text = text.lower()
+    if text.isascii():  # caso comum: nada para decompor
+        return text
     return "".join(
         c for c in unicodedata.normalize("NFD", text)
         if unicodedata.category(c) != "Mn"
     )
 
 
+def _norm_tokens(norm_text: str) -> frozenset:
+    """Tokens (len >= 2) de um texto já normalizado."""
+    return frozenset(w for w in norm_text.split() if len(w) >= 2)
+
+
 def _tokenize(text: str) -> set:
     """Split normalized text into meaningful tokens (len >= 2)."""
-    return {w for w in _norm(text).split() if len(w) >= 2}
+    return set(_norm_tokens(_norm(text)))
 
 
-def _faq_score(norm_msg: str, msg_tokens: set, kw_block: str) -> float:
-    """
-    Score a FAQ keyword block against the user message.
-    Uses a combination of:
-      - Exact substring match (highest score)
-      - Token overlap ratio (fuzzy matching)
-    Returns a float 0..1.
-    """
-    if not kw_block.strip():
-        return 0.0
+def _kw_lines(kw_block: Optional[str]) -> list[str]:
+    """Linhas de palavras-chave (uma por linha ou separadas por vírgula)."""
+    if not kw_block or not kw_block.strip():
+        return []
+    return [kw.strip() for kw in kw_block.replace("\n", ",").split(",") if kw.strip()]
 
-    best = 0.0
-    for kw_line in kw_block.replace("\n", ",").split(","):
-        kw = kw_line.strip()
-        if not kw:
-            continue
-        norm_kw = _norm(kw)
 
-        # Exact substring match -> high score
-        if norm_kw in norm_msg:
-            score = 0.85 + 0.15 * (len(norm_kw) / max(len(norm_msg), 1))
-            best = max(best, score)
-            continue
-
-        # Token overlap (fuzzy)
-        kw_tokens = _tokenize(kw)
-        if not kw_tokens:
-            continue
-        overlap = len(msg_tokens & kw_tokens)
-        if overlap > 0:
-            # Jaccard-like score weighted toward keyword coverage
-            coverage = overlap / len(kw_tokens)
-            relevance = overlap / max(len(msg_tokens), 1)
-            score = 0.4 * coverage + 0.3 * relevance
-            best = max(best, score)
-
-    return best
+_GRAM = 3  # comprimento das chaves do índice de substrings
 
 
-def _faq_match(message: str, user: User, lang: str, db: Session):
+def _substring_keys(norm_msg: str) -> set:
+    """Todos os pedaços de 1.._GRAM caracteres da mensagem (chaves do índice de substrings)."""
+    n = len(norm_msg)
+    return {norm_msg[i:i + k] for i in range(n) for k in range(1, _GRAM + 1) if i + k <= n}
+
+
+class _FAQLine:
+    """Uma palavra-chave já normalizada e tokenizada."""
+    __slots__ = ("faq", "kw", "norm", "tokens")
+
+    def __init__(self, faq: int, kw: str):
+        self.faq = faq          # posição da FAQ no índice
+        self.kw = kw
+        self.norm = _norm(kw)
+        self.tokens = _norm_tokens(self.norm)
+
+    def score(self, norm_msg: str, msg_tokens: frozenset) -> float:
+        # Exact substring match -> high score
+        if self.norm and self.norm in norm_msg:
+            return 0.85 + 0.15 * (len(self.norm) / max(len(norm_msg), 1))
+        # Token overlap (fuzzy), Jaccard-like score weighted toward keyword coverage
+        overlap = len(msg_tokens & self.tokens)
+        if not overlap:
+            return 0.0
+        coverage = overlap / len(self.tokens)
+        relevance = overlap / max(len(msg_tokens), 1)
+        return 0.4 * coverage + 0.3 * relevance
+
+
+class _FAQIndex:
     """
-    Smart FAQ matching with fuzzy scoring.
-    Returns (reply, support_url, support_label) or None.
+    Snapshot imutável das FAQs ativas, pronto a pontuar mensagens.
+
+    As palavras-chave são normalizadas uma vez na construção. Cada mensagem
+    só pontua as linhas candidatas: as que partilham um token com a mensagem
+    (índice invertido token → linhas) ou cujo início aparece na mensagem
+    (índice pelos primeiros _GRAM caracteres, para o match por substring).
+    O resultado é o mesmo que pontuar todas as linhas de todas as FAQs.
     """
-    norm_msg = _norm(message)
-    msg_tokens = _tokenize(message)
-    faqs = (
-        db.query(ChatFAQ)
-        .filter(ChatFAQ.is_active == True)
-        .order_by(ChatFAQ.priority.asc())
-        .all()
-    )
 
-    scored: list[tuple[float, ChatFAQ]] = []
-    for faq in faqs:
-        # Role filter check
-        if faq.role_filter:
-            allowed = [r.strip() for r in faq.role_filter.split(",")]
-            if user.role not in allowed:
+    def __init__(self, faqs: list):
+        self.faqs = [
+            {
+                "answers": {"pt": faq.answer_pt, "es": faq.answer_es, "en": faq.answer_en},
+                "support_url": faq.support_url,
+                "support_label": faq.support_label,
+                "roles": (
+                    frozenset(r.strip() for r in faq.role_filter.split(","))
+                    if faq.role_filter else None
+                ),
+            }
+            for faq in faqs
+        ]
+        self.lines: list[_FAQLine] = []
+        self.by_token: dict[str, list[int]] = {}
+        self.by_prefix: dict[str, list[int]] = {}
+        # Sugestões usam só a coluna do idioma (com fallback para pt)
+        self.sugg_by_token: dict[str, dict[str, list[tuple[int, _FAQLine]]]] = {"pt": {}, "es": {}, "en": {}}
+        self._roles: dict[str, frozenset] = {}
+        seqs = itertools.count()  # ordem original (FAQ, linha) das sugestões
+
+        for pos, faq in enumerate(faqs):
+            for kw in _kw_lines(faq.keywords_pt) + _kw_lines(faq.keywords_es) + _kw_lines(faq.keywords_en):
+                line = _FAQLine(pos, kw)
+                line_id = len(self.lines)
+                self.lines.append(line)
+                for token in line.tokens:
+                    self.by_token.setdefault(token, []).append(line_id)
+                if line.norm:
+                    self.by_prefix.setdefault(line.norm[:_GRAM], []).append(line_id)
+
+            for lang in ("pt", "es", "en"):
+                kw_field = {"es": faq.keywords_es, "en": faq.keywords_en}.get(lang) or faq.keywords_pt or ""
+                for kw in _kw_lines(kw_field):
+                    line = _FAQLine(pos, kw)
+                    seq = next(seqs)
+                    for token in line.tokens:
+                        self.sugg_by_token[lang].setdefault(token, []).append((seq, line))
+
+    def allowed(self, role: str) -> frozenset:
+        """Posições das FAQs visíveis para o role (partição calculada uma vez por role)."""
+        allowed = self._roles.get(role)
+        if allowed is None:
+            allowed = frozenset(
+                pos for pos, faq in enumerate(self.faqs)
+                if faq["roles"] is None or role in faq["roles"]
+            )
+            self._roles[role] = allowed
+        return allowed
+
+    def match(self, norm_msg: str, msg_tokens: frozenset, role: str) -> Optional[dict]:
+        line_ids = set()
+        for token in msg_tokens:
+            line_ids.update(self.by_token.get(token, ()))
+        for key in _substring_keys(norm_msg):
+            line_ids.update(self.by_prefix.get(key, ()))
+        if not line_ids:
+            return None
+
+        allowed = self.allowed(role)
+        best: dict[int, float] = {}
+        for line_id in line_ids:
+            line = self.lines[line_id]
+            if line.faq not in allowed:
                 continue
+            score = line.score(norm_msg, msg_tokens)
+            if score > best.get(line.faq, 0.0):
+                best[line.faq] = score
+
+        scored = [(score, pos) for pos, score in best.items() if score >= 0.45]  # threshold for a match
+        if not scored:
+            return None
+        # Highest score, then lowest priority number (posição = ordem por prioridade)
+        _, pos = min(scored, key=lambda x: (-x[0], x[1]))
+        return self.faqs[pos]
+
+    def suggestions(self, msg_tokens: frozenset, role: str, lang: str, top_n: int) -> list[str]:
+        by_token = self.sugg_by_token.get(lang, self.sugg_by_token["pt"])
+        lines = dict(entry for token in msg_tokens for entry in by_token.get(token, ()))
+        allowed = self.allowed(role)
+
+        candidates: list[tuple[float, int, str]] = []
+        for seq, line in lines.items():
+            if line.faq not in allowed:
+                continue
+            score = len(msg_tokens & line.tokens) / max(len(line.tokens), 1)
+            if 0.2 <= score < 0.45:  # partial match but not strong enough
+                candidates.append((score, seq, line.kw))
+
+        candidates.sort(key=lambda x: (-x[0], x[1]))
+        seen = set()
+        result = []
+        for _, _, kw in candidates:
+            if kw.lower() not in seen:
+                seen.add(kw.lower())
+                result.append(kw)
+            if len(result) >= top_n:
+                break
+        return result
+
+
+class _FAQIndexCache:
+    """
+    Índice partilhado entre pedidos. Os endpoints de CRUD chamam invalidate()
+    depois do commit; o TTL apanha alterações feitas fora deste router
+    (seeds, outro processo). Um índice só é guardado se não houve
+    invalidação enquanto era construído.
+    """
 
-        # Score across all language keyword columns
-        kw_fields = [faq.keywords_pt or "", faq.keywords_es or "", faq.keywords_en or ""]
-        best_score = max(_faq_score(norm_msg, msg_tokens, kw) for kw in kw_fields)
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entry: Optional[tuple[int, float, _FAQIndex]] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entry = None
+
+    def get(self, db: Session) -> _FAQIndex:
+        entry = self._entry
+        if entry and entry[0] == self.version and time.monotonic() < entry[1]:
+            return entry[2]
+
+        version = self.version
+        faqs = (
+            db.query(ChatFAQ)
+            .filter(ChatFAQ.is_active == True)
+            .order_by(ChatFAQ.priority.asc(), ChatFAQ.id.asc())
+            .all()
+        )
+        index = _FAQIndex(faqs)
+        with self._lock:
+            if self.version == version:
+                self._entry = (version, time.monotonic() + self.ttl_seconds, index)
+        return index
 
-        if best_score >= 0.45:  # threshold for a match
-            scored.append((best_score, faq))
 
-    if not scored:
-        return None
+_faq_index = _FAQIndexCache(CHAT_FAQ_INDEX_TTL_SECONDS)
 
-    # Pick the best match (highest score, then lowest priority number)
-    scored.sort(key=lambda x: (-x[0], x[1].priority))
-    _, best_faq = scored[0]
 
-    # Pick answer for the current language
-    if lang == "es" and best_faq.answer_es:
-        answer = best_faq.answer_es
-    elif lang == "en" and best_faq.answer_en:
-        answer = best_faq.answer_en
-    else:
-        answer = best_faq.answer_pt
+def _faq_match(message: str, user: User, lang: str, db: Session):
+    """
+    Smart FAQ matching with fuzzy scoring.
+    Returns (reply, support_url, support_label) or None.
+    """
+    norm_msg = _norm(message)
+    best_faq = _faq_index.get(db).match(norm_msg, _norm_tokens(norm_msg), user.role)
+    if not best_faq:
+        return None
 
-    return answer, best_faq.support_url, best_faq.support_label
+    # Pick answer for the current language (fallback pt)
+    answer = best_faq["answers"].get(lang) or best_faq["answers"]["pt"]
+    return answer, best_faq["support_url"], best_faq["support_label"]
 
 
 def _faq_suggestions(message: str, user: User, lang: str, db: Session, top_n: int = 3) -> list[str]:
@@ -202,50 +335,10 @@ def _faq_suggestions(message: str, user: User, lang: str, db: Session, top_n: in
     Return suggested FAQ keywords that partially match the user message.
     Used when no strong match is found.
     """
-    norm_msg = _norm(message)
-    msg_tokens = _tokenize(message)
+    msg_tokens = _norm_tokens(_norm(message))
     if len(msg_tokens) < 1:
         return []
-
-    faqs = (
-        db.query(ChatFAQ)
-        .filter(ChatFAQ.is_active == True)
-        .order_by(ChatFAQ.priority.asc())
-        .all()
-    )
-    candidates: list[tuple[float, str]] = []
-    for faq in faqs:
-        if faq.role_filter:
-            allowed = [r.strip() for r in faq.role_filter.split(",")]
-            if user.role not in allowed:
-                continue
-
-        kw_field = {
-            "es": faq.keywords_es,
-            "en": faq.keywords_en,
-        }.get(lang) or faq.keywords_pt or ""
-
-        for kw_line in kw_field.replace("\n", ",").split(","):
-            kw = kw_line.strip()
-            if not kw:
-                continue
-            kw_tokens = _tokenize(kw)
-            overlap = len(msg_tokens & kw_tokens)
-            if overlap > 0:
-                score = overlap / max(len(kw_tokens), 1)
-                if score >= 0.2 and score < 0.45:  # partial match but not strong enough
-                    candidates.append((score, kw))
-
-    candidates.sort(key=lambda x: -x[0])
-    seen = set()
-    result = []
-    for _, kw in candidates:
-        if kw.lower() not in seen:
-            seen.add(kw.lower())
-            result.append(kw)
-        if len(result) >= top_n:
-            break
-    return result
+    return _faq_index.get(db).suggestions(msg_tokens, user.role, lang, top_n)
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -365,20 +458,84 @@ INTENT_PATTERNS: dict[str, dict[str, list[str]]] = {
 # Intent detection
 # ════════════════════════════════════════════════════════════════════════════
 
-def detect_intent(msg: str) -> str:
-    """Return the best-matching intent key, or 'unknown'."""
-    norm = _norm(msg)
-    best_intent = "unknown"
-    best_score = 0
-    for intent, langs in INTENT_PATTERNS.items():
+class _PatternMatcher:
+    """
+    Autómato Aho-Corasick sobre padrões já normalizados.
+
+    Cada padrão tem um rank (menor = melhor) e um valor; best() percorre a
+    mensagem uma única vez e devolve o valor do padrão com menor rank entre
+    todos os que ocorrem como substring. O custo por mensagem depende do
+    tamanho da mensagem, não do número de padrões.
+    """
+
+    def __init__(self, entries):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._best: list[Optional[tuple]] = [None]   # (rank, value) do melhor padrão que termina no nó
+
+        for pattern, rank, value in entries:
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or rank < self._best[node][0]:
+                self._best[node] = (rank, value)
+
+        # Ligações de falha em largura; cada nó herda o melhor padrão do seu sufixo
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                inherited = self._best[self._fail[nxt]]
+                if inherited is not None and (self._best[nxt] is None or inherited[0] < self._best[nxt][0]):
+                    self._best[nxt] = inherited
+                queue.append(nxt)
+
+    def best(self, norm_text: str):
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for ch in norm_text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            found = best_at[node]
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+        return best[1] if best else None
+
+
+def _compile_patterns(table: dict, rank) -> _PatternMatcher:
+    """Compila {intent: {lang: [padrões]}}; rank(intent_idx, order, padrão) define a prioridade."""
+    entries = []
+    order = 0
+    for intent_idx, (intent, langs) in enumerate(table.items()):
         for patterns in langs.values():
             for p in patterns:
-                if _norm(p) in norm:
-                    score = len(p)   # longer match wins
-                    if score > best_score:
-                        best_score = score
-                        best_intent = intent
-    return best_intent
+                entries.append((_norm(p), rank(intent_idx, order, p), intent))
+                order += 1
+    return _PatternMatcher(entries)
+
+
+# Padrão mais longo ganha; em empate, o primeiro da tabela
+_INTENT_MATCHER = _compile_patterns(INTENT_PATTERNS, lambda intent_idx, order, p: (-len(p), order))
+
+
+def detect_intent(msg: str) -> str:
+    """Return the best-matching intent key, or 'unknown'."""
+    return _INTENT_MATCHER.best(_norm(msg)) or "unknown"
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -489,15 +646,13 @@ SMALLTALK_REPLIES: dict[str, dict[str, str]] = {
 }
 
 
+# Primeira intenção da tabela com algum padrão presente na mensagem
+_SMALLTALK_MATCHER = _compile_patterns(SMALLTALK, lambda intent_idx, order, p: intent_idx)
+
+
 def _detect_smalltalk(msg: str) -> Optional[str]:
     """Detect smalltalk intent, returns key or None."""
-    norm = _norm(msg)
-    for intent, langs in SMALLTALK.items():
-        for patterns in langs.values():
-            for p in patterns:
-                if _norm(p) in norm:
-                    return intent
-    return None
+    return _SMALLTALK_MATCHER.best(_norm(msg))
 
 
 def h_greeting(user: User, lang: str, **_) -> str:
@@ -595,13 +750,32 @@ def h_help(user: User, lang: str, **_) -> str:
     return _t(lang, "\n".join(lines_pt), "\n".join(lines_es), "\n".join(lines_en))
 
 
+PENDING_PLAN_STATUSES = ["RASCUNHO", "AGUARDANDO_APROVACAO", "DEVOLVIDO"]
+
+
+def _count_if(cond):
+    return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+
+def _tutorado_scope(column, user: User, own_only: bool) -> list:
+    """
+    Filtro de visibilidade dos handlers sobre a coluna tutorado_id:
+    formador → os seus tutorados; own_only → só o próprio; senão tudo.
+    Devolve uma lista de condições (vazia = sem restrição) para usar em .filter(*...).
+    """
+    if user.is_formador:
+        return [column.in_(select(User.id).where(User.tutor_id == user.id))]
+    if own_only:
+        return [column == user.id]
+    return []
+
+
 def h_my_errors(user: User, lang: str, db: Session, **_) -> str:
     is_mgr = user.is_admin or user.is_formador
-    q = db.query(TutoriaError).filter(TutoriaError.is_active == True)
-    if not is_mgr:
-        q = q.filter(TutoriaError.tutorado_id == user.id)
-    elif user.is_formador:
-        q = q.join(User, TutoriaError.tutorado_id == User.id).filter(User.tutor_id == user.id)
+    q = db.query(TutoriaError).filter(
+        TutoriaError.is_active == True,
+        *_tutorado_scope(TutoriaError.tutorado_id, user, own_only=not is_mgr),
+    )
     errors = q.order_by(TutoriaError.created_at.desc()).limit(8).all()
 
     if not errors:
@@ -623,11 +797,9 @@ def h_my_errors(user: User, lang: str, db: Session, **_) -> str:
 
 def h_my_plans(user: User, lang: str, db: Session, **_) -> str:
     is_mgr = user.is_admin or user.is_formador
-    q = db.query(TutoriaActionPlan)
-    if not is_mgr:
-        q = q.filter(TutoriaActionPlan.tutorado_id == user.id)
-    elif user.is_formador:
-        q = q.join(User, TutoriaActionPlan.tutorado_id == User.id).filter(User.tutor_id == user.id)
+    q = db.query(TutoriaActionPlan).filter(
+        *_tutorado_scope(TutoriaActionPlan.tutorado_id, user, own_only=not is_mgr),
+    )
     plans = q.order_by(TutoriaActionPlan.created_at.desc()).limit(8).all()
 
     if not plans:
@@ -650,11 +822,8 @@ def h_critical_errors(user: User, lang: str, db: Session, **_) -> str:
     q = db.query(TutoriaError).filter(
         TutoriaError.severity == "CRITICA",
         TutoriaError.is_active == True,
+        *_tutorado_scope(TutoriaError.tutorado_id, user, own_only=user.is_usuario_basico),
     )
-    if user.is_formador:
-        q = q.join(User, TutoriaError.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        q = q.filter(TutoriaError.tutorado_id == user.id)
     errors = q.order_by(TutoriaError.created_at.desc()).limit(10).all()
 
     if not errors:
@@ -672,11 +841,8 @@ def h_recurrent_errors(user: User, lang: str, db: Session, **_) -> str:
     q = db.query(TutoriaError).filter(
         TutoriaError.is_recurrent == True,
         TutoriaError.is_active == True,
+        *_tutorado_scope(TutoriaError.tutorado_id, user, own_only=user.is_usuario_basico),
     )
-    if user.is_formador:
-        q = q.join(User, TutoriaError.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        q = q.filter(TutoriaError.tutorado_id == user.id)
     errors = q.order_by(TutoriaError.recurrence_count.desc()).limit(10).all()
 
     if not errors:
@@ -691,16 +857,15 @@ def h_recurrent_errors(user: User, lang: str, db: Session, **_) -> str:
 
 
 def _plans_by_status(user: User, lang: str, db: Session, statuses: list[str]) -> str:
-    q = db.query(TutoriaActionPlan).filter(TutoriaActionPlan.status.in_(statuses))
-    if user.is_formador:
-        q = q.join(User, TutoriaActionPlan.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        q = q.filter(TutoriaActionPlan.tutorado_id == user.id)
+    q = db.query(TutoriaActionPlan).filter(
+        TutoriaActionPlan.status.in_(statuses),
+        *_tutorado_scope(TutoriaActionPlan.tutorado_id, user, own_only=user.is_usuario_basico),
+    )
     return q.order_by(TutoriaActionPlan.created_at.desc()).limit(10).all()
 
 
 def h_pending_plans(user: User, lang: str, db: Session, **_) -> str:
-    plans = _plans_by_status(user, lang, db, ["RASCUNHO", "AGUARDANDO_APROVACAO", "DEVOLVIDO"])
+    plans = _plans_by_status(user, lang, db, PENDING_PLAN_STATUSES)
     if not plans:
         return _t(lang, "✅ Não há planos pendentes.",
                         "✅ No hay planes pendientes.",
@@ -766,28 +931,44 @@ def h_my_students(user: User, lang: str, db: Session, **_) -> str:
 def h_stats(user: User, lang: str, db: Session, **_) -> str:
     is_mgr = user.is_admin or user.is_formador
 
-    # errors
-    eq = db.query(TutoriaError).filter(TutoriaError.is_active == True)
-    if user.is_formador:
-        eq = eq.join(User, TutoriaError.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        eq = eq.filter(TutoriaError.tutorado_id == user.id)
-
-    total_errors   = eq.count()
-    open_errors    = eq.filter(TutoriaError.status == "ABERTO").count()
-    recur_errors   = db.query(TutoriaError).filter(TutoriaError.is_recurrent == True, TutoriaError.is_active == True).count() if user.is_admin else eq.filter(TutoriaError.is_recurrent == True).count()
-    critical       = eq.filter(TutoriaError.severity == "CRITICA").count()
-
-    # plans
-    pq = db.query(TutoriaActionPlan)
-    if user.is_formador:
-        pq = pq.join(User, TutoriaActionPlan.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        pq = pq.filter(TutoriaActionPlan.tutorado_id == user.id)
+    # Um agregado por domínio (uma passagem por tabela), tudo num só SELECT
+    errors = (
+        select(
+            func.count().label("total"),
+            _count_if(TutoriaError.status == "ABERTO").label("open"),
+            _count_if(TutoriaError.is_recurrent == True).label("recurrent"),
+            _count_if(TutoriaError.severity == "CRITICA").label("critical"),
+        )
+        .where(
+            TutoriaError.is_active == True,
+            *_tutorado_scope(TutoriaError.tutorado_id, user, own_only=user.is_usuario_basico),
+        )
+        .subquery()
+    )
+    plans = (
+        select(
+            func.count().label("total"),
+            _count_if(TutoriaActionPlan.status.in_(PENDING_PLAN_STATUSES)).label("pending"),
+            _count_if(TutoriaActionPlan.status == "CONCLUIDO").label("done"),
+        )
+        .where(*_tutorado_scope(TutoriaActionPlan.tutorado_id, user, own_only=user.is_usuario_basico))
+        .subquery()
+    )
+    columns = [
+        errors.c.total, errors.c.open, errors.c.recurrent, errors.c.critical,
+        plans.c.total, plans.c.pending, plans.c.done,
+    ]
+    stmt_from = errors.join(plans, true())
+    if is_mgr:
+        student_filters = [User.role == "USUARIO", User.is_active == True]
+        if user.is_formador:
+            student_filters.append(User.tutor_id == user.id)
+        students = select(func.count().label("total")).where(*student_filters).subquery()
+        columns.append(students.c.total)
+        stmt_from = stmt_from.join(students, true())
 
-    total_plans    = pq.count()
-    pending_plans  = pq.filter(TutoriaActionPlan.status.in_(["RASCUNHO", "AGUARDANDO_APROVACAO", "DEVOLVIDO"])).count()
-    done_plans     = pq.filter(TutoriaActionPlan.status == "CONCLUIDO").count()
+    row = [int(v or 0) for v in db.execute(select(*columns).select_from(stmt_from)).one()]
+    total_errors, open_errors, recur_errors, critical, total_plans, pending_plans, done_plans = row[:7]
 
     lines_pt = [
         "📊 **Resumo geral:**",
@@ -809,10 +990,7 @@ def h_stats(user: User, lang: str, db: Session, **_) -> str:
     ]
 
     if is_mgr:
-        sq = db.query(User).filter(User.role == "USUARIO", User.is_active == True)
-        if user.is_formador:
-            sq = sq.filter(User.tutor_id == user.id)
-        nstudents = sq.count()
+        nstudents = row[7]
         lines_pt.append(f"• Tutorados: **{nstudents}**")
         lines_es.append(f"• Tutorados: **{nstudents}**")
         lines_en.append(f"• Students: **{nstudents}**")
@@ -838,10 +1016,14 @@ def h_users(user: User, lang: str, db: Session, **_) -> str:
         return _t(lang, "Apenas administradores podem ver utilizadores.",
                         "Solo los administradores pueden ver usuarios.",
                         "Only administrators can view users.")
-    total  = db.query(User).filter(User.is_active == True).count()
-    admins = db.query(User).filter(User.role == "ADMIN", User.is_active == True).count()
-    trainers = db.query(User).filter(User.is_formador == True, User.is_active == True).count()
-    students = db.query(User).filter(User.role == "USUARIO", User.is_active == True).count()
+    total, admins, trainers, students = (int(v or 0) for v in db.execute(
+        select(
+            func.count(),
+            _count_if(User.role == "ADMIN"),
+            _count_if(User.is_formador == True),
+            _count_if(User.role == "USUARIO"),
+        ).where(User.is_active == True)
+    ).one())
     return _t(lang,
         f"👤 **Utilizadores ({total} total):**\n• Admins: {admins}\n• Tutores: {trainers}\n• Tutorados: {students}",
         f"👤 **Usuarios ({total} total):**\n• Admins: {admins}\n• Tutores: {trainers}\n• Tutorados: {students}",
@@ -850,11 +1032,11 @@ def h_users(user: User, lang: str, db: Session, **_) -> str:
 
 
 def h_open_errors(user: User, lang: str, db: Session, **_) -> str:
-    q = db.query(TutoriaError).filter(TutoriaError.status == "ABERTO", TutoriaError.is_active == True)
-    if user.is_formador:
-        q = q.join(User, TutoriaError.tutorado_id == User.id).filter(User.tutor_id == user.id)
-    elif user.is_usuario_basico:
-        q = q.filter(TutoriaError.tutorado_id == user.id)
+    q = db.query(TutoriaError).filter(
+        TutoriaError.status == "ABERTO",
+        TutoriaError.is_active == True,
+        *_tutorado_scope(TutoriaError.tutorado_id, user, own_only=user.is_usuario_basico),
+    )
     errors = q.order_by(TutoriaError.created_at.desc()).limit(8).all()
 
     if not errors:
@@ -1180,6 +1362,7 @@ def create_faq(
     faq = ChatFAQ(**body.model_dump(), created_by_id=current_user.id)
     db.add(faq)
     db.commit()
+    _faq_index.invalidate()
     db.refresh(faq)
     return faq
 
@@ -1198,6 +1381,7 @@ def update_faq(
     for field, value in body.model_dump(exclude_none=True).items():
         setattr(faq, field, value)
     db.commit()
+    _faq_index.invalidate()
     db.refresh(faq)
     return faq
 
@@ -1214,3 +1398,4 @@ def delete_faq(
         raise HTTPException(status_code=404, detail="FAQ não encontrada")
     db.delete(faq)
     db.commit()
+    _faq_index.invalidate()
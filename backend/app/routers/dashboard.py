@@ -0,0 +1,174 @@
+"""
+Dashboards — POST /api/dashboard/batch
+
+Resolve vários widgets num só pedido: o utilizador é autenticado uma vez e
+cada widget chama directamente o endpoint que o serve (/api/relatorios/*,
+/api/dw/*, /api/stats/kpis, /api/admin/reports/*), com a mesma verificação
+de roles que a rota original. Os widgets correm em paralelo no threadpool,
+cada um com uma sessão própria do pool (a Session do SQLAlchemy não é
+thread-safe), e a resposta traz o tempo de cada widget.
+
+    {"widgets": [{"id": "dw/training/by-month", "params": {"year": 2025}},
+                 {"id": "relatorios/formacoes"}]}
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app import auth
+from app.auth import get_current_active_user, has_any_role
+from app.constants import DASHBOARD_BATCH_CONCURRENCY, DASHBOARD_BATCH_MAX_WIDGETS, DW_MAX_DAYS, DW_MAX_LIMIT
+from app.database import SessionLocal
+from app.models import User
+from app.routers import dw, relatorios, stats
+from app.routes import admin, advanced_reports
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class _Widget:
+    """Endpoint servido como widget: roles=None → qualquer utilizador autenticado.
+    params: nome → (default, máximo) — todos inteiros, como nas rotas."""
+
+    def __init__(self, endpoint, roles: Optional[list] = None, params: Optional[dict] = None):
+        self.endpoint = endpoint
+        self.roles = roles
+        self.params = params or {}
+        self._args = set(inspect.signature(endpoint).parameters)
+
+    def parse_params(self, raw: dict) -> dict:
+        unknown = set(raw) - set(self.params)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+        values = {}
+        for name, (default, maximum) in self.params.items():
+            value = raw.get(name, default)
+            if value is not None:
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise HTTPException(status_code=422, detail=f"'{name}' deve ser inteiro")
+                if maximum is not None and value > maximum:
+                    raise HTTPException(status_code=422, detail=f"'{name}' deve ser ≤ {maximum}")
+            values[name] = value
+        return values
+
+    def call(self, db, user: User, response: Response, params: dict):
+        kwargs = dict(params)
+        if "db" in self._args:
+            kwargs["db"] = db
+        for name in ("current_user", "_user"):
+            if name in self._args:
+                kwargs[name] = user
+        if "response" in self._args:
+            kwargs["response"] = response
+        result = self.endpoint(**kwargs)
+        if inspect.iscoroutine(result):
+            # Rotas async com acesso síncrono à BD: corre no loop próprio desta thread
+            result = asyncio.run(result)
+        return result
+
+
+_YEAR = {"year": (None, None)}
+_LIMIT = {"limit": (10, DW_MAX_LIMIT)}
+
+WIDGETS: Dict[str, _Widget] = {
+    # Portal de Relatórios (âmbito do utilizador; teams/members validam o acesso na própria rota)
+    "relatorios/overview": _Widget(relatorios.overview),
+    "relatorios/formacoes": _Widget(relatorios.formacoes),
+    "relatorios/tutoria": _Widget(relatorios.tutoria_relatorio),
+    "relatorios/teams": _Widget(relatorios.teams_relatorio),
+    "relatorios/members": _Widget(relatorios.members_relatorio),
+    # Data Warehouse
+    "dw/snapshot/latest": _Widget(dw.snapshot_latest, auth.ADMIN_MANAGER_ROLES),
+    "dw/snapshot/trend": _Widget(dw.snapshot_trend, auth.ADMIN_MANAGER_ROLES, {"days": (30, DW_MAX_DAYS)}),
+    "dw/training/by-month": _Widget(dw.training_by_month, auth.ADMIN_MANAGER_ROLES, _YEAR),
+    "dw/training/by-course": _Widget(dw.training_by_course, auth.ADMIN_MANAGER_ROLES, _LIMIT),
+    "dw/tutoria/by-category": _Widget(dw.tutoria_by_category, auth.ADMIN_MANAGER_ROLES),
+    "dw/tutoria/by-month": _Widget(dw.tutoria_by_month, auth.ADMIN_MANAGER_ROLES, _YEAR),
+    "dw/tutoria/by-trainer": _Widget(dw.tutoria_by_trainer, auth.ADMIN_MANAGER_ROLES, _LIMIT),
+    "dw/chamados/by-status": _Widget(dw.chamados_by_status, auth.ADMIN_MANAGER_ROLES),
+    "dw/chamados/by-month": _Widget(dw.chamados_by_month, auth.ADMIN_MANAGER_ROLES, _YEAR),
+    "dw/chamados/by-type": _Widget(dw.chamados_by_type, auth.ADMIN_MANAGER_ROLES),
+    "dw/internal-errors/by-month": _Widget(dw.internal_errors_by_month, auth.ADMIN_MANAGER_ROLES, _YEAR),
+    "dw/internal-errors/by-team": _Widget(dw.internal_errors_by_team, auth.ADMIN_MANAGER_ROLES),
+    "dw/teams/overview": _Widget(dw.teams_overview, auth.ADMIN_MANAGER_ROLES),
+    # KPIs e relatórios de administração
+    "stats/kpis": _Widget(stats.get_kpis),
+    "admin/reports/stats": _Widget(admin.get_admin_stats, auth.ADMIN_MANAGER_ROLES),
+    "admin/reports/insights": _Widget(admin.get_admin_insights, auth.ADMIN_MANAGER_ROLES),
+    "admin/advanced-reports/dashboard-summary": _Widget(
+        advanced_reports.get_dashboard_summary, auth.ADMIN_MANAGER_ROLES),
+}
+
+
+class WidgetRequest(BaseModel):
+    id: str
+    key: Optional[str] = None    # identifica o resultado quando o mesmo widget é pedido com params diferentes
+    params: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    widgets: List[WidgetRequest] = Field(..., min_length=1, max_length=DASHBOARD_BATCH_MAX_WIDGETS)
+
+
+def _run_widget(widget: _Widget, user: User, params: dict) -> dict:
+    """Corre num worker do threadpool, com uma sessão do pool só para este widget."""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        response = Response()
+        # merge(load=False): o principal já autenticado, sem voltar a ler o utilizador
+        data = widget.call(db, db.merge(user, load=False), response, params)
+        result = {"status": 200, "data": jsonable_encoder(data)}
+        generation = response.headers.get("X-DW-Generation")
+        if generation is not None:
+            result["generation"] = int(generation)
+    except HTTPException as e:
+        result = {"status": e.status_code, "error": e.detail}
+    except Exception as e:
+        logger.error("Dashboard widget %s failed: %s", widget.endpoint.__name__, e, exc_info=True)
+        result = {"status": 500, "error": "Erro interno do servidor"}
+    finally:
+        db.close()
+    result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+@router.post("/batch")
+async def dashboard_batch(
+    body: BatchRequest,
+    current_user: User = Depends(get_current_active_user),
+):
+    """Resolve os widgets pedidos em paralelo; cada resultado tem status próprio e tempo (ms)."""
+    started = time.perf_counter()
+    limit = asyncio.Semaphore(DASHBOARD_BATCH_CONCURRENCY)
+
+    async def resolve(req: WidgetRequest) -> dict:
+        head = {"id": req.id, "key": req.key or req.id}
+        widget = WIDGETS.get(req.id)
+        if widget is None:
+            return {**head, "status": 404, "error": "Widget desconhecido", "ms": 0}
+        if widget.roles is not None and (current_user.is_pending or not has_any_role(current_user, widget.roles)):
+            return {**head, "status": 403, "error": "Not enough permissions", "ms": 0}
+        try:
+            params = widget.parse_params(req.params)
+        except HTTPException as e:
+            return {**head, "status": e.status_code, "error": e.detail, "ms": 0}
+        async with limit:
+            return {**head, **await run_in_threadpool(_run_widget, widget, current_user, params)}
+
+    results = await asyncio.gather(*(resolve(w) for w in body.widgets))
+    return {
+        "widgets": list(results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -1,11 +1,18 @@
-"""Data Warehouse API — endpoints that serve pre-aggregated DW data for dashboards."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+"""
+Data Warehouse API — endpoints that serve pre-aggregated DW data for dashboards.
+
+Monthly breakdowns read the dw_agg_* rollups merged by the ETL
+(app/etl/rollups.py), not the fact tables. Responses are cached in memory
+per ETL generation (app/utils/dw_cache.py).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db
 from app import auth
 from app.auth import get_current_active_user, require_role
 from app.etl.etl_runner import run_full_etl
+from app.utils.dw_cache import dw_cache
 
 router = APIRouter()
 
@@ -18,6 +25,13 @@ def _build_response(data: list, summary: dict | None = None):
     return resp
 
 
+def _cached(db: Session, response: Response, endpoint: str, build, **params):
+    """build() servido da cache até à próxima geração do ETL (header X-DW-Generation)."""
+    generation = dw_cache.generation(db)
+    response.headers["X-DW-Generation"] = str(generation)
+    return dw_cache.get((endpoint, tuple(sorted(params.items())), generation), build)
+
+
 def _trend(current: float, previous: float) -> dict:
     if previous == 0:
         return {"trend": "+0%", "trend_direction": "neutral"}
@@ -47,203 +61,307 @@ async def trigger_etl(
 
 @router.get("/snapshot/latest")
 async def snapshot_latest(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
     """Latest daily snapshot with trend vs previous day."""
-    rows = db.execute(text("""
-        SELECT * FROM dw_fact_daily_snapshot
-        ORDER BY date_key DESC LIMIT 2
-    """)).mappings().all()
-    if not rows:
-        return _build_response([], {"total": 0})
-    latest = dict(rows[0])
-    prev = dict(rows[1]) if len(rows) > 1 else {}
-    summary = {
-        "date_key": latest["date_key"],
-        **_trend(latest.get("active_users", 0), prev.get("active_users", 0)),
-    }
-    return _build_response([latest], summary)
+    def build():
+        rows = db.execute(text("""
+            SELECT * FROM dw_fact_daily_snapshot
+            ORDER BY date_key DESC LIMIT 2
+        """)).mappings().all()
+        if not rows:
+            return _build_response([], {"total": 0})
+        latest = dict(rows[0])
+        prev = dict(rows[1]) if len(rows) > 1 else {}
+        summary = {
+            "date_key": latest["date_key"],
+            **_trend(latest.get("active_users", 0), prev.get("active_users", 0)),
+        }
+        return _build_response([latest], summary)
+
+    return _cached(db, response, "snapshot/latest", build)
 
 
 # ---------- Training ----------
 
 @router.get("/training/by-month")
 async def training_by_month(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     year: int = Query(default=None),
 ):
     """Certificates issued grouped by month."""
-    year_filter = "WHERE `year` = :year" if year else ""
-    params = {"year": year} if year else {}
-    rows = db.execute(text(f"""
-        SELECT * FROM dw_view_training_monthly
-        {year_filter}
-        ORDER BY `year`, `month`
-    """), params).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        year_filter = "WHERE `year` = :year" if year else ""
+        params = {"year": year} if year else {}
+        rows = db.execute(text(f"""
+            SELECT `year`, `month`, month_name_short,
+                   SUM(certificates) AS certificates,
+                   ROUND(SUM(hours_sum) / NULLIF(SUM(hours_count), 0), 1) AS avg_hours,
+                   ROUND(SUM(mpu_sum) / NULLIF(SUM(mpu_count), 0), 1) AS avg_mpu
+            FROM dw_agg_training_monthly
+            {year_filter}
+            GROUP BY `year`, `month`, month_name_short
+            ORDER BY `year`, `month`
+        """), params).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "training/by-month", build, year=year)
 
 
 @router.get("/training/by-course")
 async def training_by_course(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     limit: int = Query(default=10, le=50),
 ):
     """Top courses by certificates issued."""
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_training_by_course
-        ORDER BY certificates DESC
-        LIMIT :lim
-    """), {"lim": limit}).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT MAX(course_title) AS course_name,
+                   SUM(certificates) AS certificates,
+                   ROUND(SUM(approval_sum) / NULLIF(SUM(approval_count), 0), 1) AS avg_approval
+            FROM dw_agg_training_monthly
+            GROUP BY course_id
+            ORDER BY certificates DESC
+            LIMIT :lim
+        """), {"lim": limit}).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "training/by-course", build, limit=limit)
 
 
 # ---------- Tutoria ----------
 
 @router.get("/tutoria/by-category")
 async def tutoria_by_category(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
     """Tutoring errors grouped by error category."""
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_tutoria_by_category
-        ORDER BY total DESC
-    """)).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT MAX(category_name) AS category_name,
+                   SUM(total) AS total,
+                   SUM(resolved) AS resolved,
+                   ROUND(SUM(days_sum) / NULLIF(SUM(days_count), 0), 1) AS avg_days
+            FROM dw_agg_tutoria_monthly
+            WHERE category_id <> 0
+            GROUP BY category_id
+            ORDER BY total DESC
+        """)).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "tutoria/by-category", build)
 
 
 @router.get("/tutoria/by-month")
 async def tutoria_by_month(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     year: int = Query(default=None),
 ):
-    year_filter = "WHERE `year` = :year" if year else ""
-    params = {"year": year} if year else {}
-    rows = db.execute(text(f"""
-        SELECT * FROM dw_view_tutoria_monthly
-        {year_filter}
-        ORDER BY `year`, `month`
-    """), params).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        year_filter = "WHERE `year` = :year" if year else ""
+        params = {"year": year} if year else {}
+        rows = db.execute(text(f"""
+            SELECT `year`, `month`, month_name_short,
+                   SUM(total) AS total,
+                   SUM(resolved) AS resolved,
+                   ROUND(SUM(days_sum) / NULLIF(SUM(days_count), 0), 1) AS avg_days
+            FROM dw_agg_tutoria_monthly
+            {year_filter}
+            GROUP BY `year`, `month`, month_name_short
+            ORDER BY `year`, `month`
+        """), params).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "tutoria/by-month", build, year=year)
 
 
 @router.get("/tutoria/by-trainer")
 async def tutoria_by_trainer(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     limit: int = Query(default=10, le=50),
 ):
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_tutoria_by_trainer
-        ORDER BY total DESC
-        LIMIT :lim
-    """), {"lim": limit}).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT MAX(trainer_name) AS trainer_name,
+                   MAX(trainer_team_name) AS team_name,
+                   SUM(total) AS total,
+                   SUM(resolved) AS resolved,
+                   ROUND(SUM(days_sum) / NULLIF(SUM(days_count), 0), 1) AS avg_days
+            FROM dw_agg_tutoria_monthly
+            WHERE trainer_id <> 0
+            GROUP BY trainer_id
+            ORDER BY total DESC
+            LIMIT :lim
+        """), {"lim": limit}).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "tutoria/by-trainer", build, limit=limit)
 
 
 # ---------- Chamados ----------
 
 @router.get("/chamados/by-status")
 async def chamados_by_status(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_chamados_by_status
-        ORDER BY total DESC
-    """)).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT MAX(status_label) AS status_label, status_code,
+                   SUM(total) AS total,
+                   ROUND(SUM(days_sum) / NULLIF(SUM(days_count), 0), 1) AS avg_days
+            FROM dw_agg_chamados_monthly
+            WHERE status_code <> ''
+            GROUP BY status_code
+            ORDER BY total DESC
+        """)).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "chamados/by-status", build)
 
 
 @router.get("/chamados/by-month")
 async def chamados_by_month(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     year: int = Query(default=None),
 ):
-    year_filter = "WHERE `year` = :year" if year else ""
-    params = {"year": year} if year else {}
-    rows = db.execute(text(f"""
-        SELECT * FROM dw_view_chamados_monthly
-        {year_filter}
-        ORDER BY `year`, `month`
-    """), params).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        year_filter = "WHERE `year` = :year" if year else ""
+        params = {"year": year} if year else {}
+        rows = db.execute(text(f"""
+            SELECT `year`, `month`, month_name_short,
+                   SUM(total) AS total,
+                   SUM(resolved) AS resolved,
+                   ROUND(SUM(days_sum) / NULLIF(SUM(days_count), 0), 1) AS avg_days
+            FROM dw_agg_chamados_monthly
+            {year_filter}
+            GROUP BY `year`, `month`, month_name_short
+            ORDER BY `year`, `month`
+        """), params).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "chamados/by-month", build, year=year)
 
 
 @router.get("/chamados/by-type")
 async def chamados_by_type(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_chamados_by_type
-        ORDER BY total DESC
-    """)).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT NULLIF(`type`, '') AS `type`, NULLIF(`priority`, '') AS `priority`,
+                   SUM(total) AS total,
+                   SUM(resolved) AS resolved
+            FROM dw_agg_chamados_monthly
+            GROUP BY `type`, `priority`
+            ORDER BY total DESC
+        """)).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "chamados/by-type", build)
 
 
 # ---------- Internal Errors ----------
 
 @router.get("/internal-errors/by-month")
 async def internal_errors_by_month(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     year: int = Query(default=None),
 ):
-    year_filter = "WHERE `year` = :year" if year else ""
-    params = {"year": year} if year else {}
-    rows = db.execute(text(f"""
-        SELECT * FROM dw_view_internal_errors_monthly
-        {year_filter}
-        ORDER BY `year`, `month`
-    """), params).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        year_filter = "WHERE `year` = :year" if year else ""
+        params = {"year": year} if year else {}
+        rows = db.execute(text(f"""
+            SELECT `year`, `month`, month_name_short,
+                   SUM(total) AS total,
+                   SUM(with_learning_sheet) AS with_learning_sheet,
+                   SUM(with_action_plan) AS with_action_plan
+            FROM dw_agg_internal_errors_monthly
+            {year_filter}
+            GROUP BY `year`, `month`, month_name_short
+            ORDER BY `year`, `month`
+        """), params).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "internal-errors/by-month", build, year=year)
 
 
 @router.get("/internal-errors/by-team")
 async def internal_errors_by_team(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_internal_errors_by_team
-        ORDER BY total DESC
-    """)).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT MAX(team_name) AS team_name,
+                   SUM(total) AS total,
+                   SUM(with_learning_sheet) AS with_learning_sheet
+            FROM dw_agg_internal_errors_monthly
+            WHERE team_id <> 0
+            GROUP BY team_id
+            ORDER BY total DESC
+        """)).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "internal-errors/by-team", build)
 
 
 # ---------- Trend over time (for line charts) ----------
 
 @router.get("/snapshot/trend")
 async def snapshot_trend(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
     days: int = Query(default=30, le=365),
 ):
     """Daily snapshot trend for the last N days."""
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_snapshot_with_date
-        ORDER BY date_key DESC
-        LIMIT :days
-    """), {"days": days}).mappings().all()
-    data = [dict(r) for r in reversed(rows)]
-    return _build_response(data)
+    def build():
+        rows = db.execute(text("""
+            SELECT * FROM dw_view_snapshot_with_date
+            ORDER BY date_key DESC
+            LIMIT :days
+        """), {"days": days}).mappings().all()
+        data = [dict(r) for r in reversed(rows)]
+        return _build_response(data)
+
+    return _cached(db, response, "snapshot/trend", build, days=days)
 
 
 # ---------- Teams overview ----------
 
 @router.get("/teams/overview")
 async def teams_overview(
+    response: Response,
     db: Session = Depends(get_db),
     _user=Depends(require_role(auth.ADMIN_MANAGER_ROLES)),
 ):
-    rows = db.execute(text("""
-        SELECT * FROM dw_view_teams_overview
-        ORDER BY member_count DESC
-    """)).mappings().all()
-    return _build_response([dict(r) for r in rows])
+    def build():
+        rows = db.execute(text("""
+            SELECT team_name, manager_name, member_count, tutoria_errors, internal_errors
+            FROM dw_agg_teams
+            ORDER BY member_count DESC
+        """)).mappings().all()
+        return _build_response([dict(r) for r in rows])
+
+    return _cached(db, response, "teams/overview", build)
@@ -2,7 +2,7 @@
 Router para finalização de cursos e planos de formação
 Inclui lógica de verificação de conclusão e geração de certificados
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from datetime import datetime
@@ -12,6 +12,7 @@ import uuid
 from .. import models, schemas
 from ..database import get_db
 from ..auth import get_current_user, require_role, is_trainer_user
+from ..routes.certificates import prerender_certificate_pdf
 
 router = APIRouter(prefix="/api/finalization", tags=["finalization"])
 
@@ -324,6 +325,7 @@ async def get_plan_finalization_status(
 @router.post("/plan/{training_plan_id}/finalize")
 async def finalize_plan(
     training_plan_id: int,
+    background_tasks: BackgroundTasks,
     user_id: Optional[int] = None,
     request: schemas.FinalizePlanRequest = None,
     db: Session = Depends(get_db),
@@ -444,6 +446,10 @@ async def finalize_plan(
     
     db.commit()
     
+    # PDF gerado uma única vez, depois da resposta (cache em disco)
+    if certificate_id:
+        background_tasks.add_task(prerender_certificate_pdf, certificate_id)
+    
     return schemas.FinalizationResponse(
         success=True,
         message="Plano de formação finalizado com sucesso",
@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
 from app.database import get_db
-from app.auth import get_current_user, get_visible_user_ids
+from app.auth import get_current_user, visible_user_scope
 from app.models import (
     User, Senso, InternalError, InternalErrorActionPlan,
     InternalErrorActionItem, LearningSheet, InternalErrorClassification,
@@ -286,9 +286,9 @@ def list_internal_errors(
         pass  # vê tudo
     elif current_user.is_gerente or current_user.is_chefe_equipe:
         # Chefe de equipa → erros dos gravadores da sua equipa
-        visible_ids = get_visible_user_ids(db, current_user)
-        if visible_ids:
-            q = q.filter(InternalError.gravador_id.in_(visible_ids))
+        visible_scope = visible_user_scope(db, current_user)
+        if visible_scope is not None:
+            q = q.filter(InternalError.gravador_id.in_(visible_scope))
     elif _is_liberador(current_user):
         # Liberador → erros que registou ou que lhe estão atribuídos
         q = q.filter(
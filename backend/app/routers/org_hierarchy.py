@@ -4,14 +4,23 @@ Prefixo: /api/org
 """
 from __future__ import annotations
 
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session, joinedload
 
 from app.database import get_db
 from app.models import OrgNode, OrgNodeMember, OrgNodeAudit, User, Team, TeamMember
 from app.auth import get_current_active_user, require_role, ADMIN_ROLES
+from app.constants import ORG_TREE_CACHE_TTL_SECONDS
+from app.utils.org_closure import (
+    closure_insert_node, closure_move_subtree, closure_delete_node, is_descendant,
+)
 
 router = APIRouter(prefix="/api/org", tags=["org-hierarchy"])
 
@@ -62,30 +71,29 @@ def _node_to_dict(node: OrgNode, include_members: bool = False) -> dict:
     return d
 
 
+def _children_index(nodes: list[OrgNode]) -> dict[Optional[int], list[OrgNode]]:
+    """Índice parent_id → filhos ordenados (position, id), construído numa passagem."""
+    children: dict[Optional[int], list[OrgNode]] = {}
+    for n in nodes:
+        children.setdefault(n.parent_id, []).append(n)
+    for siblings in children.values():
+        siblings.sort(key=lambda n: (n.position, n.id))
+    return children
+
+
 def _build_tree(nodes: list[OrgNode], parent_id: Optional[int] = None) -> list[dict]:
-    """Recursively build a nested tree from a flat list."""
-    result = []
-    children = [n for n in nodes if n.parent_id == parent_id]
-    children.sort(key=lambda n: (n.position, n.id))
-    for child in children:
-        d = _node_to_dict(child, include_members=True)
-        d["children"] = _build_tree(nodes, child.id)
-        result.append(d)
-    return result
-
-
-def _get_descendant_ids(db: Session, node_id: int) -> set[int]:
-    """Return all descendant node IDs (to prevent cycles)."""
-    result: set[int] = set()
-    queue = [node_id]
-    while queue:
-        current = queue.pop()
-        children = db.query(OrgNode.id).filter(OrgNode.parent_id == current).all()
-        for (cid,) in children:
-            if cid not in result:
-                result.add(cid)
-                queue.append(cid)
-    return result
+    """Build a nested tree from a flat list in O(n) using a parent → children index."""
+    children = _children_index(nodes)
+
+    def _subtree(pid: Optional[int]) -> list[dict]:
+        result = []
+        for child in children.get(pid, []):
+            d = _node_to_dict(child, include_members=True)
+            d["children"] = _subtree(child.id)
+            result.append(d)
+        return result
+
+    return _subtree(parent_id)
 
 
 def _audit(db: Session, node: OrgNode, action: str,
@@ -101,23 +109,78 @@ def _audit(db: Session, node: OrgNode, action: str,
     ))
 
 
+class _OrgTreeCache:
+    """
+    Snapshots serializados de /tree e /visual-hierarchy, partilhados por todos
+    os utilizadores (a árvore não depende de quem a pede).
+
+    Cada endpoint que altera o organograma chama invalidate() depois do
+    commit; isso sobe a versão e descarta os snapshots. Um snapshot só é
+    guardado se a versão não mudou enquanto era construído. O TTL limita o
+    tempo em que alterações feitas fora deste router (nomes de utilizadores,
+    equipas do Master Data) ficam por reflectir.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._snapshots: dict[str, tuple[int, float, bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._snapshots.clear()
+
+    def get(self, key: str, build: Callable[[], object]) -> tuple[bytes, str]:
+        """Devolve (corpo JSON, ETag), construindo o snapshot se necessário."""
+        entry = self._snapshots.get(key)
+        if entry and entry[0] == self.version and time.monotonic() < entry[1]:
+            return entry[2], entry[3]
+
+        version = self.version
+        body = json.dumps(jsonable_encoder(build()), ensure_ascii=False).encode("utf-8")
+        etag = '"org-' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        with self._lock:
+            if self.version == version:
+                self._snapshots[key] = (version, time.monotonic() + self.ttl_seconds, body, etag)
+        return body, etag
+
+
+_tree_cache = _OrgTreeCache(ORG_TREE_CACHE_TTL_SECONDS)
+
+
+def _cached_json(request: Request, key: str, build: Callable[[], object]) -> Response:
+    """Resposta JSON a partir do snapshot, com ETag e 304 (If-None-Match)."""
+    body, etag = _tree_cache.get(key, build)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # ── Tree endpoint (todos os autenticados podem ver) ───────────────────────────
 
 @router.get("/tree")
 def get_tree(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Devolve a hierarquia completa como árvore aninhada."""
-    nodes = (
-        db.query(OrgNode)
-        .options(
-            joinedload(OrgNode.members).joinedload(OrgNodeMember.user),
+    """Devolve a hierarquia completa como árvore aninhada (snapshot em cache, com ETag)."""
+    def _build():
+        nodes = (
+            db.query(OrgNode)
+            .options(
+                joinedload(OrgNode.members).joinedload(OrgNodeMember.user),
+            )
+            .filter(OrgNode.is_active == True)
+            .all()
         )
-        .filter(OrgNode.is_active == True)
-        .all()
-    )
-    return _build_tree(nodes, parent_id=None)
+        return _build_tree(nodes, parent_id=None)
+
+    return _cached_json(request, "tree", _build)
 
 
 @router.get("/nodes")
@@ -153,6 +216,7 @@ def create_node(
     )
     db.add(node)
     db.flush()
+    closure_insert_node(db, node)
     _audit(db, node, "CREATE", None, {"name": node.name, "parent_id": node.parent_id}, current_user.id)
 
     # Link to a Master Data team if provided
@@ -162,6 +226,7 @@ def create_node(
             team.node_id = node.id
 
     db.commit()
+    _tree_cache.invalidate()
     db.refresh(node)
     return _node_to_dict(node)
 
@@ -186,6 +251,7 @@ def update_node(
 
     _audit(db, node, "UPDATE", old, new, current_user.id)
     db.commit()
+    _tree_cache.invalidate()
     db.refresh(node)
     return _node_to_dict(node)
 
@@ -211,6 +277,7 @@ def delete_node(
     try:
         _audit(db, node, "DELETE", {"name": node.name, "parent_id": node.parent_id}, None, current_user.id)
         db.flush()  # persist audit record before deleting node
+        closure_delete_node(db, node_id)
         db.delete(node)
         db.commit()
     except SAIntegrityError:
@@ -218,8 +285,10 @@ def delete_node(
         # Retry without audit
         node = db.query(OrgNode).filter(OrgNode.id == node_id).first()
         if node:
+            closure_delete_node(db, node_id)
             db.delete(node)
             db.commit()
+    _tree_cache.invalidate()
 
 
 @router.post("/nodes/{node_id}/move")
@@ -237,20 +306,22 @@ def move_node(
     if body.new_parent_id is not None:
         if body.new_parent_id == node_id:
             raise HTTPException(400, "Um nível não pode ser pai de si próprio")
-        descendants = _get_descendant_ids(db, node_id)
-        if body.new_parent_id in descendants:
+        if is_descendant(db, node_id, body.new_parent_id):
             raise HTTPException(400, "Ciclo hierárquico detectado: o pai não pode ser um descendente")
         parent = db.query(OrgNode).filter(OrgNode.id == body.new_parent_id).first()
         if not parent:
             raise HTTPException(404, "Novo nó pai não encontrado")
 
     old = {"parent_id": node.parent_id, "position": node.position}
+    if node.parent_id != body.new_parent_id:
+        closure_move_subtree(db, node_id, body.new_parent_id)
     node.parent_id = body.new_parent_id
     node.position = body.position
     new = {"parent_id": node.parent_id, "position": node.position}
 
     _audit(db, node, "MOVE", old, new, current_user.id)
     db.commit()
+    _tree_cache.invalidate()
     db.refresh(node)
     return _node_to_dict(node)
 
@@ -310,6 +381,7 @@ def add_member(
            {"user_id": body.user_id, "user_name": user.full_name},
            current_user.id)
     db.commit()
+    _tree_cache.invalidate()
     return {"ok": True, "user_id": body.user_id, "user_name": user.full_name}
 
 
@@ -335,6 +407,7 @@ def remove_member(
            current_user.id)
     db.delete(member)
     db.commit()
+    _tree_cache.invalidate()
 
 
 # ── Auditoria ──────────────────────────────────────────────────────────────────
@@ -422,6 +495,7 @@ def link_team_to_node(
     team.node_id = node_id
     _audit(db, node, "LINK_TEAM", None, {"team_id": team_id, "team_name": team.name}, current_user.id)
     db.commit()
+    _tree_cache.invalidate()
     return {"ok": True, "node_id": node_id, "team_id": team_id, "team_name": team.name}
 
 
@@ -482,8 +556,10 @@ def set_staff(
         )
         db.add(root)
         db.flush()
+        closure_insert_node(db, root)
         _audit(db, root, "CREATE", None, {"name": root.name, "auto_created": True}, current_user.id)
         db.commit()
+        _tree_cache.invalidate()
         db.refresh(root)
 
     def _assign(role_key: str, user_id: Optional[int]):
@@ -517,6 +593,7 @@ def set_staff(
     _assign("DIRECTOR", body.director_id)
     _assign("MANAGER", body.manager_id)
     db.commit()
+    _tree_cache.invalidate()
 
     return {"ok": True}
 
@@ -525,6 +602,7 @@ def set_staff(
 
 @router.get("/visual-hierarchy")
 def get_visual_hierarchy(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
@@ -533,7 +611,12 @@ def get_visual_hierarchy(
     Estrutura: Diretora → Gerente → Departamentos → Setores → Equipas → Membros.
     Os dois primeiros níveis (Diretor e Gerente) são sempre mostrados,
     mesmo quando ninguém está atribuído.
+    Servida a partir de um snapshot em cache (ETag / 304).
     """
+    return _cached_json(request, "visual-hierarchy", lambda: _visual_hierarchy(db))
+
+
+def _visual_hierarchy(db: Session) -> dict:
     # Load all active org_nodes with members
     nodes = (
         db.query(OrgNode)
@@ -544,10 +627,10 @@ def get_visual_hierarchy(
         .all()
     )
 
-    node_map = {n.id: n for n in nodes}
+    children = _children_index(nodes)
 
     # Root node = the organisation
-    root_nodes = [n for n in nodes if n.parent_id is None]
+    root_nodes = children.get(None, [])
     if not root_nodes:
         # Os 2 primeiros níveis (Diretor e Gerente) são sempre fixos —
         # devolver estrutura vazia mas com os campos obrigatórios.
@@ -606,10 +689,7 @@ def get_visual_hierarchy(
         }
 
     # Level 1 = departments (direct children of root)
-    dept_nodes = sorted(
-        [n for n in nodes if n.parent_id == root.id],
-        key=lambda x: (x.position, x.id),
-    )
+    dept_nodes = children.get(root.id, [])
 
     departments = []
     for dept in dept_nodes:
@@ -619,10 +699,7 @@ def get_visual_hierarchy(
         ]
 
         # Level 2 = sectors/products (children of dept)
-        sector_nodes = sorted(
-            [n for n in nodes if n.parent_id == dept.id],
-            key=lambda x: (x.position, x.id),
-        )
+        sector_nodes = children.get(dept.id, [])
 
         sectors = []
         for sector in sector_nodes:
@@ -665,3 +742,4 @@ def unlink_team_from_node(
         raise HTTPException(404, "Ligação não encontrada")
     team.node_id = None
     db.commit()
+    _tree_cache.invalidate()
@@ -0,0 +1,72 @@
+"""
+Canal SSE por utilizador (Server-Sent Events).
+
+GET /api/events/stream — mantém a ligação aberta e envia:
+  notification  → o contador de notificações por ler mudou
+  lesson        → estado de uma aula mudou (formando e formadores do plano)
+  review-queue  → a fila de correcção de desafios mudou (só revisores)
+
+Os dados continuam a ser lidos pelos endpoints normais; o evento só diz ao
+cliente quando vale a pena reler. Um cliente parado custa uma ligação
+aberta em vez de um pedido a cada poucos segundos.
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.auth import get_current_user, oauth2_scheme
+from app.constants import REALTIME_KEEPALIVE_SECONDS
+from app.database import SessionLocal
+from app.utils.events import REVIEW_QUEUE_CHANNEL, broker, user_channel
+
+router = APIRouter()
+
+# Mesmos perfis que podem ver /api/challenges/pending-review/list
+REVIEW_QUEUE_FLAGS = ("is_admin", "is_formador", "is_gerente", "is_tutor")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data if data is not None else {}, default=str)}\n\n"
+
+
+@router.get("/events/stream")
+async def event_stream(request: Request, token: str = Depends(oauth2_scheme)):
+    # Autenticação com uma sessão própria e curta: a ligação SSE fica aberta
+    # muito tempo e não deve prender uma ligação do pool da BD.
+    db = SessionLocal()
+    try:
+        user = await get_current_user(token, db)
+        channels = [user_channel(user.id)]
+        if any(getattr(user, flag, False) for flag in REVIEW_QUEUE_FLAGS):
+            channels.append(REVIEW_QUEUE_CHANNEL)
+        is_active = user.is_active
+    finally:
+        db.close()
+    if not is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    async def stream():
+        sub = broker.subscribe(channels)
+        try:
+            yield f"retry: 5000\n{_sse('ready', {'channels': sorted(sub.channels)})}"
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(sub.queue.get(), timeout=REALTIME_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event, data)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",      # nginx: não fazer buffer do stream
+            "Content-Encoding": "identity",  # GZipMiddleware deixa passar sem comprimir (e sem buffer)
+        },
+    )
@@ -3,12 +3,14 @@ Portal de Relatórios — analytics cross-portal filtrados por role.
 ADMIN=todos | MANAGER=equipa | TRAINER=tutorados | STUDENT/TRAINEE=próprios
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, case, text
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, case, or_, select, text
 from typing import Optional, List
 from datetime import date
-from app.database import get_db
-from app.auth import get_current_user, get_visible_user_ids
+from app.constants import INCIDENTS_EXPORT_BATCH, INCIDENTS_PAGE_SIZE, MAX_PAGE_SIZE
+from app.database import SessionLocal, get_db
+from app.auth import get_current_user, visible_user_scope
 from app.models import (
     User, Team,
     TutoriaError, TutoriaActionPlan,
@@ -18,16 +20,26 @@ from app.models import (
     ErrorImpact, ErrorOrigin, ErrorDetectedBy, Department, Activity,
     Bank, ErrorCategory, Product,
 )
+from app.utils import dw_reports
+from app.utils.exports import CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE, attachment_headers, iter_csv, iter_xlsx
+from app.utils.report_cache import ALL_DOMAINS, report_cache, scope_key
 
 router = APIRouter()
 
 
 # ── Scope helpers ─────────────────────────────────────────────────────────────
 
-def _team_user_ids(user: User, db: Session) -> Optional[list]:
-    """Returns list of user IDs in scope, or None for 'all'."""
-    from app.auth import get_visible_user_ids
-    return get_visible_user_ids(db, user)
+def _team_user_ids(user: User, db: Session):
+    """
+    Returns the user-ID scope as a SQL subquery (use with `col.in_(scope)`),
+    or None for 'all'. Resolved by the database — no Python ID lists.
+    """
+    return visible_user_scope(db, user)
+
+
+def _scope_sql(db: Session, scope) -> str:
+    """Scope subquery rendered as SQL for the raw text() analytics queries (only integer literals)."""
+    return str(scope.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
 
 
 def _filter_users(q, model_col, scope_ids):
@@ -36,6 +48,34 @@ def _filter_users(q, model_col, scope_ids):
     return q
 
 
+def _cached(endpoint: str, db: Session, user: User, build, domains: tuple, dw_build=None, **filters):
+    """
+    build(db, user) servido por report_cache, com chave (endpoint, âmbito, filtros).
+    Com uma carga ETL válida usa dw_build (factos do DW) e a carga entra na chave.
+    O recálculo em background (SWR) usa uma sessão própria.
+    """
+    generation = dw_reports.dw_generation(db) if dw_build is not None else None
+    if generation is not None:
+        build = dw_build
+    scope = _team_user_ids(user, db)
+    key = (
+        endpoint,
+        scope_key(_scope_sql(db, scope) if scope is not None else None, user.can_see_all, user.is_gerente),
+        tuple(sorted(filters.items())),
+        generation,
+    )
+    user_id = user.id
+
+    def refresh():
+        bg = SessionLocal()
+        try:
+            return build(bg, bg.get(User, user_id))
+        finally:
+            bg.close()
+
+    return report_cache.get(key, domains, lambda: build(db, user), refresh)
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @router.get("/relatorios/overview")
@@ -43,6 +83,11 @@ def overview(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    return _cached("overview", db, current_user, _overview, ALL_DOMAINS,
+                   dw_build=dw_reports.overview)
+
+
+def _overview(db: Session, current_user: User):
     scope = _team_user_ids(current_user, db)
 
     # Users in scope
@@ -109,6 +154,11 @@ def formacoes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    return _cached("formacoes", db, current_user, _formacoes, ("training", "teams"),
+                   dw_build=dw_reports.formacoes)
+
+
+def _formacoes(db: Session, current_user: User):
     scope = _team_user_ids(current_user, db)
 
     # Enrollments
@@ -184,6 +234,11 @@ def tutoria_relatorio(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    return _cached("tutoria", db, current_user, _tutoria_relatorio, ("tutoria", "teams"),
+                   dw_build=dw_reports.tutoria)
+
+
+def _tutoria_relatorio(db: Session, current_user: User):
     scope = _team_user_ids(current_user, db)
 
     eq = db.query(TutoriaError).filter(TutoriaError.is_active == True)
@@ -229,7 +284,12 @@ def teams_relatorio(
 ):
     if not current_user.is_gestor_or_above:
         raise HTTPException(status_code=403, detail="Acesso restrito")
+    manager_id = current_user.id if current_user.is_gerente and not current_user.is_admin else None
+    return _cached("teams", db, current_user, _teams_relatorio, ALL_DOMAINS,
+                   dw_build=dw_reports.teams, manager_id=manager_id)
+
 
+def _teams_relatorio(db: Session, current_user: User):
     q = db.query(Team).filter(Team.is_active == True)
     if current_user.is_gerente and not current_user.is_admin:
         q = q.filter(Team.manager_id == current_user.id)
@@ -280,9 +340,13 @@ def members_relatorio(
 ):
     if not current_user.is_gestor_or_above:
         raise HTTPException(status_code=403, detail="Acesso restrito")
+    return _cached("members", db, current_user, _members_relatorio, ALL_DOMAINS,
+                   dw_build=dw_reports.members)
 
+
+def _members_relatorio(db: Session, current_user: User):
     scope = _team_user_ids(current_user, db)
-    if not scope:
+    if scope is None:
         return []
 
     users = db.query(User).filter(User.id.in_(scope), User.is_active == True).all()
@@ -320,9 +384,46 @@ def members_relatorio(
 
 # ── Incidents Report ──────────────────────────────────────────────────────────
 
-@router.get("/relatorios/incidents")
-def incidents_report(
-    # Filters
+Tutorado = aliased(User)
+Creator = aliased(User)
+Approver = aliased(User)
+
+# Colunas do relatório — só o que a tabela e o Excel mostram, sem objectos ORM
+_INCIDENT_COLUMNS = (
+    TutoriaError.id,
+    TutoriaError.date_occurrence,
+    TutoriaError.date_detection,
+    TutoriaError.date_solution,
+    TutoriaError.office,
+    Bank.name.label("bank_name"),
+    Product.name.label("product_name"),
+    ErrorCategory.name.label("category_name"),
+    TutoriaError.reference_code,
+    TutoriaError.final_client,
+    TutoriaError.amount,
+    TutoriaError.currency,
+    TutoriaError.impact_level,
+    ErrorImpact.name.label("impact_name"),
+    ErrorOrigin.name.label("origin_name"),
+    TutoriaError.clasificacion,
+    TutoriaError.severity,
+    TutoriaError.recurrence_type,
+    ErrorDetectedBy.name.label("detected_by_name"),
+    Department.name.label("department_name"),
+    Activity.name.label("activity_name"),
+    TutoriaError.description,
+    TutoriaError.solution,
+    TutoriaError.action_plan_text,
+    TutoriaError.escalado,
+    TutoriaError.comentarios_reunion,
+    Tutorado.full_name.label("tutorado_name"),
+    Creator.full_name.label("created_by_name"),
+    Approver.full_name.label("approver_name"),
+    TutoriaError.status,
+)
+
+
+def incident_params(
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
     impact_id: Optional[int] = Query(None),
@@ -335,101 +436,232 @@ def incidents_report(
     product_id: Optional[int] = Query(None),
     recurrence_type: Optional[str] = Query(None),
     severity: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, max_length=200),  # pesquisa livre
+) -> dict:
+    """Filtros do relatório de incidências (partilhados pela listagem e pela exportação)."""
+    return dict(locals())
+
+
+def _incident_conditions(db: Session, user: User, p: dict) -> list:
+    conds = []
+    scope_ids = _team_user_ids(user, db)
+    if scope_ids is not None:
+        conds.append(TutoriaError.tutorado_id.in_(scope_ids))
+    if p["date_from"]:
+        conds.append(TutoriaError.date_occurrence >= p["date_from"])
+    if p["date_to"]:
+        conds.append(TutoriaError.date_occurrence <= p["date_to"])
+    for key, col in (
+        ("impact_id", TutoriaError.impact_id),
+        ("impact_level", TutoriaError.impact_level),
+        ("origin_id", TutoriaError.origin_id),
+        ("bank_id", TutoriaError.bank_id),
+        ("department_id", TutoriaError.department_id),
+        ("detected_by_id", TutoriaError.detected_by_id),
+        ("category_id", TutoriaError.category_id),
+        ("product_id", TutoriaError.product_id),
+        ("recurrence_type", TutoriaError.recurrence_type),
+        ("severity", TutoriaError.severity),
+    ):
+        if p[key]:
+            conds.append(col == p[key])
+    text_q = (p["q"] or "").strip()
+    if text_q:
+        pattern = f"%{text_q}%"
+        conds.append(or_(
+            TutoriaError.description.ilike(pattern),
+            TutoriaError.final_client.ilike(pattern),
+            Bank.name.ilike(pattern),
+            TutoriaError.reference_code.ilike(pattern),
+            Tutorado.full_name.ilike(pattern),
+            TutoriaError.solution.ilike(pattern),
+            TutoriaError.action_plan_text.ilike(pattern),
+        ))
+    return conds
+
+
+def _incidents_select(*columns):
+    """SELECT sobre tutoria_errors com os LEFT JOINs das colunas do relatório."""
+    return (
+        select(*columns)
+        .select_from(TutoriaError)
+        .outerjoin(Bank, Bank.id == TutoriaError.bank_id)
+        .outerjoin(Product, Product.id == TutoriaError.product_id)
+        .outerjoin(ErrorCategory, ErrorCategory.id == TutoriaError.category_id)
+        .outerjoin(ErrorImpact, ErrorImpact.id == TutoriaError.impact_id)
+        .outerjoin(ErrorOrigin, ErrorOrigin.id == TutoriaError.origin_id)
+        .outerjoin(ErrorDetectedBy, ErrorDetectedBy.id == TutoriaError.detected_by_id)
+        .outerjoin(Department, Department.id == TutoriaError.department_id)
+        .outerjoin(Activity, Activity.id == TutoriaError.activity_id)
+        .outerjoin(Tutorado, Tutorado.id == TutoriaError.tutorado_id)
+        .outerjoin(Creator, Creator.id == TutoriaError.created_by_id)
+        .outerjoin(Approver, Approver.id == TutoriaError.approver_id)
+    )
+
+
+_INCIDENT_ORDER = (TutoriaError.date_occurrence.desc(), TutoriaError.id.desc())
+
+
+def _incident_row(r) -> dict:
+    row = dict(r._mapping)
+    for key in ("date_occurrence", "date_detection", "date_solution"):
+        row[key] = str(row[key]) if row[key] else None
+    return row
+
+
+def _count_if(cond):
+    return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+
+@router.get("/relatorios/incidents")
+def incidents_report(
+    params: dict = Depends(incident_params),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(INCIDENTS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Returns incidents list for the report with optional filters, scoped by role."""
+    """
+    Incidências paginadas com filtros, scoped by role.
+
+    {items, total, page, page_size, total_pages, summary} — o summary tem os
+    contadores dos KPIs sobre todas as linhas filtradas (não só a página).
+    """
     if not current_user.is_gestor_or_above:
         raise HTTPException(403, "Acesso restrito")
 
-    q = (
-        db.query(TutoriaError)
-        .options(
-            joinedload(TutoriaError.tutorado),
-            joinedload(TutoriaError.creator),
-            joinedload(TutoriaError.approver),
-            joinedload(TutoriaError.bank),
-            joinedload(TutoriaError.impact),
-            joinedload(TutoriaError.origin),
-            joinedload(TutoriaError.detected_by),
-            joinedload(TutoriaError.department),
-            joinedload(TutoriaError.activity),
-            joinedload(TutoriaError.category),
-            joinedload(TutoriaError.product),
+    conds = _incident_conditions(db, current_user, params)
+    summary = db.execute(
+        _incidents_select(
+            func.count(TutoriaError.id).label("total"),
+            _count_if(TutoriaError.impact_level == "ALTA").label("high_impact"),
+            _count_if(TutoriaError.impact_level == "BAIXA").label("low_impact"),
+            _count_if(TutoriaError.recurrence_type.in_(("RECURRENT", "SYSTEMIC"))).label("recurrent"),
+        ).where(*conds)
+    ).one()
+    rows = db.execute(
+        _incidents_select(*_INCIDENT_COLUMNS)
+        .where(*conds)
+        .order_by(*_INCIDENT_ORDER)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    ).all()
+
+    total = summary.total
+    return {
+        "items": [_incident_row(r) for r in rows],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size,
+        "summary": {
+            "high_impact": int(summary.high_impact),
+            "low_impact": int(summary.low_impact),
+            "recurrent": int(summary.recurrent),
+        },
+    }
+
+
+# Exportação — cabeçalhos sempre em espanhol (requisito regulatório)
+_EXPORT_COLUMNS = (
+    ("Fecha error", 12),
+    ("Fecha Detección", 14),
+    ("Oficina", 8),
+    ("Cliente", 12),
+    ("Producto", 16),
+    ("EVENTO", 18),
+    ("Referencia", 22),
+    ("Cliente (final)", 40),
+    ("Importe del evento", 16),
+    ("Divisa", 6),
+    ("Clasificación", 14),
+    ("Origen", 16),
+    ("Tipología del error", 22),
+    ("Impacto", 36),
+    ("Recurrencia", 14),
+    ("Detectado por", 24),
+    ("Descripción incidencia", 60),
+    ("Análisis y Plan de Acción", 60),
+    ("Escalado", 14),
+    ("Comentarios vistos en la reunión", 60),
+)
+
+_EXPORT_IMPACT = {"ALTA": "Alto", "BAIXA": "Baixo"}
+_EXPORT_RECURRENCE = {
+    "SI": "Sí", "NO": "No", "PERIODICA": "Periódica",
+    "FIRST": "Primera Vez", "RECURRENT": "Recurrente", "SYSTEMIC": "Sistémico",
+}
+
+
+def _es_date(d) -> str:
+    return d.strftime("%d/%m/%Y") if d else ""
+
+
+def _export_rows(db: Session, user_id: int, params: dict):
+    """Linhas da exportação lidas em streaming (sessão própria, cursor no servidor)."""
+    try:
+        user = db.get(User, user_id)
+        stmt = (
+            _incidents_select(*_INCIDENT_COLUMNS)
+            .where(*_incident_conditions(db, user, params))
+            .order_by(*_INCIDENT_ORDER)
+            .execution_options(yield_per=INCIDENTS_EXPORT_BATCH)
         )
-    )
+        for r in db.execute(stmt):
+            yield (
+                _es_date(r.date_occurrence),
+                _es_date(r.date_detection),
+                r.office or "",
+                r.bank_name or "",
+                r.product_name or "",
+                r.activity_name or "",
+                r.reference_code or "",
+                r.final_client or "",
+                r.amount if r.amount is not None else "",
+                r.currency or "",
+                r.clasificacion or "",
+                r.origin_name or "",
+                r.category_name or "",
+                _EXPORT_IMPACT.get(r.impact_level) or r.impact_name or "",
+                _EXPORT_RECURRENCE.get(r.recurrence_type, r.recurrence_type or ""),
+                r.detected_by_name or "",
+                r.description or "",
+                r.action_plan_text or "",
+                r.escalado or "",
+                r.comentarios_reunion or "",
+            )
+    finally:
+        db.close()
+
+
+@router.get("/relatorios/incidents/export")
+def incidents_export(
+    fmt: str = Query("xlsx", alias="format", pattern="^(csv|xlsx)$"),
+    params: dict = Depends(incident_params),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Exporta todas as incidências filtradas (CSV ou XLSX) em streaming.
 
-    # Scope by role
-    scope_ids = _team_user_ids(current_user, db)
-    if scope_ids is not None:
-        q = q.filter(TutoriaError.tutorado_id.in_(scope_ids))
-
-    # Apply filters
-    if date_from:
-        q = q.filter(TutoriaError.date_occurrence >= date_from)
-    if date_to:
-        q = q.filter(TutoriaError.date_occurrence <= date_to)
-    if impact_id:
-        q = q.filter(TutoriaError.impact_id == impact_id)
-    if impact_level:
-        q = q.filter(TutoriaError.impact_level == impact_level)
-    if origin_id:
-        q = q.filter(TutoriaError.origin_id == origin_id)
-    if bank_id:
-        q = q.filter(TutoriaError.bank_id == bank_id)
-    if department_id:
-        q = q.filter(TutoriaError.department_id == department_id)
-    if detected_by_id:
-        q = q.filter(TutoriaError.detected_by_id == detected_by_id)
-    if category_id:
-        q = q.filter(TutoriaError.category_id == category_id)
-    if product_id:
-        q = q.filter(TutoriaError.product_id == product_id)
-    if recurrence_type:
-        q = q.filter(TutoriaError.recurrence_type == recurrence_type)
-    if severity:
-        q = q.filter(TutoriaError.severity == severity)
-
-    errors = q.order_by(TutoriaError.date_occurrence.desc()).all()
-
-    def _safe_name(obj):
-        return obj.name if obj else None
-
-    return [
-        {
-            "id": e.id,
-            "date_occurrence": str(e.date_occurrence) if e.date_occurrence else None,
-            "date_detection": str(e.date_detection) if getattr(e, 'date_detection', None) else None,
-            "date_solution": str(e.date_solution) if getattr(e, 'date_solution', None) else None,
-            "office": getattr(e, 'office', None),
-            "bank_name": _safe_name(getattr(e, 'bank', None)),
-            "product_name": _safe_name(getattr(e, 'product', None)),
-            "category_name": _safe_name(e.category) if e.category else None,
-            "reference_code": getattr(e, 'reference_code', None),
-            "final_client": getattr(e, 'final_client', None),
-            "amount": getattr(e, 'amount', None),
-            "currency": getattr(e, 'currency', None),
-            "impact_level": getattr(e, 'impact_level', None),
-            "impact_name": _safe_name(getattr(e, 'impact', None)),
-            "origin_name": _safe_name(getattr(e, 'origin', None)),
-            "clasificacion": getattr(e, 'clasificacion', None),
-            "severity": e.severity,
-            "recurrence_type": getattr(e, 'recurrence_type', None),
-            "detected_by_name": _safe_name(getattr(e, 'detected_by', None)),
-            "department_name": _safe_name(getattr(e, 'department', None)),
-            "activity_name": _safe_name(getattr(e, 'activity', None)),
-            "description": e.description,
-            "solution": getattr(e, 'solution', None),
-            "action_plan_text": getattr(e, 'action_plan_text', None),
-            "escalado": getattr(e, 'escalado', None),
-            "comentarios_reunion": getattr(e, 'comentarios_reunion', None),
-            "tutorado_name": e.tutorado.full_name if e.tutorado else None,
-            "created_by_name": e.creator.full_name if e.creator else None,
-            "approver_name": e.approver.full_name if getattr(e, 'approver', None) else None,
-            "status": e.status,
-        }
-        for e in errors
-    ]
+    As linhas são lidas com um cursor em lotes e escritas à medida que
+    chegam, por isso um ano de incidências não fica todo em memória.
+    """
+    if not current_user.is_gestor_or_above:
+        raise HTTPException(403, "Acesso restrito")
+
+    # Sessão própria: a da dependência fecha antes de o corpo ser enviado
+    rows = _export_rows(SessionLocal(), current_user.id, params)
+    header = [name for name, _ in _EXPORT_COLUMNS]
+    filename = f"Formulario_unico_Trade_Incidencias_{date.today().isoformat()}.{fmt}"
+    if fmt == "csv":
+        return StreamingResponse(iter_csv(header, rows), media_type=CSV_MEDIA_TYPE,
+                                 headers=attachment_headers(filename))
+    return StreamingResponse(
+        iter_xlsx(header, rows, sheet_title="DETALLE", widths=[w for _, w in _EXPORT_COLUMNS]),
+        media_type=XLSX_MEDIA_TYPE,
+        # XLSX já é um zip — sem GZip por cima
+        headers={**attachment_headers(filename), "Content-Encoding": "identity"},
+    )
 
 
 @router.get("/relatorios/incidents/filters")
@@ -459,23 +691,14 @@ def tutoria_analytics(
     db: Session = Depends(get_db),
 ):
     """Deep analytics for the Tutoria dashboard — 10 dimensions."""
-    scope = _team_user_ids(current_user, db)
-    if scope is not None and len(scope) == 0:
-        return {
-            "financial": {"total_amount": 0, "with_amount": 0, "total": 0, "max_amount": 0, "by_severity": []},
-            "pending_solution": 0,
-            "escalated": 0,
-            "by_origin": [],
-            "by_impact": [],
-            "resolution_time_by_severity": [],
-            "monthly": [],
-            "action_items": {"total": 0, "completed": 0, "overdue": 0},
-            "avg_weights": {"liberador": 0, "gravador": 0, "tutor": 0},
-            "recurrence": {"recurrent": 0, "non_recurrent": 0, "by_type": []},
-        }
+    return _cached("tutoria-analytics", db, current_user, _tutoria_analytics, ("tutoria", "teams"),
+                   dw_build=dw_reports.tutoria_analytics)
+
 
+def _tutoria_analytics(db: Session, current_user: User):
+    scope = _team_user_ids(current_user, db)
     scope_filter = (
-        f"AND te.tutorado_id IN ({','.join(str(i) for i in scope)})"
+        f"AND te.tutorado_id IN ({_scope_sql(db, scope)})"
         if scope is not None else ""
     )
 
@@ -0,0 +1,92 @@
+"""
+Pesquisa global — GET /api/search
+
+Pesquisa em texto livre sobre erros de tutoria, chamados, fichas de
+aprendizagem e FAQs do chatbot (índice em app/utils/search_index.py).
+Cada fonte respeita a mesma visibilidade das listagens respectivas.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import String, exists, func, literal, or_
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.database import get_db
+from app.models import ChatFAQ, Chamado, SearchDocument, TutoriaError, TutoriaLearningSheet, User
+from app.routers.chamados import _scoped_chamado_filters
+from app.routers.tutoria import error_scope_filters, is_tutor_or_above
+from app.utils.search_index import SOURCES, search
+
+router = APIRouter()
+
+Doc = SearchDocument
+
+
+class SearchHitOut(BaseModel):
+    source: str          # error | chamado | learning_sheet | faq
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchResultsOut(BaseModel):
+    items: List[SearchHitOut]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
+def _visibility(db: Session, user: User, sources: list[str]) -> dict:
+    """{source: [condições sobre SearchDocument]} com as regras de cada listagem."""
+    rules = {}
+    if "error" in sources:
+        # Igual a /api/tutoria/errors
+        rules["error"] = [exists().where(
+            TutoriaError.id == Doc.source_id,
+            TutoriaError.is_active == True,
+            *error_scope_filters(db, user),
+        )]
+    if "chamado" in sources:
+        # Igual a /api/chamados
+        rules["chamado"] = [exists().where(
+            Chamado.id == Doc.source_id,
+            *_scoped_chamado_filters(db, user, None, None, None),
+        )]
+    if "learning_sheet" in sources:
+        # /learning-sheets (gestor: todas; tutor: as suas) + /learning-sheets/mine
+        sheet_filters = []
+        if not user.is_gestor_or_above:
+            own = [TutoriaLearningSheet.tutorado_id == user.id]
+            if is_tutor_or_above(user):
+                own.append(TutoriaLearningSheet.tutor_id == user.id)
+            sheet_filters.append(or_(*own))
+        rules["learning_sheet"] = [exists().where(TutoriaLearningSheet.id == Doc.source_id, *sheet_filters)]
+    if "faq" in sources:
+        # FAQs activas visíveis para o role (role_filter vazio = todos)
+        roles = literal(",") + func.replace(ChatFAQ.role_filter, " ", "", type_=String) + literal(",")
+        rules["faq"] = [exists().where(
+            ChatFAQ.id == Doc.source_id,
+            ChatFAQ.is_active == True,
+            or_(ChatFAQ.role_filter == None, ChatFAQ.role_filter == "", roles.like(f"%,{user.role},%")),
+        )]
+    return rules
+
+
+@router.get("/search", response_model=SearchResultsOut)
+def search_all(
+    q: str = Query(..., min_length=2, max_length=200),
+    sources: Optional[str] = Query(None, description="Fontes separadas por vírgula (error,chamado,learning_sheet,faq)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Pesquisa ordenada por relevância, paginada, só com resultados visíveis ao utilizador."""
+    wanted = [s.strip() for s in sources.split(",")] if sources else list(SOURCES)
+    wanted = [s for s in wanted if s in SOURCES]
+    return search(db, q, _visibility(db, current_user, wanted), page, page_size)
@@ -5,13 +5,14 @@ Roles:
   TRAINER → apenas seus tutorados (tutor_id = current user)
   STUDENT/TRAINEE → apenas os seus próprios dados
 """
+import time
 from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, ConfigDict, field_validator
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import Session, aliased, joinedload
 
 from app.database import get_db
 from app.models import (
@@ -21,7 +22,8 @@ from app.models import (
     ErrorImpact, ErrorOrigin, ErrorDetectedBy, Department, Activity,
     Challenge, ChallengeSubmission,
 )
-from app.auth import get_current_user, get_visible_user_ids
+from app.auth import get_current_user, visible_user_scope
+from app.utils import notifications as notification_service
 
 router = APIRouter()
 
@@ -112,12 +114,79 @@ def _get_error_deadline(date_occurrence) -> Optional[date]:
     return d
 
 def create_notification(db: Session, user_id: int, ntype: str, message: str, error_id: int = None, plan_id: int = None):
-    notif = TutoriaNotification(
-        user_id=user_id, type=ntype, message=message,
-        error_id=error_id, plan_id=plan_id,
+    """Uma notificação para um destinatário; para vários usar notification_service.notify."""
+    return notification_service.notify(db, [user_id], ntype, message, error_id=error_id, plan_id=plan_id)
+
+
+# Estados em que um erro já não conta para o prazo de fecho mensal (A.6.1)
+DEADLINE_CLOSED_STATUSES = ("RESOLVED", "APPROVED", "CANCELLED")
+
+
+def _overdue_cutoff(today: date) -> date:
+    """
+    Erros com date_occurrence < cutoff já ultrapassaram o prazo em `today`.
+
+    O prazo é o mesmo para todo o mês de ocorrência (1.º dia útil do mês
+    seguinte), por isso "today > prazo" reduz-se a uma comparação de datas:
+    se o prazo do mês passado já passou, o cutoff é o 1.º dia deste mês;
+    senão, o 1.º dia do mês passado.
+    """
+    this_month = today.replace(day=1)
+    last_month = this_month - timedelta(days=1)
+    if today > _get_error_deadline(last_month):
+        return this_month
+    return last_month.replace(day=1)
+
+
+def notify_overdue_errors(db: Session, today: Optional[date] = None) -> dict:
+    """
+    Job de prazos (A.6.1): cria um OVERDUE_ALERT para cada erro em aberto que
+    ultrapassou o prazo e ainda não tem alerta — um SELECT com anti-join às
+    notificações existentes e uma única inserção em lote (notification_service).
+
+    O responsável é o tutor do tutorado; sem tutor, quem registou o erro.
+    Faz commit e devolve contagens e tempo de execução.
+    """
+    started = time.perf_counter()
+    cutoff = _overdue_cutoff(today or date.today())
+    tutorado = aliased(User)
+
+    overdue_filters = (
+        TutoriaError.is_active == True,
+        TutoriaError.status.notin_(DEADLINE_CLOSED_STATUSES),
+        TutoriaError.date_occurrence < cutoff,
     )
-    db.add(notif)
-    return notif
+    overdue_count = db.query(func.count(TutoriaError.id)).filter(*overdue_filters).scalar() or 0
+
+    already_alerted = exists().where(
+        TutoriaNotification.error_id == TutoriaError.id,
+        TutoriaNotification.type == "OVERDUE_ALERT",
+    )
+    new_alerts = db.execute(
+        select(
+            func.coalesce(tutorado.tutor_id, TutoriaError.created_by_id),
+            TutoriaError.id,
+        )
+        .join(tutorado, tutorado.id == TutoriaError.tutorado_id)
+        .where(*overdue_filters, ~already_alerted)
+    ).all()
+    notified = notification_service.notify_many(db, [
+        {
+            "user_id": user_id,
+            "type": "OVERDUE_ALERT",
+            "message": f"Erro #{error_id} ultrapassou o prazo de fecho mensal.",
+            "error_id": error_id,
+        }
+        for user_id, error_id in new_alerts
+    ])
+    db.commit()
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "overdue": overdue_count,
+        "notified": notified,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
 
 # ─── Pydantic schemas ─────────────────────────────────────────────────────────
 
@@ -350,7 +419,7 @@ def _error_out(e: TutoriaError) -> dict:
         "is_overdue": bool(
             _get_error_deadline(e.date_occurrence) and
             date.today() > _get_error_deadline(e.date_occurrence) and
-            getattr(e, 'status', '') not in ("RESOLVED", "APPROVED", "CANCELLED")
+            getattr(e, 'status', '') not in DEADLINE_CLOSED_STATUSES
         ),
     }
 
@@ -542,22 +611,24 @@ def _errors_query(db: Session, user: User):
             joinedload(TutoriaError.liberador),
             joinedload(TutoriaError.cancelled_by),
         )
-        .filter(TutoriaError.is_active == True)
+        .filter(TutoriaError.is_active == True, *error_scope_filters(db, user))
     )
+    return q
+
+def error_scope_filters(db: Session, user: User) -> list:
+    """Condições de visibilidade dos erros de tutoria (lista vazia = vê tudo).
+    Partilhadas com a pesquisa (app/routers/search.py)."""
     if user.can_see_all:
-        pass  # vê tudo
-    elif user.is_gerente or user.is_chefe_equipe:
+        return []  # vê tudo
+    if user.is_gerente or user.is_chefe_equipe:
         # Chefe de equipa → vê erros dos membros da sua equipa
-        visible_ids = get_visible_user_ids(db, user)
-        if visible_ids:
-            q = q.filter(TutoriaError.tutorado_id.in_(visible_ids))
-    elif user.is_tutor:
+        visible_scope = visible_user_scope(db, user)
+        return [TutoriaError.tutorado_id.in_(visible_scope)] if visible_scope is not None else []
+    if user.is_tutor:
         # Tutor → vê erros dos seus tutorados
-        q = q.join(TutoriaError.tutorado).filter(User.tutor_id == user.id)
-    else:
-        # Utilizador simples (TRAINEE / student / liberador / referente) → só os seus
-        q = q.filter(TutoriaError.tutorado_id == user.id)
-    return q
+        return [TutoriaError.tutorado_id.in_(select(User.id).where(User.tutor_id == user.id))]
+    # Utilizador simples (TRAINEE / student / liberador / referente) → só os seus
+    return [TutoriaError.tutorado_id == user.id]
 
 def _plans_query(db: Session, user: User):
     q = (
@@ -574,9 +645,9 @@ def _plans_query(db: Session, user: User):
         pass  # vê tudo
     elif user.is_gerente or user.is_chefe_equipe:
         # Chefe de equipa → planos dos membros da sua equipa
-        visible_ids = get_visible_user_ids(db, user)
-        if visible_ids:
-            q = q.filter(TutoriaActionPlan.tutorado_id.in_(visible_ids))
+        visible_scope = visible_user_scope(db, user)
+        if visible_scope is not None:
+            q = q.filter(TutoriaActionPlan.tutorado_id.in_(visible_scope))
     elif user.is_tutor:
         # Tutor → planos dos seus tutorados
         q = q.join(TutoriaActionPlan.tutorado).filter(User.tutor_id == user.id)
@@ -774,29 +845,23 @@ def create_error(
         for r in body.refs:
             db.add(TutoriaErrorRef(error_id=error.id, referencia=r.referencia, divisa=r.divisa, importe=r.importe, cliente_final=r.cliente_final))
 
-    # Notify chefe/manager of the tutorado's team
-    notified_ids = {current_user.id}  # avoid notifying the creator
+    # Notify chefe/manager of the tutorado's team, chefes de equipa and all ADMIN users
+    recipients = []
     if tutorado.team_id:
         from app.models import Team
         team = db.get(Team, tutorado.team_id)
-        if team and team.manager_id and team.manager_id not in notified_ids:
+        if team and team.manager_id:
             mgr = db.get(User, team.manager_id)
             if mgr and mgr.is_active:
-                create_notification(db, team.manager_id, "NEW_ERROR", f"Nova incidência registada por {current_user.full_name}", error_id=error.id)
-                notified_ids.add(team.manager_id)
-    # Notify chefes de equipa in the same team
-    if tutorado.team_id:
-        chefes = db.query(User).filter(User.team_id == tutorado.team_id, User.is_chefe_equipe == True, User.id != current_user.id).all()
-        for c in chefes:
-            if c.id not in notified_ids:
-                create_notification(db, c.id, "NEW_ERROR", f"Nova incidência registada por {current_user.full_name}", error_id=error.id)
-                notified_ids.add(c.id)
-    # Notify all ADMIN users about new errors
-    admins = db.query(User).filter(User.role == "ADMIN", User.is_active == True).all()
-    for a in admins:
-        if a.id not in notified_ids:
-            create_notification(db, a.id, "NEW_ERROR", f"Nova incidência registada por {current_user.full_name}", error_id=error.id)
-            notified_ids.add(a.id)
+                recipients.append(team.manager_id)
+        chefes = db.query(User.id).filter(User.team_id == tutorado.team_id, User.is_chefe_equipe == True).all()
+        recipients += [c.id for c in chefes]
+    admins = db.query(User.id).filter(User.role == "ADMIN", User.is_active == True).all()
+    recipients += [a.id for a in admins]
+    notification_service.notify(
+        db, [uid for uid in recipients if uid != current_user.id],  # avoid notifying the creator
+        "NEW_ERROR", f"Nova incidência registada por {current_user.full_name}", error_id=error.id,
+    )
 
     db.commit()
     db.refresh(error)
@@ -1663,9 +1728,9 @@ def submit_analysis(
         if error.tutorado:
             tutorado = error.tutorado
             if hasattr(tutorado, 'team_id') and tutorado.team_id:
-                chefes = db.query(User).filter(User.team_id == tutorado.team_id, User.is_chefe_equipe == True).all()
-                for c in chefes:
-                    create_notification(db, c.id, "PENDING_REVIEW", f"Análise do Referente aguarda aprovação", error_id=error.id)
+                chefes = db.query(User.id).filter(User.team_id == tutorado.team_id, User.is_chefe_equipe == True).all()
+                notification_service.notify(db, [c.id for c in chefes], "PENDING_REVIEW",
+                                            "Análise do Referente aguarda aprovação", error_id=error.id)
         db.commit()
         db.refresh(error)
         return _error_out(error)
@@ -1677,17 +1742,13 @@ def submit_analysis(
     error.status = "PENDING_TUTOR_REVIEW"
     db.flush()
 
-    # Notify tutors responsible for the plans
+    # Notify tutors responsible for the plans, and the tutorado's tutor
     plans = db.query(TutoriaActionPlan).filter(TutoriaActionPlan.error_id == error_id).all()
-    notified_ids = set()
-    for p in plans:
-        rid = getattr(p, 'responsible_id', None)
-        if rid and rid not in notified_ids:
-            create_notification(db, rid, "PENDING_REVIEW", f"Incidência #{error_id} submetida para revisão", error_id=error.id)
-            notified_ids.add(rid)
-    # Also notify tutorado's tutor
-    if error.tutorado and error.tutorado.tutor_id and error.tutorado.tutor_id not in notified_ids:
-        create_notification(db, error.tutorado.tutor_id, "PENDING_REVIEW", f"Incidência #{error_id} submetida para revisão", error_id=error.id)
+    recipients = [getattr(p, 'responsible_id', None) for p in plans]
+    if error.tutorado:
+        recipients.append(error.tutorado.tutor_id)
+    notification_service.notify(db, recipients, "PENDING_REVIEW",
+                                f"Incidência #{error_id} submetida para revisão", error_id=error.id)
 
     db.commit()
     db.refresh(error)
@@ -1717,14 +1778,11 @@ def approve_chief(
 
     # Notify tutors
     plans = db.query(TutoriaActionPlan).filter(TutoriaActionPlan.error_id == error_id).all()
-    notified_ids = set()
-    for p in plans:
-        rid = getattr(p, 'responsible_id', None)
-        if rid and rid not in notified_ids:
-            create_notification(db, rid, "PENDING_REVIEW", f"Incidência #{error_id} aprovada pelo Chefe, aguarda revisão", error_id=error.id)
-            notified_ids.add(rid)
-    if error.tutorado and error.tutorado.tutor_id and error.tutorado.tutor_id not in notified_ids:
-        create_notification(db, error.tutorado.tutor_id, "PENDING_REVIEW", f"Incidência #{error_id} aprovada pelo Chefe, aguarda revisão", error_id=error.id)
+    recipients = [getattr(p, 'responsible_id', None) for p in plans]
+    if error.tutorado:
+        recipients.append(error.tutorado.tutor_id)
+    notification_service.notify(db, recipients, "PENDING_REVIEW",
+                                f"Incidência #{error_id} aprovada pelo Chefe, aguarda revisão", error_id=error.id)
 
     db.commit()
     db.refresh(error)
@@ -1754,22 +1812,16 @@ def cancel_error(
 
     msg = f"Incidência #{error.id} cancelada. Motivo: {error.cancelled_reason or 'não especificado'}"
 
-    # Notify creator
-    if error.created_by_id and error.created_by_id != current_user.id:
-        create_notification(db, error.created_by_id, "CANCELLED_ERROR", msg, error_id=error.id)
-
-    # Notify tutorado/grabador (if different from creator and canceller)
-    if error.tutorado_id and error.tutorado_id != error.created_by_id and error.tutorado_id != current_user.id:
-        create_notification(db, error.tutorado_id, "CANCELLED_ERROR", msg, error_id=error.id)
-
-    # Notify liberador
-    if error.liberador_id and error.liberador_id != current_user.id:
-        create_notification(db, error.liberador_id, "CANCELLED_ERROR", msg, error_id=error.id)
-
-    # Notify tutor (via tutorado's tutor_id)
+    # Notify creator, tutorado/grabador, liberador and tutor (via tutorado's tutor_id) — never the canceller
     tutorado = db.query(User).filter(User.id == error.tutorado_id).first() if error.tutorado_id else None
-    if tutorado and tutorado.tutor_id and tutorado.tutor_id not in [error.created_by_id, error.tutorado_id, current_user.id]:
-        create_notification(db, tutorado.tutor_id, "CANCELLED_ERROR", msg, error_id=error.id)
+    recipients = [
+        error.created_by_id,
+        error.tutorado_id,
+        error.liberador_id,
+        tutorado.tutor_id if tutorado else None,
+    ]
+    notification_service.notify(db, [uid for uid in recipients if uid != current_user.id],
+                                "CANCELLED_ERROR", msg, error_id=error.id)
 
     db.commit()
     return {"ok": True, "status": "CANCELLED"}
@@ -1795,10 +1847,12 @@ def approve_plans(
 
     # Notify responsible of each plan
     plans = db.query(TutoriaActionPlan).filter(TutoriaActionPlan.error_id == error_id).all()
-    for p in plans:
-        rid = getattr(p, 'responsible_id', None)
-        if rid:
-            create_notification(db, rid, "PLAN_APPROVED", f"Plano #{p.id} aprovado pelo Tutor para incidência #{error_id}", error_id=error.id, plan_id=p.id)
+    notification_service.notify_many(db, [
+        {"user_id": getattr(p, 'responsible_id', None), "type": "PLAN_APPROVED",
+         "message": f"Plano #{p.id} aprovado pelo Tutor para incidência #{error_id}",
+         "error_id": error.id, "plan_id": p.id}
+        for p in plans
+    ])
 
     # Auto-create learning sheets if origin is Trade_Personas
     origin_name = None
@@ -1810,6 +1864,7 @@ def approve_plans(
             participants.add(error.grabador_id)
         if getattr(error, 'liberador_id', None):
             participants.add(error.liberador_id)
+        new_sheet_users = []
         for uid in participants:
             existing = db.query(TutoriaLearningSheet).filter(
                 TutoriaLearningSheet.error_id == error_id,
@@ -1827,7 +1882,9 @@ def approve_plans(
                     tutor_id=error.tutorado.tutor_id if error.tutorado else None,
                 )
                 db.add(sheet)
-                create_notification(db, uid, "LEARNING_SHEET", f"Nova ficha de aprendizagem para incidência #{error_id}", error_id=error.id)
+                new_sheet_users.append(uid)
+        notification_service.notify(db, new_sheet_users, "LEARNING_SHEET",
+                                    f"Nova ficha de aprendizagem para incidência #{error_id}", error_id=error.id)
 
     db.commit()
     db.refresh(error)
@@ -1868,10 +1925,9 @@ def return_analysis(
                           f"Análise da incidência #{error_id} devolvida: {body.reason.strip()[:100]}", error_id=error.id)
     # Also notify chefes of team
     if error.tutorado and hasattr(error.tutorado, 'team_id') and error.tutorado.team_id:
-        chefes = db.query(User).filter(User.team_id == error.tutorado.team_id, User.is_chefe_equipe == True, User.id != error.created_by_id).all()
-        for c in chefes:
-            create_notification(db, c.id, "PLAN_RETURNED",
-                              f"Análise da incidência #{error_id} devolvida pelo Tutor", error_id=error.id)
+        chefes = db.query(User.id).filter(User.team_id == error.tutorado.team_id, User.is_chefe_equipe == True, User.id != error.created_by_id).all()
+        notification_service.notify(db, [c.id for c in chefes], "PLAN_RETURNED",
+                                    f"Análise da incidência #{error_id} devolvida pelo Tutor", error_id=error.id)
 
     db.commit()
     db.refresh(error)
@@ -2039,16 +2095,23 @@ def list_notifications(
     ]
 
 
+@router.get("/notifications/unread-count")
+def notifications_unread_count(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Número de notificações por ler — leitura do contador (custo fixo, para polling)."""
+    return {"unread": notification_service.unread_count(db, current_user.id)}
+
+
 @router.patch("/notifications/{notif_id}/read")
 def mark_notification_read(
     notif_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    notif = db.get(TutoriaNotification, notif_id)
-    if not notif or notif.user_id != current_user.id:
+    if not notification_service.mark_read(db, current_user.id, notif_id):
         raise HTTPException(404, "Notificação não encontrada")
-    notif.is_read = True
     db.commit()
     return {"ok": True}
 
@@ -2058,10 +2121,7 @@ def mark_all_notifications_read(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    db.query(TutoriaNotification).filter(
-        TutoriaNotification.user_id == current_user.id,
-        TutoriaNotification.is_read == False,
-    ).update({"is_read": True})
+    notification_service.mark_all_read(db, current_user.id)
     db.commit()
     return {"ok": True}
 
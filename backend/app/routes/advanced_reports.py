@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 from app import models, auth
 from app.database import get_db
+from app.utils import dw_reports
 
 router = APIRouter(prefix="/api/admin/advanced-reports", tags=["advanced_reports"])
 
@@ -195,6 +196,12 @@ async def get_student_performance_report(
     """Detailed student performance analytics - MPU = minutos por operação"""
     
     try:
+        # Com uma carga ETL válida: uma leitura de dw_fact_user_activity
+        if dw_reports.dw_generation(db) is not None:
+            return StudentPerformanceResponse(students=[
+                StudentPerformanceItem(**row) for row in dw_reports.student_performance(db)
+            ])
+
         students = db.query(models.User).filter(models.User.role == "TRAINEE").all()
         performance_list = []
         
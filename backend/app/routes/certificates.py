@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List
 from datetime import datetime
-from io import BytesIO
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import io
 import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
 
+from app.config import settings
+from app.constants import (
+    CERTIFICATE_RENDER_WORKERS,
+    CERTIFICATE_BATCH_MAX_SIZE,
+    CERTIFICATE_BATCH_JOB_TTL_SECONDS,
+    CERTIFICATE_TEMPLATE_VERSION,
+)
 from app.database import get_db
-from app import models, auth
+from app import models, schemas, auth
 from app.auth import is_trainer_user
 
 logger = logging.getLogger(__name__)
@@ -137,14 +156,227 @@ async def get_certificate(
     }
 
 
+# ==================== CACHE DE PDFs ====================
+# O PDF de um certificado é imutável enquanto o template não mudar: é gerado
+# uma vez (na emissão ou no primeiro download) e guardado em
+# STORAGE_DIR/certificates/<id>-<versão do template>.pdf. Subir
+# CERTIFICATE_TEMPLATE_VERSION (ou trocar o logo / motor de PDF) muda a versão
+# e os PDFs são regenerados à medida que são pedidos.
+
+CERTIFICATE_PDF_DIR = Path(settings.STORAGE_DIR) / "certificates"
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'frontend', 'public', 'logo-sds.png')
+
+
+@lru_cache(maxsize=1)
+def certificate_template_version() -> str:
+    """Hash do template: CERTIFICATE_TEMPLATE_VERSION, motor de PDF disponível e logo."""
+    digest = hashlib.sha256(f"v{CERTIFICATE_TEMPLATE_VERSION}".encode())
+    try:
+        import weasyprint  # noqa: F401
+        digest.update(b"weasyprint")
+    except ImportError:
+        digest.update(b"fpdf2")
+    if os.path.exists(LOGO_PATH):
+        with open(LOGO_PATH, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def certificate_pdf_path(certificate: models.Certificate) -> Path:
+    return CERTIFICATE_PDF_DIR / f"{certificate.id}-{certificate_template_version()}.pdf"
+
+
+def certificate_pdf_etag(certificate: models.Certificate) -> str:
+    return f'"cert-{certificate.id}-{certificate_template_version()}"'
+
+
+def build_certificate_pdf_contexts(db: Session, certificates: list) -> dict:
+    """
+    Dados do PDF (cursos, desafios aprovados, formador) para vários
+    certificados, com um número fixo de queries — independentemente do
+    número de certificados, cursos ou desafios.
+
+    Returns:
+        {certificate_id: kwargs de generate_certificate_pdf}
+    """
+    plan_ids = {c.training_plan_id for c in certificates}
+    user_ids = {c.user_id for c in certificates}
+
+    plans = {}
+    courses_by_plan = {}
+    lessons_count = {}
+    challenges_by_course = {}
+    best_submission = {}
+    trainer_names = {}
+
+    if plan_ids:
+        plans = {p.id: p for p in db.query(models.TrainingPlan).filter(
+            models.TrainingPlan.id.in_(plan_ids)
+        ).all()}
+
+        plan_courses = db.query(models.TrainingPlanCourse).options(
+            joinedload(models.TrainingPlanCourse.course)
+        ).filter(
+            models.TrainingPlanCourse.training_plan_id.in_(plan_ids)
+        ).order_by(models.TrainingPlanCourse.id).all()
+        for pc in plan_courses:
+            if pc.course:
+                courses_by_plan.setdefault(pc.training_plan_id, []).append(pc.course)
+
+    course_ids = {course.id for courses in courses_by_plan.values() for course in courses}
+    if course_ids:
+        lessons_count = dict(
+            db.query(models.Lesson.course_id, func.count(models.Lesson.id)).filter(
+                models.Lesson.course_id.in_(course_ids)
+            ).group_by(models.Lesson.course_id).all()
+        )
+
+        challenges = db.query(models.Challenge).filter(
+            models.Challenge.course_id.in_(course_ids),
+            models.Challenge.is_active == True
+        ).order_by(models.Challenge.id).all()
+        for ch in challenges:
+            challenges_by_course.setdefault(ch.course_id, []).append(ch)
+
+        challenge_ids = [ch.id for ch in challenges]
+        if challenge_ids:
+            # Melhor submissão aprovada por (desafio, aluno, plano) — maior score primeiro
+            submissions = db.query(models.ChallengeSubmission).filter(
+                models.ChallengeSubmission.challenge_id.in_(challenge_ids),
+                models.ChallengeSubmission.user_id.in_(user_ids),
+                models.ChallengeSubmission.training_plan_id.in_(plan_ids),
+                models.ChallengeSubmission.is_approved == True
+            ).order_by(
+                models.ChallengeSubmission.score.desc(),
+                models.ChallengeSubmission.id
+            ).all()
+            for sub in submissions:
+                best_submission.setdefault(
+                    (sub.challenge_id, sub.user_id, sub.training_plan_id), sub
+                )
+
+    trainer_ids = {p.trainer_id for p in plans.values() if p.trainer_id}
+    if trainer_ids:
+        trainer_names = dict(
+            db.query(models.User.id, models.User.full_name).filter(
+                models.User.id.in_(trainer_ids)
+            ).all()
+        )
+
+    contexts = {}
+    for certificate in certificates:
+        plan = plans.get(certificate.training_plan_id)
+        courses_details = []
+        for course in courses_by_plan.get(certificate.training_plan_id, []):
+            challenge_results = []
+            for ch in challenges_by_course.get(course.id, []):
+                sub = best_submission.get((ch.id, certificate.user_id, certificate.training_plan_id))
+                if sub:
+                    challenge_results.append({
+                        "title": ch.title,
+                        "mpu": sub.calculated_mpu,
+                        "score": sub.score
+                    })
+
+            courses_details.append({
+                "title": course.title,
+                "lessons_count": lessons_count.get(course.id, 0),
+                "challenges": challenge_results
+            })
+
+        trainer_name = "N/A"
+        if plan and plan.trainer_id and trainer_names.get(plan.trainer_id):
+            trainer_name = trainer_names[plan.trainer_id]
+
+        contexts[certificate.id] = {
+            "certificate_number": certificate.certificate_number,
+            "student_name": certificate.student_name,
+            "training_plan_title": certificate.training_plan_title,
+            "total_hours": certificate.total_hours,
+            "courses_completed": certificate.courses_completed,
+            "average_mpu": certificate.average_mpu,
+            "issued_at": certificate.issued_at,
+            "trainer_name": trainer_name,
+            "courses": courses_details,
+        }
+    return contexts
+
+
+def build_certificate_pdf_context(db: Session, certificate: models.Certificate) -> dict:
+    """Dados do PDF de um único certificado."""
+    return build_certificate_pdf_contexts(db, [certificate])[certificate.id]
+
+
+def store_certificate_pdf(certificate_id: int, path: Path, context: dict) -> Path:
+    """
+    Gera o PDF e grava-o de forma atómica (ficheiro temporário + rename), para
+    que um download concorrente nunca veja um ficheiro a meio. Remove as
+    versões antigas do mesmo certificado.
+    """
+    if path.exists():
+        return path
+
+    pdf_bytes = generate_certificate_pdf(**context)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{certificate_id}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+    for stale in path.parent.glob(f"{certificate_id}-*.pdf"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return path
+
+
+def get_certificate_pdf(db: Session, certificate: models.Certificate) -> Path:
+    """Caminho do PDF em cache, gerando-o se ainda não existir para esta versão."""
+    path = certificate_pdf_path(certificate)
+    if path.exists():
+        return path
+    context = build_certificate_pdf_context(db, certificate)
+    return store_certificate_pdf(certificate.id, path, context)
+
+
+def prerender_certificate_pdf(certificate_id: int) -> None:
+    """
+    Gera o PDF logo após a emissão (BackgroundTasks), com sessão própria.
+    Falhas não são fatais — o PDF é gerado no primeiro download.
+    """
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        certificate = db.query(models.Certificate).filter(
+            models.Certificate.id == certificate_id
+        ).first()
+        if certificate:
+            get_certificate_pdf(db, certificate)
+    except Exception as e:
+        logger.warning("Certificate %s PDF pre-render failed (non-fatal): %s", certificate_id, e)
+    finally:
+        db.close()
+
+
 @router.get("/{certificate_id}/pdf")
 async def download_certificate_pdf(
     certificate_id: int,
+    request: Request,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Gerar e baixar o certificado em PDF
+    Baixar o certificado em PDF (gerado uma vez e servido da cache em disco).
+    Suporta If-None-Match: devolve 304 se o cliente já tem esta versão.
     """
     certificate = db.query(models.Certificate).filter(
         models.Certificate.id == certificate_id
@@ -163,76 +395,326 @@ async def download_certificate_pdf(
        (plan and current_user.id != plan.trainer_id):
         raise HTTPException(status_code=403, detail="Sem permissão")
     
-    # Buscar detalhes para o PDF
-    courses_details = []
-    if plan:
-        plan_courses = db.query(models.TrainingPlanCourse).filter(
-            models.TrainingPlanCourse.training_plan_id == plan.id
-        ).all()
-        
-        for pc in plan_courses:
-            course = db.query(models.Course).filter(models.Course.id == pc.course_id).first()
-            if not course:
-                continue
-            
-            # Contar lições
-            lessons_count = db.query(models.Lesson).filter(
-                models.Lesson.course_id == course.id
-            ).count()
-            
-            # Buscar desafios aprovados
-            challenges = db.query(models.Challenge).filter(
-                models.Challenge.course_id == course.id,
-                models.Challenge.is_active == True
-            ).all()
-            
-            challenge_results = []
-            for ch in challenges:
-                sub = db.query(models.ChallengeSubmission).filter(
-                    models.ChallengeSubmission.challenge_id == ch.id,
-                    models.ChallengeSubmission.user_id == certificate.user_id,
-                    models.ChallengeSubmission.training_plan_id == plan.id,
-                    models.ChallengeSubmission.is_approved == True
-                ).first()
-                if sub:
-                    challenge_results.append({
-                        "title": ch.title,
-                        "mpu": sub.calculated_mpu,
-                        "score": sub.score
-                    })
-            
-            courses_details.append({
-                "title": course.title,
-                "lessons_count": lessons_count,
-                "challenges": challenge_results
-            })
-    
-    # Buscar formador
-    trainer_name = "N/A"
-    if plan and plan.trainer_id:
-        trainer = db.query(models.User).filter(models.User.id == plan.trainer_id).first()
-        if trainer:
-            trainer_name = trainer.full_name
-    
-    # Gerar PDF
-    pdf_bytes = generate_certificate_pdf(
-        certificate_number=certificate.certificate_number,
-        student_name=certificate.student_name,
-        training_plan_title=certificate.training_plan_title,
-        total_hours=certificate.total_hours,
-        courses_completed=certificate.courses_completed,
-        average_mpu=certificate.average_mpu,
-        issued_at=certificate.issued_at,
-        trainer_name=trainer_name,
-        courses=courses_details
-    )
+    etag = certificate_pdf_etag(certificate)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    path = certificate_pdf_path(certificate)
+    if not path.exists():
+        # Geração (lenta, CPU) fora do event loop; as queries ficam nesta thread
+        context = build_certificate_pdf_context(db, certificate)
+        path = await run_in_threadpool(store_certificate_pdf, certificate.id, path, context)
     
     filename = f"certificado_{certificate.certificate_number}.pdf"
     
-    return StreamingResponse(
-        BytesIO(pdf_bytes),
+    return FileResponse(
+        path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        filename=filename,
+        headers=headers
+    )
+
+
+# ==================== RENDERIZAÇÃO EM LOTE ====================
+# Quando uma turma conclui um plano, os PDFs são pedidos às dezenas. A geração
+# é CPU-bound, por isso os lotes correm num ProcessPoolExecutor cujos processos
+# são reutilizados (motor de PDF, template e fontes carregados uma vez) em vez
+# de bloquearem o event loop. Os jobs vivem em memória no processo da API: são
+# efémeros — o resultado fica na cache de PDFs em disco.
+
+_FONT_CONFIG = None
+_render_pool = None
+_render_pool_lock = threading.Lock()
+_batch_jobs = {}
+_batch_jobs_lock = threading.Lock()
+
+
+def init_render_worker() -> None:
+    """Initializer dos processos do pool: versão do template e fontes carregadas uma vez."""
+    global _FONT_CONFIG
+    certificate_template_version()
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+        _FONT_CONFIG = FontConfiguration()
+    except ImportError:
+        pass
+
+
+def render_certificate_pdf_file(certificate_id: int, path: str, context: dict) -> tuple:
+    """Tarefa do pool: gera o PDF para a cache. Devolve (id, caminho, erro)."""
+    try:
+        return certificate_id, str(store_certificate_pdf(certificate_id, Path(path), context)), None
+    except Exception as e:
+        return certificate_id, None, str(getattr(e, "detail", e))
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=CERTIFICATE_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_render_worker,
+            )
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Chamado no shutdown da aplicação."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+class CertificateBatchJob:
+    """Estado de um lote: PDFs prontos, falhas e futures pendentes."""
+
+    def __init__(self, user_id: int, certificates: list):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.filenames = {
+            c.id: f"certificado_{c.certificate_number}.pdf" for c in certificates
+        }
+        self.ready = {}     # certificate_id -> caminho do PDF
+        self.failed = {}    # certificate_id -> erro
+        self.futures = {}   # certificate_id -> Future do pool
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return len(self.filenames)
+
+    @property
+    def done(self) -> int:
+        return len(self.ready) + len(self.failed)
+
+    @property
+    def status(self) -> str:
+        if self.done < self.total:
+            return "RUNNING"
+        if self.failed and not self.ready:
+            return "FAILED"
+        return "COMPLETED_WITH_ERRORS" if self.failed else "COMPLETED"
+
+    def record(self, certificate_id: int, path: str = None, error: str = None) -> None:
+        with self._lock:
+            if path:
+                self.ready[certificate_id] = path
+            else:
+                self.failed[certificate_id] = error or "Erro desconhecido"
+            if self.done >= self.total and self.finished_at is None:
+                self.finished_at = datetime.now()
+
+    def track(self, certificate_id: int, future) -> None:
+        self.futures[certificate_id] = future
+
+        def _on_done(f):
+            try:
+                _, path, error = f.result()
+            except BaseException as e:  # pool cancelado ou processo morto
+                path, error = None, str(e) or type(e).__name__
+            self.record(certificate_id, path, error)
+
+        future.add_done_callback(_on_done)
+
+    def ready_items(self) -> list:
+        with self._lock:
+            return list(self.ready.items())
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "completed": len(self.ready),
+                "failed": len(self.failed),
+                "progress": round(self.done / self.total * 100, 1) if self.total else 100.0,
+                "created_at": self.created_at.isoformat(),
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "errors": [
+                    {"certificate_id": cid, "error": error}
+                    for cid, error in self.failed.items()
+                ],
+            }
+
+
+def _register_batch_job(job: CertificateBatchJob) -> None:
+    """Guarda o job e descarta os terminados há mais de CERTIFICATE_BATCH_JOB_TTL_SECONDS."""
+    now = datetime.now()
+    with _batch_jobs_lock:
+        expired = [
+            job_id for job_id, j in _batch_jobs.items()
+            if j.finished_at and (now - j.finished_at).total_seconds() > CERTIFICATE_BATCH_JOB_TTL_SECONDS
+        ]
+        for job_id in expired:
+            del _batch_jobs[job_id]
+        _batch_jobs[job.id] = job
+
+
+def _get_batch_job(job_id: str, current_user: models.User) -> CertificateBatchJob:
+    with _batch_jobs_lock:
+        job = _batch_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    if current_user.role != "ADMIN" and current_user.id != job.user_id:
+        raise HTTPException(status_code=403, detail="Sem permissão")
+    return job
+
+
+class _ZipChunkWriter(io.RawIOBase):
+    """Destino não-seekable do ZipFile: acumula bytes até serem enviados."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _stream_batch_zip(job: CertificateBatchJob):
+    """
+    ZIP em streaming: cada PDF é enviado assim que fica pronto (ordem de
+    conclusão), o diretório central no fim. Falhas vão para erros.txt.
+
+    Os PDFs já vêm comprimidos, por isso entram no ZIP sem nova compressão
+    (ZIP_STORED); leitura e escrita correm no threadpool, fora do event loop.
+    """
+    writer = _ZipChunkWriter()
+    zf = zipfile.ZipFile(writer, mode="w", compression=zipfile.ZIP_STORED)
+
+    def add_pdf(name: str, path: str) -> bytes:
+        zf.writestr(name, Path(path).read_bytes())
+        return writer.drain()
+    written = set()
+    pending = {asyncio.wrap_future(f) for f in job.futures.values()}
+
+    while True:
+        for certificate_id, path in job.ready_items():
+            if certificate_id in written:
+                continue
+            written.add(certificate_id)
+            yield await run_in_threadpool(add_pdf, job.filenames[certificate_id], path)
+
+        if job.done >= job.total and len(written) == len(job.ready):
+            break
+
+        pending = {f for f in pending if not f.done()}
+        if pending:
+            await asyncio.wait(pending, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await asyncio.sleep(0.05)
+
+    if job.failed:
+        lines = [
+            f"{job.filenames[e['certificate_id']]}: {e['error']}"
+            for e in job.to_dict()["errors"]
+        ]
+        zf.writestr("erros.txt", "\n".join(lines) + "\n")
+    zf.close()
+    yield writer.drain()
+
+
+@router.post("/batch", status_code=202)
+async def create_certificate_batch(
+    payload: schemas.CertificateBatchRequest,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gerar PDFs de vários certificados (por ids e/ou por plano) num pool de
+    processos. Devolve o job; o progresso está em GET /batch/{job_id} e o ZIP
+    (em streaming, à medida que os PDFs ficam prontos) em GET /batch/{job_id}/zip.
+    """
+    if not payload.certificate_ids and not payload.training_plan_id:
+        raise HTTPException(status_code=400, detail="Indique certificate_ids ou training_plan_id")
+
+    query = db.query(models.Certificate)
+    if payload.certificate_ids:
+        query = query.filter(models.Certificate.id.in_(payload.certificate_ids))
+    if payload.training_plan_id:
+        query = query.filter(models.Certificate.training_plan_id == payload.training_plan_id)
+    certificates = query.order_by(models.Certificate.id).all()
+
+    if not certificates:
+        raise HTTPException(status_code=404, detail="Nenhum certificado encontrado")
+    if len(certificates) > CERTIFICATE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {CERTIFICATE_BATCH_MAX_SIZE} certificados por lote"
+        )
+
+    # Verificar permissões - dono, formador do plano ou admin (todos os certificados)
+    if current_user.role != "ADMIN":
+        trainer_by_plan = dict(
+            db.query(models.TrainingPlan.id, models.TrainingPlan.trainer_id).filter(
+                models.TrainingPlan.id.in_({c.training_plan_id for c in certificates})
+            ).all()
+        )
+        for c in certificates:
+            if current_user.id != c.user_id and current_user.id != trainer_by_plan.get(c.training_plan_id):
+                raise HTTPException(status_code=403, detail="Sem permissão")
+
+    job = CertificateBatchJob(current_user.id, certificates)
+
+    to_render = []
+    for c in certificates:
+        path = certificate_pdf_path(c)
+        if path.exists():
+            job.record(c.id, str(path))
+        else:
+            to_render.append(c)
+
+    if to_render:
+        contexts = build_certificate_pdf_contexts(db, to_render)
+        pool = get_render_pool()
+        for c in to_render:
+            future = pool.submit(
+                render_certificate_pdf_file, c.id, str(certificate_pdf_path(c)), contexts[c.id]
+            )
+            job.track(c.id, future)
+
+    _register_batch_job(job)
+    return job.to_dict()
+
+
+@router.get("/batch/{job_id}")
+async def get_certificate_batch(
+    job_id: str,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Estado/progresso de um lote de PDFs"""
+    return _get_batch_job(job_id, current_user).to_dict()
+
+
+@router.get("/batch/{job_id}/zip")
+async def download_certificate_batch_zip(
+    job_id: str,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """ZIP do lote, enviado à medida que os PDFs ficam prontos"""
+    job = _get_batch_job(job_id, current_user)
+    return StreamingResponse(
+        _stream_batch_zip(job),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=certificados_{job.id[:8]}.zip"}
     )
 
 
@@ -277,7 +759,7 @@ def generate_certificate_pdf(
     courses_word_completed = "concluído" if courses_completed == 1 else "concluídos"
     
     # Logo path
-    logo_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'frontend', 'public', 'logo-sds.png')
+    logo_path = LOGO_PATH
     logo_uri = f"file:///{logo_path.replace(os.sep, '/')}" if os.path.exists(logo_path) else ""
     
     # Gerar HTML dos cursos
@@ -924,7 +1406,7 @@ def generate_certificate_pdf(
     
     # Gerar PDF
     html = HTML(string=html_content)
-    pdf_bytes = html.write_pdf()
+    pdf_bytes = html.write_pdf(font_config=_FONT_CONFIG)
     
     return pdf_bytes
 
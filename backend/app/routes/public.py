@@ -1,13 +1,25 @@
-"""Public endpoints for the landing page — no authentication required."""
+"""Public endpoints for the landing page — no authentication required.
 
-from fastapi import APIRouter, Depends
+The landing payload is built by a background refresher (main.py,
+every LANDING_REFRESH_SECONDS) and served from memory with ETag /
+Cache-Control, so visitors never hit the database.
+"""
+
+import hashlib
+import json
+import threading
+
+from fastapi import APIRouter, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct
 from pydantic import BaseModel
 from typing import List, Optional
 
 from app import models
-from app.database import get_db
+from app.constants import LANDING_CACHE_MAX_AGE
+from app.database import SessionLocal
 
 router = APIRouter(prefix="/api/public", tags=["public"])
 
@@ -36,11 +48,10 @@ class LandingDataResponse(BaseModel):
     ratings: List[PublicRating]
 
 
-# ============ Endpoints ============
+# ============ Snapshot ============
 
-@router.get("/landing", response_model=LandingDataResponse)
-async def get_landing_data(db: Session = Depends(get_db)):
-    """Public endpoint — returns stats and ratings for the landing page."""
+def build_landing_data(db: Session) -> LandingDataResponse:
+    """Stats and recent ratings for the landing page (runs the DB queries)."""
 
     # --- Stats ---
     total_products = db.query(func.count(models.Product.id)).scalar() or 0
@@ -104,3 +115,43 @@ async def get_landing_data(db: Session = Depends(get_db)):
         ))
 
     return LandingDataResponse(stats=stats, ratings=ratings)
+
+
+class _LandingSnapshot:
+    """Serialized landing payload + ETag, replaced as a whole by refresh()."""
+
+    def __init__(self):
+        self.entry: Optional[tuple[bytes, str]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session) -> None:
+        body = json.dumps(jsonable_encoder(build_landing_data(db)), ensure_ascii=False).encode("utf-8")
+        etag = '"landing-' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.entry = (body, etag)
+
+    def ensure(self) -> tuple[bytes, str]:
+        """First request before the refresher ran (e.g. no lifespan): build once, not per visitor."""
+        with self._lock:
+            if self.entry is None:
+                db = SessionLocal()
+                try:
+                    self.refresh(db)
+                finally:
+                    db.close()
+            return self.entry
+
+
+landing_snapshot = _LandingSnapshot()
+
+
+# ============ Endpoints ============
+
+@router.get("/landing", response_model=LandingDataResponse)
+async def get_landing_data(request: Request):
+    """Public endpoint — returns stats and ratings for the landing page (from memory)."""
+    body, etag = landing_snapshot.entry or await run_in_threadpool(landing_snapshot.ensure)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={LANDING_CACHE_MAX_AGE}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
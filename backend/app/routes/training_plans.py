@@ -1,26 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func as sa_func, or_
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func as sa_func, or_, and_, case
+from typing import List, Optional
 from datetime import datetime
 from app.database import get_db
 from app import models, schemas, auth
+from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.pagination import paginate
+from app.routes.certificates import prerender_certificate_pdf
 
 router = APIRouter()
 
 
-def calculate_plan_status(db: Session, plan: models.TrainingPlan, student_id: int = None) -> dict:
+def _completed_lessons_by_course(db: Session, targets) -> dict:
+    """Contagem de lições concluídas (e confirmadas) por curso, em lote.
+
+    `targets` é uma lista de pares (plan, student_id). Devolve
+    {(plan_id, student_id): {course_id: completed}} com duas queries no máximo,
+    independentemente do número de planos/cursos.
+
+    Regra legada: se o aluno não tem NENHUM registo de progresso associado ao
+    plano para as lições de um curso, contam-se as lições concluídas sem filtro
+    de plano (dados anteriores a training_plan_id).
+    """
+    targets = [(plan, sid) for plan, sid in targets if sid]
+    if not targets:
+        return {}
+
+    plan_ids = {plan.id for plan, _ in targets}
+    student_ids = {sid for _, sid in targets}
+    course_ids = {pc.course_id for plan, _ in targets for pc in plan.courses}
+    if not course_ids:
+        return {(plan.id, sid): {} for plan, sid in targets}
+
+    LP = models.LessonProgress
+    is_done = and_(LP.status == "COMPLETED", LP.student_confirmed == True)
+
+    # Progresso registado no próprio plano: lições concluídas + nº de registos
+    rows = db.query(
+        LP.training_plan_id, LP.user_id, models.Lesson.course_id,
+        sa_func.count(sa_func.distinct(case((is_done, LP.lesson_id)))),
+        sa_func.count(LP.id),
+    ).join(models.Lesson, models.Lesson.id == LP.lesson_id).filter(
+        LP.training_plan_id.in_(plan_ids),
+        LP.user_id.in_(student_ids),
+        models.Lesson.course_id.in_(course_ids),
+    ).group_by(LP.training_plan_id, LP.user_id, models.Lesson.course_id).all()
+    per_plan = {(r[0], r[1], r[2]): r[3] for r in rows if r[4]}
+
+    # Fallback legado apenas para (aluno, curso) sem registos no plano
+    legacy = {}
+    needs_legacy = any(
+        (plan.id, sid, pc.course_id) not in per_plan
+        for plan, sid in targets for pc in plan.courses
+    )
+    if needs_legacy:
+        legacy_rows = db.query(
+            LP.user_id, models.Lesson.course_id,
+            sa_func.count(sa_func.distinct(LP.lesson_id)),
+        ).join(models.Lesson, models.Lesson.id == LP.lesson_id).filter(
+            LP.user_id.in_(student_ids),
+            models.Lesson.course_id.in_(course_ids),
+            is_done,
+        ).group_by(LP.user_id, models.Lesson.course_id).all()
+        legacy = {(r[0], r[1]): r[2] for r in legacy_rows}
+
+    result = {}
+    for plan, sid in targets:
+        counts = {}
+        for pc in plan.courses:
+            key = (plan.id, sid, pc.course_id)
+            counts[pc.course_id] = per_plan[key] if key in per_plan else legacy.get((sid, pc.course_id), 0)
+        result[(plan.id, sid)] = counts
+    return result
+
+
+def calculate_plan_status(
+    db: Session,
+    plan: models.TrainingPlan,
+    student_id: int = None,
+    completed_by_course: dict = None,
+) -> dict:
     """Calcula o status de um plano baseado no progresso.
     If student_id is given, calculates for that specific enrollment.
-    Otherwise falls back to plan.student_id for backward compatibility."""
+    Otherwise falls back to plan.student_id for backward compatibility.
+
+    Usa as relações plan.courses / course.lessons / plan.assignments, pelo que
+    não faz queries extra quando o plano foi carregado com selectinload.
+    `completed_by_course` permite passar o resultado de
+    _completed_lessons_by_course já calculado para vários planos."""
     now = datetime.now()
     
     target_student = student_id or plan.student_id
     
-    # Buscar cursos do plano
-    plan_courses = db.query(models.TrainingPlanCourse).filter(
-        models.TrainingPlanCourse.training_plan_id == plan.id
-    ).all()
+    # Cursos do plano
+    plan_courses = plan.courses
     
     total_courses = len(plan_courses)
     
@@ -30,47 +104,20 @@ def calculate_plan_status(db: Session, plan: models.TrainingPlan, student_id: in
     completed_courses = 0
     
     if target_student:
+        if completed_by_course is None:
+            completed_by_course = _completed_lessons_by_course(
+                db, [(plan, target_student)]
+            ).get((plan.id, target_student), {})
+
         for pc in plan_courses:
-            lessons = db.query(models.Lesson).filter(
-                models.Lesson.course_id == pc.course_id
-            ).all()
-            course_total = len(lessons)
+            course_total = len(pc.course.lessons) if pc.course else 0
             total_lessons += course_total
-            
-            lesson_ids = [l.id for l in lessons]
-            if lesson_ids:
-                # Filter by training_plan_id to avoid cross-plan counting
-                # Only count lessons that are COMPLETED AND confirmed by student
-                completed = db.query(sa_func.count(sa_func.distinct(models.LessonProgress.lesson_id))).filter(
-                    models.LessonProgress.lesson_id.in_(lesson_ids),
-                    models.LessonProgress.user_id == target_student,
-                    models.LessonProgress.status == "COMPLETED",
-                    models.LessonProgress.student_confirmed == True,
-                    models.LessonProgress.training_plan_id == plan.id
-                ).scalar() or 0
-                
-                # Fallback: only if NO records exist at all for this plan (truly legacy data)
-                if completed == 0:
-                    has_any_records_for_plan = db.query(models.LessonProgress).filter(
-                        models.LessonProgress.lesson_id.in_(lesson_ids),
-                        models.LessonProgress.user_id == target_student,
-                        models.LessonProgress.training_plan_id == plan.id
-                    ).first()
-                    
-                    if not has_any_records_for_plan:
-                        # Truly legacy: no records with this training_plan_id at all
-                        completed = db.query(sa_func.count(sa_func.distinct(models.LessonProgress.lesson_id))).filter(
-                            models.LessonProgress.lesson_id.in_(lesson_ids),
-                            models.LessonProgress.user_id == target_student,
-                            models.LessonProgress.status == "COMPLETED",
-                            models.LessonProgress.student_confirmed == True
-                        ).scalar() or 0
+            completed = completed_by_course.get(pc.course_id, 0) if course_total else 0
+            completed_lessons += completed
                 
-                completed_lessons += completed
-                
-                # Course is completed for this student only if all lessons are done
-                if course_total > 0 and completed >= course_total:
-                    completed_courses += 1
+            # Course is completed for this student only if all lessons are done
+            if course_total > 0 and completed >= course_total:
+                completed_courses += 1
     else:
         # No student: use plan_course status (legacy)
         completed_courses = len([pc for pc in plan_courses if pc.status == "COMPLETED"])
@@ -79,11 +126,9 @@ def calculate_plan_status(db: Session, plan: models.TrainingPlan, student_id: in
     effective_start = plan.start_date
     effective_end = plan.end_date
     
+    enrollment = None
     if student_id:
-        enrollment = db.query(models.TrainingPlanAssignment).filter(
-            models.TrainingPlanAssignment.training_plan_id == plan.id,
-            models.TrainingPlanAssignment.user_id == student_id
-        ).first()
+        enrollment = next((a for a in plan.assignments if a.user_id == student_id), None)
         if enrollment:
             effective_start = enrollment.start_date or plan.start_date
             effective_end = enrollment.end_date or plan.end_date
@@ -92,14 +137,7 @@ def calculate_plan_status(db: Session, plan: models.TrainingPlan, student_id: in
     plan_status = plan.status or "PENDING"
     
     # For per-student status, check enrollment completed_at instead of plan-level
-    student_completed = False
-    if student_id:
-        enrollment = db.query(models.TrainingPlanAssignment).filter(
-            models.TrainingPlanAssignment.training_plan_id == plan.id,
-            models.TrainingPlanAssignment.user_id == student_id
-        ).first()
-        if enrollment and enrollment.completed_at:
-            student_completed = True
+    student_completed = bool(enrollment and enrollment.completed_at)
     
     if student_id and student_completed:
         plan_status = "COMPLETED"
@@ -167,8 +205,153 @@ async def test_post_endpoint():
     return {"message": "POST Training plans endpoint is working!"}
 
 # LIST - GET /
+def _plan_list_options():
+    """Grafo de relações usado pela listagem — carregado com selectinload
+    (uma query por relação, independentemente do número de planos)."""
+    return (
+        selectinload(models.TrainingPlan.courses)
+            .selectinload(models.TrainingPlanCourse.course)
+            .selectinload(models.Course.lessons)
+            .load_only(models.Lesson.id, models.Lesson.course_id, models.Lesson.estimated_minutes),
+        selectinload(models.TrainingPlan.assignments).selectinload(models.TrainingPlanAssignment.user),
+        selectinload(models.TrainingPlan.trainers).selectinload(models.TrainingPlanTrainer.trainer),
+        selectinload(models.TrainingPlan.bank_associations).selectinload(models.TrainingPlanBank.bank),
+        selectinload(models.TrainingPlan.product_associations).selectinload(models.TrainingPlanProduct.product),
+        selectinload(models.TrainingPlan.trainer),
+        selectinload(models.TrainingPlan.student),
+        selectinload(models.TrainingPlan.bank),
+        selectinload(models.TrainingPlan.product),
+    )
+
+
+def _serialize_plan_list_item(plan: models.TrainingPlan, plan_status: dict) -> dict:
+    """Serializa um plano (já com o grafo carregado) para a listagem."""
+    # Get student info (from assignments - catalog model)
+    students_list = []
+    for enrollment in plan.assignments:
+        student = enrollment.user
+        if student:
+            students_list.append({
+                "id": student.id,
+                "full_name": student.full_name,
+                "email": student.email,
+                "status": enrollment.status or "PENDING",
+                "start_date": enrollment.start_date.isoformat() if enrollment.start_date else None,
+                "end_date": enrollment.end_date.isoformat() if enrollment.end_date else None,
+            })
+
+    # Legacy: if no assignments but student_id exists
+    student_info = None
+    if plan.student_id and not students_list:
+        student = plan.student
+        if student:
+            student_info = {
+                "id": student.id,
+                "full_name": student.full_name,
+                "email": student.email
+            }
+            students_list.append({
+                "id": student.id,
+                "full_name": student.full_name,
+                "email": student.email,
+                "status": "PENDING",
+                "start_date": plan.start_date.isoformat() if plan.start_date else None,
+                "end_date": plan.end_date.isoformat() if plan.end_date else None,
+            })
+    elif students_list:
+        student_info = students_list[0]  # First student for backward compatibility
+
+    # calculate total duration in minutes from lessons
+    total_minutes = sum(
+        (l.estimated_minutes or 0)
+        for pc in plan.courses if pc.course
+        for l in pc.course.lessons
+    )
+    total_hours = round(total_minutes / 60)
+
+    # Todos os formadores do plano
+    trainers_list = [
+        {
+            "id": pt.trainer.id,
+            "full_name": pt.trainer.full_name,
+            "email": pt.trainer.email,
+            "is_primary": pt.is_primary
+        }
+        for pt in plan.trainers if pt.trainer
+    ]
+
+    # Se não houver na nova tabela, usar formador legado
+    if not trainers_list and plan.trainer:
+        trainers_list.append({
+            "id": plan.trainer.id,
+            "full_name": plan.trainer.full_name,
+            "email": plan.trainer.email if hasattr(plan.trainer, 'email') else None,
+            "is_primary": True
+        })
+
+    # Bancos associados (N:N) com fallback para banco legado
+    banks_list = [
+        {"id": pb.bank.id, "code": pb.bank.code, "name": pb.bank.name}
+        for pb in plan.bank_associations if pb.bank
+    ]
+    if not banks_list and plan.bank:
+        banks_list.append({"id": plan.bank.id, "code": plan.bank.code, "name": plan.bank.name})
+
+    # Produtos associados (N:N) com fallback para produto legado
+    products_list = [
+        {"id": pp.product.id, "code": pp.product.code, "name": pp.product.name}
+        for pp in plan.product_associations if pp.product
+    ]
+    if not products_list and plan.product:
+        products_list.append({"id": plan.product.id, "code": plan.product.code, "name": plan.product.name})
+
+    return {
+        "id": plan.id,
+        "title": plan.title,
+        "description": plan.description,
+        "trainer_id": plan.trainer_id,
+        "trainer": {
+            "id": plan.trainer.id if plan.trainer else None,
+            "full_name": plan.trainer.full_name if plan.trainer else None
+        },
+        "trainers": trainers_list,
+        "total_courses": len(plan.courses),
+        "student": student_info,
+        "enrolled_students": students_list,
+        "enrolled_count": len(students_list),
+        "total_duration_hours": total_hours,
+        "start_date": plan.start_date.isoformat() if plan.start_date else None,
+        "end_date": plan.end_date.isoformat() if plan.end_date else None,
+        "is_permanent": bool(plan.is_permanent) if plan.is_permanent else False,
+        "created_at": plan.created_at.isoformat() if plan.created_at else None,
+        # Bank and Product info (legacy single, fallback to N:N)
+        "bank_id": plan.bank_id or (banks_list[0]["id"] if banks_list else None),
+        "bank_code": banks_list[0]["code"] if banks_list else None,
+        "bank_name": banks_list[0]["name"] if banks_list else None,
+        "product_id": plan.product_id or (products_list[0]["id"] if products_list else None),
+        "product_name": products_list[0]["name"] if products_list else None,
+        "product_code": products_list[0]["code"] if products_list else None,
+        # Multiple banks and products
+        "bank_ids": [b["id"] for b in banks_list],
+        "product_ids": [p["id"] for p in products_list],
+        "banks": banks_list,
+        "products": products_list,
+        "is_active": plan.is_active,
+        # Novos campos de status
+        "status": plan_status["status"],
+        "progress_percentage": plan_status["progress_percentage"],
+        "days_remaining": plan_status["days_remaining"],
+        "days_delayed": plan_status["days_delayed"],
+        "is_delayed": plan_status["is_delayed"],
+        "completed_courses": plan_status["completed_courses"],
+        "completed_lessons": plan_status["completed_lessons"]
+    }
+
+
 @router.get("/")
 async def list_training_plans(
+    page: Optional[int] = Query(None, ge=1, description="Page number (omit for the full list)"),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Items per page"),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -177,223 +360,81 @@ async def list_training_plans(
     - ADMIN: Vê todos
     - TRAINER: Vê apenas os que ele é formador
     - STUDENT: Vê apenas os que foi atribuído
+
+    Sem `page` devolve a lista completa (retrocompatível); com `page` devolve
+    {items, total, page, page_size, total_pages}. O grafo de cada plano é
+    carregado com selectinload, por isso o nº de queries não cresce com o nº
+    de planos. A renovação de planos permanentes é feita pelo job diário
+    (ver app.utils.training_plans.renew_permanent_training_plans).
     """
     import logging
     logger = logging.getLogger(__name__)
     
     try:
-        # Load plans according to role
+        query = db.query(models.TrainingPlan)
+
+        # Filter plans according to role
         if current_user.role == "ADMIN":
-            plans = db.query(models.TrainingPlan).all()
+            pass
         elif current_user.is_formador:
-            # Buscar planos onde é formador primário OU secundário
-            trainer_assignments = db.query(models.TrainingPlanTrainer).filter(
+            # Planos onde é formador primário OU secundário, ou pelo campo legado trainer_id
+            trainer_plan_ids = db.query(models.TrainingPlanTrainer.training_plan_id).filter(
                 models.TrainingPlanTrainer.trainer_id == current_user.id
-            ).all()
-            plan_ids_from_trainer = [ta.training_plan_id for ta in trainer_assignments]
-            
-            # Também incluir planos pelo campo legado trainer_id
-            plans_by_trainer_id = db.query(models.TrainingPlan).filter(
-                models.TrainingPlan.trainer_id == current_user.id
-            ).all()
-            plan_ids_legacy = [p.id for p in plans_by_trainer_id]
-            
-            all_trainer_plan_ids = list(set(plan_ids_from_trainer + plan_ids_legacy))
-            if all_trainer_plan_ids:
-                plans = db.query(models.TrainingPlan).filter(
-                    models.TrainingPlan.id.in_(all_trainer_plan_ids)
-                ).all()
-            else:
-                plans = []
+            )
+            query = query.filter(or_(
+                models.TrainingPlan.id.in_(trainer_plan_ids),
+                models.TrainingPlan.trainer_id == current_user.id,
+            ))
         else:  # STUDENT/TRAINEE
-            # Buscar planos: por assignment OU por student_id direto
-            assignments = db.query(models.TrainingPlanAssignment).filter(
+            # Planos por assignment OU por student_id direto
+            assigned_plan_ids = db.query(models.TrainingPlanAssignment.training_plan_id).filter(
                 models.TrainingPlanAssignment.user_id == current_user.id
-            ).all()
-            plan_ids_from_assignments = [a.training_plan_id for a in assignments]
-            
-            # Também buscar planos onde o user é o student_id
-            plans_by_student_id = db.query(models.TrainingPlan).filter(
-                models.TrainingPlan.student_id == current_user.id
-            ).all()
-            plan_ids_from_student = [p.id for p in plans_by_student_id]
-            
-            # Combinar ambos (sem duplicados)
-            all_plan_ids = list(set(plan_ids_from_assignments + plan_ids_from_student))
-            
-            if all_plan_ids:
-                plans = db.query(models.TrainingPlan).filter(
-                    models.TrainingPlan.id.in_(all_plan_ids)
-                ).all()
-            else:
-                plans = []
+            )
+            query = query.filter(or_(
+                models.TrainingPlan.id.in_(assigned_plan_ids),
+                models.TrainingPlan.student_id == current_user.id,
+            ))
 
-        # Auto-renew permanent plans: update end_date to 31/12 of current year if year changed
-        from datetime import datetime as dt_cls
-        current_year = dt_cls.now().year
-        for plan in plans:
-            if plan.is_permanent and plan.end_date:
-                if plan.end_date.year < current_year:
-                    plan.end_date = dt_cls(current_year, 12, 31, 23, 59, 59)
-                    db.add(plan)
-        db.commit()
+        query = query.options(*_plan_list_options()).order_by(models.TrainingPlan.id)
+
+        if page is not None:
+            plans, total = paginate(query, page, page_size)
+        else:
+            plans = query.all()
+            total = len(plans)
+
+        # Progresso por aluno calculado em lote para todos os planos da página
+        if current_user.is_usuario_basico:
+            targets = [(plan, current_user.id) for plan in plans]
+        else:
+            targets = [(plan, plan.student_id) for plan in plans if plan.student_id]
+        completed = _completed_lessons_by_course(db, targets)
 
         result = []
         for plan in plans:
-            # count courses in plan
-            plan_courses = db.query(models.TrainingPlanCourse).filter(
-                models.TrainingPlanCourse.training_plan_id == plan.id
-            ).all()
-            total_courses = len(plan_courses)
-
-            # Get student info (from assignments - catalog model)
-            enrolled_students = db.query(models.TrainingPlanAssignment).filter(
-                models.TrainingPlanAssignment.training_plan_id == plan.id
-            ).all()
-            students_list = []
-            for enrollment in enrolled_students:
-                student = db.query(models.User).filter(models.User.id == enrollment.user_id).first()
-                if student:
-                    students_list.append({
-                        "id": student.id,
-                        "full_name": student.full_name,
-                        "email": student.email,
-                        "status": enrollment.status or "PENDING",
-                        "start_date": enrollment.start_date.isoformat() if enrollment.start_date else None,
-                        "end_date": enrollment.end_date.isoformat() if enrollment.end_date else None,
-                    })
-            
-            # Legacy: if no assignments but student_id exists
-            student_info = None
-            if plan.student_id and not students_list:
-                student = db.query(models.User).filter(models.User.id == plan.student_id).first()
-                if student:
-                    student_info = {
-                        "id": student.id,
-                        "full_name": student.full_name,
-                        "email": student.email
-                    }
-                    students_list.append({
-                        "id": student.id,
-                        "full_name": student.full_name,
-                        "email": student.email,
-                        "status": "PENDING",
-                        "start_date": plan.start_date.isoformat() if plan.start_date else None,
-                        "end_date": plan.end_date.isoformat() if plan.end_date else None,
-                    })
-            elif students_list:
-                student_info = students_list[0]  # First student for backward compatibility
-
-            # calculate total duration in minutes from lessons
-            total_minutes = 0
-            for pc in plan_courses:
-                lessons = db.query(models.Lesson).filter(models.Lesson.course_id == pc.course_id).all()
-                total_minutes += sum((l.estimated_minutes or 0) for l in lessons)
-
-            total_hours = round(total_minutes / 60)
-            
             # Calcular status do plano - per student for TRAINEE users
             if current_user.is_usuario_basico:
-                plan_status = calculate_plan_status(db, plan, student_id=current_user.id)
+                plan_status = calculate_plan_status(
+                    db, plan, student_id=current_user.id,
+                    completed_by_course=completed.get((plan.id, current_user.id), {}),
+                )
             else:
-                plan_status = calculate_plan_status(db, plan)
-
-            # Buscar todos os formadores do plano
-            plan_trainers = db.query(models.TrainingPlanTrainer).filter(
-                models.TrainingPlanTrainer.training_plan_id == plan.id
-            ).all()
-            trainers_list = []
-            for pt in plan_trainers:
-                trainer = db.query(models.User).filter(models.User.id == pt.trainer_id).first()
-                if trainer:
-                    trainers_list.append({
-                        "id": trainer.id,
-                        "full_name": trainer.full_name,
-                        "email": trainer.email,
-                        "is_primary": pt.is_primary
-                    })
-            
-            # Se não houver na nova tabela, usar formador legado
-            if not trainers_list and plan.trainer:
-                trainers_list.append({
-                    "id": plan.trainer.id,
-                    "full_name": plan.trainer.full_name,
-                    "email": plan.trainer.email if hasattr(plan.trainer, 'email') else None,
-                    "is_primary": True
-                })
-            
-            # Buscar bancos associados (N:N)
-            plan_banks = db.query(models.TrainingPlanBank).filter(
-                models.TrainingPlanBank.training_plan_id == plan.id
-            ).all()
-            banks_list = []
-            for pb in plan_banks:
-                bank = db.query(models.Bank).filter(models.Bank.id == pb.bank_id).first()
-                if bank:
-                    banks_list.append({"id": bank.id, "code": bank.code, "name": bank.name})
-            
-            # Fallback para banco legado
-            if not banks_list and plan.bank:
-                banks_list.append({"id": plan.bank.id, "code": plan.bank.code, "name": plan.bank.name})
-            
-            # Buscar produtos associados (N:N)
-            plan_products = db.query(models.TrainingPlanProduct).filter(
-                models.TrainingPlanProduct.training_plan_id == plan.id
-            ).all()
-            products_list = []
-            for pp in plan_products:
-                product = db.query(models.Product).filter(models.Product.id == pp.product_id).first()
-                if product:
-                    products_list.append({"id": product.id, "code": product.code, "name": product.name})
-            
-            # Fallback para produto legado
-            if not products_list and plan.product:
-                products_list.append({"id": plan.product.id, "code": plan.product.code, "name": plan.product.name})
-
-            result.append({
-                "id": plan.id,
-                "title": plan.title,
-                "description": plan.description,
-                "trainer_id": plan.trainer_id,
-                "trainer": {
-                    "id": plan.trainer.id if plan.trainer else None,
-                    "full_name": plan.trainer.full_name if plan.trainer else None
-                } if hasattr(plan, 'trainer') else None,
-                "trainers": trainers_list,
-                "total_courses": total_courses,
-                "student": student_info,
-                "enrolled_students": students_list,
-                "enrolled_count": len(students_list),
-                "total_duration_hours": total_hours,
-                "start_date": plan.start_date.isoformat() if plan.start_date else None,
-                "end_date": plan.end_date.isoformat() if plan.end_date else None,
-                "is_permanent": bool(plan.is_permanent) if plan.is_permanent else False,
-                "created_at": plan.created_at.isoformat() if plan.created_at else None,
-                # Bank and Product info (legacy single, fallback to N:N)
-                "bank_id": plan.bank_id or (banks_list[0]["id"] if banks_list else None),
-                "bank_code": banks_list[0]["code"] if banks_list else None,
-                "bank_name": banks_list[0]["name"] if banks_list else None,
-                "product_id": plan.product_id or (products_list[0]["id"] if products_list else None),
-                "product_name": products_list[0]["name"] if products_list else None,
-                "product_code": products_list[0]["code"] if products_list else None,
-                # Multiple banks and products
-                "bank_ids": [b["id"] for b in banks_list],
-                "product_ids": [p["id"] for p in products_list],
-                "banks": banks_list,
-                "products": products_list,
-                "is_active": plan.is_active,
-                # Novos campos de status
-                "status": plan_status["status"],
-                "progress_percentage": plan_status["progress_percentage"],
-                "days_remaining": plan_status["days_remaining"],
-                "days_delayed": plan_status["days_delayed"],
-                "is_delayed": plan_status["is_delayed"],
-                "completed_courses": plan_status["completed_courses"],
-                "completed_lessons": plan_status["completed_lessons"]
-            })
+                plan_status = calculate_plan_status(
+                    db, plan,
+                    completed_by_course=completed.get((plan.id, plan.student_id), {}),
+                )
+            result.append(_serialize_plan_list_item(plan, plan_status))
 
         logger.info(f"User {current_user.email} fetched {len(result)} training plans")
-        return result
+        if page is None:
+            return result
+        return {
+            "items": result,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size,
+        }
     
     except Exception as e:
         logger.error(f"Error listing training plans: {str(e)}")
@@ -664,16 +705,6 @@ async def get_training_plan(
     if not plan:
         raise HTTPException(status_code=404, detail="Training plan not found")
 
-    # Auto-renew permanent plan: update end_date to 31/12 of current year if year changed
-    from datetime import datetime as dt_renew
-    if plan.is_permanent and plan.end_date:
-        current_year = dt_renew.now().year
-        if plan.end_date.year < current_year:
-            plan.end_date = dt_renew(current_year, 12, 31, 23, 59, 59)
-            db.add(plan)
-            db.commit()
-            db.refresh(plan)
-
     # Verificar permissões
     if current_user.is_usuario_basico:
         # Verificar se o formando está atribuído (por assignment OU por student_id)
@@ -1888,6 +1919,7 @@ async def get_plan_completion_status(
 @router.post("/{plan_id}/finalize")
 async def finalize_training_plan(
     plan_id: int,
+    background_tasks: BackgroundTasks,
     student_id: int = None,
     current_user: models.User = Depends(auth.require_role(["ADMIN", "FORMADOR"])),
     db: Session = Depends(get_db)
@@ -2035,6 +2067,9 @@ async def finalize_training_plan(
     
     logger.info(f"Training plan {plan_id} finalized for student {student.email} by user {current_user.email}. Certificate {cert_number} issued.")
     
+    # PDF gerado uma única vez, depois da resposta (cache em disco)
+    background_tasks.add_task(prerender_certificate_pdf, certificate.id)
+    
     return {
         "success": True,
         "message": "Plano de formação finalizado com sucesso!",
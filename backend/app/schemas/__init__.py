@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # User Schemas
@@ -750,4 +750,9 @@ class FinalizationResponse(BaseModel):
     success: bool
     message: str
     finalized_at: Optional[datetime] = None
-    certificate_id: Optional[int] = None
\ No newline at end of file
+    certificate_id: Optional[int] = None
+
+class CertificateBatchRequest(BaseModel):
+    """Request para gerar PDFs de certificados em lote (ids e/ou plano)"""
+    certificate_ids: Optional[List[int]] = None
+    training_plan_id: Optional[int] = None
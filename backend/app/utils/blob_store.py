@@ -0,0 +1,78 @@
+"""
+Blob store para ficheiros binários (anexos de chamados, ...).
+
+A BD guarda apenas metadados e a chave do blob; o conteúdo fica fora da BD.
+As chaves são o sha256 do conteúdo, por isso o mesmo ficheiro enviado duas
+vezes ocupa espaço uma só vez e um blob nunca muda depois de escrito.
+
+O backend é escolhido por BLOB_STORE_BACKEND; hoje só existe "local"
+(disco em STORAGE_DIR/blobs). Outro backend só precisa de implementar
+put / open / size / exists / delete.
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import settings
+
+
+class LocalBlobStore:
+    """Blobs em disco: <root>/<2 primeiros chars da chave>/<chave>."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if len(key) != 64 or not all(ch in "0123456789abcdef" for ch in key):
+            raise ValueError(f"Chave de blob inválida: {key!r}")
+        return self.root / key[:2] / key
+
+    def put(self, data: bytes) -> str:
+        """Guarda o conteúdo e devolve a chave (idempotente)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if path.exists():
+            return key
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return key
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+BLOB_STORE_BACKENDS = {
+    "local": lambda: LocalBlobStore(Path(settings.STORAGE_DIR) / "blobs"),
+}
+
+
+@lru_cache(maxsize=1)
+def get_blob_store():
+    backend = BLOB_STORE_BACKENDS.get(settings.BLOB_STORE_BACKEND)
+    if backend is None:
+        raise RuntimeError(f"BLOB_STORE_BACKEND desconhecido: {settings.BLOB_STORE_BACKEND}")
+    return backend()
@@ -0,0 +1,162 @@
+"""
+Agregados incrementais das operações de desafios COMPLETE.
+
+Cada ChallengeSubmission guarda contadores que resumem as suas operações
+concluídas (ops_completed, ops_reviewed, ops_with_error, ops_correct,
+ops_duration_seconds e os totais error_* por tipo). Em vez de reler todas
+as operações a cada evento, finish_operation e classify_operation aplicam
+apenas a diferença (antes/depois) da operação alterada, na mesma transacção.
+A diferença é somada em SQL (col = col + delta), por isso eventos
+concorrentes na mesma submission (formando e formador) não perdem incrementos.
+
+recompute_submission_aggregates reconstrói os contadores a partir das
+operações — usado pela ferramenta de verificação de admin e como rede de
+segurança para dados antigos.
+"""
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, selectinload
+from .. import models
+
+
+# Tipos de erro aceites (EN e PT) → coluna de totalizador na submission
+ERROR_TYPE_COLUMNS = {
+    "METHODOLOGY": "error_methodology",
+    "METODOLOGIA": "error_methodology",
+    "KNOWLEDGE": "error_knowledge",
+    "CONHECIMENTO": "error_knowledge",
+    "DETAIL": "error_detail",
+    "DETALHE": "error_detail",
+    "PROCEDURE": "error_procedure",
+    "PROCEDIMENTO": "error_procedure",
+}
+
+AGGREGATE_COLUMNS = (
+    "ops_completed",
+    "ops_reviewed",
+    "ops_with_error",
+    "ops_correct",
+    "ops_duration_seconds",
+    "error_methodology",
+    "error_knowledge",
+    "error_detail",
+    "error_procedure",
+)
+
+
+def operation_contribution(operation: models.ChallengeOperation, error_types=None) -> dict:
+    """
+    Contribuição de uma operação para os agregados da submission.
+
+    Só operações concluídas contam. `error_types` é a lista de tipos de erro
+    da operação; se omitida usa operation.errors.
+    """
+    contribution = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+    if not operation.completed_at:
+        return contribution
+
+    contribution["ops_completed"] = 1
+    contribution["ops_duration_seconds"] = operation.duration_seconds or 0
+    if operation.is_approved is not None:
+        contribution["ops_reviewed"] = 1
+    if operation.has_error:
+        contribution["ops_with_error"] = 1
+        if error_types is None:
+            error_types = [err.error_type for err in operation.errors]
+        for error_type in error_types:
+            column = ERROR_TYPE_COLUMNS.get((error_type or "").upper())
+            if column:
+                contribution[column] += 1
+    elif operation.is_approved == True:
+        contribution["ops_correct"] = 1
+    return contribution
+
+
+def aggregate_operations(operations) -> dict:
+    """Agregados completos de uma lista de operações (com errors carregados)."""
+    totals = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+    for operation in operations:
+        for column, value in operation_contribution(operation).items():
+            totals[column] += value
+    return totals
+
+
+def apply_operation_delta(
+    db: Session, submission: models.ChallengeSubmission, before: dict, after: dict
+) -> None:
+    """
+    Soma (after - before) aos contadores da submission — O(1) por evento.
+
+    UPDATE atómico na BD (a linha fica bloqueada até ao commit); os
+    contadores do objecto são relidos para reflectirem o valor actual.
+    """
+    Sub = models.ChallengeSubmission
+    values = {
+        column: func.coalesce(getattr(Sub, column), 0) + (after[column] - before[column])
+        for column in AGGREGATE_COLUMNS
+        if after[column] != before[column]
+    }
+    if not values:
+        return
+    db.execute(
+        update(Sub).where(Sub.id == submission.id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.refresh(submission, attribute_names=list(values))
+
+
+def live_score(submission: models.ChallengeSubmission, challenge: models.Challenge) -> dict:
+    """
+    Pontuação corrente a partir dos agregados (sem ler operações).
+    MPU = minutos / operações concluídas (quanto menor, melhor).
+    """
+    total_ops = submission.ops_completed or 0
+    total_time_minutes = (submission.ops_duration_seconds or 0) / 60.0
+
+    calculated_mpu = 0.0
+    if total_ops > 0 and total_time_minutes > 0:
+        calculated_mpu = round(total_time_minutes / total_ops, 2)
+
+    target_mpu = (challenge.target_mpu or 0) if challenge else 0
+    mpu_vs_target = round((target_mpu / calculated_mpu * 100) if calculated_mpu > 0 else 0, 1)
+
+    return {
+        "total_operations": total_ops,
+        "reviewed_operations": submission.ops_reviewed or 0,
+        "operations_with_error": submission.ops_with_error or 0,
+        "correct_operations": submission.ops_correct or 0,
+        "total_time_minutes": total_time_minutes,
+        "calculated_mpu": calculated_mpu,
+        "mpu_vs_target": mpu_vs_target,
+    }
+
+
+def recompute_submission_aggregates(
+    db: Session, submission: models.ChallengeSubmission, fix: bool = False
+) -> dict:
+    """
+    Recalcula os agregados a partir das operações e compara com os guardados.
+
+    Returns:
+        dict {coluna: {"stored": x, "actual": y}} apenas com as divergências.
+        Com fix=True os valores guardados são corrigidos (sem commit).
+        Submissions SUMMARY não têm operações e devolvem sempre {}.
+    """
+    if submission.submission_type != "COMPLETE":
+        return {}
+
+    operations = db.query(models.ChallengeOperation).options(
+        selectinload(models.ChallengeOperation.errors)
+    ).filter(
+        models.ChallengeOperation.submission_id == submission.id
+    ).all()
+
+    actual = aggregate_operations(operations)
+
+    mismatches = {}
+    for column in AGGREGATE_COLUMNS:
+        stored = getattr(submission, column) or 0
+        if stored != actual[column]:
+            mismatches[column] = {"stored": stored, "actual": actual[column]}
+            if fix:
+                setattr(submission, column, actual[column])
+    return mismatches
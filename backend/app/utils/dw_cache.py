@@ -0,0 +1,101 @@
+"""
+Cache das respostas de /api/dw por geração do ETL.
+
+Os dados do DW só mudam quando o ETL corre. A geração é o id da última
+carga terminada em dw_etl_runs: run_full_etl chama bump() no fim (neste
+processo) e os outros workers vêem a nova geração ao reler dw_etl_runs, no
+máximo a cada DW_GENERATION_CHECK_SECONDS.
+
+Entradas por (endpoint, parâmetros, geração), com limite LRU e um TTL de
+segurança. Enquanto uma carga está a meio, as respostas da geração actual
+continuam a ser servidas da cache, mas o que for lido do DW nesse intervalo
+não é guardado (os factos podem estar incompletos).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.constants import DW_CACHE_MAX_ENTRIES, DW_CACHE_TTL_SECONDS, DW_GENERATION_CHECK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class DWCache:
+    def __init__(self, ttl_seconds: int, max_entries: int, check_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.check_seconds = check_seconds
+        self._generation = 0
+        self._loading = False
+        self._checked_at: Optional[float] = None
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ── geração ──────────────────────────────────────────────────────────
+
+    def begin_load(self) -> None:
+        """Chamado pelo ETL no início de uma carga (este processo)."""
+        with self._lock:
+            self._loading = True
+
+    def bump(self, generation: int) -> None:
+        """Chamado pelo ETL no fim de uma carga (este processo)."""
+        with self._lock:
+            self._generation = max(self._generation, generation)
+            self._loading = False
+            self._checked_at = time.monotonic()
+            self._drop_old()
+
+    def generation(self, db: Session) -> int:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            try:
+                row = db.execute(text("""
+                    SELECT MAX(CASE WHEN finished_at IS NOT NULL THEN id END) AS finished,
+                           MAX(id) AS latest
+                    FROM dw_etl_runs
+                """)).one()
+                finished, latest = row.finished or 0, row.latest or 0
+            except SQLAlchemyError as e:  # migração V024 ainda não aplicada
+                db.rollback()
+                logger.warning("dw_etl_runs unavailable: %s", e)
+                finished, latest = self._generation, self._generation
+            with self._lock:
+                if finished > self._generation:
+                    self._generation = finished
+                    self._drop_old()
+                self._loading = latest > finished
+                self._checked_at = now
+        return self._generation
+
+    def _drop_old(self) -> None:
+        for key in [k for k in self._entries if k[-1] != self._generation]:
+            del self._entries[key]
+
+    # ── leitura ──────────────────────────────────────────────────────────
+
+    def get(self, key: tuple, build: Callable[[], object]):
+        """`key` termina na geração (ver generation())."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[0]:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = build()
+        with self._lock:
+            if key[-1] == self._generation and not self._loading:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+
+dw_cache = DWCache(DW_CACHE_TTL_SECONDS, DW_CACHE_MAX_ENTRIES, DW_GENERATION_CHECK_SECONDS)
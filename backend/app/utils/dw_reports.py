@@ -0,0 +1,472 @@
+"""
+Relatórios calculados sobre o DW (esquema em estrela, carregado por app/etl).
+
+Os builders têm a mesma assinatura e devolvem o mesmo formato que os
+builders OLTP de app/routers/relatorios.py, mas leem só factos e dimensões:
+  dw_fact_tutoria / dw_fact_tutoria_plans  — erros e planos de acção
+  dw_fact_training_plans                   — planos de formação
+  dw_fact_user_activity                    — agregados de formação por utilizador
+  dw_dim_user / dw_dim_team / dw_dim_product / dw_dim_date
+
+O âmbito do utilizador (visible_user_scope) entra como `du.user_id IN (...)`.
+
+dw_generation() decide se o DW pode ser usado: só em MySQL, com
+REPORTS_FROM_DW activo e com a última carga ETL terminada sem erros há
+menos de DW_REPORTS_MAX_AGE_SECONDS. Caso contrário (SQLite nos testes,
+carga em curso ou falhada) os relatórios continuam a ler as tabelas OLTP.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.auth import visible_user_scope
+from app.config import settings
+from app.constants import DW_REPORTS_MAX_AGE_SECONDS
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+def dw_generation(db: Session) -> Optional[int]:
+    """Id da última carga ETL válida, ou None se os relatórios devem ler o OLTP."""
+    if not settings.REPORTS_FROM_DW or db.get_bind().dialect.name != "mysql":
+        return None
+    try:
+        row = db.execute(text("""
+            SELECT id, ok, finished_at >= NOW() - INTERVAL :max_age SECOND AS recent
+            FROM dw_etl_runs
+            ORDER BY id DESC
+            LIMIT 1
+        """), {"max_age": DW_REPORTS_MAX_AGE_SECONDS}).first()
+    except SQLAlchemyError as e:  # migração V024 ainda não aplicada
+        logger.warning("dw_etl_runs unavailable, reports read OLTP: %s", e)
+        return None
+    # Carga em curso (finished_at NULL), falhada ou antiga → OLTP
+    if row is None or not row.ok or not row.recent:
+        return None
+    return row.id
+
+
+def _scope_filter(db: Session, user: User, column: str = "du.user_id") -> str:
+    """`AND <column> IN (<scope>)`, ou "" para quem vê todos (só literais inteiros)."""
+    scope = visible_user_scope(db, user)
+    if scope is None:
+        return ""
+    sql = scope.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    return f"AND {column} IN ({sql})"
+
+
+def _avg(total, count) -> float:
+    return round(float(total) / int(count), 2) if count else 0
+
+
+def _rate(part, total) -> float:
+    return round(int(part) / int(total) * 100, 1) if total else 0
+
+
+# ── Portal de Relatórios ──────────────────────────────────────────────────────
+
+def overview(db: Session, current_user: User):
+    scope = _scope_filter(db, current_user)
+
+    total_users = db.execute(text(f"""
+        SELECT COUNT(*) FROM dw_dim_user du WHERE du.is_active = 1 {scope}
+    """)).scalar() or 0
+
+    if current_user.can_see_all:
+        total_teams = db.execute(text("SELECT COUNT(*) FROM dw_dim_team WHERE is_active = 1")).scalar() or 0
+    else:
+        total_teams = 1 if current_user.is_gerente else 0
+
+    plans = db.execute(text(f"""
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(CASE WHEN f.status_code = 'IN_PROGRESS' THEN 1 ELSE 0 END), 0) AS active
+        FROM dw_fact_training_plans f
+        LEFT JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE 1 = 1 {scope}
+    """)).one()
+
+    errors = db.execute(text(f"""
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(CASE WHEN f.severity = 'CRITICA' THEN 1 ELSE 0 END), 0) AS critical
+        FROM dw_fact_tutoria f
+        JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE 1 = 1 {scope}
+    """)).one()
+
+    pending_action_plans = db.execute(text(f"""
+        SELECT COUNT(*)
+        FROM dw_fact_tutoria_plans f
+        JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE f.status_code IN ('RASCUNHO', 'AGUARDANDO_APROVACAO', 'DEVOLVIDO') {scope}
+    """)).scalar() or 0
+
+    activity = db.execute(text(f"""
+        SELECT COALESCE(SUM(f.certificates), 0) AS certificates,
+               COALESCE(SUM(f.mpu_approved_sum), 0) AS mpu_sum,
+               COALESCE(SUM(f.mpu_approved_count), 0) AS mpu_count
+        FROM dw_fact_user_activity f
+        JOIN dw_dim_user du ON du.user_key = f.user_key
+        WHERE 1 = 1 {scope}
+    """)).one()
+
+    return {
+        "total_users": int(total_users),
+        "total_teams": int(total_teams),
+        "total_plans": int(plans.total),
+        "active_plans": int(plans.active),
+        "total_errors": int(errors.total),
+        "critical_errors": int(errors.critical),
+        "pending_action_plans": int(pending_action_plans),
+        "total_certificates": int(activity.certificates),
+        "avg_mpu": _avg(activity.mpu_sum, activity.mpu_count),
+    }
+
+
+def formacoes(db: Session, current_user: User):
+    scope = _scope_filter(db, current_user)
+
+    a = db.execute(text(f"""
+        SELECT COALESCE(SUM(f.enrollments_total), 0) AS enrollments,
+               COALESCE(SUM(f.enrollments_completed), 0) AS enrollments_completed,
+               COALESCE(SUM(f.submissions_total), 0) AS submissions,
+               COALESCE(SUM(f.submissions_approved), 0) AS submissions_approved,
+               COALESCE(SUM(f.mpu_approved_sum), 0) AS mpu_sum,
+               COALESCE(SUM(f.mpu_approved_count), 0) AS mpu_count,
+               COALESCE(SUM(f.lesson_minutes), 0) AS lesson_minutes,
+               COALESCE(SUM(f.certificates), 0) AS certificates,
+               COALESCE(SUM(f.error_methodology), 0) AS methodology,
+               COALESCE(SUM(f.error_knowledge), 0) AS knowledge,
+               COALESCE(SUM(f.error_detail), 0) AS detail,
+               COALESCE(SUM(f.error_procedure), 0) AS `procedure`
+        FROM dw_fact_user_activity f
+        JOIN dw_dim_user du ON du.user_key = f.user_key
+        WHERE 1 = 1 {scope}
+    """)).one()
+
+    plan_rows = db.execute(text(f"""
+        SELECT f.status_code, COUNT(*) AS cnt
+        FROM dw_fact_training_plans f
+        LEFT JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE 1 = 1 {scope}
+        GROUP BY f.status_code
+    """)).fetchall()
+    by_status = {r.status_code: int(r.cnt) for r in plan_rows}
+
+    return {
+        "total_enrollments": int(a.enrollments),
+        "completed_enrollments": int(a.enrollments_completed),
+        "completion_rate": _rate(a.enrollments_completed, a.enrollments),
+        "plan_status": {st: by_status.get(st, 0) for st in ["PENDING", "IN_PROGRESS", "COMPLETED", "DELAYED"]},
+        "total_submissions": int(a.submissions),
+        "approved_submissions": int(a.submissions_approved),
+        "approval_rate": _rate(a.submissions_approved, a.submissions),
+        "avg_mpu": _avg(a.mpu_sum, a.mpu_count),
+        "total_study_hours": round(float(a.lesson_minutes) / 60, 1),
+        "total_certificates": int(a.certificates),
+        "error_breakdown": {
+            "methodology": int(a.methodology),
+            "knowledge": int(a.knowledge),
+            "detail": int(a.detail),
+            "procedure": int(a.procedure),
+        },
+    }
+
+
+def tutoria(db: Session, current_user: User):
+    scope = _scope_filter(db, current_user)
+
+    rows = db.execute(text(f"""
+        SELECT f.severity, f.status_code, f.is_recurrent, COUNT(*) AS cnt
+        FROM dw_fact_tutoria f
+        JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE 1 = 1 {scope}
+        GROUP BY f.severity, f.status_code, f.is_recurrent
+    """)).fetchall()
+    by_severity = dict.fromkeys(["BAIXA", "MEDIA", "ALTA", "CRITICA"], 0)
+    by_status = dict.fromkeys(["ABERTO", "EM_ANALISE", "PLANO_CRIADO", "EM_EXECUCAO", "CONCLUIDO", "VERIFICADO"], 0)
+    total_errors = recurrent = 0
+    for r in rows:
+        total_errors += r.cnt
+        if r.is_recurrent:
+            recurrent += r.cnt
+        if r.severity in by_severity:
+            by_severity[r.severity] += r.cnt
+        if r.status_code in by_status:
+            by_status[r.status_code] += r.cnt
+    resolved = by_status["CONCLUIDO"] + by_status["VERIFICADO"]
+
+    plan_rows = db.execute(text(f"""
+        SELECT f.status_code, COUNT(*) AS cnt
+        FROM dw_fact_tutoria_plans f
+        JOIN dw_dim_user du ON du.user_key = f.student_key
+        WHERE 1 = 1 {scope}
+        GROUP BY f.status_code
+    """)).fetchall()
+    plans = {r.status_code: int(r.cnt) for r in plan_rows}
+
+    return {
+        "total_errors": total_errors,
+        "recurrent_errors": recurrent,
+        "recurrent_rate": _rate(recurrent, total_errors),
+        "resolved_errors": resolved,
+        "resolved_rate": _rate(resolved, total_errors),
+        "by_severity": by_severity,
+        "by_status": by_status,
+        "plans_by_status": {
+            st: plans.get(st, 0)
+            for st in ["RASCUNHO", "AGUARDANDO_APROVACAO", "APROVADO", "EM_EXECUCAO", "CONCLUIDO", "DEVOLVIDO"]
+        },
+    }
+
+
+def teams(db: Session, current_user: User):
+    manager_filter = ""
+    params = {}
+    if current_user.is_gerente and not current_user.is_admin:
+        manager_filter = "AND dt.manager_id = :manager_id"
+        params["manager_id"] = current_user.id
+
+    rows = db.execute(text(f"""
+        SELECT dt.team_id, dt.`name` AS team_name, dp.`name` AS product_name, dt.manager_name,
+               (SELECT COUNT(*) FROM dw_dim_user du WHERE du.team_id = dt.team_id) AS members_count,
+               (SELECT COUNT(*) FROM dw_fact_tutoria ft WHERE ft.team_key = dt.team_key) AS errors_count,
+               COALESCE(tp.total, 0) AS plans_total,
+               COALESCE(tp.completed, 0) AS plans_completed,
+               COALESCE(ua.mpu_sum, 0) AS mpu_sum,
+               COALESCE(ua.mpu_count, 0) AS mpu_count
+        FROM dw_dim_team dt
+        LEFT JOIN dw_dim_product dp ON dp.product_key = dt.product_key
+        LEFT JOIN (
+            SELECT team_key, COUNT(*) AS total,
+                   SUM(CASE WHEN status_code = 'COMPLETED' THEN 1 ELSE 0 END) AS completed
+            FROM dw_fact_training_plans
+            WHERE team_key IS NOT NULL
+            GROUP BY team_key
+        ) tp ON tp.team_key = dt.team_key
+        LEFT JOIN (
+            SELECT team_key, SUM(mpu_approved_sum) AS mpu_sum, SUM(mpu_approved_count) AS mpu_count
+            FROM dw_fact_user_activity
+            WHERE team_key IS NOT NULL
+            GROUP BY team_key
+        ) ua ON ua.team_key = dt.team_key
+        WHERE dt.is_active = 1 {manager_filter}
+        ORDER BY dt.team_id
+    """), params).fetchall()
+
+    return [
+        {
+            "team_id": r.team_id,
+            "team_name": r.team_name,
+            "product_name": r.product_name,
+            "manager_name": r.manager_name,
+            "members_count": int(r.members_count),
+            "errors_count": int(r.errors_count),
+            "plans_total": int(r.plans_total),
+            "plans_completed": int(r.plans_completed),
+            "completion_rate": _rate(r.plans_completed, r.plans_total),
+            "avg_mpu": _avg(r.mpu_sum, r.mpu_count),
+        }
+        for r in rows
+    ]
+
+
+def members(db: Session, current_user: User):
+    scope = _scope_filter(db, current_user)
+    if not scope:
+        return []
+
+    rows = db.execute(text(f"""
+        SELECT du.user_id, du.full_name, du.email, du.`role`,
+               COALESCE(er.total, 0) AS errors_count,
+               COALESCE(tp.total, 0) AS plans_total,
+               COALESCE(tp.completed, 0) AS plans_completed,
+               COALESCE(ua.mpu_approved_sum, 0) AS mpu_sum,
+               COALESCE(ua.mpu_approved_count, 0) AS mpu_count,
+               COALESCE(ua.certificates, 0) AS certificates
+        FROM dw_dim_user du
+        LEFT JOIN dw_fact_user_activity ua ON ua.user_key = du.user_key
+        LEFT JOIN (
+            SELECT student_key, COUNT(*) AS total
+            FROM dw_fact_tutoria
+            GROUP BY student_key
+        ) er ON er.student_key = du.user_key
+        LEFT JOIN (
+            SELECT student_key, COUNT(*) AS total,
+                   SUM(CASE WHEN status_code = 'COMPLETED' THEN 1 ELSE 0 END) AS completed
+            FROM dw_fact_training_plans
+            WHERE student_key IS NOT NULL
+            GROUP BY student_key
+        ) tp ON tp.student_key = du.user_key
+        WHERE du.is_active = 1 {scope}
+    """)).fetchall()
+
+    result = [
+        {
+            "id": r.user_id,
+            "full_name": r.full_name,
+            "email": r.email,
+            "role": r.role,
+            "errors_count": int(r.errors_count),
+            "plans_total": int(r.plans_total),
+            "plans_completed": int(r.plans_completed),
+            "completion_rate": _rate(r.plans_completed, r.plans_total),
+            "avg_mpu": _avg(r.mpu_sum, r.mpu_count),
+            "certificates": int(r.certificates),
+        }
+        for r in rows
+    ]
+    return sorted(result, key=lambda x: x["full_name"])
+
+
+def tutoria_analytics(db: Session, current_user: User):
+    scope = _scope_filter(db, current_user)
+    base = """
+        FROM dw_fact_tutoria f
+        JOIN dw_dim_user du ON du.user_key = f.student_key
+    """
+
+    # 1 — Financial impact
+    fin_rows = db.execute(text(f"""
+        SELECT f.severity,
+               COUNT(*) AS cnt,
+               COALESCE(SUM(f.amount), 0) AS total_amount,
+               COUNT(f.amount) AS with_amount,
+               COALESCE(MAX(f.amount), 0) AS max_amount
+        {base}
+        WHERE 1 = 1 {scope}
+        GROUP BY f.severity
+    """)).fetchall()
+    financial = {
+        "total_amount": float(sum(r.total_amount for r in fin_rows)),
+        "with_amount": int(sum(r.with_amount for r in fin_rows)),
+        "total": int(sum(r.cnt for r in fin_rows)),
+        "max_amount": float(max((r.max_amount for r in fin_rows), default=0)),
+        "by_severity": [
+            {"severity": r.severity, "count": r.cnt, "amount": float(r.total_amount)}
+            for r in fin_rows
+        ],
+    }
+
+    # 2, 3, 8 — Pending solution, escalated, action items
+    flags = db.execute(text(f"""
+        SELECT COALESCE(SUM(f.pending_solution), 0) AS pending_solution,
+               COALESCE(SUM(f.is_escalated), 0) AS escalated,
+               COALESCE(SUM(f.action_items_count), 0) AS ai_total,
+               COALESCE(SUM(f.action_items_completed), 0) AS ai_completed,
+               COALESCE(SUM(f.action_items_overdue), 0) AS ai_overdue
+        {base}
+        WHERE 1 = 1 {scope}
+    """)).one()
+
+    # 4, 5 — By origin / impact
+    def _by(column: str) -> list:
+        rows = db.execute(text(f"""
+            SELECT f.{column} AS name, COUNT(*) AS cnt
+            {base}
+            WHERE 1 = 1 {scope}
+            GROUP BY f.{column}
+            ORDER BY cnt DESC
+        """)).fetchall()
+        return [{"name": r.name or "N/A", "count": r.cnt} for r in rows]
+
+    # 6 — Resolution time by severity
+    res_rows = db.execute(text(f"""
+        SELECT f.severity,
+               AVG(f.days_to_resolve) AS avg_days,
+               MIN(f.days_to_resolve) AS min_days,
+               MAX(f.days_to_resolve) AS max_days
+        {base}
+        WHERE f.days_to_resolve IS NOT NULL {scope}
+        GROUP BY f.severity
+    """)).fetchall()
+
+    # 7 — Monthly distribution (last 12 months)
+    monthly_rows = db.execute(text(f"""
+        SELECT dd.`year` AS yr, dd.`month` AS mo, COUNT(*) AS cnt,
+               SUM(CASE WHEN f.status_code IN ('RESOLVED','CLOSED') THEN 1 ELSE 0 END) AS resolved,
+               COALESCE(SUM(f.amount), 0) AS amount
+        {base}
+        JOIN dw_dim_date dd ON dd.date_key = f.date_key
+        WHERE dd.full_date >= DATE_SUB(CURDATE(), INTERVAL 12 MONTH) {scope}
+        GROUP BY dd.`year`, dd.`month`
+        ORDER BY dd.`year`, dd.`month`
+    """)).fetchall()
+
+    # 10 — Recurrence
+    rec_rows = db.execute(text(f"""
+        SELECT f.is_recurrent, f.recurrence_type, COUNT(*) AS cnt
+        {base}
+        WHERE 1 = 1 {scope}
+        GROUP BY f.is_recurrent, f.recurrence_type
+    """)).fetchall()
+
+    return {
+        "financial": financial,
+        "pending_solution": int(flags.pending_solution),
+        "escalated": int(flags.escalated),
+        "by_origin": _by("origin_name"),
+        "by_impact": _by("impact_name"),
+        "resolution_time_by_severity": [
+            {
+                "severity": r.severity,
+                "avg_days": round(float(r.avg_days), 1) if r.avg_days else 0,
+                "min_days": int(r.min_days) if r.min_days else 0,
+                "max_days": int(r.max_days) if r.max_days else 0,
+            }
+            for r in res_rows
+        ],
+        "monthly": [
+            {"year": r.yr, "month": r.mo, "count": r.cnt, "resolved": int(r.resolved), "amount": float(r.amount)}
+            for r in monthly_rows
+        ],
+        "action_items": {
+            "total": int(flags.ai_total),
+            "completed": int(flags.ai_completed),
+            "overdue": int(flags.ai_overdue),
+        },
+        # 9 — Os pesos (liberador/gravador/tutor) são de internal_errors, não de tutoria_errors
+        "avg_weights": {"liberador": 0, "gravador": 0, "tutor": 0},
+        "recurrence": {
+            "recurrent": sum(r.cnt for r in rec_rows if r.is_recurrent),
+            "non_recurrent": sum(r.cnt for r in rec_rows if not r.is_recurrent),
+            "by_type": [
+                {"type": r.recurrence_type or "N/A", "count": r.cnt}
+                for r in rec_rows if r.is_recurrent and r.recurrence_type
+            ],
+        },
+    }
+
+
+# ── Advanced reports ──────────────────────────────────────────────────────────
+
+def student_performance(db: Session) -> list:
+    """Linhas de /api/admin/advanced-reports/student-performance (todos os TRAINEE)."""
+    rows = db.execute(text("""
+        SELECT du.full_name, du.email,
+               COALESCE(ua.lessons_total, 0) AS total_lessons,
+               COALESCE(ua.lessons_completed, 0) AS completed_lessons,
+               COALESCE(ua.mpu_positive_sum, 0) AS mpu_sum,
+               COALESCE(ua.mpu_positive_count, 0) AS mpu_count,
+               COALESCE(ua.study_seconds, 0) AS study_seconds,
+               COALESCE(ua.certificates, 0) AS certificates
+        FROM dw_dim_user du
+        LEFT JOIN dw_fact_user_activity ua ON ua.user_key = du.user_key
+        WHERE du.`role` = 'TRAINEE'
+        ORDER BY du.user_id
+    """)).fetchall()
+    return [
+        {
+            "student_name": r.full_name or "Sem nome",
+            "email": r.email,
+            "total_lessons": int(r.total_lessons),
+            "completed_lessons": int(r.completed_lessons),
+            "avg_mpu": _avg(r.mpu_sum, r.mpu_count),
+            "total_time_hours": round(float(r.study_seconds) / 3600.0, 2),
+            "certificates_count": int(r.certificates),
+        }
+        for r in rows
+    ]
@@ -0,0 +1,265 @@
+"""
+Eventos em tempo real para o SPA (Server-Sent Events).
+
+Canais:
+  user:<id>     → notificações e estado das aulas desse utilizador
+  review-queue  → a fila de correcção de desafios mudou (revisores)
+
+O EventBroker é um pub/sub em memória: cada ligação SSE subscreve os seus
+canais e recebe os eventos numa asyncio.Queue. publish() pode ser chamado
+de endpoints síncronos (threadpool) — a entrega passa para o event loop.
+
+Os eventos de uma transacção só saem depois do commit (publish_after_commit
+guarda-os em session.info; um rollback descarta-os), para o cliente nunca
+reler dados ainda não gravados. Alterações a LessonProgress e à fila de
+revisão são detectadas no flush, sem código nos endpoints.
+
+Com vários workers (REALTIME_DB_BRIDGE=True) cada evento é também escrito
+em realtime_events e run_db_bridge() reentrega localmente os eventos
+publicados pelos outros workers.
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event as sa_event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.constants import (
+    REALTIME_SUBSCRIBER_QUEUE_SIZE,
+    REALTIME_BRIDGE_POLL_SECONDS,
+    REALTIME_BRIDGE_RETENTION_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+REVIEW_QUEUE_CHANNEL = "review-queue"
+WORKER_ID = uuid.uuid4().hex
+
+_PENDING_KEY = "realtime_pending_events"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """Uma ligação SSE: os seus canais e a fila de eventos (no loop onde foi criada)."""
+
+    def __init__(self, channels: Iterable[str], loop: asyncio.AbstractEventLoop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=REALTIME_SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, item) -> None:
+        # Cliente lento: descarta o evento mais antigo em vez de bloquear quem publica
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+
+class EventBroker:
+    def __init__(self):
+        self._channels: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        sub = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in sub.channels:
+                self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._channels.get(channel)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._channels[channel]
+
+    def dispatch(self, channel: str, event: str, data=None) -> int:
+        """Entrega local de um evento; devolve o número de ligações que o recebem."""
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        item = (event, data)
+        for sub in subs:
+            if sub.loop is running:
+                sub.push(item)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub.push, item)
+        return len(subs)
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._channels.values() for sub in subs})
+
+
+broker = EventBroker()
+
+
+def publish(channels: Iterable[str], event: str, data=None) -> None:
+    """Publica já (fora de transacções). Dentro de um pedido usar publish_after_commit."""
+    channels = list(dict.fromkeys(channels))
+    for channel in channels:
+        broker.dispatch(channel, event, data)
+    if settings.REALTIME_DB_BRIDGE and channels:
+        _bridge_write(channels, event, data)
+
+
+def publish_after_commit(session: Session, channels: Iterable[str], event: str, data=None) -> None:
+    """Agenda o evento para depois do commit da sessão (descartado em rollback)."""
+    session.info.setdefault(_PENDING_KEY, []).append((list(channels), event, data))
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for channels, event, data in session.info.pop(_PENDING_KEY, None) or ():
+        try:
+            publish(channels, event, data)
+        except Exception as exc:  # nunca falhar o pedido por causa do push
+            logger.warning("Realtime publish failed (non-fatal): %s", exc)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# ── Eventos derivados do flush ────────────────────────────────────────────────
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_model_events(session: Session, flush_context) -> None:
+    from app import models
+
+    lesson_changes = {}
+    review_queue_changed = False
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        is_new_or_deleted = obj in session.new or obj in session.deleted
+        if isinstance(obj, models.LessonProgress):
+            if obj.user_id and (is_new_or_deleted or _changed(obj, "status", "is_paused", "is_released", "is_approved", "student_confirmed")):
+                lesson_changes[(obj.user_id, obj.lesson_id, obj.training_plan_id)] = obj.status
+        elif isinstance(obj, models.ChallengeSubmission):
+            if is_new_or_deleted or _changed(obj, "status"):
+                review_queue_changed = True
+        elif isinstance(obj, models.ChallengeOperation):
+            if is_new_or_deleted or _changed(obj, "completed_at"):
+                review_queue_changed = True
+
+    if review_queue_changed:
+        publish_after_commit(session, [REVIEW_QUEUE_CHANNEL], "review-queue")
+
+    if not lesson_changes:
+        return
+
+    # Formadores dos planos envolvidos também acompanham o progresso dos formandos
+    plan_ids = {plan_id for (_, _, plan_id) in lesson_changes if plan_id}
+    trainers_by_plan: dict[int, set[int]] = {}
+    if plan_ids:
+        conn = session.connection()
+        rows = conn.execute(
+            select(models.TrainingPlan.id, models.TrainingPlan.trainer_id)
+            .where(models.TrainingPlan.id.in_(plan_ids))
+        ).all()
+        rows += conn.execute(
+            select(models.TrainingPlanTrainer.training_plan_id, models.TrainingPlanTrainer.trainer_id)
+            .where(models.TrainingPlanTrainer.training_plan_id.in_(plan_ids))
+        ).all()
+        for plan_id, trainer_id in rows:
+            if trainer_id:
+                trainers_by_plan.setdefault(plan_id, set()).add(trainer_id)
+
+    for (user_id, lesson_id, plan_id), status in lesson_changes.items():
+        recipients = {user_id} | trainers_by_plan.get(plan_id, set())
+        publish_after_commit(
+            session,
+            [user_channel(uid) for uid in sorted(recipients)],
+            "lesson",
+            {"lesson_id": lesson_id, "training_plan_id": plan_id, "user_id": user_id, "status": status},
+        )
+
+
+# ── Ponte pela BD entre workers (opcional) ────────────────────────────────────
+
+def _bridge_write(channels: list, event: str, data) -> None:
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.add_all([
+            models.RealtimeEvent(channel=channel, event=event, data=data, origin=WORKER_ID)
+            for channel in channels
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _bridge_fetch(last_id: Optional[int]) -> tuple[list, Optional[int]]:
+    """Eventos de outros workers com id > last_id (na primeira chamada só fixa o ponto de partida)."""
+    from app import models
+    from app.database import SessionLocal
+
+    Event = models.RealtimeEvent
+    db = SessionLocal()
+    try:
+        if last_id is None:
+            max_id = db.execute(select(Event.id).order_by(Event.id.desc()).limit(1)).scalar()
+            return [], max_id or 0
+        rows = db.execute(
+            select(Event.id, Event.channel, Event.event, Event.data, Event.origin)
+            .where(Event.id > last_id)
+            .order_by(Event.id)
+            .limit(500)
+        ).all()
+        if rows:
+            last_id = rows[-1].id
+        return [(r.channel, r.event, r.data) for r in rows if r.origin != WORKER_ID], last_id
+    finally:
+        db.close()
+
+
+def _bridge_prune() -> None:
+    from app import models
+    from app.database import SessionLocal
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=REALTIME_BRIDGE_RETENTION_SECONDS)
+    db = SessionLocal()
+    try:
+        db.execute(delete(models.RealtimeEvent).where(models.RealtimeEvent.created_at < cutoff))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_db_bridge() -> None:
+    """Tarefa de fundo (lifespan): reentrega localmente os eventos dos outros workers."""
+    last_id = None
+    polls = 0
+    while True:
+        try:
+            events, last_id = await asyncio.to_thread(_bridge_fetch, last_id)
+            for channel, event, data in events:
+                broker.dispatch(channel, event, data)
+            polls += 1
+            if polls % 600 == 0:
+                await asyncio.to_thread(_bridge_prune)
+        except Exception as exc:
+            logger.warning("Realtime DB bridge poll failed (non-fatal): %s", exc)
+        await asyncio.sleep(REALTIME_BRIDGE_POLL_SECONDS)
@@ -0,0 +1,74 @@
+"""
+Exportação de tabelas em streaming (CSV / XLSX).
+
+As linhas chegam por um iterador (normalmente um cursor em streaming) e
+são escritas à medida que chegam — a memória usada não depende do número
+de linhas.
+
+CSV:  cada lote de linhas é enviado logo ao cliente.
+XLSX: o openpyxl em modo write_only escreve a folha para um ficheiro
+      temporário; no fim o ficheiro é enviado aos blocos e apagado.
+"""
+import csv
+import io
+import tempfile
+from typing import Iterable, Iterator, Optional, Sequence
+
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_CSV_FLUSH_ROWS = 500
+_FILE_CHUNK = 64 * 1024
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """CSV em UTF-8 com BOM (o Excel reconhece os acentos)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if v is None else v for v in row])
+        pending += 1
+        if pending >= _CSV_FLUSH_ROWS:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue().encode("utf-8")
+
+
+def iter_xlsx(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    sheet_title: str = "Sheet1",
+    widths: Optional[Sequence[int]] = None,
+) -> Iterator[bytes]:
+    """XLSX de uma folha, escrito em modo write_only e enviado aos blocos."""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    for idx, width in enumerate(widths or [], start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.append(list(header))
+    for row in rows:
+        # Caracteres de controlo (texto colado de outras ferramentas) fariam o
+        # openpyxl falhar a meio, com a resposta 200 já enviada
+        ws.append([ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v for v in row])
+
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while chunk := tmp.read(_FILE_CHUNK):
+            yield chunk
+
+
+def attachment_headers(filename: str) -> dict:
+    return {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+    }
@@ -0,0 +1,133 @@
+"""
+Serviço de notificações in-app (tutoria).
+
+As notificações são inseridas em lote (executemany) e cada utilizador tem
+um contador de não lidas em tutoria_notification_counters, actualizado na
+mesma transacção. Assim /notifications/unread-count é uma leitura por
+chave primária, independente do tamanho da caixa de entrada.
+
+Nada aqui faz commit — quem chama decide quando. Depois do commit cada
+destinatário recebe um evento "notification" no seu canal SSE
+(app/utils/events.py), para actualizar o contador sem polling.
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from .events import publish_after_commit, user_channel
+
+Notification = models.TutoriaNotification
+UnreadCounter = models.TutoriaNotificationCounter
+
+
+def _add_unread(db: Session, deltas: dict) -> None:
+    """Soma `deltas` {user_id: n} aos contadores (upsert; cria a linha se faltar)."""
+    rows = [{"user_id": user_id, "unread": n} for user_id, n in deltas.items() if n]
+    if not rows:
+        return
+
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as upsert
+        stmt = upsert(UnreadCounter)
+        stmt = stmt.on_duplicate_key_update(unread=UnreadCounter.unread + stmt.inserted.unread)
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(UnreadCounter)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UnreadCounter.user_id],
+            set_={"unread": UnreadCounter.unread + stmt.excluded.unread},
+        )
+    db.execute(stmt, rows)
+
+
+def notify_many(db: Session, rows: list) -> int:
+    """
+    Insere várias notificações de uma vez.
+
+    rows: dicts com user_id, type, message e opcionalmente error_id / plan_id.
+    Linhas sem user_id são ignoradas. Devolve o número de notificações criadas.
+    """
+    rows = [
+        {
+            "user_id": row["user_id"],
+            "type": row["type"],
+            "message": row["message"][:500],
+            "error_id": row.get("error_id"),
+            "plan_id": row.get("plan_id"),
+            "is_read": False,
+        }
+        for row in rows
+        if row.get("user_id")
+    ]
+    if not rows:
+        return 0
+    db.execute(insert(Notification), rows)
+    deltas = Counter(row["user_id"] for row in rows)
+    _add_unread(db, deltas)
+    publish_after_commit(db, [user_channel(uid) for uid in deltas], "notification")
+    return len(rows)
+
+
+def notify(
+    db: Session,
+    recipients: Iterable[Optional[int]],
+    ntype: str,
+    message: str,
+    error_id: int = None,
+    plan_id: int = None,
+) -> int:
+    """Mesma notificação para vários destinatários (sem repetidos, ignora None)."""
+    user_ids = list(dict.fromkeys(uid for uid in recipients if uid))
+    return notify_many(db, [
+        {"user_id": uid, "type": ntype, "message": message, "error_id": error_id, "plan_id": plan_id}
+        for uid in user_ids
+    ])
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    counter = db.get(UnreadCounter, user_id)
+    return max(counter.unread, 0) if counter else 0
+
+
+def mark_read(db: Session, user_id: int, notification_id: int) -> bool:
+    """Marca uma notificação como lida. False se não existir / não for do utilizador."""
+    # UPDATE condicional: de dois pedidos concorrentes só um vê rowcount 1 e desconta
+    result = db.execute(
+        update(Notification)
+        .where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id,
+            Notification.is_read == False,
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        db.execute(
+            update(UnreadCounter)
+            .where(UnreadCounter.user_id == user_id, UnreadCounter.unread > 0)
+            .values(unread=UnreadCounter.unread - 1)
+        )
+        publish_after_commit(db, [user_channel(user_id)], "notification")
+        return True
+    return db.query(Notification.id).filter(
+        Notification.id == notification_id, Notification.user_id == user_id
+    ).first() is not None
+
+
+def mark_all_read(db: Session, user_id: int) -> int:
+    """Marca todas como lidas num só UPDATE e zera o contador. Devolve quantas mudaram."""
+    result = db.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(UnreadCounter).where(UnreadCounter.user_id == user_id).values(unread=0)
+    )
+    publish_after_commit(db, [user_channel(user_id)], "notification")
+    return max(result.rowcount or 0, 0)
@@ -0,0 +1,133 @@
+"""
+Closure table da hierarquia organizacional (org_node_closure).
+
+Para cada nó existe uma linha (antecessor, descendente, depth) por cada um
+dos seus antecessores, incluindo ele próprio com depth 0. Assim:
+
+  - descendentes de X  → WHERE ancestor_id = X
+  - antecessores de X  → WHERE descendant_id = X
+  - "Y está sob X?"    → existe (X, Y)
+
+cada um numa única query indexada. A lista de adjacência (parent_id)
+continua a ser a fonte de verdade; estas funções mantêm a closure em cada
+create / move / delete, na mesma transacção (sem commit).
+"""
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+Closure = models.OrgNodeClosure
+
+
+def closure_insert_node(db: Session, node: models.OrgNode) -> None:
+    """Regista um nó novo (já com id) sob o seu parent_id."""
+    rows = [{"ancestor_id": node.id, "descendant_id": node.id, "depth": 0}]
+    if node.parent_id is not None:
+        ancestors = db.query(Closure.ancestor_id, Closure.depth).filter(
+            Closure.descendant_id == node.parent_id
+        ).all()
+        rows += [
+            {"ancestor_id": ancestor_id, "descendant_id": node.id, "depth": depth + 1}
+            for ancestor_id, depth in ancestors
+        ]
+    db.execute(insert(Closure), rows)
+
+
+def closure_move_subtree(db: Session, node_id: int, new_parent_id) -> None:
+    """
+    Move a subárvore de node_id para debaixo de new_parent_id (None = raiz).
+
+    Remove as ligações dos antigos antecessores externos à subárvore e liga
+    cada antecessor do novo pai a cada nó da subárvore.
+    """
+    subtree = db.query(Closure.descendant_id, Closure.depth).filter(
+        Closure.ancestor_id == node_id
+    ).all()
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+    db.query(Closure).filter(
+        Closure.descendant_id.in_(subtree_ids),
+        Closure.ancestor_id.notin_(subtree_ids),
+    ).delete(synchronize_session=False)
+
+    if new_parent_id is None:
+        return
+
+    ancestors = db.query(Closure.ancestor_id, Closure.depth).filter(
+        Closure.descendant_id == new_parent_id
+    ).all()
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": a_depth + d_depth + 1}
+        for ancestor_id, a_depth in ancestors
+        for descendant_id, d_depth in subtree
+    ]
+    if rows:
+        db.execute(insert(Closure), rows)
+
+
+def closure_delete_node(db: Session, node_id: int) -> None:
+    """Remove as linhas de um nó (as FKs ON DELETE CASCADE fazem o mesmo em MySQL)."""
+    db.query(Closure).filter(
+        (Closure.ancestor_id == node_id) | (Closure.descendant_id == node_id)
+    ).delete(synchronize_session=False)
+
+
+def descendant_ids(db: Session, node_id: int, include_self: bool = False) -> set[int]:
+    """Todos os descendentes de node_id numa só query."""
+    q = db.query(Closure.descendant_id).filter(Closure.ancestor_id == node_id)
+    if not include_self:
+        q = q.filter(Closure.depth > 0)
+    return {descendant_id for (descendant_id,) in q.all()}
+
+
+def ancestor_ids(db: Session, node_id: int, include_self: bool = False) -> list[int]:
+    """Antecessores de node_id, do pai até à raiz."""
+    q = db.query(Closure.ancestor_id).filter(Closure.descendant_id == node_id)
+    if not include_self:
+        q = q.filter(Closure.depth > 0)
+    return [ancestor_id for (ancestor_id,) in q.order_by(Closure.depth).all()]
+
+
+def is_descendant(db: Session, ancestor_id: int, node_id: int) -> bool:
+    """True se node_id está na subárvore de ancestor_id (inclui o próprio)."""
+    return db.query(Closure.depth).filter(
+        Closure.ancestor_id == ancestor_id,
+        Closure.descendant_id == node_id,
+    ).first() is not None
+
+
+def rebuild_org_closure(db: Session) -> int:
+    """
+    Reconstrói a closure a partir de parent_id (sem commit).
+    Devolve o número de linhas escritas.
+    """
+    parents = dict(db.query(models.OrgNode.id, models.OrgNode.parent_id).all())
+
+    rows = []
+    for node_id in parents:
+        depth, current, seen = 0, node_id, set()
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            rows.append({"ancestor_id": current, "descendant_id": node_id, "depth": depth})
+            current = parents[current]
+            depth += 1
+
+    db.query(Closure).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(Closure), rows)
+    return len(rows)
+
+
+def ensure_org_closure(db: Session) -> int:
+    """
+    Reconstrói a closure se não cobrir todos os nós (ex.: BD criada com
+    create_all, sem a migração V019). Idempotente; devolve as linhas escritas.
+    """
+    node_count = db.query(models.OrgNode.id).count()
+    self_rows = db.query(Closure.descendant_id).filter(Closure.depth == 0).count()
+    if node_count == self_rows:
+        return 0
+    written = rebuild_org_closure(db)
+    db.commit()
+    return written
@@ -0,0 +1,209 @@
+"""
+Cache de resultados dos relatórios (Portal de Relatórios).
+
+Cada resultado fica guardado por (endpoint, âmbito, filtros). O âmbito é o
+hash do SQL de visible_user_scope mais as flags que mudam o relatório, por
+isso utilizadores com a mesma visibilidade (ex.: todos os admins) partilham
+a mesma entrada.
+
+Invalidação por domínio ("tutoria", "training", "teams"): writes ORM aos
+modelos de cada domínio (flush ou UPDATE/DELETE em massa) sobem a versão do
+domínio depois do commit. Uma entrada construída com versões antigas, ou
+mais velha que o TTL, passa a "stale":
+
+  REPORT_CACHE_SWR=True  → devolve logo o resultado stale e recalcula em
+                           background (stale-while-revalidate), desde que
+                           não passe de REPORT_CACHE_STALE_MAX_SECONDS;
+  REPORT_CACHE_SWR=False → recalcula no pedido.
+
+A cache é por processo; com vários workers o TTL limita quanto tempo um
+worker pode mostrar dados de writes feitos noutro.
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event as sa_event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.constants import (
+    REPORT_CACHE_MAX_ENTRIES,
+    REPORT_CACHE_REFRESH_WORKERS,
+    REPORT_CACHE_STALE_MAX_SECONDS,
+    REPORT_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "report_cache_domains"
+
+# Modelo → domínios cujos relatórios dependem dele
+_DOMAIN_MODELS = {
+    "tutoria": (
+        "TutoriaError", "TutoriaActionPlan", "TutoriaActionItem",
+        "ErrorOrigin", "ErrorImpact",
+    ),
+    "training": (
+        "TrainingPlan", "TrainingPlanAssignment", "Enrollment", "LessonProgress",
+        "ChallengeSubmission", "Certificate",
+    ),
+    "teams": (
+        "User", "Team", "Product", "OrgNode", "OrgNodeMember", "OrgNodeClosure",
+    ),
+}
+ALL_DOMAINS = tuple(_DOMAIN_MODELS)
+
+# Colunas de User que entram nos relatórios (password, SSO, ... não invalidam)
+_USER_REPORT_ATTRS = (
+    "full_name", "email", "role", "is_active", "team_id", "tutor_id",
+    "is_admin", "is_diretor", "is_gerente", "is_chefe_equipe", "is_formador",
+)
+
+_domains_by_model: Optional[dict] = None
+
+
+def _model_domains(cls) -> tuple:
+    global _domains_by_model
+    if _domains_by_model is None:
+        mapping = {}
+        for domain, names in _DOMAIN_MODELS.items():
+            for name in names:
+                mapping.setdefault(name, []).append(domain)
+        _domains_by_model = {name: tuple(domains) for name, domains in mapping.items()}
+    return _domains_by_model.get(cls.__name__, ())
+
+
+class _Entry:
+    __slots__ = ("value", "built_at", "versions")
+
+    def __init__(self, value, built_at: float, versions: tuple):
+        self.value = value
+        self.built_at = built_at
+        self.versions = versions
+
+
+class ReportCache:
+    def __init__(self, ttl_seconds: int, stale_max_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.stale_max_seconds = stale_max_seconds
+        self.max_entries = max_entries
+        self._versions = {domain: 0 for domain in ALL_DOMAINS}
+        self._entries: dict = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    # ── versões por domínio ──────────────────────────────────────────────
+
+    def _snapshot(self, domains: tuple) -> tuple:
+        return tuple(self._versions[d] for d in domains)
+
+    def invalidate(self, domains: Iterable[str] = ALL_DOMAINS) -> None:
+        with self._lock:
+            for domain in domains:
+                self._versions[domain] += 1
+
+    # ── leitura ──────────────────────────────────────────────────────────
+
+    def get(self, key, domains: tuple, build: Callable[[], object],
+            refresh: Optional[Callable[[], object]] = None):
+        """
+        Resultado de `key`. `build` calcula no pedido; `refresh` (opcional)
+        calcula fora do pedido, com sessão própria, para o modo SWR.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = now - entry.built_at
+            fresh = entry.versions == self._snapshot(domains) and age < self.ttl_seconds
+            if fresh:
+                return entry.value
+            if refresh is not None and settings.REPORT_CACHE_SWR and age < self.stale_max_seconds:
+                self._schedule(key, domains, refresh)
+                return entry.value
+        return self._store(key, domains, build)
+
+    def _store(self, key, domains: tuple, build: Callable[[], object]):
+        versions = self._snapshot(domains)
+        built_at = time.monotonic()
+        value = build()
+        with self._lock:
+            # Só guarda se nenhum write do domínio aconteceu durante o cálculo
+            if versions == self._snapshot(domains):
+                self._entries.pop(key, None)
+                self._entries[key] = _Entry(value, built_at, versions)
+                while len(self._entries) > self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+        return value
+
+    def _schedule(self, key, domains: tuple, refresh: Callable[[], object]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=REPORT_CACHE_REFRESH_WORKERS, thread_name_prefix="report-cache",
+                )
+        self._pool.submit(self._run_refresh, key, domains, refresh)
+
+    def _run_refresh(self, key, domains: tuple, refresh: Callable[[], object]) -> None:
+        try:
+            self._store(key, domains, refresh)
+        except Exception as exc:  # a entrada stale continua a ser servida
+            logger.warning("Report cache refresh failed for %s: %s", key[0], exc)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+report_cache = ReportCache(REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_STALE_MAX_SECONDS, REPORT_CACHE_MAX_ENTRIES)
+
+
+def scope_key(scope_sql: Optional[str], *parts) -> str:
+    """Hash curto do âmbito (SQL do scope ou None = todos) + partes extra."""
+    raw = "|".join([scope_sql or "*"] + [str(p) for p in parts])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# ── Hooks de invalidação ──────────────────────────────────────────────────────
+
+def _mark(session: Session, domains) -> None:
+    if domains:
+        session.info.setdefault(_PENDING_KEY, set()).update(domains)
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        domains = _model_domains(type(obj))
+        if domains and type(obj).__name__ == "User" and obj in session.dirty:
+            state = inspect(obj)
+            if not any(state.attrs[attr].history.has_changes() for attr in _USER_REPORT_ATTRS):
+                continue
+        _mark(session, domains)
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state) -> None:
+    # insert()/update()/delete() em massa não passam pelo flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark(orm_execute_state.session, _model_domains(mapper.class_))
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    domains = session.info.pop(_PENDING_KEY, None)
+    if domains:
+        report_cache.invalidate(domains)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
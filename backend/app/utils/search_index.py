@@ -0,0 +1,326 @@
+"""
+Índice de pesquisa em texto livre (tabela search_documents).
+
+Cada erro de tutoria, chamado, ficha de aprendizagem e FAQ do chatbot tem
+uma linha com título e corpo. O índice é actualizado na mesma transacção
+que a escrita (listener after_flush), por isso nunca fica à frente nem
+atrás dos dados. Alterações feitas com UPDATEs em massa não passam pelo
+listener — ensure_search_index() (arranque) reconstrói se faltar algo.
+
+Motor conforme a BD:
+  MySQL   → índice FULLTEXT (title, body), MATCH ... AGAINST em BOOLEAN MODE
+  SQLite  → tabela virtual FTS5 com conteúdo externo, mantida por triggers
+  outro / sem FTS5 → LIKE por termo (só para desenvolvimento)
+
+Todas as pesquisas são AND de prefixos: "ficha proced" encontra
+"Ficha de procedimento". A visibilidade é aplicada por quem chama, juntando
+cada documento à tabela de origem.
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, and_, delete, event as sa_event, func, literal, or_, select, text, true
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+Doc = models.SearchDocument
+
+FTS_TABLE = "search_documents_fts"
+MYSQL_FULLTEXT_INDEX = "ft_search_documents"
+MYSQL_MIN_TOKEN = 3      # innodb_ft_min_token_size (defeito)
+SNIPPET_CHARS = 160
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ── Documentos ───────────────────────────────────────────────────────────────
+
+def _join(*parts) -> str:
+    return "\n\n".join(p.strip() for p in parts if p and p.strip())
+
+
+def _short(text_: Optional[str], n: int = 120) -> str:
+    text_ = " ".join((text_ or "").split())
+    return text_ if len(text_) <= n else text_[: n - 1] + "…"
+
+
+def _error_doc(e) -> tuple[str, str]:
+    return _short(e.description), _join(e.description, e.solution)
+
+
+def _chamado_doc(c) -> tuple[str, str]:
+    return c.title or "", c.description or ""
+
+
+def _sheet_doc(s) -> tuple[str, str]:
+    return s.title or "", _join(s.error_summary, s.root_cause, s.correct_procedure, s.key_learnings, s.reference_material)
+
+
+def _faq_doc(f) -> tuple[str, str]:
+    first_kw = (f.keywords_pt or "").replace("\n", ",").split(",")[0].strip()
+    return first_kw, _join(f.answer_pt, f.answer_es, f.answer_en)
+
+
+# source → (modelo, documento, atributos que alteram o documento)
+SOURCES = {
+    "error": (models.TutoriaError, _error_doc, ("description", "solution")),
+    "chamado": (models.Chamado, _chamado_doc, ("title", "description")),
+    "learning_sheet": (
+        models.TutoriaLearningSheet, _sheet_doc,
+        ("title", "error_summary", "root_cause", "correct_procedure", "key_learnings", "reference_material"),
+    ),
+    "faq": (models.ChatFAQ, _faq_doc, ("keywords_pt", "answer_pt", "answer_es", "answer_en")),
+}
+_SOURCE_BY_MODEL = {model: source for source, (model, _, _) in SOURCES.items()}
+
+
+def doc_key(source: str, source_id: int) -> str:
+    return f"{source}:{source_id}"
+
+
+def _row(source: str, obj) -> dict:
+    title, body = SOURCES[source][1](obj)
+    return {
+        "doc_key": doc_key(source, obj.id),
+        "source": source,
+        "source_id": obj.id,
+        "title": title[:300],
+        "body": body,
+    }
+
+
+def _upsert(conn, rows: list) -> None:
+    if not rows:
+        return
+    if conn.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as upsert
+        stmt = upsert(Doc)
+        stmt = stmt.on_duplicate_key_update(title=stmt.inserted.title, body=stmt.inserted.body)
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(Doc)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Doc.doc_key],
+            set_={"title": stmt.excluded.title, "body": stmt.excluded.body},
+        )
+    conn.execute(stmt, rows)
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _index_flushed(session: Session, flush_context) -> None:
+    rows, removed = [], []
+    for obj in session.new:
+        source = _SOURCE_BY_MODEL.get(type(obj))
+        if source:
+            rows.append(_row(source, obj))
+    for obj in session.dirty:
+        source = _SOURCE_BY_MODEL.get(type(obj))
+        if source and session.is_modified(obj, include_collections=False):
+            state = obj._sa_instance_state
+            if any(state.attrs[attr].history.has_changes() for attr in SOURCES[source][2]):
+                rows.append(_row(source, obj))
+    for obj in session.deleted:
+        source = _SOURCE_BY_MODEL.get(type(obj))
+        if source:
+            removed.append(doc_key(source, obj.id))
+
+    if not rows and not removed:
+        return
+    conn = session.connection()
+    _upsert(conn, rows)
+    if removed:
+        conn.execute(delete(Doc).where(Doc.doc_key.in_(removed)))
+
+
+# ── Manutenção ───────────────────────────────────────────────────────────────
+
+def rebuild_search_index(db: Session, batch_size: int = 500) -> int:
+    """Reescreve o índice a partir das tabelas de origem. Não faz commit."""
+    conn = db.connection()
+    conn.execute(delete(Doc))
+    written = 0
+    for source, (model, _, _) in SOURCES.items():
+        last_id = 0
+        while True:
+            objs = (
+                db.query(model).filter(model.id > last_id)
+                .order_by(model.id).limit(batch_size).all()
+            )
+            if not objs:
+                break
+            _upsert(conn, [_row(source, obj) for obj in objs])
+            written += len(objs)
+            last_id = objs[-1].id
+            db.expunge_all()
+    return written
+
+
+def _ensure_engine_index(db: Session) -> None:
+    conn = db.connection()
+    if conn.dialect.name == "mysql":
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'search_documents' AND index_name = :name LIMIT 1"
+        ), {"name": MYSQL_FULLTEXT_INDEX}).first()
+        if not exists:
+            conn.execute(text(f"ALTER TABLE search_documents ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (title, body)"))
+    elif conn.dialect.name == "sqlite":
+        _sqlite_fts_ready(conn)
+
+
+def ensure_search_index(db: Session) -> int:
+    """
+    Prepara o motor (FULLTEXT / FTS5) e reconstrói o índice se o número de
+    documentos não bater com as tabelas de origem. Faz commit; devolve as
+    linhas escritas (0 se já estava completo).
+    """
+    _ensure_engine_index(db)
+    expected = sum(db.query(func.count(model.id)).scalar() or 0 for model, _, _ in SOURCES.values())
+    indexed = db.query(func.count(Doc.id)).scalar() or 0
+    written = rebuild_search_index(db) if expected != indexed else 0
+    db.commit()
+    return written
+
+
+# ── SQLite FTS5 ──────────────────────────────────────────────────────────────
+
+_FTS_UNAVAILABLE: set[str] = set()   # URLs de engines sem FTS5
+
+
+def _sqlite_fts_ready(conn) -> bool:
+    """Cria (se faltar) a tabela FTS5 e os triggers que a sincronizam com search_documents."""
+    url = str(conn.engine.url)
+    if url in _FTS_UNAVAILABLE:
+        return False
+    present = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    if present:
+        return True
+    try:
+        # Transacção própria e confirmada: quem chama pode acabar em rollback
+        # (ex.: um GET), e triggers sem o 'rebuild' deixariam o FTS corrompido.
+        with conn.engine.begin() as ddl:
+            ddl.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, body, "
+                "content='search_documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            ))
+            ddl.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+            ))
+            ddl.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END"
+            ))
+            ddl.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+                f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+            ))
+            ddl.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        return True
+    except OperationalError as exc:  # sqlite compilado sem FTS5
+        logger.warning("SQLite FTS5 unavailable, search falls back to LIKE: %s", exc)
+        _FTS_UNAVAILABLE.add(url)
+        return False
+
+
+# ── Pesquisa ─────────────────────────────────────────────────────────────────
+
+def query_terms(query: str) -> list[str]:
+    return list(dict.fromkeys(t.lower() for t in _TOKEN_RE.findall(query or "")))
+
+
+def _match(conn, terms: list[str]):
+    """
+    (from, condição, score) para o motor da BD, ou None se nenhum termo é
+    pesquisável (ex.: só palavras abaixo do mínimo do FULLTEXT).
+    """
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import match
+        terms = [t for t in terms if len(t) >= MYSQL_MIN_TOKEN]
+        if not terms:
+            return None
+        score = match(Doc.title, Doc.body, against=" ".join(f"+{t}*" for t in terms)).in_boolean_mode()
+        return Doc.__table__, score > 0, score
+
+    if dialect == "sqlite" and _sqlite_fts_ready(conn):
+        fts = (
+            text(
+                f"SELECT rowid AS doc_id, -bm25({FTS_TABLE}, 2.0, 1.0) AS score "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query"
+            )
+            .bindparams(fts_query=" ".join(f'"{t}"*' for t in terms))
+            .columns(doc_id=Integer, score=Float)
+            .subquery()
+        )
+        return Doc.__table__.join(fts, fts.c.doc_id == Doc.id), true(), fts.c.score
+
+    like = and_(*[or_(Doc.title.ilike(f"%{t}%"), Doc.body.ilike(f"%{t}%")) for t in terms])
+    return Doc.__table__, like, literal(0.0, Float)
+
+
+def snippet(body: Optional[str], terms: list[str], size: int = SNIPPET_CHARS) -> str:
+    """Excerto do corpo à volta da primeira ocorrência de um termo."""
+    body = " ".join((body or "").split())
+    lower = body.lower()
+    positions = [pos for pos in (lower.find(t) for t in terms) if pos >= 0]
+    start = max(min(positions) - size // 4, 0) if positions else 0
+    if start:
+        # Começar numa palavra inteira
+        space = body.find(" ", start)
+        start = space + 1 if 0 <= space < min(positions) else start
+    excerpt = body[start:start + size]
+    return ("…" if start else "") + excerpt + ("…" if start + size < len(body) else "")
+
+
+def search(db: Session, query: str, visibility: dict, page: int, page_size: int) -> dict:
+    """
+    Pesquisa paginada por relevância.
+
+    visibility: {source: [condições]} — só entram as fontes presentes; cada
+    lista é aplicada (AND) aos documentos dessa fonte (lista vazia = todos).
+    """
+    terms = query_terms(query)
+    empty = {"items": [], "total": 0, "page": page, "page_size": page_size, "total_pages": 0}
+    if not terms or not visibility:
+        return empty
+    matched = _match(db.connection(), terms)
+    if matched is None:
+        return empty
+    from_, condition, score = matched
+
+    scope = or_(*[and_(Doc.source == source, *conds) for source, conds in visibility.items()])
+    base = (
+        select(Doc.source, Doc.source_id, Doc.title, Doc.body, score.label("score"))
+        .select_from(from_)
+        .where(condition, scope)
+    )
+
+    total = db.execute(select(func.count()).select_from(base.subquery())).scalar() or 0
+    rows = db.execute(
+        base.order_by(score.desc(), Doc.id.desc()).offset((page - 1) * page_size).limit(page_size)
+    ).all()
+    return {
+        "items": [
+            {
+                "source": r.source,
+                "id": r.source_id,
+                "title": r.title,
+                "snippet": snippet(r.body, terms),
+                "score": float(r.score or 0),
+            }
+            for r in rows
+        ],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size,
+    }
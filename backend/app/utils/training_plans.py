@@ -1,6 +1,7 @@
 """
 Utilidades para gestão de planos de formação
 """
+from datetime import datetime
 from sqlalchemy.orm import Session
 from .. import models
 
@@ -55,3 +56,29 @@ def reopen_completed_training_plans(db: Session, course_id: int, reason: str = "
         db.commit()
     
     return reopened_count
+
+
+def renew_permanent_training_plans(db: Session, today: datetime = None) -> int:
+    """
+    Renova planos permanentes: end_date passa para 31/12 do ano corrente
+    quando o ano mudou. Executado uma vez por dia pelo scheduler (main.py),
+    em vez de em cada leitura da listagem de planos.
+
+    Args:
+        db: Database session
+        today: Data de referência (por omissão, agora)
+
+    Returns:
+        int: Número de planos renovados
+    """
+    current_year = (today or datetime.now()).year
+    renewed = db.query(models.TrainingPlan).filter(
+        models.TrainingPlan.is_permanent == True,
+        models.TrainingPlan.end_date.isnot(None),
+        models.TrainingPlan.end_date < datetime(current_year, 1, 1),
+    ).update(
+        {models.TrainingPlan.end_date: datetime(current_year, 12, 31, 23, 59, 59)},
+        synchronize_session=False,
+    )
+    db.commit()
+    return renewed
@@ -15,10 +15,14 @@ from app.routers import chamados
 from app.routers import internal_errors
 from app.routers import dw
 from app.routers import feedback
+from app.routers import realtime
+from app.routers import search
+from app.routers import dashboard
 from app.database import init_db
 from app.migrate import run_migrations
 from app.constants import (
     RATE_LIMIT_DEFAULT, ETL_INTERVAL_SECONDS, DEADLINE_INTERVAL_SECONDS,
+    PLAN_RENEWAL_INTERVAL_SECONDS, LANDING_REFRESH_SECONDS,
     CACHE_ASSETS_MAX_AGE, CACHE_LOCALES_MAX_AGE, HSTS_MAX_AGE,
 )
 from contextlib import asynccontextmanager
@@ -50,39 +54,65 @@ async def _etl_scheduler():
 async def _deadline_scheduler():
     """Daily task: notify responsible parties about overdue errors (A.6.1)."""
     import asyncio
-    from datetime import date
     while True:
         await asyncio.sleep(DEADLINE_INTERVAL_SECONDS)  # 24 hours
         try:
             from app.database import SessionLocal
-            from app.models import TutoriaError, TutoriaNotification
-            from app.routers.tutoria import _get_error_deadline, create_notification
+            from app.routers.tutoria import notify_overdue_errors
             db = SessionLocal()
             try:
-                today = date.today()
-                errors = db.query(TutoriaError).filter(
-                    TutoriaError.status.notin_(['RESOLVED', 'CANCELLED'])
-                ).all()
-                count = 0
-                for e in errors:
-                    dl = _get_error_deadline(e.date_occurrence)
-                    if dl and today > dl:
-                        # Check if notification already sent today
-                        existing = db.query(TutoriaNotification).filter(
-                            TutoriaNotification.error_id == e.id,
-                            TutoriaNotification.ntype == 'OVERDUE_ALERT',
-                        ).first()
-                        if not existing and e.responsible_id:
-                            create_notification(db, e.responsible_id, 'OVERDUE_ALERT',
-                                f'Erro #{e.id} ultrapassou o prazo de fecho mensal.', error_id=e.id)
-                            count += 1
-                logger.info("Deadline check: %d overdue notifications sent.", count)
+                stats = notify_overdue_errors(db)
+                logger.info(
+                    "Deadline check: %d overdue error(s), %d notification(s) sent in %.1f ms (cutoff %s).",
+                    stats["overdue"], stats["notified"], stats["elapsed_ms"], stats["cutoff"],
+                )
             finally:
                 db.close()
         except Exception as exc:
             logger.warning("Deadline scheduler failed (non-fatal): %s", exc)
 
 
+async def _plan_renewal_scheduler():
+    """Daily task: renew permanent training plans to 31/12 of the current year.
+
+    Runs once at startup (so a restart after New Year renews immediately)
+    and then every 24 hours — the plan list endpoints no longer write on read.
+    """
+    import asyncio
+    while True:
+        try:
+            from app.database import SessionLocal
+            from app.utils.training_plans import renew_permanent_training_plans
+            db = SessionLocal()
+            try:
+                count = renew_permanent_training_plans(db)
+                logger.info("Permanent plan renewal: %d plan(s) renewed.", count)
+            finally:
+                db.close()
+        except Exception as exc:
+            logger.warning("Plan renewal scheduler failed (non-fatal): %s", exc)
+        await asyncio.sleep(PLAN_RENEWAL_INTERVAL_SECONDS)
+
+
+async def _landing_scheduler():
+    """Rebuild the public landing snapshot at startup and every few minutes.
+
+    /api/public/landing serves this snapshot from memory (no DB per visitor).
+    """
+    import asyncio
+    while True:
+        try:
+            from app.database import SessionLocal
+            db = SessionLocal()
+            try:
+                public.landing_snapshot.refresh(db)
+            finally:
+                db.close()
+        except Exception as exc:
+            logger.warning("Landing refresh failed (non-fatal): %s", exc)
+        await asyncio.sleep(LANDING_REFRESH_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app):
     import asyncio
@@ -95,6 +125,51 @@ async def lifespan(app):
     except Exception as e:
         logger.error("Migration failed: %s", e)
 
+    if chamados.Image is None:
+        logger.error("Pillow is not installed: chamado image attachments will be rejected "
+                     "(pip install -r requirements.txt).")
+
+    # Move legacy base64 chamado attachments into the blob store (idempotent)
+    try:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            moved = chamados.migrate_legacy_chamado_attachments(db)
+            if moved:
+                logger.info("Moved %d legacy chamado attachment(s) to the blob store.", moved)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning("Chamado attachment migration failed (non-fatal): %s", e)
+
+    # Fill org_node_closure for databases created without V019 (idempotent)
+    try:
+        from app.database import SessionLocal
+        from app.utils.org_closure import ensure_org_closure
+        db = SessionLocal()
+        try:
+            written = ensure_org_closure(db)
+            if written:
+                logger.info("Rebuilt org hierarchy closure table (%d row(s)).", written)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning("Org closure rebuild failed (non-fatal): %s", e)
+
+    # Fill search_documents (and FULLTEXT / FTS5) for existing data (idempotent)
+    try:
+        from app.database import SessionLocal
+        from app.utils.search_index import ensure_search_index
+        db = SessionLocal()
+        try:
+            written = ensure_search_index(db)
+            if written:
+                logger.info("Rebuilt search index (%d document(s)).", written)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning("Search index rebuild failed (non-fatal): %s", e)
+
     # Run ETL on startup (populates DW tables after migrations)
     try:
         from app.database import SessionLocal
@@ -112,12 +187,26 @@ async def lifespan(app):
     scheduler_task = asyncio.create_task(_etl_scheduler())
     # Start daily deadline enforcement scheduler (A.6.1)
     deadline_task = asyncio.create_task(_deadline_scheduler())
+    # Start daily permanent-plan renewal scheduler
+    renewal_task = asyncio.create_task(_plan_renewal_scheduler())
+    # Start public landing stats refresher
+    landing_task = asyncio.create_task(_landing_scheduler())
+    # Ponte de eventos SSE entre workers (só necessária com vários processos)
+    bridge_task = None
+    if settings.REALTIME_DB_BRIDGE:
+        from app.utils.events import run_db_bridge
+        bridge_task = asyncio.create_task(run_db_bridge())
 
     yield
 
     # Cleanup
     scheduler_task.cancel()
     deadline_task.cancel()
+    renewal_task.cancel()
+    landing_task.cancel()
+    if bridge_task:
+        bridge_task.cancel()
+    certificates.shutdown_render_pool()
 
 app = FastAPI(
     title="Trade Data Hub API",
@@ -263,6 +352,12 @@ app.include_router(knowledge_matrix.router, tags=["knowledge_matrix"])
 app.include_router(public.router, tags=["public"])
 # Data Warehouse aggregated data for dashboards
 app.include_router(dw.router, prefix="/api/dw", tags=["data-warehouse"])
+# Server-Sent Events (notificações, aulas, fila de revisão)
+app.include_router(realtime.router, prefix="/api", tags=["realtime"])
+# Pesquisa global (erros, chamados, fichas, FAQs)
+app.include_router(search.router, prefix="/api", tags=["search"])
+# Dashboards: vários widgets num só pedido
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 
 @app.get("/api")
 async def api_root():
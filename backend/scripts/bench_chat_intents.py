@@ -0,0 +1,137 @@
+"""
+Micro-benchmark — detecção de intents do chat (app/routers/chat.py)
+
+Compara o autómato Aho-Corasick (_PatternMatcher) com o varrimento antigo
+(um `padrão in texto` por intent × língua × padrão) e confirma primeiro que
+ambos escolhem o mesmo intent em mensagens aleatórias.
+
+Os padrões são replicados (cada cópia com um sufixo próprio) para medir o
+custo por mensagem à medida que a tabela cresce.
+
+Executar a partir de backend/:
+  python scripts/bench_chat_intents.py [--messages 20000] [--scales 1,10,100]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.routers.chat import (  # noqa: E402
+    INTENT_PATTERNS, SMALLTALK, _compile_patterns, _norm,
+)
+
+
+def _longest(intent_idx, order, p):
+    """Rank de detect_intent."""
+    return (-len(p), order)
+
+
+def _first_intent(intent_idx, order, p):
+    """Rank de _detect_smalltalk."""
+    return intent_idx
+
+
+# ── Implementação anterior (referência) ──────────────────────────────────────
+
+def naive_intent(table: dict, msg: str):
+    """Padrão mais longo ganha; em empate, o primeiro da tabela."""
+    text = _norm(msg)
+    best, best_len = None, 0
+    for intent, langs in table.items():
+        for patterns in langs.values():
+            for p in patterns:
+                if _norm(p) in text and len(p) > best_len:
+                    best, best_len = intent, len(p)
+    return best
+
+
+def naive_smalltalk(table: dict, msg: str):
+    """Primeiro intent (ordem da tabela) com algum padrão presente."""
+    text = _norm(msg)
+    for intent, langs in table.items():
+        for patterns in langs.values():
+            if any(_norm(p) in text for p in patterns):
+                return intent
+    return None
+
+
+# ── Dados ─────────────────────────────────────────────────────────────────────
+
+def replicate(table: dict, copies: int) -> dict:
+    """Tabela com `copies` cópias de cada padrão (cópia 0 = original)."""
+    return {
+        intent: {
+            lang: [p if k == 0 else f"{p} xq{k}" for p in patterns for k in range(copies)]
+            for lang, patterns in langs.items()
+        }
+        for intent, langs in table.items()
+    }
+
+
+def random_messages(table: dict, count: int, seed: int = 7) -> list:
+    """Mensagens de ~64 caracteres com palavras dos padrões, acentos e ruído."""
+    rng = random.Random(seed)
+    words = sorted({w for langs in table.values() for ps in langs.values() for p in ps for w in p.split()})
+    words += ["olá", "AÇÃO", "formação", "por", "favor", "xpto", "hoje", "?"]
+    messages = []
+    for _ in range(count):
+        msg = ""
+        while len(msg) < 64:
+            msg += rng.choice(words) + " "
+        messages.append(msg.strip())
+    return messages
+
+
+# ── Execução ──────────────────────────────────────────────────────────────────
+
+def check(table: dict, rank, naive, messages: list) -> int:
+    matcher = _compile_patterns(table, rank)
+    return sum(1 for m in messages if matcher.best(_norm(m)) != naive(table, m))
+
+
+def bench(table: dict, rank, naive, message: str, number: int) -> tuple:
+    matcher = _compile_patterns(table, rank)
+    auto = timeit.timeit(lambda: matcher.best(_norm(message)), number=number) / number
+    old = timeit.timeit(lambda: naive(table, message), number=max(number // 50, 5)) / max(number // 50, 5)
+    return auto, old
+
+
+def _fmt(seconds: float) -> str:
+    return f"{seconds * 1e6:8.1f} us" if seconds < 1e-3 else f"{seconds * 1e3:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=20000, help="mensagens na verificação")
+    parser.add_argument("--scales", default="1,10,100", help="cópias de cada padrão")
+    parser.add_argument("--number", type=int, default=2000, help="repetições por medição")
+    args = parser.parse_args()
+
+    suites = [("intents", INTENT_PATTERNS, _longest, naive_intent),
+              ("smalltalk", SMALLTALK, _first_intent, naive_smalltalk)]
+
+    print(f"Verificação: {args.messages} mensagens aleatórias")
+    failed = 0
+    for name, table, rank, naive in suites:
+        diffs = check(table, rank, naive, random_messages(table, args.messages))
+        failed += diffs
+        print(f"  {name:<10} {diffs} diferença(s)")
+
+    message = random_messages(INTENT_PATTERNS, 1, seed=1)[0]
+    print(f"\nTempo por mensagem ({len(message)} caracteres)")
+    for copies in (int(s) for s in args.scales.split(",")):
+        for name, table, rank, naive in suites:
+            scaled = replicate(table, copies)
+            patterns = sum(len(ps) for langs in scaled.values() for ps in langs.values())
+            auto, old = bench(scaled, rank, naive, message, args.number)
+            print(f"  {name:<10} {patterns:>7} padrões  autómato {_fmt(auto)}  varrimento {_fmt(old)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
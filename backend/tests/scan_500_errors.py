@@ -490,6 +490,7 @@ test("get", "/api/relatorios/teams", headers=ah, label="rel teams")
 test("get", "/api/relatorios/members", headers=ah, label="rel members")
 test("get", "/api/relatorios/incidents", headers=ah, label="rel incidents")
 test("get", "/api/relatorios/incidents/filters", headers=ah, label="rel inc filters")
+test("get", "/api/relatorios/incidents/export?format=csv", headers=ah, label="rel inc export")
 test("get", "/api/relatorios/tutoria", headers=ah, label="rel tutoria")
 test("get", "/api/relatorios/tutoria/analytics", headers=ah, label="rel tut analytics")
 
@@ -42,6 +42,8 @@ Executar:
   cd backend && python -m pytest tests/test_all_portals.py -v --tb=short
 """
 
+import csv
+import io
 import pytest
 import time
 from fastapi.testclient import TestClient
@@ -82,6 +84,60 @@ def _create_or_find(endpoint: str, headers: dict, payload: dict, name_field: str
     return r.status_code, None
 
 
+def _seed_finalizable_plan():
+    """Plano do formador/aluno de teste com um curso sem lições nem desafios
+    (pode ser finalizado). Devolve (plan_id, course_id, student_id)."""
+    from app.database import SessionLocal
+    from app import models
+    db = SessionLocal()
+    try:
+        trainer = db.query(models.User).filter(models.User.email == "trainer_test@tradehub.com").one()
+        student = db.query(models.User).filter(models.User.email == "student_test@tradehub.com").one()
+        course = models.Course(title=f"Curso Finalização {_RUN_ID}", created_by=trainer.id)
+        plan = models.TrainingPlan(title=f"Plano Finalização {_RUN_ID}", created_by=trainer.id,
+                                   trainer_id=trainer.id, student_id=student.id)
+        db.add_all([course, plan])
+        db.flush()
+        db.add(models.TrainingPlanCourse(training_plan_id=plan.id, course_id=course.id))
+        db.commit()
+        return plan.id, course.id, student.id
+    finally:
+        db.close()
+
+
+def _seed_complete_submission(operations: int = 2):
+    """Desafio COMPLETE (KPI manual) com uma submission IN_PROGRESS do aluno de
+    teste e `operations` operações iniciadas. Devolve (submission_id, [operation_ids])."""
+    from datetime import datetime, timedelta
+    from app.database import SessionLocal
+    from app import models
+    db = SessionLocal()
+    try:
+        trainer = db.query(models.User).filter(models.User.email == "trainer_test@tradehub.com").one()
+        student = db.query(models.User).filter(models.User.email == "student_test@tradehub.com").one()
+        course = models.Course(title=f"Curso Agregados {_RUN_ID}", created_by=trainer.id)
+        db.add(course)
+        db.flush()
+        challenge = models.Challenge(course_id=course.id, title=f"Desafio Agregados {_RUN_ID}",
+                                     operations_required=operations, target_mpu=5,
+                                     created_by=trainer.id, kpi_mode="MANUAL")
+        db.add(challenge)
+        db.flush()
+        submission = models.ChallengeSubmission(challenge_id=challenge.id, user_id=student.id,
+                                                submission_type="COMPLETE", status="IN_PROGRESS")
+        db.add(submission)
+        db.flush()
+        started = datetime.now() - timedelta(minutes=5)
+        ops = [models.ChallengeOperation(submission_id=submission.id, operation_number=n + 1,
+                                         started_at=started)
+               for n in range(operations)]
+        db.add_all(ops)
+        db.commit()
+        return submission.id, [op.id for op in ops]
+    finally:
+        db.close()
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # SHARED STATE — IDs criados durante os testes
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -270,6 +326,20 @@ class TestHealthAndPublic:
     def test_public_landing(self):
         r = client.get("/api/public/landing")
         assert r.status_code == 200
+        assert set(r.json()) == {"stats", "ratings"}
+        assert r.headers["cache-control"].startswith("public")
+        r2 = client.get("/api/public/landing", headers={"If-None-Match": r.headers["etag"]})
+        assert r2.status_code == 304
+
+    def test_public_landing_served_from_snapshot(self, monkeypatch):
+        from app.routes import public
+        client.get("/api/public/landing")
+
+        def no_db():
+            raise AssertionError("landing request opened a DB session")
+
+        monkeypatch.setattr(public, "SessionLocal", no_db)
+        assert client.get("/api/public/landing").status_code == 200
 
     def test_stats_kpis(self):
         r = client.get("/api/stats/kpis")
@@ -942,6 +1012,75 @@ class TestTrainingPlans:
         r = client.get("/api/training-plans/", headers=trainer_headers)
         assert r.status_code == 200
 
+    def test_list_plans_paginated(self, trainer_headers):
+        seeded = {_seed_finalizable_plan()[0], _seed_finalizable_plan()[0]}
+        full = client.get("/api/training-plans/", headers=trainer_headers).json()
+        assert isinstance(full, list)
+        assert seeded <= {p["id"] for p in full}
+        r = client.get("/api/training-plans/?page=1&page_size=1", headers=trainer_headers)
+        assert r.status_code == 200
+        body = r.json()
+        assert body["total"] == len(full)
+        assert body["total_pages"] == len(full)
+        assert [p["id"] for p in body["items"]] == [full[0]["id"]]
+        last = client.get(f"/api/training-plans/?page={len(full)}&page_size=1",
+                          headers=trainer_headers).json()
+        assert [p["id"] for p in last["items"]] == [full[-1]["id"]]
+
+    def test_completed_lessons_counted_in_batch(self):
+        from app.database import SessionLocal
+        from app import models
+        from app.routes.training_plans import _completed_lessons_by_course
+        plan_id, course_id, student_id = _seed_finalizable_plan()
+        other_plan_id, other_course_id, _ = _seed_finalizable_plan()
+        db = SessionLocal()
+        try:
+            lessons = [models.Lesson(course_id=cid, title=f"Lição {n}")
+                       for n, cid in enumerate((course_id, course_id, other_course_id))]
+            db.add_all(lessons)
+            enrollment = models.Enrollment(user_id=student_id, course_id=course_id)
+            db.add(enrollment)
+            db.flush()
+
+            def progress(lesson, plan, status="COMPLETED", confirmed=True):
+                return models.LessonProgress(enrollment_id=enrollment.id, lesson_id=lesson.id, user_id=student_id,
+                                             training_plan_id=plan, status=status, student_confirmed=confirmed)
+
+            db.add_all([
+                progress(lessons[0], plan_id),
+                progress(lessons[1], plan_id, status="IN_PROGRESS", confirmed=False),
+                progress(lessons[2], None),  # legado: sem plano → conta no outro plano
+            ])
+            db.commit()
+            plans = db.query(models.TrainingPlan).filter(
+                models.TrainingPlan.id.in_([plan_id, other_plan_id])).order_by(models.TrainingPlan.id).all()
+            completed = _completed_lessons_by_course(db, [(p, student_id) for p in plans])
+            assert completed[(plan_id, student_id)] == {course_id: 1}
+            assert completed[(other_plan_id, student_id)] == {other_course_id: 1}
+        finally:
+            db.close()
+
+    def test_renew_permanent_training_plans(self):
+        from datetime import datetime
+        from app.database import SessionLocal
+        from app.models import TrainingPlan
+        from app.utils.training_plans import renew_permanent_training_plans
+        permanent_id, _, _ = _seed_finalizable_plan()
+        fixed_id, _, _ = _seed_finalizable_plan()
+        db = SessionLocal()
+        try:
+            db.get(TrainingPlan, permanent_id).is_permanent = True
+            for pid in (permanent_id, fixed_id):
+                db.get(TrainingPlan, pid).end_date = datetime(2018, 12, 31, 23, 59, 59)
+            db.commit()
+            assert renew_permanent_training_plans(db, today=datetime(2019, 1, 2)) == 1
+            db.expire_all()
+            assert db.get(TrainingPlan, permanent_id).end_date.replace(tzinfo=None) == datetime(2019, 12, 31, 23, 59, 59)
+            assert db.get(TrainingPlan, fixed_id).end_date.year == 2018
+            assert renew_permanent_training_plans(db, today=datetime(2019, 6, 1)) == 0
+        finally:
+            db.close()
+
     def test_list_plans_student(self, student_headers):
         r = client.get("/api/training-plans/", headers=student_headers)
         assert r.status_code == 200
@@ -1304,6 +1443,200 @@ class TestChallenges:
         # May fail if student already has active submission
         assert r.status_code in (200, 201, 400, 409)
 
+    def test_operation_deltas_match_recompute(self, student_headers, trainer_headers):
+        from app.database import SessionLocal
+        from app.models import ChallengeSubmission
+        from app.utils.challenge_scoring import recompute_submission_aggregates
+        submission_id, (op1, op2) = _seed_complete_submission()
+        r = client.post(f"/api/challenges/operations/{op1}/finish", headers=student_headers,
+                        json={"actual_duration_seconds": 120})
+        assert r.status_code == 200, r.text
+        r = client.post(f"/api/challenges/operations/{op2}/finish", headers=student_headers,
+                        json={"actual_duration_seconds": 60, "has_error": True,
+                              "errors": [{"error_type": "DETAIL"}]})
+        assert r.status_code == 200, r.text
+        r = client.post(f"/api/challenges/operations/{op1}/classify", headers=trainer_headers,
+                        json={"has_error": False})
+        assert r.status_code == 200, r.text
+        r = client.post(f"/api/challenges/operations/{op2}/classify", headers=trainer_headers,
+                        json={"has_error": True, "errors": [{"error_type": "METHODOLOGY"},
+                                                            {"error_type": "PROCEDURE"}]})
+        assert r.status_code == 200, r.text
+        db = SessionLocal()
+        try:
+            sub = db.get(ChallengeSubmission, submission_id)
+            assert (sub.ops_completed, sub.ops_reviewed, sub.ops_with_error, sub.ops_correct) == (2, 2, 1, 1)
+            assert sub.ops_duration_seconds == 180
+            assert (sub.error_detail, sub.error_methodology, sub.error_procedure) == (0, 1, 1)
+            assert recompute_submission_aggregates(db, sub) == {}
+        finally:
+            db.close()
+
+    def test_operation_delta_is_atomic(self):
+        # Duas sessões com a mesma submission carregada: nenhum incremento se perde
+        from app.database import SessionLocal
+        from app.models import ChallengeSubmission
+        from app.utils.challenge_scoring import AGGREGATE_COLUMNS, apply_operation_delta
+        submission_id, _ = _seed_complete_submission()
+        zero = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+        one_op = {**zero, "ops_completed": 1, "ops_duration_seconds": 30}
+        a, b = SessionLocal(), SessionLocal()
+        try:
+            sub_a = a.get(ChallengeSubmission, submission_id)
+            sub_b = b.get(ChallengeSubmission, submission_id)
+            apply_operation_delta(a, sub_a, zero, one_op)
+            a.commit()
+            apply_operation_delta(b, sub_b, zero, one_op)
+            assert sub_b.ops_completed == 2
+            b.commit()
+        finally:
+            a.close()
+            b.close()
+        db = SessionLocal()
+        try:
+            sub = db.get(ChallengeSubmission, submission_id)
+            assert (sub.ops_completed, sub.ops_duration_seconds) == (2, 60)
+        finally:
+            db.close()
+
+    def test_finish_operation_counted_once(self, student_headers):
+        # Pedido concorrente com a operação ainda por concluir na sua sessão
+        import asyncio
+        from fastapi import HTTPException
+        from app.database import SessionLocal
+        from app.models import ChallengeOperation, ChallengeSubmission, User
+        from app.routers.challenges import FinishOperationInput, finish_operation
+        from app.utils.challenge_scoring import recompute_submission_aggregates
+        submission_id, (op1, _) = _seed_complete_submission()
+        body = {"actual_duration_seconds": 90, "has_error": True, "errors": [{"error_type": "DETAIL"}]}
+        stale_db = SessionLocal()
+        try:
+            stale = stale_db.get(ChallengeOperation, op1)
+            assert stale.completed_at is None
+            r = client.post(f"/api/challenges/operations/{op1}/finish", headers=student_headers, json=body)
+            assert r.status_code == 200, r.text
+            user = stale_db.query(User).filter(User.email == "student_test@tradehub.com").first()
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(finish_operation(op1, FinishOperationInput(**body), db=stale_db, current_user=user))
+            assert exc.value.status_code == 400
+        finally:
+            stale_db.close()
+        db = SessionLocal()
+        try:
+            sub = db.get(ChallengeSubmission, submission_id)
+            assert (sub.ops_completed, sub.ops_with_error, sub.error_detail, sub.ops_duration_seconds) == (1, 1, 1, 90)
+            assert recompute_submission_aggregates(db, sub) == {}
+        finally:
+            db.close()
+
+    def test_finish_operation_counts_existing_errors(self, student_headers):
+        from app.database import SessionLocal
+        from app.models import ChallengeOperation, ChallengeSubmission, OperationError
+        from app.utils.challenge_scoring import recompute_submission_aggregates
+        submission_id, (op1, _) = _seed_complete_submission()
+        db = SessionLocal()
+        try:
+            db.get(ChallengeOperation, op1).has_error = True
+            db.add(OperationError(operation_id=op1, error_type="KNOWLEDGE"))
+            db.commit()
+        finally:
+            db.close()
+        r = client.post(f"/api/challenges/operations/{op1}/finish", headers=student_headers,
+                        json={"actual_duration_seconds": 30, "errors": [{"error_type": "PROCEDURE"}]})
+        assert r.status_code == 200, r.text
+        db = SessionLocal()
+        try:
+            sub = db.get(ChallengeSubmission, submission_id)
+            assert (sub.error_knowledge, sub.error_procedure) == (1, 1)
+            assert recompute_submission_aggregates(db, sub) == {}
+        finally:
+            db.close()
+
+    def test_submission_detail_serializer(self, student_headers, trainer_headers):
+        from sqlalchemy import event
+        from app.database import SessionLocal, engine
+        from app.routers.challenges import load_submission_graph, submission_detail_out
+        submission_id, (op1, op2) = _seed_complete_submission()
+        client.post(f"/api/challenges/operations/{op2}/finish", headers=student_headers,
+                    json={"actual_duration_seconds": 240})
+        client.post(f"/api/challenges/operations/{op2}/classify", headers=trainer_headers,
+                    json={"has_error": True, "errors": [{"error_type": "KNOWLEDGE", "description": "x"}]})
+        r = client.get(f"/api/challenges/submissions/{submission_id}", headers=student_headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert [op["id"] for op in body["operations"]] == [op1, op2]
+        assert body["operations"][1]["errors"][0]["error_type"] == "KNOWLEDGE"
+        # Totais derivados das operações concluídas (só op2)
+        assert (body["total_operations"], body["total_time_minutes"], body["calculated_mpu"]) == (1, 4.0, 4.0)
+        assert body["errors_count"] == 1
+        assert body["errors_summary"]["error_knowledge"] == 1
+        assert body["user"]["email"] == "student_test@tradehub.com"
+        assert body["challenge"]["kpi_mode"] == "MANUAL"
+
+        statements = []
+
+        def count(*_args):
+            statements.append(1)
+
+        db = SessionLocal()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            submission = load_submission_graph(db, submission_id)
+            loaded = len(statements)
+            out = submission_detail_out(submission)
+            assert len(statements) == loaded  # o serializer não faz queries
+            assert [op["id"] for op in out["operations"]] == [op1, op2]
+            assert (out["total_operations"], out["errors_count"]) == (1, 1)
+            assert loaded <= 5
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+            db.close()
+
+    def test_review_queue_pagination(self, student_headers, trainer_headers):
+        idle_id, _ = _seed_complete_submission()
+        queued_id, (op1, _) = _seed_complete_submission()
+        assert client.post(f"/api/challenges/operations/{op1}/finish", headers=student_headers,
+                           json={"actual_duration_seconds": 30}).status_code == 200
+        r = client.get("/api/challenges/pending-review/list", headers=trainer_headers)
+        assert r.status_code == 200
+        assert "x-total-count" not in r.headers
+        full = r.json()
+        ids = [sub["id"] for sub in full]
+        # IN_PROGRESS só entra com operações concluídas
+        assert queued_id in ids and idle_id not in ids
+        queued = next(sub for sub in full if sub["id"] == queued_id)
+        assert queued["total_operations"] == 2 and queued["user"]["email"] == "student_test@tradehub.com"
+        r = client.get("/api/challenges/pending-review/list?page=2&page_size=1", headers=trainer_headers)
+        assert r.status_code == 200
+        assert r.headers["x-total-count"] == str(len(full))
+        assert [sub["id"] for sub in r.json()] == ids[1:2]
+
+    def test_verify_aggregates_reports_and_fixes(self, student_headers):
+        import asyncio
+        from app.database import SessionLocal
+        from app.models import ChallengeSubmission
+        from app.routers.challenges import verify_submission_aggregates
+        assert client.get("/api/challenges/admin/aggregates/verify",
+                          headers=student_headers).status_code == 403
+        submission_id, (op1, _) = _seed_complete_submission()
+        assert client.post(f"/api/challenges/operations/{op1}/finish", headers=student_headers,
+                           json={"actual_duration_seconds": 90}).status_code == 200
+        db = SessionLocal()
+        try:
+            db.get(ChallengeSubmission, submission_id).ops_completed = 5  # deriva simulada
+            db.commit()
+            report = asyncio.run(verify_submission_aggregates(submission_id=submission_id, fix=False, db=db))
+            assert report["checked"] == 1 and report["mismatched"] == 1
+            assert report["details"][0]["mismatches"] == {"ops_completed": {"stored": 5, "actual": 1}}
+            report = asyncio.run(verify_submission_aggregates(submission_id=submission_id, fix=True, db=db))
+            assert report["fixed"] is True
+            db.expire_all()
+            assert db.get(ChallengeSubmission, submission_id).ops_completed == 1
+            report = asyncio.run(verify_submission_aggregates(submission_id=submission_id, fix=False, db=db))
+            assert report["mismatched"] == 0
+        finally:
+            db.close()
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 9. LESSONS — progress, release, start, pause
@@ -1420,6 +1753,36 @@ class TestFinalization:
         # May fail if plan not fully completed
         assert r.status_code in (200, 400)
 
+    def test_finalize_course_completes_plan_course(self, trainer_headers):
+        from app.database import SessionLocal
+        from app.models import TrainingPlanCourse
+        plan_id, course_id, student_id = _seed_finalizable_plan()
+        r = client.post(f"/api/finalization/course/{plan_id}/{course_id}/finalize?user_id={student_id}",
+                        headers=trainer_headers)
+        assert r.status_code == 200, r.text
+        assert r.json()["success"] is True
+        db = SessionLocal()
+        try:
+            pc = db.query(TrainingPlanCourse).filter(TrainingPlanCourse.training_plan_id == plan_id).one()
+            assert pc.status == "COMPLETED"
+        finally:
+            db.close()
+        r = client.post(f"/api/finalization/course/{plan_id}/{course_id}/finalize?user_id={student_id}",
+                        headers=trainer_headers)
+        assert r.status_code == 400
+
+    def test_finalize_plan_prerenders_certificate(self, trainer_headers, monkeypatch):
+        from app.routers import finalization
+        rendered = []
+        monkeypatch.setattr(finalization, "prerender_certificate_pdf", rendered.append)
+        plan_id, _, student_id = _seed_finalizable_plan()
+        r = client.post(f"/api/finalization/plan/{plan_id}/finalize?user_id={student_id}",
+                        headers=trainer_headers)
+        assert r.status_code == 200, r.text
+        certificate_id = r.json()["certificate_id"]
+        assert certificate_id
+        assert rendered == [certificate_id]
+
     def test_finalize_training_plan(self, admin_headers):
         r = client.post(
             f"/api/training-plans/{st.training_plan_id}/finalize?student_id={st.student_id}",
@@ -1823,9 +2186,66 @@ class TestTutoriaNotifications:
                          headers=admin_headers)
         assert r.status_code == 200
 
+    def test_unread_count_after_read_all(self, admin_headers):
+        r = client.get("/api/tutoria/notifications/unread-count",
+                       headers=admin_headers)
+        assert r.status_code == 200
+        assert r.json()["unread"] == 0
+
+    def test_mark_read_twice_decrements_once(self, student_headers, trainer_headers):
+        from app.database import SessionLocal
+        from app.models import TutoriaNotification, User
+        from app.utils.notifications import mark_read, notify
+        db = SessionLocal()
+        try:
+            user_id = db.query(User.id).filter(User.email == "student_test@tradehub.com").scalar()
+            notify(db, [user_id], "TEST", "Notificação A")
+            notify(db, [user_id], "TEST", "Notificação B")
+            notify(db, [user_id], "TEST", "Notificação C")
+            db.commit()
+            nid = db.query(TutoriaNotification.id).filter(TutoriaNotification.user_id == user_id)\
+                    .order_by(TutoriaNotification.id.desc()).limit(1).scalar()
+        finally:
+            db.close()
+
+        def unread():
+            r = client.get("/api/tutoria/notifications/unread-count", headers=student_headers)
+            assert r.status_code == 200
+            return r.json()["unread"]
+
+        before = unread()
+        assert before >= 3
+        for _ in range(2):
+            r = client.patch(f"/api/tutoria/notifications/{nid}/read", headers=student_headers)
+            assert r.status_code == 200
+        assert unread() == before - 1
+        # Notificação de outro utilizador → 404 e o contador não muda
+        r = client.patch(f"/api/tutoria/notifications/{nid}/read", headers=trainer_headers)
+        assert r.status_code == 404
+
+        # Pedido concorrente com a notificação ainda por ler na sua sessão
+        a, b = SessionLocal(), SessionLocal()
+        try:
+            other = a.query(TutoriaNotification).filter(
+                TutoriaNotification.user_id == user_id, TutoriaNotification.is_read == False
+            ).order_by(TutoriaNotification.id.desc()).first()
+            stale = b.get(TutoriaNotification, other.id)
+            assert stale.is_read is False
+            assert mark_read(a, user_id, other.id)
+            a.commit()
+            assert mark_read(b, user_id, other.id)
+            b.commit()
+        finally:
+            a.close()
+            b.close()
+        assert unread() == before - 2
+
     def test_notifications_unauthenticated(self):
         assert client.get("/api/tutoria/notifications").status_code == 401
 
+    def test_event_stream_unauthenticated(self):
+        assert client.get("/api/events/stream").status_code == 401
+
 
 class TestTutoriaComments:
 
@@ -2172,6 +2592,71 @@ class TestTeams:
         assert r2.status_code in (200, 204)
 
 
+class TestOrgClosure:
+    """org_node_closure mantida pelas rotas de /api/org (router não montado: chamadas directas)."""
+
+    def test_closure_insert_move_delete(self):
+        from fastapi import HTTPException
+        from app.database import SessionLocal
+        from app.models import OrgNodeClosure, User
+        from app.routers import org_hierarchy as org
+        from app.utils.org_closure import ancestor_ids, descendant_ids, is_descendant
+
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == "manager_test@tradehub.com").first()
+
+            def create(name, parent_id=None):
+                return org.create_node(org.OrgNodeCreate(name=name, parent_id=parent_id),
+                                       db=db, current_user=user)["id"]
+
+            def move(node_id, parent_id):
+                org.move_node(node_id, org.OrgNodeMove(new_parent_id=parent_id), db=db, current_user=user)
+
+            def rows(*ids):
+                return {
+                    (r.ancestor_id, r.descendant_id, r.depth)
+                    for r in db.query(OrgNodeClosure).filter(
+                        OrgNodeClosure.descendant_id.in_(ids) | OrgNodeClosure.ancestor_id.in_(ids))
+                }
+
+            tag = int(time.time())
+            a = create(f"Closure A {tag}")
+            b = create(f"Closure B {tag}", a)
+            c = create(f"Closure C {tag}", b)
+            d = create(f"Closure D {tag}")
+            assert rows(a, b, c) == {(a, a, 0), (b, b, 0), (c, c, 0), (a, b, 1), (b, c, 1), (a, c, 2)}
+            assert ancestor_ids(db, c) == [b, a]
+
+            # Mover B (com C) para debaixo de D
+            move(b, d)
+            assert ancestor_ids(db, c) == [b, d]
+            assert descendant_ids(db, a) == set()
+            assert descendant_ids(db, d) == {b, c}
+            assert (d, c, 2) in rows(c)
+
+            # Ciclo: D não pode ir para debaixo de C
+            with pytest.raises(HTTPException) as exc:
+                move(d, c)
+            assert exc.value.status_code == 400
+            db.rollback()
+
+            # Mover B para a raiz: C mantém só B como antecessor
+            move(b, None)
+            assert ancestor_ids(db, c) == [b]
+            assert not is_descendant(db, d, c)
+
+            # Um nó com filhos não é eliminado; folhas removem as suas linhas
+            with pytest.raises(HTTPException) as exc:
+                org.delete_node(b, db=db, current_user=user)
+            assert exc.value.status_code == 409
+            for node_id in (c, b, a, d):
+                org.delete_node(node_id, db=db, current_user=user)
+            assert rows(a, b, c, d) == set()
+        finally:
+            db.close()
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 14. CHAMADOS — Support Tickets
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -2192,6 +2677,46 @@ class TestChamados:
         r = client.get("/api/chamados", headers=admin_headers)
         assert r.status_code == 200
 
+    def test_attachment_accented_filename(self, student_headers):
+        Image = pytest.importorskip("PIL.Image")
+        r = client.post("/api/chamados", headers=student_headers,
+                        json={"title": "Chamado anexo", "description": "Anexo com acentos",
+                              "type": "BUG", "priority": "MEDIA", "portal": "FORMACOES"})
+        assert r.status_code == 201
+        png = io.BytesIO()
+        Image.new("RGB", (8, 8), "red").save(png, format="PNG")
+        r = client.post(f"/api/chamados/{r.json()['id']}/attachments", headers=student_headers,
+                        files={"file": ("captura de ecrã.png", png.getvalue(), "image/png")})
+        assert r.status_code == 201
+        url = f"/api/chamados/attachments/{r.json()['id']}"
+        r = client.get(url, headers=student_headers)
+        assert r.status_code == 200
+        assert r.content == png.getvalue()
+        disposition = r.headers["content-disposition"]
+        assert disposition == "inline; filename=\"captura de ecra.png\"; filename*=UTF-8''captura%20de%20ecr%C3%A3.png"
+        r = client.get(url, headers={**student_headers, "Range": "bytes=0-3"})
+        assert r.status_code == 206
+        assert r.content == png.getvalue()[:4]
+        from app.routers.chamados import _content_disposition
+        assert _content_disposition('a"b\\c.png') == 'inline; filename="a\\"b\\\\c.png"; filename*=UTF-8\'\'a%22b%5Cc.png'
+
+    def test_attachment_type_sniffed_not_trusted(self, student_headers, monkeypatch):
+        pytest.importorskip("PIL.Image")
+        from app.routers import chamados
+        r = client.post("/api/chamados", headers=student_headers,
+                        json={"title": "Chamado anexo falso", "description": "Content-Type falso",
+                              "type": "BUG", "priority": "MEDIA", "portal": "FORMACOES"})
+        assert r.status_code == 201
+        url = f"/api/chamados/{r.json()['id']}/attachments"
+        r = client.post(url, headers=student_headers,
+                        files={"file": ("nota.png", b"<script>x</script>", "image/png")})
+        assert r.status_code == 400
+        # Sem Pillow o anexo é recusado em vez de aceitar o Content-Type do cliente
+        monkeypatch.setattr(chamados, "Image", None)
+        r = client.post(url, headers=student_headers,
+                        files={"file": ("nota.png", b"\x89PNG\r\n\x1a\n", "image/png")})
+        assert r.status_code == 503
+
     def test_get_chamado(self, admin_headers):
         r = client.get(f"/api/chamados/{st.chamado_id}",
                        headers=admin_headers)
@@ -2226,6 +2751,16 @@ class TestChamados:
                        headers=admin_headers)
         assert r.status_code == 200
 
+    def test_list_summary_view(self, admin_headers):
+        r = client.get("/api/chamados?view=summary&page_size=5",
+                       headers=admin_headers)
+        assert r.status_code == 200
+        columns = r.json()["columns"]
+        assert "EM_ANDAMENTO" in columns
+        card = next(c for c in columns["EM_ANDAMENTO"]["items"] if c["id"] == st.chamado_id)
+        assert card["comments_count"] >= 2
+        assert "comments" not in card
+
     def test_delete_chamado(self, admin_headers):
         """Create a temp chamado and delete it."""
         r = client.post("/api/chamados", headers=_h(_token("student_test@tradehub.com")),
@@ -2241,6 +2776,23 @@ class TestChamados:
     def test_chamado_unauthenticated(self):
         assert client.get("/api/chamados").status_code == 401
 
+    def test_search_finds_own_chamado(self, student_headers):
+        r = client.post("/api/chamados", headers=student_headers,
+                        json={"title": "Pesquisa zircónio",
+                              "description": "Chamado para a pesquisa global",
+                              "type": "BUG",
+                              "priority": "BAIXA",
+                              "portal": "FORMACOES"})
+        assert r.status_code == 201
+        r = client.get("/api/search", headers=student_headers, params={"q": "zirconio"})
+        assert r.status_code == 200
+        assert any(h["source"] == "chamado" and h["title"] == "Pesquisa zircónio"
+                   for h in r.json()["items"])
+
+    def test_search_validation(self, student_headers):
+        assert client.get("/api/search", params={"q": "ab"}).status_code == 401
+        assert client.get("/api/search", headers=student_headers, params={"q": "a"}).status_code == 422
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 15. CHAT — Chatbot & FAQ
@@ -2264,6 +2816,19 @@ class TestChat:
                         json={"message": "hola", "lang": "es"})
         assert r.status_code == 200
 
+    def test_stats_summary(self, student_headers):
+        r = client.post("/api/chat", headers=student_headers,
+                        json={"message": "resumo", "lang": "pt"})
+        assert r.status_code == 200
+        assert "Resumo geral" in r.json()["reply"]
+
+    def test_longest_intent_wins(self, student_headers):
+        """'ola' (saudação) e 'cara ou coroa' na mesma mensagem: ganha o padrão mais longo."""
+        r = client.post("/api/chat", headers=student_headers,
+                        json={"message": "Olá! Cara ou coroa?", "lang": "pt"})
+        assert r.status_code == 200
+        assert r.json()["reply"].startswith("🪙")
+
     def test_chat_unauthenticated(self):
         r = client.post("/api/chat",
                         json={"message": "Olá", "lang": "pt"})
@@ -2288,6 +2853,21 @@ class TestChat:
                          json={"answer_pt": "Resposta actualizada"})
         assert r.status_code == 200
 
+    def test_faq_index_follows_crud(self, admin_headers, student_headers):
+        """O índice das FAQs é reconstruído após create/update/delete."""
+        r = client.post("/api/chat/faqs", headers=admin_headers,
+                        json={"keywords_pt": "zebra azul", "answer_pt": "Resposta zebra"})
+        assert r.status_code == 201
+        faq_id = r.json()["id"]
+        ask = lambda: client.post("/api/chat", headers=student_headers,
+                                  json={"message": "onde está a zebra azul?", "lang": "pt"}).json()["reply"]
+        assert ask() == "Resposta zebra"
+        client.patch(f"/api/chat/faqs/{faq_id}", headers=admin_headers,
+                     json={"answer_pt": "Zebra actualizada"})
+        assert ask() == "Zebra actualizada"
+        client.delete(f"/api/chat/faqs/{faq_id}", headers=admin_headers)
+        assert "zebra" not in ask().lower()
+
     def test_delete_faq(self, admin_headers):
         """Create a temp FAQ and delete it."""
         r = client.post("/api/chat/faqs", headers=admin_headers,
@@ -2317,6 +2897,138 @@ class TestRelatorios:
         r = client.get("/api/relatorios/overview", headers=student_headers)
         assert r.status_code == 200
 
+    def test_report_cache_invalidated_by_commit(self):
+        from app.database import SessionLocal
+        from app.models import User
+        from app.utils.report_cache import report_cache
+        calls = []
+
+        def build():
+            calls.append(1)
+            return len(calls)
+
+        key = ("test-report", "scope", ())
+        assert report_cache.get(key, ("teams",), build) == 1
+        assert report_cache.get(key, ("teams",), build) == 1
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == "student_test@tradehub.com").first()
+            user.full_name = user.full_name
+            db.commit()  # sem alterações reais: não invalida
+            assert report_cache.get(key, ("teams",), build) == 1
+            name = user.full_name
+            user.full_name = name + " (cache)"
+            db.commit()
+            assert report_cache.get(key, ("teams",), build) == 2
+            user.full_name = name
+            db.commit()
+        finally:
+            db.close()
+
+    def test_dw_generation_disabled_reads_oltp(self, monkeypatch):
+        from app.config import settings
+        from app.database import SessionLocal
+        from app.utils.dw_reports import dw_generation
+        monkeypatch.setattr(settings, "REPORTS_FROM_DW", False)
+        db = SessionLocal()
+        try:
+            assert dw_generation(db) is None
+        finally:
+            db.close()
+
+    def test_dw_generation_follows_last_etl_run(self, monkeypatch):
+        from sqlalchemy import text
+        from app.config import settings
+        from app.constants import DW_REPORTS_MAX_AGE_SECONDS
+        from app.database import SessionLocal
+        from app.utils.dw_reports import dw_generation
+        monkeypatch.setattr(settings, "REPORTS_FROM_DW", True)
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name != "mysql":
+                assert dw_generation(db) is None  # DW só existe em MySQL
+                return
+            run_id = db.execute(text(
+                "INSERT INTO dw_etl_runs (started_at, finished_at, ok) VALUES (NOW(), NOW(), 1)"
+            )).lastrowid
+            db.commit()
+            try:
+                assert dw_generation(db) == run_id
+                db.execute(text(
+                    "UPDATE dw_etl_runs SET finished_at = NOW() - INTERVAL :age SECOND WHERE id = :id"
+                ), {"age": DW_REPORTS_MAX_AGE_SECONDS + 60, "id": run_id})
+                db.commit()
+                assert dw_generation(db) is None  # carga antiga
+                db.execute(text("UPDATE dw_etl_runs SET finished_at = NOW(), ok = 0 WHERE id = :id"),
+                           {"id": run_id})
+                db.commit()
+                assert dw_generation(db) is None  # carga falhada
+                db.execute(text("UPDATE dw_etl_runs SET finished_at = NULL, ok = NULL WHERE id = :id"),
+                           {"id": run_id})
+                db.commit()
+                assert dw_generation(db) is None  # carga em curso
+            finally:
+                db.execute(text("DELETE FROM dw_etl_runs WHERE id = :id"), {"id": run_id})
+                db.commit()
+        finally:
+            db.close()
+
+    def test_reports_switch_to_dw_builder(self, student_headers, monkeypatch):
+        from app.utils import dw_reports
+        generation = 10**9 + int(time.time())
+        monkeypatch.setattr(dw_reports, "dw_generation", lambda db: generation)
+        monkeypatch.setattr(dw_reports, "formacoes", lambda db, user: {"source": "dw"})
+        r = client.get("/api/relatorios/formacoes", headers=student_headers)
+        assert r.status_code == 200
+        assert r.json() == {"source": "dw"}
+        monkeypatch.setattr(dw_reports, "dw_generation", lambda db: None)
+        r = client.get("/api/relatorios/formacoes", headers=student_headers)
+        assert r.status_code == 200
+        assert r.json() != {"source": "dw"}
+
+    def test_etl_run_retention(self):
+        from sqlalchemy import text
+        from app.constants import DW_ETL_RUNS_RETENTION_DAYS
+        from app.database import SessionLocal
+        from app.etl.etl_runner import _finish_run
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name != "mysql":
+                pytest.skip("dw_etl_runs só existe em MySQL")
+            old_id = db.execute(text(
+                "INSERT INTO dw_etl_runs (started_at, finished_at, ok) "
+                "VALUES (NOW() - INTERVAL :days DAY, NOW() - INTERVAL :days DAY, 1)"
+            ), {"days": DW_ETL_RUNS_RETENTION_DAYS + 1}).lastrowid
+            run_id = db.execute(text("INSERT INTO dw_etl_runs (started_at) VALUES (NOW())")).lastrowid
+            db.commit()
+            _finish_run(db, run_id, {"errors": []})
+            ids = {r.id for r in db.execute(text(
+                "SELECT id FROM dw_etl_runs WHERE id IN (:a, :b)"), {"a": old_id, "b": run_id})}
+            assert ids == {run_id}
+            db.execute(text("DELETE FROM dw_etl_runs WHERE id = :id"), {"id": run_id})
+            db.commit()
+        finally:
+            db.close()
+
+    def test_dw_cache_serves_until_next_generation(self):
+        from app.utils.dw_cache import DWCache
+        cache = DWCache(ttl_seconds=60, max_entries=10, check_seconds=60)
+        cache.bump(1)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return len(calls)
+
+        assert cache.get(("a", (), 1), build) == 1
+        assert cache.get(("a", (), 1), build) == 1
+        cache.bump(2)
+        assert cache.get(("a", (), 2), build) == 2
+        cache.begin_load()  # carga a meio: lê o DW mas não guarda
+        assert cache.get(("b", (), 2), build) == 3
+        assert cache.get(("b", (), 2), build) == 4
+        assert cache.get(("a", (), 2), build) == 2
+
     def test_formacoes(self, admin_headers):
         r = client.get("/api/relatorios/formacoes", headers=admin_headers)
         assert r.status_code == 200
@@ -2346,6 +3058,47 @@ class TestRelatorios:
                        headers=admin_headers)
         assert r.status_code == 200
 
+    def test_incidents_paginated_and_export(self, admin_headers):
+        r = client.get("/api/relatorios/incidents", headers=admin_headers,
+                       params={"page": 1, "page_size": 5})
+        assert r.status_code == 200
+        body = r.json()
+        assert len(body["items"]) <= 5
+        assert set(body["summary"]) == {"high_impact", "low_impact", "recurrent"}
+        r = client.get("/api/relatorios/incidents/export", headers=admin_headers,
+                       params={"format": "csv"})
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(r.content.decode("utf-8-sig"))))
+        assert rows[0][:2] == ["Fecha error", "Fecha Detección"]
+        assert len(rows) == body["total"] + 1
+
+    def test_incidents_export_xlsx(self, admin_headers):
+        from openpyxl import load_workbook
+        r = client.get("/api/relatorios/incidents/export", headers=admin_headers,
+                       params={"format": "xlsx"})
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/vnd.openxmlformats")
+        ws = load_workbook(io.BytesIO(r.content), read_only=True).active
+        assert next(ws.iter_rows(values_only=True))[0] == "Fecha error"
+        r = client.get("/api/relatorios/incidents/export", headers=admin_headers,
+                       params={"format": "pdf"})
+        assert r.status_code == 422
+
+    def test_xlsx_export_strips_control_characters(self):
+        from openpyxl import load_workbook
+        from app.utils.exports import iter_xlsx
+        data = b"".join(iter_xlsx(["Descripción", "Importe"],
+                                  iter([("linha\x0bcolada\x00", 12.5), (None, 3)])))
+        ws = load_workbook(io.BytesIO(data), read_only=True).active
+        assert list(ws.iter_rows(values_only=True)) == [
+            ("Descripción", "Importe"), ("linhacolada", 12.5), (None, 3),
+        ]
+
+    def test_incidents_export_student_forbidden(self, student_headers):
+        r = client.get("/api/relatorios/incidents/export", headers=student_headers)
+        assert r.status_code == 403
+
     def test_relatorios_unauthenticated(self):
         assert client.get("/api/relatorios/overview").status_code == 401
 
@@ -2494,6 +3247,75 @@ class TestCertificates:
         r = client.get("/api/certificates/999999", headers=admin_headers)
         assert r.status_code == 404
 
+    @staticmethod
+    def _cached_certificate(trainer_headers, monkeypatch, tmp_path):
+        """Emite um certificado (finalize_plan) e grava um PDF na cache em disco (tmp_path)."""
+        from app.database import SessionLocal
+        from app.models import Certificate
+        from app.routers import finalization
+        from app.routes import certificates
+        monkeypatch.setattr(finalization, "prerender_certificate_pdf", lambda _id: None)
+        monkeypatch.setattr(certificates, "CERTIFICATE_PDF_DIR", tmp_path)
+        plan_id, _, student_id = _seed_finalizable_plan()
+        r = client.post(f"/api/finalization/plan/{plan_id}/finalize?user_id={student_id}",
+                        headers=trainer_headers)
+        assert r.status_code == 200, r.text
+        db = SessionLocal()
+        try:
+            cert = db.get(Certificate, r.json()["certificate_id"])
+            path = certificates.certificate_pdf_path(cert)
+            pdf = b"%PDF-1.4 certificado " + cert.certificate_number.encode()
+            path.write_bytes(pdf)
+            return cert.id, cert.certificate_number, pdf
+        finally:
+            db.close()
+
+    def test_certificate_template_version_is_explicit(self, monkeypatch):
+        from app.routes import certificates
+        certificates.certificate_template_version.cache_clear()
+        try:
+            current = certificates.certificate_template_version()
+            certificates.certificate_template_version.cache_clear()
+            assert certificates.certificate_template_version() == current
+            monkeypatch.setattr(certificates, "CERTIFICATE_TEMPLATE_VERSION",
+                                certificates.CERTIFICATE_TEMPLATE_VERSION + 1)
+            certificates.certificate_template_version.cache_clear()
+            assert certificates.certificate_template_version() != current
+        finally:
+            monkeypatch.undo()
+            certificates.certificate_template_version.cache_clear()
+
+    def test_certificate_pdf_etag_304(self, trainer_headers, student_headers, monkeypatch, tmp_path):
+        cert_id, _, pdf = self._cached_certificate(trainer_headers, monkeypatch, tmp_path)
+        r = client.get(f"/api/certificates/{cert_id}/pdf", headers=student_headers)
+        assert r.status_code == 200
+        assert r.content == pdf
+        etag = r.headers["etag"]
+        r = client.get(f"/api/certificates/{cert_id}/pdf",
+                       headers={**student_headers, "If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+
+    def test_certificate_batch_zip_round_trip(self, trainer_headers, student_headers,
+                                              monkeypatch, tmp_path):
+        import zipfile
+        cert_id, number, pdf = self._cached_certificate(trainer_headers, monkeypatch, tmp_path)
+        r = client.post("/api/certificates/batch", headers=student_headers,
+                        json={"certificate_ids": [cert_id]})
+        assert r.status_code == 202, r.text
+        job = r.json()
+        assert (job["status"], job["total"], job["completed"]) == ("COMPLETED", 1, 1)
+        r = client.get(f"/api/certificates/batch/{job['job_id']}", headers=student_headers)
+        assert r.status_code == 200 and r.json()["progress"] == 100.0
+        assert client.get(f"/api/certificates/batch/{job['job_id']}",
+                          headers=trainer_headers).status_code == 403
+        r = client.get(f"/api/certificates/batch/{job['job_id']}/zip", headers=student_headers)
+        assert r.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+            info = zf.getinfo(f"certificado_{number}.pdf")
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert zf.read(info) == pdf
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 20. FULL WORKFLOW — Lifecycle end-to-end
@@ -3007,6 +3829,119 @@ class TestDataWarehouse:
         r = client.post("/api/dw/etl/run", headers=admin_headers)
         assert r.status_code == 200
 
+    def test_dw_rollups_match_facts(self, admin_headers):
+        from sqlalchemy import text
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name != "mysql":
+                pytest.skip("DW só existe em MySQL")
+            r = client.post("/api/dw/etl/run", headers=admin_headers)
+            assert r.status_code == 200
+            assert r.json()["result"]["errors"] == []
+
+            def count(sql):
+                return int(db.execute(text(sql)).scalar() or 0)
+
+            def total(path, field="total"):
+                r = client.get(f"/api/dw/{path}", headers=admin_headers)
+                assert r.status_code == 200
+                return sum(int(row[field] or 0) for row in r.json()["data"]), r.json()["data"]
+
+            tutoria = """FROM dw_fact_tutoria ft
+                JOIN dw_dim_date dd ON dd.date_key = ft.date_key
+                JOIN dw_dim_user du ON du.user_key = ft.student_key"""
+            assert total("tutoria/by-month")[0] == count(f"SELECT COUNT(*) {tutoria}")
+            # category_id = 0 é o grupo "sem categoria" e fica fora de by-category
+            assert total("tutoria/by-category")[0] == count(f"""SELECT COUNT(*) {tutoria}
+                JOIN dw_dim_error_category c ON c.category_key = ft.category_key""")
+
+            certificates, months = total("training/by-month", "certificates")
+            assert certificates == count("""SELECT COUNT(*) FROM dw_fact_training ft
+                JOIN dw_dim_date dd ON dd.date_key = ft.date_key
+                JOIN dw_dim_course dc ON dc.course_key = ft.course_key""")
+            # Médias ponderadas (SUM/SUM) = AVG sobre os factos do mês
+            expected = {
+                (row.year, row.month): row.avg_hours
+                for row in db.execute(text("""
+                    SELECT dd.`year`, dd.`month`, ROUND(AVG(ft.total_hours), 1) AS avg_hours
+                    FROM dw_fact_training ft
+                    JOIN dw_dim_date dd ON dd.date_key = ft.date_key
+                    JOIN dw_dim_course dc ON dc.course_key = ft.course_key
+                    GROUP BY dd.`year`, dd.`month`"""))
+            }
+            for month in months:
+                avg = expected[(month["year"], month["month"])]
+                assert month["avg_hours"] == (None if avg is None else pytest.approx(float(avg), abs=0.1))
+
+            chamados, by_type = total("chamados/by-type")
+            assert chamados == count("""SELECT COUNT(*) FROM dw_fact_chamados fc
+                JOIN dw_dim_date dd ON dd.date_key = fc.date_key""")
+            assert all(row["type"] != "" and row["priority"] != "" for row in by_type)
+            assert total("chamados/by-month")[0] == chamados
+
+            assert total("internal-errors/by-month")[0] == count("""SELECT COUNT(*)
+                FROM dw_fact_internal_errors fie
+                JOIN dw_dim_date dd ON dd.date_key = fie.date_key
+                JOIN dw_dim_user du ON du.user_key = fie.reporter_key""")
+        finally:
+            db.close()
+
+    def test_dw_rollup_merge_is_idempotent_and_prunes(self):
+        from sqlalchemy import text
+        from app.database import SessionLocal
+        from app.etl.rollups import load_agg_chamados_monthly, load_all_rollups
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name != "mysql":
+                pytest.skip("DW só existe em MySQL")
+            first = load_all_rollups(db)
+            assert load_all_rollups(db) == first
+            # Grupo que já não existe nos factos é apagado no merge seguinte
+            db.execute(text("""
+                INSERT INTO dw_agg_chamados_monthly
+                    (`year`, `month`, month_name_short, status_code, `type`, `priority`, total)
+                VALUES (1999, 1, 'Jan', 'GONE', '', '', 5)
+            """))
+            db.commit()
+            assert load_agg_chamados_monthly(db) == first["agg_chamados_monthly"]
+            assert db.execute(text(
+                "SELECT COUNT(*) FROM dw_agg_chamados_monthly WHERE `year` = 1999"
+            )).scalar() == 0
+        finally:
+            db.close()
+
+    def test_dashboard_batch_manager(self, manager_headers):
+        r = client.post("/api/dashboard/batch", headers=manager_headers, json={"widgets": [
+            {"id": "relatorios/overview"},
+            {"id": "stats/kpis"},
+            {"id": "admin/reports/stats"},
+            {"id": "admin/advanced-reports/dashboard-summary"},
+            {"id": "dw/training/by-course", "key": "top5", "params": {"limit": 5}},
+            {"id": "dw/training/by-course", "params": {"limit": 500}},
+            {"id": "nao/existe"},
+        ]})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["elapsed_ms"] >= 0
+        widgets = body["widgets"]
+        assert [w["key"] for w in widgets][:5] == [
+            "relatorios/overview", "stats/kpis", "admin/reports/stats",
+            "admin/advanced-reports/dashboard-summary", "top5"]
+        assert all(w["status"] == 200 and "ms" in w for w in widgets[:4])
+        assert widgets[1]["data"] == client.get("/api/stats/kpis").json()
+        assert [w["status"] for w in widgets[5:]] == [422, 404]
+
+    def test_dashboard_batch_student(self, student_headers):
+        r = client.post("/api/dashboard/batch", headers=student_headers, json={"widgets": [
+            {"id": "relatorios/overview"},
+            {"id": "relatorios/teams"},
+            {"id": "dw/snapshot/latest"},
+        ]})
+        assert r.status_code == 200
+        assert [w["status"] for w in r.json()["widgets"]] == [200, 403, 403]
+        assert client.post("/api/dashboard/batch", json={"widgets": [{"id": "stats/kpis"}]}).status_code == 401
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 28. FEEDBACK / SURVEYS (Grabadores)
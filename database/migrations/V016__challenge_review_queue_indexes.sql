@@ -0,0 +1,9 @@
+-- V016: Índices para a fila de revisão de desafios (/api/challenges/pending-review/list)
+-- A fila filtra por status e ordena por updated_at; a contagem de operações
+-- agrupa challenge_operations por submission_id (com completed_at).
+
+CREATE INDEX idx_challenge_submissions_status_updated
+  ON challenge_submissions (status, updated_at);
+
+CREATE INDEX idx_challenge_operations_submission_completed
+  ON challenge_operations (submission_id, completed_at);
@@ -0,0 +1,52 @@
+-- V017: Agregados incrementais das operações em challenge_submissions
+-- Mantidos por finish_operation / classify_operation com deltas O(1)
+-- (app/utils/challenge_scoring.py), evitando reler todas as operações.
+--
+-- SAFE: apenas adiciona colunas e preenche-as a partir de challenge_operations.
+
+ALTER TABLE challenge_submissions
+  ADD COLUMN ops_completed        INT NOT NULL DEFAULT 0,
+  ADD COLUMN ops_reviewed         INT NOT NULL DEFAULT 0,
+  ADD COLUMN ops_with_error       INT NOT NULL DEFAULT 0,
+  ADD COLUMN ops_correct          INT NOT NULL DEFAULT 0,
+  ADD COLUMN ops_duration_seconds INT NOT NULL DEFAULT 0;
+
+-- Backfill dos contadores de operações (todas as submissions COMPLETE)
+UPDATE challenge_submissions cs
+  JOIN (
+    SELECT submission_id,
+           COUNT(*)                                                        AS completed,
+           SUM(CASE WHEN is_approved IS NOT NULL THEN 1 ELSE 0 END)        AS reviewed,
+           SUM(CASE WHEN has_error = 1 THEN 1 ELSE 0 END)                  AS with_error,
+           SUM(CASE WHEN has_error = 0 AND is_approved = 1 THEN 1 ELSE 0 END) AS correct,
+           COALESCE(SUM(duration_seconds), 0)                              AS seconds
+      FROM challenge_operations
+     WHERE completed_at IS NOT NULL
+     GROUP BY submission_id
+  ) agg ON agg.submission_id = cs.id
+SET cs.ops_completed        = agg.completed,
+    cs.ops_reviewed         = agg.reviewed,
+    cs.ops_with_error       = agg.with_error,
+    cs.ops_correct          = agg.correct,
+    cs.ops_duration_seconds = agg.seconds
+WHERE cs.submission_type = 'COMPLETE';
+
+-- Totais de erros por tipo passam a ser mantidos em tempo real para
+-- submissions COMPLETE ainda em curso (as finalizadas mantêm o histórico)
+UPDATE challenge_submissions cs
+  LEFT JOIN (
+    SELECT co.submission_id,
+           SUM(CASE WHEN UPPER(oe.error_type) IN ('METHODOLOGY', 'METODOLOGIA') THEN 1 ELSE 0 END) AS methodology,
+           SUM(CASE WHEN UPPER(oe.error_type) IN ('KNOWLEDGE', 'CONHECIMENTO')  THEN 1 ELSE 0 END) AS knowledge,
+           SUM(CASE WHEN UPPER(oe.error_type) IN ('DETAIL', 'DETALHE')          THEN 1 ELSE 0 END) AS detail,
+           SUM(CASE WHEN UPPER(oe.error_type) IN ('PROCEDURE', 'PROCEDIMENTO')  THEN 1 ELSE 0 END) AS procedure_
+      FROM challenge_operations co
+      JOIN operation_errors oe ON oe.operation_id = co.id
+     WHERE co.completed_at IS NOT NULL AND co.has_error = 1
+     GROUP BY co.submission_id
+  ) err ON err.submission_id = cs.id
+SET cs.error_methodology = COALESCE(err.methodology, 0),
+    cs.error_knowledge   = COALESCE(err.knowledge, 0),
+    cs.error_detail      = COALESCE(err.detail, 0),
+    cs.error_procedure   = COALESCE(err.procedure_, 0)
+WHERE cs.submission_type = 'COMPLETE' AND cs.completed_at IS NULL;
@@ -0,0 +1,27 @@
+-- V018: Anexos de chamados fora da coluna JSON
+-- Os screenshots passam a ser guardados no blob store (STORAGE_DIR/blobs);
+-- a BD guarda apenas metadados. Os anexos base64 existentes em
+-- chamados.attachments são migrados pelo backend no arranque
+-- (migrate_legacy_chamado_attachments) e a coluna fica a NULL.
+
+CREATE TABLE IF NOT EXISTS chamado_attachments (
+    id            INT AUTO_INCREMENT PRIMARY KEY,
+    chamado_id    INT          NOT NULL,
+    filename      VARCHAR(255) NOT NULL,
+    content_type  VARCHAR(100) NOT NULL,
+    size_bytes    INT          NOT NULL DEFAULT 0,
+    blob_key      VARCHAR(64)  NOT NULL,
+    thumbnail_key VARCHAR(64)  NULL,
+    created_by_id INT          NULL,
+    created_at    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_chamado_attachments_chamado
+        FOREIGN KEY (chamado_id) REFERENCES chamados(id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_chamado_attachments_created_by
+        FOREIGN KEY (created_by_id) REFERENCES users(id)
+        ON DELETE SET NULL ON UPDATE CASCADE,
+
+    INDEX idx_chamado_attachments_chamado (chamado_id),
+    INDEX idx_chamado_attachments_blob (blob_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
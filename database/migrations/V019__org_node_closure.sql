@@ -0,0 +1,36 @@
+-- V019: Closure table da hierarquia organizacional
+-- Uma linha por par (antecessor, descendente), incluindo o próprio nó
+-- (depth 0). Subárvores, antecessores e a verificação de ciclos passam a ser
+-- uma única query indexada em vez de uma query por nó.
+-- Mantida pelo backend (app/utils/org_closure.py) em create / move / delete.
+--
+-- SAFE: apenas cria a tabela e preenche-a a partir de org_nodes.parent_id.
+
+CREATE TABLE IF NOT EXISTS org_node_closure (
+    ancestor_id   INT NOT NULL,
+    descendant_id INT NOT NULL,
+    depth         INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (ancestor_id, descendant_id),
+
+    CONSTRAINT fk_org_node_closure_ancestor
+        FOREIGN KEY (ancestor_id) REFERENCES org_nodes(id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_org_node_closure_descendant
+        FOREIGN KEY (descendant_id) REFERENCES org_nodes(id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+
+    INDEX idx_org_node_closure_descendant (descendant_id, depth)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill a partir da lista de adjacência existente
+INSERT IGNORE INTO org_node_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM org_nodes
+    UNION ALL
+    SELECT p.ancestor_id, n.id, p.depth + 1
+      FROM paths p
+      JOIN org_nodes n ON n.parent_id = p.descendant_id
+     WHERE p.depth < 64
+)
+SELECT ancestor_id, descendant_id, depth FROM paths;
@@ -0,0 +1,6 @@
+-- V020: Índice para o job de prazos (A.6.1)
+-- notify_overdue_errors faz um anti-join às notificações existentes por
+-- (error_id, type) para não repetir OVERDUE_ALERT.
+
+CREATE INDEX idx_tutoria_notifications_error_type
+  ON tutoria_notifications (error_id, type);
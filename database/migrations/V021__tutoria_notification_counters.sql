@@ -0,0 +1,23 @@
+-- V021: Contador de notificações por ler, por utilizador
+-- Mantido pelo backend (app/utils/notifications.py) em cada inserção /
+-- leitura, para que /api/tutoria/notifications/unread-count seja uma leitura
+-- por chave primária em vez de um COUNT sobre a caixa de entrada.
+--
+-- SAFE: apenas cria a tabela e preenche-a a partir de tutoria_notifications.
+
+CREATE TABLE IF NOT EXISTS tutoria_notification_counters (
+    user_id INT NOT NULL PRIMARY KEY,
+    unread  INT NOT NULL DEFAULT 0,
+
+    CONSTRAINT fk_tutoria_notification_counters_user
+        FOREIGN KEY (user_id) REFERENCES users(id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill (a tabela pode já ter sido criada vazia pelo create_all do arranque)
+INSERT INTO tutoria_notification_counters (user_id, unread)
+SELECT user_id, COUNT(*)
+  FROM tutoria_notifications
+ WHERE is_read = 0
+ GROUP BY user_id
+ON DUPLICATE KEY UPDATE unread = VALUES(unread);
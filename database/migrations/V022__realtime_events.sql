@@ -0,0 +1,17 @@
+-- V022: Ponte de eventos SSE entre workers
+-- Só usada com REALTIME_DB_BRIDGE=True: cada evento publicado é também
+-- gravado aqui e os outros workers reentregam-no às suas ligações
+-- (app/utils/events.py). Linhas com mais de uma hora são apagadas.
+--
+-- SAFE: apenas cria a tabela.
+
+CREATE TABLE IF NOT EXISTS realtime_events (
+    id         INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    channel    VARCHAR(100) NOT NULL,
+    event      VARCHAR(50)  NOT NULL,
+    data       JSON NULL,
+    origin     VARCHAR(32)  NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_realtime_events_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,22 @@
+-- V023: Índice de pesquisa global (/api/search)
+-- Uma linha por erro de tutoria, chamado, ficha de aprendizagem e FAQ,
+-- mantida pelo backend (app/utils/search_index.py) na mesma transacção de
+-- cada escrita. O preenchimento inicial é feito no arranque
+-- (ensure_search_index), que reconstrói o índice quando faltam documentos.
+--
+-- SAFE: apenas cria a tabela e o índice FULLTEXT.
+
+CREATE TABLE IF NOT EXISTS search_documents (
+    id        INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    doc_key   VARCHAR(40)  NOT NULL,
+    source    VARCHAR(20)  NOT NULL,
+    source_id INT          NOT NULL,
+    title     VARCHAR(300) NOT NULL DEFAULT '',
+    body      TEXT NULL,
+
+    UNIQUE KEY uk_search_documents_doc_key (doc_key),
+    INDEX idx_search_documents_source (source)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- A tabela pode já ter sido criada pelo create_all do arranque (sem FULLTEXT)
+ALTER TABLE search_documents ADD FULLTEXT INDEX ft_search_documents (title, body);
@@ -0,0 +1,112 @@
+-- V024: DW para o Portal de Relatórios e advanced-reports
+-- Os relatórios passam a ser calculados sobre os factos do DW
+-- (app/utils/dw_reports.py) em vez das tabelas OLTP:
+--   * dimensões de banco e produto; dw_dim_team ganha gestor e produto
+--   * dw_fact_tutoria ganha chaves de equipa/banco/produto e os atributos
+--     usados pelos relatórios (severidade, estado, recorrência, importe, ...)
+--   * dw_fact_tutoria_plans / dw_fact_training_plans — um registo por plano
+--   * dw_fact_user_activity — agregados de formação por utilizador
+--   * dw_etl_runs — registo de cada carga; os relatórios só leem o DW
+--     quando a última carga terminou sem erros
+--
+-- SAFE: apenas cria tabelas e adiciona colunas/índices ao DW (recarregado pelo ETL).
+
+CREATE TABLE IF NOT EXISTS dw_dim_bank (
+    bank_key INT PRIMARY KEY AUTO_INCREMENT,
+    bank_id INT NOT NULL,
+    `name` VARCHAR(100) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    loaded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_dw_bank (bank_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_dim_product (
+    product_key INT PRIMARY KEY AUTO_INCREMENT,
+    product_id INT NOT NULL,
+    `name` VARCHAR(100) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    loaded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_dw_product (product_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+ALTER TABLE dw_dim_team
+  ADD COLUMN manager_id INT NULL AFTER manager_name,
+  ADD COLUMN product_key INT NULL AFTER manager_id,
+  ADD INDEX idx_dw_team_manager (manager_id);
+
+ALTER TABLE dw_fact_tutoria
+  ADD COLUMN team_key INT NULL AFTER trainer_key,
+  ADD COLUMN bank_key INT NULL AFTER team_key,
+  ADD COLUMN product_key INT NULL AFTER bank_key,
+  ADD COLUMN severity VARCHAR(20) NULL,
+  ADD COLUMN status_code VARCHAR(30) NULL,
+  ADD COLUMN is_recurrent BOOLEAN NOT NULL DEFAULT FALSE,
+  ADD COLUMN recurrence_type VARCHAR(30) NULL,
+  ADD COLUMN amount DOUBLE NULL,
+  ADD COLUMN pending_solution BOOLEAN NOT NULL DEFAULT FALSE,
+  ADD COLUMN is_escalated BOOLEAN NOT NULL DEFAULT FALSE,
+  ADD COLUMN origin_name VARCHAR(100) NULL,
+  ADD COLUMN impact_name VARCHAR(100) NULL,
+  ADD COLUMN action_items_overdue INT DEFAULT 0,
+  ADD INDEX idx_ftut_team (team_key),
+  ADD INDEX idx_ftut_bank (bank_key),
+  ADD INDEX idx_ftut_product (product_key),
+  ADD INDEX idx_ftut_student_severity (student_key, severity);
+
+CREATE TABLE IF NOT EXISTS dw_fact_tutoria_plans (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    plan_id INT NOT NULL,
+    student_key INT NOT NULL,
+    team_key INT,
+    status_code VARCHAR(30),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_ftp_student_status (student_key, status_code),
+    FOREIGN KEY (student_key) REFERENCES dw_dim_user(user_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_fact_training_plans (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    plan_id INT NOT NULL,
+    student_key INT,
+    team_key INT,
+    product_key INT,
+    status_code VARCHAR(30),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_ftrp_student_status (student_key, status_code),
+    INDEX idx_ftrp_team (team_key),
+    FOREIGN KEY (student_key) REFERENCES dw_dim_user(user_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_fact_user_activity (
+    user_key INT PRIMARY KEY,
+    team_key INT,
+    enrollments_total INT NOT NULL DEFAULT 0,
+    enrollments_completed INT NOT NULL DEFAULT 0,
+    submissions_total INT NOT NULL DEFAULT 0,
+    submissions_approved INT NOT NULL DEFAULT 0,
+    mpu_approved_sum DOUBLE NOT NULL DEFAULT 0,
+    mpu_approved_count INT NOT NULL DEFAULT 0,
+    mpu_positive_sum DOUBLE NOT NULL DEFAULT 0,
+    mpu_positive_count INT NOT NULL DEFAULT 0,
+    error_methodology INT NOT NULL DEFAULT 0,
+    error_knowledge INT NOT NULL DEFAULT 0,
+    error_detail INT NOT NULL DEFAULT 0,
+    error_procedure INT NOT NULL DEFAULT 0,
+    lessons_total INT NOT NULL DEFAULT 0,
+    lessons_completed INT NOT NULL DEFAULT 0,
+    lesson_minutes INT NOT NULL DEFAULT 0,
+    study_seconds DOUBLE NOT NULL DEFAULT 0,
+    certificates INT NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_fua_team (team_key),
+    FOREIGN KEY (user_key) REFERENCES dw_dim_user(user_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_etl_runs (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL,
+    ok BOOLEAN NULL,
+    summary TEXT NULL,
+    INDEX idx_dw_etl_runs_finished (finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
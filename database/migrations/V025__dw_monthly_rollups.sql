@@ -0,0 +1,90 @@
+-- V025: Rollups mensais do DW (tabelas agregadas em vez das views do V002)
+-- O ETL (app/etl/rollups.py) agrega os factos por mês × categoria/formador/
+-- estado/equipa e funde o resultado nestas tabelas: só os grupos cujos
+-- valores mudaram são escritos e os grupos que desapareceram são apagados,
+-- por isso /api/dw/* nunca lê tabelas vazias durante uma carga.
+--
+-- As chaves são ids naturais (não as surrogate keys das dimensões, que mudam
+-- em cada carga); 0 / '' = sem valor. As médias guardam soma + contagem para
+-- poderem ser reagregadas (ex.: por ano ou por curso).
+--
+-- As views do V002 mantêm-se para consultas ad-hoc.
+--
+-- SAFE: apenas cria tabelas (preenchidas na próxima carga ETL).
+
+CREATE TABLE IF NOT EXISTS dw_agg_training_monthly (
+    `year` INT NOT NULL,
+    `month` INT NOT NULL,
+    month_name_short VARCHAR(3) NOT NULL,
+    course_id INT NOT NULL,
+    course_title VARCHAR(255) NOT NULL,
+    certificates INT NOT NULL DEFAULT 0,
+    hours_sum DOUBLE NOT NULL DEFAULT 0,
+    hours_count INT NOT NULL DEFAULT 0,
+    mpu_sum DOUBLE NOT NULL DEFAULT 0,
+    mpu_count INT NOT NULL DEFAULT 0,
+    approval_sum DOUBLE NOT NULL DEFAULT 0,
+    approval_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`year`, `month`, course_id),
+    INDEX idx_agg_training_course (course_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_agg_tutoria_monthly (
+    `year` INT NOT NULL,
+    `month` INT NOT NULL,
+    month_name_short VARCHAR(3) NOT NULL,
+    category_id INT NOT NULL,
+    trainer_id INT NOT NULL,
+    team_id INT NOT NULL,
+    category_name VARCHAR(100),
+    trainer_name VARCHAR(255),
+    trainer_team_name VARCHAR(200),
+    total INT NOT NULL DEFAULT 0,
+    resolved INT NOT NULL DEFAULT 0,
+    days_sum BIGINT NOT NULL DEFAULT 0,
+    days_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`year`, `month`, category_id, trainer_id, team_id),
+    INDEX idx_agg_tutoria_category (category_id),
+    INDEX idx_agg_tutoria_trainer (trainer_id),
+    INDEX idx_agg_tutoria_team (team_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_agg_chamados_monthly (
+    `year` INT NOT NULL,
+    `month` INT NOT NULL,
+    month_name_short VARCHAR(3) NOT NULL,
+    status_code VARCHAR(50) NOT NULL,
+    `type` VARCHAR(20) NOT NULL,
+    `priority` VARCHAR(20) NOT NULL,
+    status_label VARCHAR(100),
+    total INT NOT NULL DEFAULT 0,
+    resolved INT NOT NULL DEFAULT 0,
+    days_sum BIGINT NOT NULL DEFAULT 0,
+    days_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`year`, `month`, status_code, `type`, `priority`),
+    INDEX idx_agg_chamados_status (status_code),
+    INDEX idx_agg_chamados_type (`type`, `priority`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_agg_internal_errors_monthly (
+    `year` INT NOT NULL,
+    `month` INT NOT NULL,
+    month_name_short VARCHAR(3) NOT NULL,
+    team_id INT NOT NULL,
+    team_name VARCHAR(200),
+    total INT NOT NULL DEFAULT 0,
+    with_learning_sheet INT NOT NULL DEFAULT 0,
+    with_action_plan INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`year`, `month`, team_id),
+    INDEX idx_agg_internal_errors_team (team_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS dw_agg_teams (
+    team_id INT NOT NULL PRIMARY KEY,
+    team_name VARCHAR(200) NOT NULL,
+    manager_name VARCHAR(255),
+    member_count INT NOT NULL DEFAULT 0,
+    tutoria_errors INT NOT NULL DEFAULT 0,
+    internal_errors INT NOT NULL DEFAULT 0,
+    INDEX idx_agg_teams_members (member_count)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
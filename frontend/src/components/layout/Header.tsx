@@ -6,7 +6,8 @@ import { useAuthStore, getEffectiveRole } from '../../stores/authStore';
 import { useTheme } from '../../contexts/ThemeContext';
 import { useSidebarStore } from '../../stores/sidebarStore';
 import axios from '../../lib/axios';
-import { NOTIFICATIONS_POLL_MS } from '../../constants/timings';
+import { NOTIFICATIONS_POLL_MS, SSE_FALLBACK_POLL_MS } from '../../constants/timings';
+import { useServerEvents } from '../../hooks/useServerEvents';
 
 const LANGUAGES = [
   { code: 'pt-PT', label: 'PT' },
@@ -36,19 +37,25 @@ export default function Header() {
   const dropdownRef = useRef<HTMLDivElement>(null);
   const [unreadNotifs, setUnreadNotifs] = useState(0);
 
-  // Poll unread notifications
+  const fetchUnread = async () => {
+    try {
+      const { data } = await axios.get('/tutoria/notifications/unread-count');
+      setUnreadNotifs(typeof data?.unread === 'number' ? data.unread : 0);
+    } catch { /* ignore */ }
+  };
+
+  // Push: o servidor avisa quando o contador muda
+  const live = useServerEvents((event) => {
+    if (event === 'notification') fetchUnread();
+  }, !!user);
+
+  // Poll unread notifications (fallback lento enquanto o SSE está ligado)
   useEffect(() => {
     if (!user) return;
-    const fetchUnread = async () => {
-      try {
-        const { data } = await axios.get('/tutoria/notifications');
-        setUnreadNotifs(Array.isArray(data) ? data.filter((n: any) => !n.is_read).length : 0);
-      } catch { /* ignore */ }
-    };
     fetchUnread();
-    const iv = setInterval(fetchUnread, NOTIFICATIONS_POLL_MS);
+    const iv = setInterval(fetchUnread, live ? SSE_FALLBACK_POLL_MS : NOTIFICATIONS_POLL_MS);
     return () => clearInterval(iv);
-  }, [user]);
+  }, [user, live]);
 
   useEffect(() => {
     const onScroll = () => setScrolled(window.scrollY > 20);
@@ -12,6 +12,12 @@ export const NAVIGATE_AFTER_SUBMIT_MS = 2000;
 /** Intervalo de polling para notificações não lidas no Header */
 export const NOTIFICATIONS_POLL_MS = 30_000; // 30 segundos
 
+/** Polling de recurso enquanto o canal SSE (/api/events/stream) está ligado */
+export const SSE_FALLBACK_POLL_MS = 60_000; // 1 minuto
+
+/** Espera máxima entre tentativas de religar o canal SSE */
+export const SSE_RECONNECT_MAX_MS = 30_000;
+
 /** Delay para exibir mensagem de sucesso antes de limpar */
 export const SUCCESS_MESSAGE_CLEAR_MS = 3000;
 
@@ -0,0 +1,118 @@
+import { useEffect, useRef, useState } from 'react';
+import { getBaseURL } from '../lib/axios';
+import { useAuthStore } from '../stores/authStore';
+import { SSE_RECONNECT_MAX_MS } from '../constants/timings';
+
+/**
+ * Canal SSE partilhado (GET /api/events/stream).
+ *
+ * Uma única ligação para toda a app, aberta enquanto houver componentes
+ * subscritos. Usa fetch (e não EventSource) para poder enviar o header
+ * Authorization. Reconecta com backoff exponencial.
+ */
+
+export type ServerEventHandler = (event: string, data: any) => void;
+
+const listeners = new Set<ServerEventHandler>();
+const statusListeners = new Set<(connected: boolean) => void>();
+let controller: AbortController | null = null;
+let connected = false;
+
+function setConnected(value: boolean) {
+  if (connected === value) return;
+  connected = value;
+  statusListeners.forEach((fn) => fn(value));
+}
+
+function dispatch(block: string) {
+  let event = 'message';
+  const data: string[] = [];
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data.push(line.slice(5).trimStart());
+  }
+  if (!data.length) return; // comentário / keepalive
+  let payload: any = null;
+  try {
+    payload = JSON.parse(data.join('\n'));
+  } catch (_e) { /* ignore */ }
+  if (event === 'ready') return;
+  listeners.forEach((fn) => fn(event, payload));
+}
+
+async function run(signal: AbortSignal) {
+  let retryMs = 1000;
+  while (!signal.aborted) {
+    const token = useAuthStore.getState().token;
+    if (token) {
+      try {
+        const res = await fetch(`${getBaseURL().replace(/\/$/, '')}/events/stream`, {
+          headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+          signal,
+        });
+        if (res.ok && res.body) {
+          setConnected(true);
+          retryMs = 1000;
+          const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value.replace(/\r\n/g, '\n');
+            let idx;
+            while ((idx = buffer.indexOf('\n\n')) >= 0) {
+              dispatch(buffer.slice(0, idx));
+              buffer = buffer.slice(idx + 2);
+            }
+          }
+        }
+      } catch (_e) {
+        /* ligação caiu ou foi abortada */
+      }
+    }
+    setConnected(false);
+    if (signal.aborted) return;
+    await new Promise((resolve) => setTimeout(resolve, retryMs));
+    retryMs = Math.min(retryMs * 2, SSE_RECONNECT_MAX_MS);
+  }
+}
+
+function retain(fn: ServerEventHandler) {
+  listeners.add(fn);
+  if (!controller) {
+    controller = new AbortController();
+    run(controller.signal);
+  }
+}
+
+function release(fn: ServerEventHandler) {
+  listeners.delete(fn);
+  if (!listeners.size && controller) {
+    controller.abort();
+    controller = null;
+  }
+}
+
+/**
+ * Subscreve eventos do servidor. Devolve `true` enquanto a ligação está
+ * aberta — os componentes usam-no para abrandar o polling de recurso.
+ */
+export function useServerEvents(handler: ServerEventHandler, enabled = true): boolean {
+  const handlerRef = useRef(handler);
+  handlerRef.current = handler;
+  const [isConnected, setIsConnected] = useState(connected);
+
+  useEffect(() => {
+    if (!enabled) return;
+    const fn: ServerEventHandler = (event, data) => handlerRef.current(event, data);
+    statusListeners.add(setIsConnected);
+    setIsConnected(connected);
+    retain(fn);
+    return () => {
+      release(fn);
+      statusListeners.delete(setIsConnected);
+    };
+  }, [enabled]);
+
+  return enabled && isConnected;
+}
@@ -1,7 +1,7 @@
 import axios from 'axios';
 import { useAuthStore } from '../stores/authStore';
 
-const getBaseURL = () => {
+export const getBaseURL = () => {
   // In development prefer the relative `/api` so Vite's proxy handles host/port.
   // This avoids hardwired env values blocking requests when opening the app
   // by IP (e.g. http://192.168.x.x:5173).
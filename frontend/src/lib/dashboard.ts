@@ -0,0 +1,39 @@
+import api from './axios';
+
+/**
+ * Widgets de dashboard num só pedido (POST /api/dashboard/batch).
+ * O id é o caminho do endpoint sem /api (ex.: 'dw/training/by-month').
+ */
+export interface WidgetRequest {
+  id: string;
+  key?: string;
+  params?: Record<string, number | string | null>;
+}
+
+interface WidgetResult {
+  id: string;
+  key: string;
+  status: number;
+  data?: unknown;
+  error?: string;
+  ms: number;
+}
+
+/**
+ * Resultados na mesma ordem e forma que Promise.allSettled([api.get(...), ...]):
+ * fulfilled → { data } com o corpo que o endpoint devolveria.
+ */
+export async function fetchWidgets(
+  widgets: WidgetRequest[],
+): Promise<PromiseSettledResult<{ data: any }>[]> {
+  try {
+    const res = await api.post<{ widgets: WidgetResult[] }>('/dashboard/batch', { widgets });
+    return res.data.widgets.map((w): PromiseSettledResult<{ data: any }> =>
+      w.status === 200
+        ? { status: 'fulfilled', value: { data: w.data } }
+        : { status: 'rejected', reason: w },
+    );
+  } catch (error) {
+    return widgets.map(() => ({ status: 'rejected', reason: error }));
+  }
+}
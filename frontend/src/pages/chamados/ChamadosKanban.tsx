@@ -18,6 +18,16 @@ interface ChamadoComment {
   created_at: string;
 }
 
+interface ChamadoAttachment {
+  id: number;
+  filename: string;
+  content_type: string;
+  size_bytes: number;
+  has_thumbnail: boolean;
+  url: string;
+  thumbnail_url: string;
+}
+
 interface Chamado {
   id: number;
   title: string;
@@ -31,15 +41,44 @@ interface Chamado {
   assigned_to_id: number | null;
   assignee_name: string | null;
   admin_notes: string | null;
-  attachments?: string[];
+  attachments?: ChamadoAttachment[];
   completed_at: string | null;
   created_at: string;
   updated_at: string | null;
   comments: ChamadoComment[];
 }
 
+/** Cartão do Kanban (GET /chamados?view=summary) — só contagens, sem coleções */
+interface ChamadoSummary {
+  id: number;
+  title: string;
+  description: string;
+  type: string;
+  priority: string;
+  status: string;
+  portal: string;
+  created_by_id: number;
+  creator_name: string;
+  assigned_to_id: number | null;
+  assignee_name: string | null;
+  comments_count: number;
+  attachments_count: number;
+  completed_at: string | null;
+  created_at: string;
+  updated_at: string | null;
+}
+
+interface BoardColumn {
+  items: ChamadoSummary[];
+  total: number;
+  page: number;
+  page_size: number;
+  total_pages: number;
+}
+
 // ─── Constants ───────────────────────────────────────────────────────────────
 const KANBAN_COLUMNS = ['ABERTO', 'EM_ANDAMENTO', 'EM_REVISAO'] as const;
+const COLUMN_PAGE_SIZE = 20;
 
 const COLUMN_STYLES: Record<string, { bg: string; darkBg: string; border: string; darkBorder: string; dot: string; text: string; darkText: string }> = {
   ABERTO:       { bg: 'bg-blue-50',    darkBg: 'dark:bg-blue-900/10',    border: 'border-blue-200',    darkBorder: 'dark:border-blue-800',    dot: 'bg-blue-500',    text: 'text-blue-600',    darkText: 'dark:text-blue-400' },
@@ -90,6 +129,33 @@ async function compressImage(file: File, maxW = 1200, quality = 0.72): Promise<s
   });
 }
 
+// ─── Attachment image (authenticated fetch → object URL) ──────────────────────
+function AttachmentImage({ id, thumbnail = false, className, alt = '', onClick }: {
+  id: number; thumbnail?: boolean; className?: string; alt?: string;
+  onClick?: (e: React.MouseEvent) => void;
+}) {
+  const [src, setSrc] = useState<string | null>(null);
+
+  useEffect(() => {
+    let url: string | null = null;
+    let cancelled = false;
+    api.get(`/chamados/attachments/${id}${thumbnail ? '/thumbnail' : ''}`, { responseType: 'blob' })
+      .then(({ data }) => {
+        if (cancelled) return;
+        url = URL.createObjectURL(data);
+        setSrc(url);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+      if (url) URL.revokeObjectURL(url);
+    };
+  }, [id, thumbnail]);
+
+  if (!src) return <div className={`${className ?? ''} bg-gray-100 dark:bg-gray-800 animate-pulse`} />;
+  return <img src={src} alt={alt} className={className} onClick={onClick} />;
+}
+
 // ─── Create Wizard ───────────────────────────────────────────────────────────
 interface WizardProps { onClose: () => void; onCreated: () => void; }
 
@@ -401,7 +467,8 @@ export default function ChamadosKanban() {
   const { t } = useTranslation();
   const isAdmin = user?.role === 'ADMIN';
 
-  const [chamados, setChamados]         = useState<Chamado[]>([]);
+  const [columns, setColumns]           = useState<Record<string, BoardColumn>>({});
+  const [detail, setDetail]             = useState<Chamado | null>(null);
   const [loading, setLoading]           = useState(true);
   const [showCreate, setShowCreate]     = useState(false);
   const [selectedChamado, setSelectedChamado] = useState<number | null>(null);
@@ -412,20 +479,66 @@ export default function ChamadosKanban() {
   const [filterType, setFilterType]     = useState<string>('');
   const [draggedId, setDraggedId]       = useState<number | null>(null);
   const [users, setUsers]               = useState<{ id: number; full_name: string }[]>([]);
-  const [lightboxSrc, setLightboxSrc]   = useState<string | null>(null);
+  const [lightboxId, setLightboxId]     = useState<number | null>(null);
+
+  const boardParams = useCallback((extra: Record<string, unknown> = {}) => ({
+    view: 'summary',
+    page_size: COLUMN_PAGE_SIZE,
+    portal: filterPortal || undefined,
+    type: filterType || undefined,
+    ...extra,
+  }), [filterPortal, filterType]);
 
-  const fetchChamados = useCallback(async () => {
+  const fetchBoard = useCallback(async () => {
     try {
-      const { data } = await api.get('/chamados');
-      setChamados(Array.isArray(data) ? data : []);
+      const { data } = await api.get('/chamados', { params: boardParams() });
+      setColumns(data?.columns ?? {});
     } catch (err) {
       console.error('Error fetching chamados', err);
     } finally {
       setLoading(false);
     }
+  }, [boardParams]);
+
+  useEffect(() => { fetchBoard(); }, [fetchBoard]);
+
+  const loadMore = async (status: string) => {
+    const col = columns[status];
+    if (!col || col.page >= col.total_pages) return;
+    try {
+      const { data } = await api.get('/chamados', { params: boardParams({ status, page: col.page + 1 }) });
+      const next: BoardColumn | undefined = data?.columns?.[status];
+      if (!next) return;
+      setColumns(prev => ({
+        ...prev,
+        [status]: { ...next, items: [...(prev[status]?.items ?? []), ...next.items] },
+      }));
+    } catch (err) { console.error('Error loading more chamados', err); }
+  };
+
+  // Detalhe completo (comentários, anexos, notas) só para o chamado aberto
+  const fetchDetail = useCallback(async (chamadoId: number) => {
+    try {
+      const { data } = await api.get(`/chamados/${chamadoId}`);
+      setDetail(data);
+      return data as Chamado;
+    } catch (err) {
+      console.error('Error fetching chamado', err);
+      return null;
+    }
   }, []);
 
-  useEffect(() => { fetchChamados(); }, [fetchChamados]);
+  useEffect(() => {
+    if (selectedChamado === null) { setDetail(null); return; }
+    fetchDetail(selectedChamado).then(data => {
+      if (data) setAdminNotes(prev => ({ ...prev, [data.id]: data.admin_notes || '' }));
+    });
+  }, [selectedChamado, fetchDetail]);
+
+  const fetchChamados = () => {
+    fetchBoard();
+    if (selectedChamado !== null) fetchDetail(selectedChamado);
+  };
 
   useEffect(() => {
     if (!isAdmin) return;
@@ -480,7 +593,7 @@ export default function ChamadosKanban() {
     try {
       await api.delete(`/chamados/${chamadoId}`);
       setSelectedChamado(null);
-      fetchChamados();
+      fetchBoard();
     } catch (err) { console.error('Error deleting', err); }
   };
 
@@ -504,13 +617,9 @@ export default function ChamadosKanban() {
     setDraggedId(null);
   };
 
-  const filtered = chamados.filter(c => {
-    if (filterPortal && c.portal !== filterPortal) return false;
-    if (filterType && c.type !== filterType) return false;
-    return true;
-  });
-
-  const getColumnChamados = (status: string) => filtered.filter(c => c.status === status);
+  const getColumnChamados = (status: string) => columns[status]?.items ?? [];
+  const getColumnTotal = (status: string) => columns[status]?.total ?? 0;
+  const hasMore = (status: string) => (columns[status]?.items.length ?? 0) < getColumnTotal(status);
 
   if (loading) {
     return (
@@ -572,14 +681,14 @@ export default function ChamadosKanban() {
               <div className="flex items-center gap-2 mb-4">
                 <div className={`w-2.5 h-2.5 rounded-full ${colStyle.dot}`} />
                 <h3 className={`text-sm font-bold uppercase tracking-wider ${colStyle.text} ${colStyle.darkText}`}>{t(`chamados.status_${status}`)}</h3>
-                <span className={`ml-auto text-xs font-bold px-2 py-0.5 rounded-full bg-white/60 dark:bg-gray-900/40 ${colStyle.text} ${colStyle.darkText}`}>{items.length}</span>
+                <span className={`ml-auto text-xs font-bold px-2 py-0.5 rounded-full bg-white/60 dark:bg-gray-900/40 ${colStyle.text} ${colStyle.darkText}`}>{getColumnTotal(status)}</span>
               </div>
 
               <div className="space-y-3">
                 {items.map(chamado => {
                   const PriorityIcon = PRIORITY_CONFIG[chamado.priority]?.icon || Minus;
                   const priorityColor = PRIORITY_CONFIG[chamado.priority]?.color || 'text-gray-400';
-                  const hasAttachments = (chamado.attachments?.length ?? 0) > 0;
+                  const hasAttachments = chamado.attachments_count > 0;
 
                   return (
                     <div key={chamado.id}
@@ -613,24 +722,21 @@ export default function ChamadosKanban() {
                         <span className="text-[10px] text-gray-400">
                           <User className="w-3 h-3 inline mr-0.5" />{chamado.creator_name}
                         </span>
-                        {chamado.comments.length > 0 && (
+                        {chamado.comments_count > 0 && (
                           <span className="text-[10px] text-gray-400">
-                            <MessageSquare className="w-3 h-3 inline mr-0.5" />{chamado.comments.length}
+                            <MessageSquare className="w-3 h-3 inline mr-0.5" />{chamado.comments_count}
                           </span>
                         )}
                         {hasAttachments && (
                           <span className="text-[10px] text-gray-400">
-                            <ImagePlus className="w-3 h-3 inline mr-0.5" />{chamado.attachments!.length}
+                            <ImagePlus className="w-3 h-3 inline mr-0.5" />{chamado.attachments_count}
                           </span>
                         )}
                       </div>
 
                       {/* View details */}
                       <button
-                        onClick={() => {
-                          setSelectedChamado(chamado.id);
-                          setAdminNotes(prev => ({ ...prev, [chamado.id]: chamado.admin_notes || '' }));
-                        }}
+                        onClick={() => setSelectedChamado(chamado.id)}
                         className="w-full mt-3 flex items-center justify-center gap-1.5 text-xs font-medium py-1.5 rounded-lg transition-colors text-gray-400 hover:text-gray-600 dark:hover:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-800"
                       >
                         <Eye className="w-3.5 h-3.5" />
@@ -645,6 +751,14 @@ export default function ChamadosKanban() {
                     {t('chamados.emptyColumn')}
                   </div>
                 )}
+
+                {hasMore(status) && (
+                  <button onClick={() => loadMore(status)}
+                    className="w-full text-xs font-medium py-2 rounded-lg transition-colors text-gray-500 hover:text-gray-700 dark:hover:text-gray-300 hover:bg-white/60 dark:hover:bg-gray-900/40"
+                  >
+                    {t('chamados.loadMore')}
+                  </button>
+                )}
               </div>
             </div>
           );
@@ -653,7 +767,7 @@ export default function ChamadosKanban() {
 
       {/* ── Archive: Completed ────────────────────────────── */}
       {(() => {
-        const archiveItems = filtered.filter(c => c.status === 'CONCLUIDO');
+        const archiveItems = getColumnChamados('CONCLUIDO');
         return (
           <div
             onDragOver={handleDragOver}
@@ -676,7 +790,7 @@ export default function ChamadosKanban() {
                 </p>
               </div>
               <span className="text-xs font-bold px-2.5 py-1 rounded-full bg-emerald-50 dark:bg-emerald-900/20 text-emerald-600 dark:text-emerald-400">
-                {archiveItems.length}
+                {getColumnTotal('CONCLUIDO')}
               </span>
               <ChevronDown className={`w-4 h-4 transition-transform text-gray-400 ${showArchive ? 'rotate-180' : ''}`} />
             </button>
@@ -692,10 +806,7 @@ export default function ChamadosKanban() {
                         key={chamado.id}
                         draggable={isAdmin}
                         onDragStart={e => handleDragStart(e, chamado.id)}
-                        onClick={() => {
-                          setSelectedChamado(chamado.id);
-                          setAdminNotes(prev => ({ ...prev, [chamado.id]: chamado.admin_notes || '' }));
-                        }}
+                        onClick={() => setSelectedChamado(chamado.id)}
                         className={`cursor-pointer text-left rounded-xl border p-3.5 transition-all ${isAdmin ? 'active:cursor-grabbing' : ''} bg-white dark:bg-gray-900 border-gray-200 dark:border-gray-800 hover:shadow-md ${draggedId === chamado.id ? 'opacity-50' : ''}`}
                       >
                         <div className="flex items-center gap-2 mb-1.5">
@@ -720,6 +831,15 @@ export default function ChamadosKanban() {
                     );
                   })}
                 </div>
+                {hasMore('CONCLUIDO') && (
+                  <div className="px-5 pb-4">
+                    <button onClick={() => loadMore('CONCLUIDO')}
+                      className="w-full text-xs font-medium py-2 rounded-lg transition-colors text-gray-500 hover:text-gray-700 dark:hover:text-gray-300 hover:bg-gray-100 dark:hover:bg-gray-800"
+                    >
+                      {t('chamados.loadMore')}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
@@ -733,7 +853,7 @@ export default function ChamadosKanban() {
 
       {/* ── Detail Modal ─────────────────────────────────── */}
       {selectedChamado && (() => {
-        const chamado = chamados.find(c => c.id === selectedChamado);
+        const chamado = detail && detail.id === selectedChamado ? detail : null;
         if (!chamado) return null;
         const PIcon = PRIORITY_CONFIG[chamado.priority]?.icon || Minus;
         const pColor = PRIORITY_CONFIG[chamado.priority]?.color || 'text-gray-400';
@@ -800,11 +920,11 @@ export default function ChamadosKanban() {
                           {t('chamados.attachments')} ({chamado.attachments!.length})
                         </span>
                         <div className="grid grid-cols-3 gap-2 mt-2">
-                          {chamado.attachments!.map((src, i) => (
-                            <button key={i} onClick={() => setLightboxSrc(src)}
+                          {chamado.attachments!.map(att => (
+                            <button key={att.id} onClick={() => setLightboxId(att.id)}
                               className="relative group aspect-video rounded-xl overflow-hidden border border-gray-200 dark:border-gray-700 hover:ring-2 hover:ring-[#EC0000] transition-all"
                             >
-                              <img src={src} alt="" className="w-full h-full object-cover" />
+                              <AttachmentImage id={att.id} thumbnail className="w-full h-full object-cover" />
                               <div className="absolute inset-0 bg-black/40 opacity-0 group-hover:opacity-100 transition-opacity flex items-center justify-center">
                                 <ZoomIn className="w-5 h-5 text-white" />
                               </div>
@@ -957,17 +1077,17 @@ export default function ChamadosKanban() {
       })()}
 
       {/* ── Lightbox ────────────────────────────────────────── */}
-      {lightboxSrc && (
+      {lightboxId !== null && (
         <div
           className="fixed inset-0 z-[60] flex items-center justify-center p-6 bg-black/90 backdrop-blur-sm cursor-pointer animate-in fade-in duration-200"
-          onClick={() => setLightboxSrc(null)}
+          onClick={() => setLightboxId(null)}
         >
-          <img
-            src={lightboxSrc} alt={t('chamados.attachmentAlt', { num: '' })}
+          <AttachmentImage
+            id={lightboxId} alt={t('chamados.attachmentAlt', { num: '' })}
             className="max-w-full max-h-full rounded-xl shadow-2xl object-contain"
             onClick={e => e.stopPropagation()}
           />
-          <button onClick={() => setLightboxSrc(null)}
+          <button onClick={() => setLightboxId(null)}
             className="absolute top-4 right-4 p-2 rounded-full bg-white/10 hover:bg-white/20 text-white transition-colors"
           >
             <X className="w-5 h-5" />
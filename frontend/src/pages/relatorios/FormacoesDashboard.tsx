@@ -5,7 +5,7 @@ import {
 } from 'lucide-react';
 import { AreaChart, BarChart, DonutChart, BarList, Legend } from '@tremor/react';
 import { useTranslation } from 'react-i18next';
-import api from '../../lib/axios';
+import { fetchWidgets } from '../../lib/dashboard';
 import { KpiCard, ChartCard } from '../../components/reports';
 
 /* ─── Types ──────────────────────────────────────────────────────────────── */
@@ -49,10 +49,10 @@ export default function FormacoesDashboard() {
   const currentYear = new Date().getFullYear();
 
   useEffect(() => {
-    Promise.allSettled([
-      api.get('/relatorios/formacoes'),
-      api.get(`/dw/training/by-month?year=${currentYear}`),
-      api.get('/dw/training/by-course?limit=8'),
+    fetchWidgets([
+      { id: 'relatorios/formacoes' },
+      { id: 'dw/training/by-month', params: { year: currentYear } },
+      { id: 'dw/training/by-course', params: { limit: 8 } },
     ]).then(([formRes, monthRes, courseRes]) => {
       if (formRes.status === 'fulfilled') setData(formRes.value.data);
       if (monthRes.status === 'fulfilled') {
@@ -1,13 +1,13 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect } from 'react';
 import {
   Filter, Loader2, AlertTriangle, ChevronDown,
-  Calendar, X, FileSpreadsheet, Search, RefreshCw,
+  Calendar, X, FileSpreadsheet, FileText, Search, RefreshCw,
+  ChevronLeft, ChevronRight,
 } from 'lucide-react';
 import { KpiCard } from '../../components/reports';
 import { useTranslation } from 'react-i18next';
 import { useAuthStore } from '../../stores/authStore';
 import api from '../../lib/axios';
-import * as XLSX from 'xlsx';
 
 // ─── Types ────────────────────────────────────────────────────────────────────
 
@@ -44,6 +44,21 @@ interface Incident {
   status: string | null;
 }
 
+interface IncidentSummary {
+  high_impact: number;
+  low_impact: number;
+  recurrent: number;
+}
+
+interface IncidentPage {
+  items: Incident[];
+  total: number;
+  page: number;
+  page_size: number;
+  total_pages: number;
+  summary: IncidentSummary;
+}
+
 interface FilterOption { id: number; name: string }
 
 interface Filters {
@@ -56,6 +71,9 @@ interface Filters {
   products: FilterOption[];
 }
 
+const INCIDENTS_PAGE_SIZE = 50;
+const EMPTY_SUMMARY: IncidentSummary = { high_impact: 0, low_impact: 0, recurrent: 0 };
+
 // ─── Helpers ──────────────────────────────────────────────────────────────────
 
 function fmtDate(d: string | null) {
@@ -108,8 +126,13 @@ export default function IncidentsReport() {
   const canView = userRole === 'ADMIN' || userRole === 'MANAGER';
 
   const [data, setData] = useState<Incident[]>([]);
+  const [total, setTotal] = useState(0);
+  const [totalPages, setTotalPages] = useState(0);
+  const [summary, setSummary] = useState<IncidentSummary>(EMPTY_SUMMARY);
+  const [page, setPage] = useState(1);
   const [filters, setFilters] = useState<Filters | null>(null);
   const [loading, setLoading] = useState(true);
+  const [exporting, setExporting] = useState<'' | 'xlsx' | 'csv'>('');
   const [showFilters, setShowFilters] = useState(true);
 
   // Filter state
@@ -132,9 +155,8 @@ export default function IncidentsReport() {
       .catch(() => {});
   }, []);
 
-  // Load data
-  const fetchData = () => {
-    setLoading(true);
+  // Filtros aplicados (listagem e exportação usam os mesmos)
+  const buildParams = () => {
     const params = new URLSearchParams();
     if (dateFrom) params.set('date_from', dateFrom);
     if (dateTo) params.set('date_to', dateTo);
@@ -146,10 +168,31 @@ export default function IncidentsReport() {
     if (categoryId) params.set('category_id', categoryId);
     if (productId) params.set('product_id', productId);
     if (recurrence) params.set('recurrence_type', recurrence);
+    if (searchText.trim()) params.set('q', searchText.trim());
+    return params;
+  };
 
-    api.get(`/relatorios/incidents?${params.toString()}`)
-      .then(r => setData(Array.isArray(r.data) ? r.data : []))
-      .catch(() => setData([]))
+  // Load data (uma página; os KPIs vêm no summary, calculados sobre todas as linhas)
+  const fetchData = (targetPage = 1) => {
+    setLoading(true);
+    setPage(targetPage);
+    const params = buildParams();
+    params.set('page', String(targetPage));
+    params.set('page_size', String(INCIDENTS_PAGE_SIZE));
+
+    api.get<IncidentPage>(`/relatorios/incidents?${params.toString()}`)
+      .then(r => {
+        setData(r.data.items);
+        setTotal(r.data.total);
+        setTotalPages(r.data.total_pages);
+        setSummary(r.data.summary);
+      })
+      .catch(() => {
+        setData([]);
+        setTotal(0);
+        setTotalPages(0);
+        setSummary(EMPTY_SUMMARY);
+      })
       .finally(() => setLoading(false));
   };
 
@@ -157,21 +200,6 @@ export default function IncidentsReport() {
     if (filters) fetchData();
   }, [filters]);
 
-  // Local text search
-  const filtered = useMemo(() => {
-    if (!searchText.trim()) return data;
-    const s = searchText.toLowerCase();
-    return data.filter(i =>
-      (i.description || '').toLowerCase().includes(s) ||
-      (i.final_client || '').toLowerCase().includes(s) ||
-      (i.bank_name || '').toLowerCase().includes(s) ||
-      (i.reference_code || '').toLowerCase().includes(s) ||
-      (i.tutorado_name || '').toLowerCase().includes(s) ||
-      (i.solution || '').toLowerCase().includes(s) ||
-      (i.action_plan_text || '').toLowerCase().includes(s)
-    );
-  }, [data, searchText]);
-
   // Clear filters
   const clearFilters = () => {
     setDateFrom(''); setDateTo('');
@@ -185,71 +213,26 @@ export default function IncidentsReport() {
 
   const hasActiveFilters = dateFrom || dateTo || impactLevel || originId || bankId || departmentId || detectedById || categoryId || productId || recurrence;
 
-  // Excel Export — headers always in Spanish (regulatory requirement)
-  const ES_EXCEL_HEADERS = {
-    dateError: 'Fecha error',
-    dateDetection: 'Fecha Detección',
-    office: 'Oficina',
-    client: 'Cliente',
-    product: 'Producto',
-    event: 'EVENTO',
-    reference: 'Referencia',
-    finalClient: 'Cliente (final)',
-    amount: 'Importe del evento',
-    currency: 'Divisa',
-    classification: 'Clasificación',
-    origin: 'Origen',
-    errorTypology: 'Tipología del error',
-    impact: 'Impacto',
-    recurrence: 'Recurrencia',
-    detectedBy: 'Detectado por',
-    description: 'Descripción incidencia',
-    actionPlan: 'Análisis y Plan de Acción',
-    escalated: 'Escalado',
-    meetingComments: 'Comentarios vistos en la reunión',
-  } as const;
-
-  const exportToExcel = () => {
-    const rows = filtered.map(i => ({
-      [ES_EXCEL_HEADERS.dateError]: fmtDate(i.date_occurrence),
-      [ES_EXCEL_HEADERS.dateDetection]: fmtDate(i.date_detection),
-      [ES_EXCEL_HEADERS.office]: i.office || '',
-      [ES_EXCEL_HEADERS.client]: i.bank_name || '',
-      [ES_EXCEL_HEADERS.product]: i.product_name || '',
-      [ES_EXCEL_HEADERS.event]: i.activity_name || '',
-      [ES_EXCEL_HEADERS.reference]: i.reference_code || '',
-      [ES_EXCEL_HEADERS.finalClient]: i.final_client || '',
-      [ES_EXCEL_HEADERS.amount]: i.amount ?? '',
-      [ES_EXCEL_HEADERS.currency]: i.currency || '',
-      [ES_EXCEL_HEADERS.classification]: i.clasificacion || '',
-      [ES_EXCEL_HEADERS.origin]: i.origin_name || '',
-      [ES_EXCEL_HEADERS.errorTypology]: i.category_name || '',
-      [ES_EXCEL_HEADERS.impact]: i.impact_level === 'ALTA' ? 'Alto' : i.impact_level === 'BAIXA' ? 'Baixo' : i.impact_name || '',
-      [ES_EXCEL_HEADERS.recurrence]: ({ SI: 'Sí', NO: 'No', PERIODICA: 'Periódica', FIRST: 'Primera Vez', RECURRENT: 'Recurrente', SYSTEMIC: 'Sistémico' } as Record<string, string>)[i.recurrence_type ?? ''] ?? i.recurrence_type ?? '',
-      [ES_EXCEL_HEADERS.detectedBy]: i.detected_by_name || '',
-      [ES_EXCEL_HEADERS.description]: i.description || '',
-      [ES_EXCEL_HEADERS.actionPlan]: i.action_plan_text || '',
-      [ES_EXCEL_HEADERS.escalated]: i.escalado || '',
-      [ES_EXCEL_HEADERS.meetingComments]: i.comentarios_reunion || '',
-    }));
-
-    const ws = XLSX.utils.json_to_sheet(rows);
-    ws['!cols'] = [
-      { wch: 12 }, { wch: 14 }, { wch: 8 }, { wch: 12 }, { wch: 16 },
-      { wch: 18 }, { wch: 22 }, { wch: 40 }, { wch: 16 }, { wch: 6 },
-      { wch: 14 }, { wch: 16 }, { wch: 22 }, { wch: 36 }, { wch: 14 },
-      { wch: 24 }, { wch: 60 }, { wch: 60 }, { wch: 14 }, { wch: 60 },
-    ];
-
-    const wb = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(wb, ws, 'DETALLE');
-
-    const today = new Date().toISOString().split('T')[0];
-    XLSX.writeFile(wb, `Formulario_unico_Trade_Incidencias_${today}.xlsx`);
+  // Exportação gerada no servidor (todas as linhas filtradas, em streaming)
+  const exportFile = (format: 'xlsx' | 'csv') => {
+    setExporting(format);
+    const params = buildParams();
+    params.set('format', format);
+    api.get(`/relatorios/incidents/export?${params.toString()}`, { responseType: 'blob' })
+      .then(r => {
+        const today = new Date().toISOString().split('T')[0];
+        const url = URL.createObjectURL(r.data);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `Formulario_unico_Trade_Incidencias_${today}.${format}`;
+        a.click();
+        URL.revokeObjectURL(url);
+      })
+      .catch(() => {})
+      .finally(() => setExporting(''));
   };
 
-  // Count high impact — use impact_level field (always populated)
-  const highImpactCount = filtered.filter(i => i.impact_level === 'ALTA').length;
+  const highImpactCount = summary.high_impact;
 
   // Access denied
   if (!canView) {
@@ -280,7 +263,7 @@ export default function IncidentsReport() {
               </p>
               <h1 className="text-3xl font-headline font-bold text-gray-900 dark:text-white">{t('relIncidents.title')}</h1>
               <p className="text-sm mt-0.5 text-gray-500 dark:text-gray-400">
-                {t('relIncidents.incidentsCount', { count: filtered.length })}
+                {t('relIncidents.incidentsCount', { count: total })}
                 {highImpactCount > 0 && (
                   <> · <span className="text-[#EC0000] font-semibold">{t('relIncidents.highImpactCount', { count: highImpactCount })}</span></>
                 )}
@@ -302,11 +285,19 @@ export default function IncidentsReport() {
               )}
             </button>
             <button
-              onClick={exportToExcel}
-              disabled={filtered.length === 0}
+              onClick={() => exportFile('csv')}
+              disabled={total === 0 || !!exporting}
+              className="flex items-center gap-2 px-4 py-2.5 rounded-xl text-sm font-semibold border transition-all bg-white dark:bg-gray-900 border-gray-200 dark:border-gray-800 text-gray-600 dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-800 disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              {exporting === 'csv' ? <Loader2 className="w-4 h-4 animate-spin" /> : <FileText className="w-4 h-4" />}
+              {t('relIncidents.exportCsv')}
+            </button>
+            <button
+              onClick={() => exportFile('xlsx')}
+              disabled={total === 0 || !!exporting}
               className="flex items-center gap-2 px-5 py-2.5 rounded-xl bg-[#10B981] hover:bg-[#059669] text-white text-sm font-bold transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
             >
-              <FileSpreadsheet className="w-4 h-4" />
+              {exporting === 'xlsx' ? <Loader2 className="w-4 h-4 animate-spin" /> : <FileSpreadsheet className="w-4 h-4" />}
               {t('relIncidents.exportExcel')}
             </button>
           </div>
@@ -323,12 +314,12 @@ export default function IncidentsReport() {
             </div>
             <div className="flex items-center gap-2">
               {hasActiveFilters && (
-                <button onClick={() => { clearFilters(); setTimeout(fetchData, 50); }}
+                <button onClick={() => { clearFilters(); setTimeout(() => fetchData(), 50); }}
                   className="text-xs font-medium px-2.5 py-1 rounded-lg transition-all text-gray-500 dark:text-gray-400 hover:bg-gray-100 dark:hover:bg-gray-800 hover:text-gray-700 dark:hover:text-white">
                   <X className="w-3 h-3 inline mr-1" />{t('relIncidents.clear')}
                 </button>
               )}
-              <button onClick={fetchData}
+              <button onClick={() => fetchData()}
                 className="flex items-center gap-1.5 px-3 py-1.5 rounded-lg text-xs font-bold bg-[#EC0000] hover:bg-[#CC0000] text-white transition-colors">
                 <Search className="w-3 h-3" />{t('relIncidents.apply')}
               </button>
@@ -353,7 +344,7 @@ export default function IncidentsReport() {
                 <label className="text-xs font-semibold uppercase tracking-wider mb-1.5 block text-gray-500 dark:text-gray-400">
                   <Search className="w-3 h-3 inline mr-1" />{t('relIncidents.freeSearch')}
                 </label>
-                <input type="text" value={searchText} onChange={e => setSearchText(e.target.value)} placeholder={t('relIncidents.searchPlaceholder')} className={inputCls} />
+                <input type="text" value={searchText} onChange={e => setSearchText(e.target.value)} onKeyDown={e => { if (e.key === 'Enter') fetchData(); }} placeholder={t('relIncidents.searchPlaceholder')} className={inputCls} />
               </div>
             </div>
             {/* Row 2: Dropdowns */}
@@ -419,7 +410,7 @@ export default function IncidentsReport() {
       {!loading && (
         <div className="grid grid-cols-2 sm:grid-cols-4 gap-4">
           <KpiCard index={0} icon={AlertTriangle}
-            label={t('relIncidents.totalIncidents')} value={filtered.length}
+            label={t('relIncidents.totalIncidents')} value={total}
             boxClass="bg-blue-50 dark:bg-blue-900/20" iconClass="text-blue-600 dark:text-blue-400"
           />
           <KpiCard index={1} icon={AlertTriangle}
@@ -428,12 +419,12 @@ export default function IncidentsReport() {
           />
           <KpiCard index={2} icon={AlertTriangle}
             label={t('relIncidents.lowImpact')}
-            value={filtered.filter(i => i.impact_level === 'BAIXA').length}
+            value={summary.low_impact}
             boxClass="bg-emerald-50 dark:bg-emerald-900/20" iconClass="text-emerald-600 dark:text-emerald-400"
           />
           <KpiCard index={3} icon={RefreshCw}
             label={t('relIncidents.recurrentLabel')}
-            value={filtered.filter(i => i.recurrence_type === 'RECURRENT' || i.recurrence_type === 'SYSTEMIC').length}
+            value={summary.recurrent}
             boxClass="bg-amber-50 dark:bg-amber-900/20" iconClass="text-amber-600 dark:text-amber-400"
           />
         </div>
@@ -444,7 +435,7 @@ export default function IncidentsReport() {
         <div className="flex justify-center py-24">
           <Loader2 className="w-8 h-8 animate-spin text-[#EC0000]" />
         </div>
-      ) : filtered.length === 0 ? (
+      ) : data.length === 0 ? (
         <div className="text-center py-24 text-gray-400 dark:text-gray-600">
           <AlertTriangle className="w-12 h-12 mx-auto mb-4 opacity-30" />
           <p className="text-lg font-bold">{t('relIncidents.noIncidentsFound')}</p>
@@ -471,7 +462,7 @@ export default function IncidentsReport() {
                 </tr>
               </thead>
               <tbody>
-                {filtered.map((row, idx) => {
+                {data.map((row, idx) => {
                   const isHigh = (row.impact_name || '').toLowerCase() === 'alto';
                   return (
                     <tr
@@ -524,10 +515,29 @@ export default function IncidentsReport() {
           {/* Footer */}
           <div className="px-6 py-3 border-t border-gray-200 dark:border-gray-800 bg-gray-50 dark:bg-gray-800/50 flex items-center justify-between">
             <span className="text-xs text-gray-400 dark:text-gray-500">
-              {t('relIncidents.recordsFound', { count: filtered.length })}
+              {(page - 1) * INCIDENTS_PAGE_SIZE + 1}–{Math.min(page * INCIDENTS_PAGE_SIZE, total)} / {t('relIncidents.recordsFound', { count: total })}
             </span>
+            {totalPages > 1 && (
+              <div className="flex items-center gap-1">
+                <button
+                  onClick={() => fetchData(page - 1)}
+                  disabled={page <= 1}
+                  className="w-7 h-7 rounded-lg flex items-center justify-center hover:bg-gray-200 dark:hover:bg-gray-700 disabled:opacity-30 disabled:cursor-not-allowed transition-colors"
+                >
+                  <ChevronLeft className="w-4 h-4 text-gray-600 dark:text-gray-400" />
+                </button>
+                <span className="px-2 text-xs font-medium text-gray-600 dark:text-gray-400">{page} / {totalPages}</span>
+                <button
+                  onClick={() => fetchData(page + 1)}
+                  disabled={page >= totalPages}
+                  className="w-7 h-7 rounded-lg flex items-center justify-center hover:bg-gray-200 dark:hover:bg-gray-700 disabled:opacity-30 disabled:cursor-not-allowed transition-colors"
+                >
+                  <ChevronRight className="w-4 h-4 text-gray-600 dark:text-gray-400" />
+                </button>
+              </div>
+            )}
             <button
-              onClick={fetchData}
+              onClick={() => fetchData(page)}
               className="flex items-center gap-1.5 text-xs font-medium px-3 py-1.5 rounded-lg transition-colors text-gray-500 dark:text-gray-400 hover:bg-gray-100 dark:hover:bg-gray-800 hover:text-gray-700 dark:hover:text-white"
             >
               <RefreshCw className="w-3 h-3" /> {t('relIncidents.refresh')}
@@ -4,7 +4,7 @@ import {
   Loader2, GraduationCap, BarChart3, Shield, Ticket, Building2, BookOpen,
 } from 'lucide-react';
 import { useAuthStore } from '../../stores/authStore';
-import api from '../../lib/axios';
+import { fetchWidgets } from '../../lib/dashboard';
 import { useTranslation } from 'react-i18next';
 import { Link } from 'react-router-dom';
 import { KpiCard } from '../../components/reports';
@@ -60,9 +60,9 @@ export default function RelatoriosOverview() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    Promise.allSettled([
-      api.get('/relatorios/overview'),
-      api.get('/dw/chamados/by-status'),
+    fetchWidgets([
+      { id: 'relatorios/overview' },
+      { id: 'dw/chamados/by-status' },
     ]).then(([ovRes, chamRes]) => {
       if (ovRes.status === 'fulfilled') setData(ovRes.value.data);
       if (chamRes.status === 'fulfilled') {
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { Loader2, Users, AlertTriangle, CheckCircle2, TrendingUp, Search, Building2 } from 'lucide-react';
 import { BarList } from '@tremor/react';
 import { useTranslation } from 'react-i18next';
-import api from '../../lib/axios';
+import { fetchWidgets } from '../../lib/dashboard';
 import { KpiCard, RateBar } from '../../components/reports';
 
 /* ─── Types ──────────────────────────────────────────────────────────────── */
@@ -33,9 +33,9 @@ export default function TeamsDashboard() {
   const [hideEmpty, setHideEmpty] = useState(true);
 
   useEffect(() => {
-    Promise.allSettled([
-      api.get('/relatorios/teams'),
-      api.get('/dw/internal-errors/by-team'),
+    fetchWidgets([
+      { id: 'relatorios/teams' },
+      { id: 'dw/internal-errors/by-team' },
     ]).then(([teamsRes, errRes]) => {
       if (teamsRes.status === 'fulfilled') {
         const d = teamsRes.value.data;
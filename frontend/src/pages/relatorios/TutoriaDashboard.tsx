@@ -4,7 +4,7 @@ import {
 } from 'lucide-react';
 import { AreaChart, BarChart, DonutChart, BarList, Legend } from '@tremor/react';
 import { useTranslation } from 'react-i18next';
-import api from '../../lib/axios';
+import { fetchWidgets } from '../../lib/dashboard';
 import { KpiCard, ChartCard, RateBar } from '../../components/reports';
 
 /* ─── Types ──────────────────────────────────────────────────────────────── */
@@ -39,11 +39,11 @@ export default function TutoriaDashboard() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    Promise.allSettled([
-      api.get('/relatorios/tutoria'),
-      api.get('/dw/tutoria/by-month'),
-      api.get('/dw/tutoria/by-category'),
-      api.get('/dw/tutoria/by-trainer'),
+    fetchWidgets([
+      { id: 'relatorios/tutoria' },
+      { id: 'dw/tutoria/by-month' },
+      { id: 'dw/tutoria/by-category' },
+      { id: 'dw/tutoria/by-trainer' },
     ]).then(([tutRes, monthRes, catRes, trainerRes]) => {
       if (tutRes.status === 'fulfilled') setData(tutRes.value.data);
       if (monthRes.status === 'fulfilled') { const d = monthRes.value.data; setMonthly(Array.isArray(d) ? d : []); }
@@ -28,6 +28,8 @@ import DOMPurify from 'dompurify';
 import { RatingModal } from '../../components';
 import { STORAGE_KEYS } from '../../constants/storageKeys';
 import { CHARS_PER_PAGE } from '../../constants/pagination';
+import { SSE_FALLBACK_POLL_MS } from '../../constants/timings';
+import { useServerEvents } from '../../hooks/useServerEvents';
 
 interface Lesson {
   id: number;
@@ -428,16 +430,24 @@ export default function LessonView() {
     }
   }, [lessonId]);
 
+  // Push: o servidor avisa quando o formador muda o estado desta aula
+  const live = useServerEvents((event, data) => {
+    if (event === 'lesson' && String(data?.lesson_id) === String(lessonId)) {
+      fetchProgress();
+    }
+  }, !!lessonId);
+
   // Polling para atualizar progresso automaticamente (para formando ver alterações do formador)
+  // Com o canal SSE ligado fica só como recurso, num intervalo longo.
   useEffect(() => {
     if (!lessonId) return;
     
     const pollInterval = setInterval(() => {
       fetchProgress();
-    }, 3000); // Atualiza a cada 3 segundos
+    }, live ? SSE_FALLBACK_POLL_MS : 3000); // Sem SSE: a cada 3 segundos
     
     return () => clearInterval(pollInterval);
-  }, [planId, lessonId]);
+  }, [planId, lessonId, live]);
 
   const handleGoBack = () => {
     if (planId) {
@@ -12,6 +12,7 @@ import {
   Hash
 } from 'lucide-react';
 import api from '../../lib/axios';
+import { useServerEvents } from '../../hooks/useServerEvents';
 
 interface Submission {
   id: number;
@@ -47,9 +48,14 @@ export default function PendingReviews() {
     loadSubmissions();
   }, []);
 
-  const loadSubmissions = async () => {
+  // Push: a fila mudou (nova submissão ou correcção feita) — recarrega sem spinner
+  useServerEvents((event) => {
+    if (event === 'review-queue') loadSubmissions(true);
+  });
+
+  const loadSubmissions = async (silent = false) => {
     try {
-      setLoading(true);
+      if (!silent) setLoading(true);
       const response = await api.get('/api/challenges/pending-review/list');
       setSubmissions(response.data);
     } catch (error) {
@@ -115,7 +121,7 @@ export default function PendingReviews() {
             </div>
           </div>
           <button
-            onClick={loadSubmissions}
+            onClick={() => loadSubmissions()}
             className="flex items-center gap-2 px-4 py-2.5 bg-gray-100 dark:bg-gray-800 hover:bg-gray-200 dark:hover:bg-gray-700 text-gray-600 dark:text-gray-400 rounded-xl font-body font-bold text-sm transition-colors shrink-0"
           >
             <RefreshCw className="w-4 h-4" />
@@ -10,6 +10,8 @@ import api from '../../lib/axios';
 import { useAuthStore } from '../../stores/authStore';
 import { useTheme } from '../../contexts/ThemeContext';
 import RatingModal from '../../components/RatingModal';
+import { SSE_FALLBACK_POLL_MS } from '../../constants/timings';
+import { useServerEvents } from '../../hooks/useServerEvents';
 
 interface LessonItem {
   id: number;
@@ -214,7 +216,15 @@ export default function TrainingPlanDetail() {
     return () => clearInterval(interval);
   }, []);
 
+  // Push: mudanças de estado das aulas deste plano (formando ou formador)
+  const live = useServerEvents((event, data) => {
+    if (event === 'lesson' && plan && data?.training_plan_id === plan.id) {
+      fetchProgressData(plan).catch((err) => console.log('Refresh error:', err));
+    }
+  }, !!plan);
+
   // Polling para atualizar progresso automaticamente (para formando ver alterações do formador)
+  // Com o canal SSE ligado fica só como recurso, num intervalo longo.
   useEffect(() => {
     if (!plan || !isStudent) return;
     
@@ -224,10 +234,10 @@ export default function TrainingPlanDetail() {
       } catch (err) {
         console.log('Polling error:', err);
       }
-    }, 5000); // Atualiza a cada 5 segundos
+    }, live ? SSE_FALLBACK_POLL_MS : 5000); // Sem SSE: a cada 5 segundos
     
     return () => clearInterval(pollInterval);
-  }, [plan, isStudent]);
+  }, [plan, isStudent, live]);
 
   // Polling para formador ver alterações do formando (ex: quando formando finaliza)
   useEffect(() => {
@@ -239,10 +249,10 @@ export default function TrainingPlanDetail() {
       } catch (err) {
         console.log('Polling error:', err);
       }
-    }, 5000); // Atualiza a cada 5 segundos
+    }, live ? SSE_FALLBACK_POLL_MS : 5000); // Sem SSE: a cada 5 segundos
     
     return () => clearInterval(pollInterval);
-  }, [plan, isTrainer, selectedStudentId]);
+  }, [plan, isTrainer, selectedStudentId, live]);
 
   // Refetch progress when selected student changes
   useEffect(() => {